@@ -0,0 +1,105 @@
+"""
+Requisições em lote (BatchHttpRequest) para a YouTube Data API
+Agrupa leituras independentes em um único round trip HTTP
+"""
+import time
+import logging
+from api_quota import endpoint_name
+
+logger = logging.getLogger(__name__)
+
+
+class BatchReader:
+    """
+    Executa várias leituras independentes em um único round trip
+
+    Uso:
+        batch = BatchReader(youtube, ledger, label='status')
+        batch.add('broadcast', youtube.liveBroadcasts().list(part='status', id=broadcast_id))
+        batch.add('stream', youtube.liveStreams().list(part='status', id=stream_id))
+        batch.execute()
+        broadcast_info = batch.result('broadcast')
+
+    Se o endpoint de batch falhar como um todo, as requisições são executadas
+    uma a uma (com o mesmo resultado, só que mais lento).
+    """
+
+    def __init__(self, youtube, ledger=None, label='batch'):
+        """
+        Args:
+            youtube: Cliente da YouTube Data API (googleapiclient)
+            ledger: QuotaLedger opcional; cada sub-requisição é registrada nele
+            label: Nome do lote usado nos logs
+        """
+        self.youtube = youtube
+        self.ledger = ledger
+        self.label = label
+        self.results = {}
+        self.errors = {}
+        self._requests = []
+
+    def add(self, key, request):
+        """Adiciona uma requisição ao lote"""
+        self._requests.append((key, request))
+        return self
+
+    def __len__(self):
+        return len(self._requests)
+
+    def execute(self):
+        """
+        Executa o lote
+
+        Returns:
+            Dicionário chave -> resposta (erros ficam em self.errors)
+        """
+        if not self._requests:
+            return self.results
+
+        if len(self._requests) == 1:
+            self._execute_sequential()
+            return self.results
+
+        start = time.monotonic()
+
+        def callback(request_id, response, exception):
+            if exception is not None:
+                self.errors[request_id] = exception
+            else:
+                self.results[request_id] = response
+
+        try:
+            batch = self.youtube.new_batch_http_request(callback=callback)
+            for key, request in self._requests:
+                batch.add(request, request_id=key)
+            batch.execute()
+        except Exception as e:
+            logger.warning(f"⚠️  Batch '{self.label}' falhou ({e}), executando requisições individualmente")
+            self.results.clear()
+            self.errors.clear()
+            self._execute_sequential()
+            return self.results
+
+        latency = time.monotonic() - start
+        logger.info(f"📦 Batch '{self.label}': {len(self._requests)} requisições em {latency * 1000:.0f}ms "
+                    f"({len(self.errors)} com erro)")
+
+        if self.ledger is not None:
+            # As sub-requisições não passam por execute(); registra cada uma no ledger
+            for key, request in self._requests:
+                self.ledger.record(endpoint_name(getattr(request, 'methodId', None)),
+                                   latency / len(self._requests), error=self.errors.get(key))
+        return self.results
+
+    def _execute_sequential(self):
+        for key, request in self._requests:
+            try:
+                self.results[key] = request.execute()
+            except Exception as e:
+                self.errors[key] = e
+
+    def result(self, key):
+        """Resposta de uma requisição do lote (levanta a exceção se ela falhou)"""
+        if key in self.errors:
+            raise self.errors[key]
+        return self.results.get(key, {})
@@ -0,0 +1,255 @@
+"""
+Contabilidade de quota da YouTube Data API
+Registra endpoint, latência e unidades estimadas de cada chamada em um ledger diário
+e expõe um orçamento que os loops de consulta verificam antes de continuar
+"""
+import os
+import time
+import atexit
+import threading
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from googleapiclient.http import HttpRequest
+from googleapiclient.errors import HttpError
+from state_files import load_json, save_json_atomic
+
+
+# A quota diária do YouTube é zerada à meia-noite no horário do Pacífico
+QUOTA_TIMEZONE = ZoneInfo('America/Los_Angeles')
+DEFAULT_DAILY_LIMIT = 10000
+
+# Custo em unidades por endpoint (https://developers.google.com/youtube/v3/determine_quota_cost)
+QUOTA_COSTS = {
+    'liveBroadcasts.list': 1,
+    'liveBroadcasts.insert': 50,
+    'liveBroadcasts.update': 50,
+    'liveBroadcasts.bind': 50,
+    'liveBroadcasts.transition': 50,
+    'liveBroadcasts.delete': 50,
+    'liveStreams.list': 1,
+    'liveStreams.insert': 50,
+    'liveStreams.update': 50,
+    'liveStreams.delete': 50,
+    'videos.list': 1,
+    'videos.insert': 1600,
+    'videos.update': 50,
+}
+
+
+def endpoint_name(method_id):
+    """Converte o methodId do discovery ('youtube.liveBroadcasts.list') em 'liveBroadcasts.list'"""
+    if not method_id:
+        return 'unknown'
+    if method_id.startswith('youtube.'):
+        return method_id[len('youtube.'):]
+    return method_id
+
+
+def estimate_cost(endpoint):
+    """Estima o custo em unidades de uma chamada"""
+    if endpoint in QUOTA_COSTS:
+        return QUOTA_COSTS[endpoint]
+    # Leituras custam 1 unidade, escritas 50
+    return 1 if endpoint.endswith('.list') else 50
+
+
+def is_quota_exceeded(error):
+    """True se o erro indica que a quota diária acabou"""
+    if not isinstance(error, HttpError):
+        return False
+    content = error.content or b''
+    if isinstance(content, str):
+        content = content.encode('utf-8', errors='ignore')
+    return b'quotaExceeded' in content or b'dailyLimitExceeded' in content
+
+
+class QuotaLedger:
+    """
+    Ledger diário de uso da quota, persistido em JSON
+
+    O orçamento tem três estados:
+        - 'ok': loops de consulta rodam normalmente
+        - 'low': abaixo de `low_fraction` do limite, loops consultam mais devagar
+        - 'exhausted': só resta a reserva, loops de consulta devem parar
+    A reserva (`reserve_units`) fica guardada para criar e publicar a próxima live.
+    """
+
+    def __init__(self, ledger_file='credentials/api_quota.json', daily_limit=None,
+                 reserve_units=400, low_fraction=0.2, save_interval=5.0):
+        """
+        Args:
+            ledger_file: Arquivo onde o ledger é persistido
+            daily_limit: Quota diária do projeto (padrão: YOUTUBE_QUOTA_LIMIT ou 10000)
+            reserve_units: Unidades reservadas para criar/publicar a próxima live
+            low_fraction: Fração restante abaixo da qual o orçamento fica 'low'
+            save_interval: Intervalo mínimo entre gravações em disco (segundos)
+        """
+        if daily_limit is None:
+            daily_limit = int(os.getenv('YOUTUBE_QUOTA_LIMIT', DEFAULT_DAILY_LIMIT))
+        self.ledger_file = ledger_file
+        self.daily_limit = daily_limit
+        self.reserve_units = reserve_units
+        self.low_fraction = low_fraction
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+        self._dirty = False
+        self._data = load_json(ledger_file, {}) or {}
+
+    def _today(self):
+        return datetime.now(QUOTA_TIMEZONE).strftime('%Y-%m-%d')
+
+    def _day(self):
+        """Entrada do dia corrente (cria se necessário)"""
+        today = self._today()
+        days = self._data.setdefault('days', {})
+        if today not in days:
+            days[today] = {'units': 0, 'calls': 0, 'errors': 0,
+                           'exhausted': False, 'endpoints': {}}
+            # Mantém só os últimos 30 dias
+            for old_day in sorted(days)[:-30]:
+                del days[old_day]
+        return days[today]
+
+    def record(self, endpoint, latency, units=None, error=None):
+        """
+        Registra uma chamada à API
+
+        Args:
+            endpoint: Nome do endpoint ('liveBroadcasts.list')
+            latency: Duração da chamada em segundos
+            units: Unidades consumidas (None = estimativa por endpoint)
+            error: Exceção levantada pela chamada, se houver
+        """
+        units = estimate_cost(endpoint) if units is None else units
+        with self._lock:
+            day = self._day()
+            day['units'] += units
+            day['calls'] += 1
+            stats = day['endpoints'].setdefault(
+                endpoint, {'calls': 0, 'units': 0, 'errors': 0, 'latency_total': 0.0, 'latency_max': 0.0}
+            )
+            stats['calls'] += 1
+            stats['units'] += units
+            stats['latency_total'] = round(stats['latency_total'] + latency, 4)
+            stats['latency_max'] = round(max(stats['latency_max'], latency), 4)
+            if error is not None:
+                day['errors'] += 1
+                stats['errors'] += 1
+                if is_quota_exceeded(error):
+                    day['exhausted'] = True
+            self._dirty = True
+            if time.monotonic() - self._last_save >= self.save_interval:
+                self._save_locked()
+
+    def flush(self):
+        """Grava o ledger em disco se houver alterações pendentes"""
+        with self._lock:
+            if self._dirty:
+                self._save_locked()
+
+    def _save_locked(self):
+        try:
+            save_json_atomic(self.ledger_file, self._data)
+            self._dirty = False
+        except OSError as e:
+            print(f"⚠️  Erro ao salvar ledger de quota: {e}")
+        self._last_save = time.monotonic()
+
+    def used_units(self):
+        """Unidades usadas hoje"""
+        with self._lock:
+            return self._day()['units']
+
+    def remaining_units(self):
+        """Unidades restantes hoje"""
+        with self._lock:
+            day = self._day()
+            if day['exhausted']:
+                return 0
+            return max(0, self.daily_limit - day['units'])
+
+    def budget_state(self):
+        """'ok', 'low' ou 'exhausted'"""
+        remaining = self.remaining_units()
+        if remaining <= self.reserve_units:
+            return 'exhausted'
+        if remaining <= self.daily_limit * self.low_fraction:
+            return 'low'
+        return 'ok'
+
+    def polling_allowed(self):
+        """True se loops de consulta ainda podem gastar quota"""
+        return self.budget_state() != 'exhausted'
+
+    def delay_factor(self):
+        """Multiplicador aplicado aos intervalos de consulta conforme o orçamento"""
+        return 3.0 if self.budget_state() == 'low' else 1.0
+
+    def summary(self):
+        """Resumo legível do uso de hoje"""
+        with self._lock:
+            day = self._day()
+            top = sorted(day['endpoints'].items(), key=lambda item: item[1]['units'], reverse=True)[:5]
+        endpoints = ', '.join(f"{name}={stats['units']}u/{stats['calls']}x" for name, stats in top)
+        return (f"{day['units']}/{self.daily_limit} unidades, {day['calls']} chamadas "
+                f"({self.budget_state()}){' - ' + endpoints if endpoints else ''}")
+
+
+class MeteredHttpRequest(HttpRequest):
+    """HttpRequest que registra cada execute()/upload no ledger de quota"""
+
+    ledger = None
+
+    def execute(self, http=None, num_retries=0):
+        if self.resumable is not None:
+            # O execute() de um upload resumable chama next_chunk(), que já registra
+            return super().execute(http=http, num_retries=num_retries)
+        start = time.monotonic()
+        try:
+            result = super().execute(http=http, num_retries=num_retries)
+        except Exception as e:
+            self._record(time.monotonic() - start, e)
+            raise
+        self._record(time.monotonic() - start)
+        return result
+
+    def next_chunk(self, http=None, num_retries=0):
+        # Uploads resumable: a quota é cobrada uma vez, quando o upload termina
+        start = time.monotonic()
+        try:
+            status, response = super().next_chunk(http=http, num_retries=num_retries)
+        except Exception as e:
+            self._record(self._upload_elapsed(start), e)
+            raise
+        if response is None:
+            self._upload_latency = self._upload_elapsed(start)
+        else:
+            self._record(self._upload_elapsed(start))
+        return status, response
+
+    def _upload_elapsed(self, start):
+        return getattr(self, '_upload_latency', 0.0) + time.monotonic() - start
+
+    def _record(self, latency, error=None):
+        if self.ledger is not None:
+            self.ledger.record(endpoint_name(self.methodId), latency, error=error)
+
+
+def metered_request_builder(ledger):
+    """Cria um requestBuilder para googleapiclient.discovery.build que usa o ledger"""
+    return type('MeteredHttpRequest', (MeteredHttpRequest,), {'ledger': ledger})
+
+
+_default_ledger = None
+_default_ledger_lock = threading.Lock()
+
+
+def get_quota_ledger():
+    """Ledger compartilhado pelo processo (a quota é do projeto, não do uploader)"""
+    global _default_ledger
+    with _default_ledger_lock:
+        if _default_ledger is None:
+            _default_ledger = QuotaLedger()
+            atexit.register(_default_ledger.flush)
+        return _default_ledger
@@ -0,0 +1,390 @@
+"""
+Ingestão de recursos: normaliza em segundo plano as imagens e áudios novos
+As pastas de recursos (images/, imagens noite/, audios/, audio_noite/ e as dos
+slots) são varridas periodicamente; cada arquivo novo ou alterado é convertido
+num pool de processos de baixa prioridade:
+
+- Imagens: RGB já redimensionado (LANCZOS) para cada resolução de
+  INGEST_RESOLUTIONS, em bytes crus (.rgb) carregados sem decodificar
+- Áudios: WAV PCM 16 bits com taxa e canais canônicos e loudness EBU R128
+  normalizado (loudnorm em duas passagens; medições salvas no state_store)
+
+Os renders leem do cache (cached_image / cached_audio) e usam o arquivo
+original enquanto a versão normalizada não estiver pronta.
+"""
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from state_store import get_state_store
+
+
+logger = logging.getLogger(__name__)
+
+# Liga a varredura das pastas pelo bot
+INGEST_ENABLED = os.getenv('INGEST_ENABLED', 'true').lower() == 'true'
+ASSET_CACHE_DIR = os.getenv('ASSET_CACHE_DIR', 'cache/assets')
+# Pastas varridas além das definidas nos slots (separadas por vírgula)
+INGEST_DIRS = [d.strip() for d in os.getenv('INGEST_DIRS', 'images,imagens noite,audios,audio_noite').split(',')
+               if d.strip()]
+# Resoluções das imagens pré-escaladas (ex: 1920x1080,1280x720)
+INGEST_RESOLUTIONS = os.getenv('INGEST_RESOLUTIONS', '1920x1080')
+# Formato canônico do áudio
+INGEST_SAMPLE_RATE = int(os.getenv('INGEST_SAMPLE_RATE', 48000))
+INGEST_CHANNELS = int(os.getenv('INGEST_CHANNELS', 2))
+# Alvo EBU R128: loudness integrado (LUFS), true peak (dBTP) e faixa de loudness (LU)
+INGEST_LOUDNESS = float(os.getenv('INGEST_LOUDNESS', -14))
+INGEST_TRUE_PEAK = float(os.getenv('INGEST_TRUE_PEAK', -1.5))
+INGEST_LRA = float(os.getenv('INGEST_LRA', 11))
+# Processos de conversão simultâneos e prioridade (nice)
+INGEST_WORKERS = int(os.getenv('INGEST_WORKERS', 1))
+INGEST_NICE = int(os.getenv('INGEST_NICE', 15))
+# Intervalo entre varreduras das pastas (segundos)
+INGEST_SCAN_INTERVAL = int(os.getenv('INGEST_SCAN_INTERVAL', 60))
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.m4a', '.aac', '.ogg', '.flac')
+
+_LOUDNORM_JSON = re.compile(r'\{[^{}]*"input_i"[^{}]*\}', re.S)
+
+
+def ffmpeg_binary():
+    """ffmpeg do sistema ou o do imageio-ffmpeg (dependência do moviepy)"""
+    if os.getenv('FFMPEG_BINARY'):
+        return os.getenv('FFMPEG_BINARY')
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return 'ffmpeg'
+
+
+def resolutions():
+    """INGEST_RESOLUTIONS como lista de (largura, altura)"""
+    sizes = []
+    for value in INGEST_RESOLUTIONS.split(','):
+        width, _, height = value.strip().lower().partition('x')
+        if width.isdigit() and height.isdigit():
+            sizes.append((int(width), int(height)))
+    return sizes
+
+
+def image_variant(width, height):
+    return f'{width}x{height}'
+
+
+def audio_variant():
+    """Variante do áudio: muda (e reconverte) se o formato ou o alvo mudarem"""
+    return f'pcm16-{INGEST_SAMPLE_RATE}hz-{INGEST_CHANNELS}ch-i{INGEST_LOUDNESS:g}'
+
+
+def cache_path(source, variant, extension):
+    digest = hashlib.sha1(os.path.abspath(source).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(ASSET_CACHE_DIR, f'{digest}_{variant}{extension}')
+
+
+def _lower_priority():
+    """Inicialização dos processos do pool: baixa prioridade"""
+    if INGEST_NICE:
+        try:
+            os.nice(INGEST_NICE)
+        except OSError:
+            pass
+
+
+# ---- conversões (executadas nos processos do pool) ----
+
+def normalize_image(source, target, width, height):
+    """Converte a imagem para RGB width x height em bytes crus"""
+    from PIL import Image
+    with Image.open(source) as img:
+        img = img.convert('RGB')
+        if img.size != (width, height):
+            img = img.resize((width, height), Image.Resampling.LANCZOS)
+        data = img.tobytes()
+    _write_atomic(target, data)
+    return None
+
+
+def _loudnorm_stats(stderr):
+    matches = _LOUDNORM_JSON.findall(stderr)
+    if not matches:
+        raise RuntimeError('loudnorm não retornou medições')
+    return json.loads(matches[-1])
+
+
+def normalize_audio(source, target):
+    """
+    Converte o áudio para WAV canônico com loudness normalizado (loudnorm em duas passagens)
+
+    Returns:
+        Medições EBU R128 (antes e depois)
+    """
+    ffmpeg = ffmpeg_binary()
+    target_filter = f'loudnorm=I={INGEST_LOUDNESS}:TP={INGEST_TRUE_PEAK}:LRA={INGEST_LRA}'
+    measure = subprocess.run(
+        [ffmpeg, '-hide_banner', '-nostats', '-i', source, '-af', f'{target_filter}:print_format=json',
+         '-f', 'null', '-'],
+        capture_output=True, text=True, errors='replace'
+    )
+    if measure.returncode != 0:
+        raise RuntimeError(f'ffmpeg (medição) terminou com código {measure.returncode}: {measure.stderr[-500:]}')
+    measured = _loudnorm_stats(measure.stderr)
+
+    temp_target = f'{target}.tmp.wav'
+    os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+    convert = subprocess.run(
+        [ffmpeg, '-hide_banner', '-nostats', '-y', '-i', source, '-vn',
+         '-af', (f"{target_filter}:measured_I={measured['input_i']}:measured_TP={measured['input_tp']}"
+                 f":measured_LRA={measured['input_lra']}:measured_thresh={measured['input_thresh']}"
+                 f":offset={measured['target_offset']}:linear=true:print_format=json"),
+         '-ar', str(INGEST_SAMPLE_RATE), '-ac', str(INGEST_CHANNELS), '-c:a', 'pcm_s16le', temp_target],
+        capture_output=True, text=True, errors='replace'
+    )
+    if convert.returncode != 0:
+        if os.path.exists(temp_target):
+            os.remove(temp_target)
+        raise RuntimeError(f'ffmpeg (conversão) terminou com código {convert.returncode}: {convert.stderr[-500:]}')
+    os.replace(temp_target, target)
+    result = _loudnorm_stats(convert.stderr)
+    return {
+        'input_i': float(measured['input_i']), 'input_tp': float(measured['input_tp']),
+        'input_lra': float(measured['input_lra']),
+        'output_i': float(result['output_i']), 'output_tp': float(result['output_tp']),
+        'output_lra': float(result['output_lra']),
+        'normalization_type': result.get('normalization_type'),
+    }
+
+
+def build_pcm(source):
+    """Preenche o pcm_cache com a faixa (import aqui: pcm_cache depende deste módulo)"""
+    from pcm_cache import build_track
+    build_track(source)
+
+
+def _write_atomic(target, data):
+    os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+    temp_target = f'{target}.tmp'
+    with open(temp_target, 'wb') as f:
+        f.write(data)
+    os.replace(temp_target, target)
+
+
+# ---- leitura pelos renders ----
+
+def _fresh_entry(source, variant, store=None):
+    """Entrada do cache de `source` se o arquivo original não mudou desde a conversão"""
+    try:
+        stat = os.stat(source)
+    except OSError:
+        return None
+    for entry in (store or get_state_store()).asset_cache(os.path.abspath(source)):
+        if (entry['variant'] == variant and entry['source_mtime'] == stat.st_mtime
+                and entry['source_size'] == stat.st_size and os.path.exists(entry['cache_path'])):
+            return entry
+    return None
+
+
+def cached_image(source, width, height):
+    """
+    Imagem pré-escalada do cache (PIL.Image RGB) ou None se ainda não existir
+    """
+    entry = _fresh_entry(source, image_variant(width, height))
+    if not entry:
+        return None
+    from PIL import Image
+    with open(entry['cache_path'], 'rb') as f:
+        data = f.read()
+    if len(data) != width * height * 3:
+        return None
+    return Image.frombytes('RGB', (width, height), data)
+
+
+def cached_audio(source):
+    """Caminho do áudio normalizado (ou o original, se ainda não convertido)"""
+    entry = _fresh_entry(source, audio_variant())
+    return entry['cache_path'] if entry else source
+
+
+# ---- varredura e pool ----
+
+class AssetIngest:
+    """
+    Varre as pastas de recursos e converte os arquivos novos num pool de processos
+
+    - scan() é barato quando nada mudou (compara mtime/tamanho com o state_store)
+    - Cada arquivo tem no máximo uma conversão em andamento
+    - Entradas de arquivos apagados são removidas do cache
+    """
+
+    def __init__(self, dirs=None, store=None, workers=INGEST_WORKERS):
+        self.dirs = list(dirs or INGEST_DIRS)
+        self.store = store or get_state_store()
+        self.workers = workers
+        self._executor = None
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def watch(self, directory):
+        """Inclui uma pasta (ex.: as de um slot) na varredura"""
+        if directory and directory not in self.dirs:
+            self.dirs.append(directory)
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                initializer=_lower_priority
+            )
+        return self._executor
+
+    def _sources(self):
+        for directory in self.dirs:
+            for root, _, files in os.walk(directory):
+                for name in files:
+                    extension = os.path.splitext(name)[1].lower()
+                    if extension in IMAGE_EXTENSIONS:
+                        yield 'image', os.path.abspath(os.path.join(root, name))
+                    elif extension in AUDIO_EXTENSIONS:
+                        yield 'audio', os.path.abspath(os.path.join(root, name))
+
+    def _targets(self, kind, source):
+        """(variante, arquivo do cache, função, argumentos) de cada conversão de `source`"""
+        if kind == 'audio':
+            target = cache_path(source, audio_variant(), '.wav')
+            return [(audio_variant(), target, normalize_audio, (source, target))]
+        targets = []
+        for width, height in resolutions():
+            variant = image_variant(width, height)
+            target = cache_path(source, variant, '.rgb')
+            targets.append((variant, target, normalize_image, (source, target, width, height)))
+        return targets
+
+    def scan(self):
+        """
+        Procura arquivos novos ou alterados e agenda a conversão
+
+        Returns:
+            Quantidade de conversões agendadas
+        """
+        known = {}
+        for entry in self.store.asset_cache():
+            known[(entry['source'], entry['variant'])] = entry
+
+        current = set()
+        submitted = 0
+        for kind, source in self._sources():
+            try:
+                stat = os.stat(source)
+            except OSError:
+                continue
+            for variant, target, func, args in self._targets(kind, source):
+                current.add((source, variant))
+                entry = known.get((source, variant))
+                if (entry and entry['source_mtime'] == stat.st_mtime and entry['source_size'] == stat.st_size
+                        and os.path.exists(entry['cache_path'])):
+                    continue
+                if self._submit(kind, source, variant, target, stat, func, args):
+                    submitted += 1
+
+        # Arquivos apagados e variantes que não são mais geradas (outra resolução ou alvo)
+        for key, entry in known.items():
+            if key not in current and (not os.path.exists(entry['source']) or
+                                       any(source == entry['source'] for source, _ in current)):
+                self._remove(entry)
+        for entry in self.store.pcm_entries():
+            if not os.path.exists(entry['source']):
+                self._remove_pcm(entry)
+
+        if submitted:
+            logger.info(f"📥 {submitted} recursos enviados para normalização")
+        return submitted
+
+    def _submit(self, kind, source, variant, target, stat, func, args):
+        key = (source, variant)
+        with self._lock:
+            if key in self._pending:
+                return False
+            future = self._pool().submit(func, *args)
+            self._pending[key] = future
+        future.add_done_callback(
+            lambda done: self._finished(done, kind, source, variant, target, stat)
+        )
+        return True
+
+    def _finished(self, future, kind, source, variant, target, stat):
+        with self._lock:
+            self._pending.pop((source, variant), None)
+        try:
+            loudness = future.result()
+        except Exception as e:
+            logger.warning(f"⚠️  Falha ao normalizar {os.path.basename(source)} ({variant}): {e}")
+            return
+        self.store.save_asset_cache(source, variant, kind, stat.st_mtime, stat.st_size, target, loudness)
+        if loudness:
+            logger.info(f"🔊 {os.path.basename(source)}: {loudness['input_i']:.1f} → "
+                        f"{loudness['output_i']:.1f} LUFS (true peak {loudness['output_tp']:.1f} dBTP)")
+            self._submit_pcm(source)
+        else:
+            logger.info(f"🖼️  {os.path.basename(source)}: {variant} pronto")
+
+    def _submit_pcm(self, source):
+        """Decodifica a versão normalizada para o pcm_cache (o render não precisa decodificar)"""
+        with self._lock:
+            if (source, 'pcm') in self._pending or self._executor is None:
+                return
+            future = self._executor.submit(build_pcm, source)
+            self._pending[(source, 'pcm')] = future
+        future.add_done_callback(lambda done: self._pcm_finished(done, source))
+
+    def _pcm_finished(self, future, source):
+        with self._lock:
+            self._pending.pop((source, 'pcm'), None)
+        try:
+            future.result()
+        except Exception as e:
+            logger.warning(f"⚠️  Falha ao decodificar {os.path.basename(source)} para o cache de PCM: {e}")
+
+    def _remove(self, entry):
+        try:
+            os.remove(entry['cache_path'])
+        except OSError:
+            pass
+        self.store.delete_asset_cache(entry['source'], entry['variant'])
+        logger.info(f"🗑️  Cache removido: {os.path.basename(entry['source'])} ({entry['variant']})")
+
+    def _remove_pcm(self, entry):
+        try:
+            os.remove(entry['pcm_path'])
+        except OSError:
+            pass
+        self.store.delete_pcm_entry(entry['source'])
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def shutdown(self, wait=False):
+        """Encerra o pool (conversões em andamento são descartadas sem wait)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_ingest = None
+_ingest_lock = threading.Lock()
+
+
+def get_asset_ingest():
+    """Ingestão compartilhada pelo processo"""
+    global _ingest
+    with _ingest_lock:
+        if _ingest is None:
+            _ingest = AssetIngest()
+        return _ingest
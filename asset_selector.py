@@ -0,0 +1,281 @@
+"""
+Seleção sem repetição de imagens, áudios e categorias
+Cada pool (uma pasta de imagens, uma pasta de áudios, as categorias de um
+slot) tem sua ordem: 'lru' (o menos usado recentemente, sorteado entre os
+primeiros candidatos conforme o peso) ou 'shuffle' (sacola embaralhada: todos
+saem uma vez, na proporção do peso, antes de repetir). Itens usados há menos
+de `cooldown` segundos são evitados enquanto houver alternativa.
+
+O estado fica em memória (cada escolha é O(1), mesmo com milhares de itens)
+e é gravado no state_store em lotes: a cada SELECTOR_FLUSH_EVERY escolhas,
+em flush() e na saída do processo.
+"""
+import os
+import math
+import time
+import random
+import atexit
+import logging
+import threading
+from itertools import islice
+from collections import OrderedDict
+from state_files import load_json
+from state_store import get_state_store
+
+
+logger = logging.getLogger(__name__)
+
+# Ordem dos pools de imagens e de áudios ('lru' ou 'shuffle')
+IMAGE_SELECTION = os.getenv('IMAGE_SELECTION', 'lru')
+AUDIO_SELECTION = os.getenv('AUDIO_SELECTION', 'shuffle')
+# Intervalo mínimo entre dois usos do mesmo arquivo (horas, 0 = sem cooldown)
+ASSET_COOLDOWN_HOURS = float(os.getenv('ASSET_COOLDOWN_HOURS', 0))
+# Escolhas acumuladas antes de gravar no banco
+SELECTOR_FLUSH_EVERY = int(os.getenv('SELECTOR_FLUSH_EVERY', 10))
+# Candidatos sorteados pelo peso no modo 'lru' (os menos usados recentemente)
+LRU_CANDIDATES = 8
+# Pesos opcionais dentro de cada pasta: {"arquivo.jpg": 2.0, ...}
+WEIGHTS_FILE = 'weights.json'
+
+MODES = ('lru', 'shuffle')
+
+
+def folder_weights(directory):
+    """Pesos de weights.json da pasta (caminho completo -> peso)"""
+    weights = load_json(os.path.join(directory, WEIGHTS_FILE), {}) or {}
+    return {os.path.join(directory, name): float(weight) for name, weight in weights.items()}
+
+
+def folder_version(directory):
+    """mtime da pasta: muda quando um arquivo é adicionado ou removido"""
+    try:
+        return os.stat(directory).st_mtime_ns
+    except OSError:
+        return None
+
+
+class _Pool:
+    """Itens de um escopo, do menos ao mais usado recentemente, e a sacola embaralhada"""
+
+    def __init__(self, scope, used, bag):
+        self.scope = scope
+        self.order = OrderedDict(used)
+        self.bag = bag
+        self.weights = {}
+        self.version = None
+        # Mudanças ainda não gravadas
+        self.used = {}
+        self.removed = set()
+        # Sacola regravada inteira só quando muda (nova, item inserido);
+        # a cada escolha grava-se apenas quantos itens restam
+        self.bag_dirty = False
+        self.bag_popped = False
+
+    def sync(self, items):
+        """Acompanha a lista atual (arquivos novos entram como nunca usados)"""
+        current = set(items)
+        # Diferenças de conjuntos: só os itens que mudaram custam trabalho em Python
+        for item in self.order.keys() - current:
+            del self.order[item]
+            self.used.pop(item, None)
+            self.removed.add(item)
+        added = current - self.order.keys()
+        # Itens nunca usados não têm histórico: após reiniciar já estão na sacola restaurada
+        in_bag = set(self.bag) if added and self.bag else set()
+        for item in added:
+            self.order[item] = 0.0
+            self.order.move_to_end(item, last=False)
+            self.removed.discard(item)
+            if self.bag is not None and item not in in_bag:
+                self._insert_in_bag(item)
+
+    def _insert_in_bag(self, item):
+        """Coloca `item` numa posição aleatória da sacola (troca O(1))"""
+        self.bag.append(item)
+        position = random.randrange(len(self.bag))
+        self.bag[position], self.bag[-1] = self.bag[-1], self.bag[position]
+        self.bag_dirty = True
+
+    def weight(self, item):
+        return max(0.0, self.weights.get(item, 1.0))
+
+    def cooling(self, item, cooldown, now):
+        return cooldown > 0 and now - self.order.get(item, 0.0) < cooldown
+
+    def pick_lru(self, cooldown, now):
+        # No máximo metade do pool: um item não volta antes de metade dos outros saírem
+        candidates = list(islice(self.order, min(LRU_CANDIDATES, max(1, len(self.order) // 2))))
+        ready = [item for item in candidates if not self.cooling(item, cooldown, now)] or candidates[:1]
+        weights = [self.weight(item) for item in ready]
+        if not any(weights):
+            return ready[0]
+        return random.choices(ready, weights)[0]
+
+    def refill(self):
+        """Nova sacola: floor(peso) cópias + uma com probabilidade da parte fracionária"""
+        bag = []
+        for item in self.order:
+            weight = self.weight(item)
+            copies = int(math.floor(weight)) + (1 if random.random() < weight - math.floor(weight) else 0)
+            bag.extend([item] * copies)
+        if not bag:
+            bag = list(self.order)
+        random.shuffle(bag)
+        self.bag_dirty = True
+        # Não começa a sacola nova com o último item da anterior
+        last = next(reversed(self.order)) if self.order else None
+        if len(bag) > 1 and bag[-1] == last:
+            position = random.randrange(len(bag) - 1)
+            bag[position], bag[-1] = bag[-1], bag[position]
+        self.bag = bag
+
+    def pick_shuffle(self, cooldown, now):
+        if self.bag is None:
+            self.bag = []
+        self.bag_popped = True
+        deferred = []
+        for _ in range(LRU_CANDIDATES):
+            while self.bag and self.bag[-1] not in self.order:
+                self.bag.pop()  # Arquivo removido da pasta
+            if not self.bag:
+                self.refill()
+            item = self.bag.pop()
+            if not self.cooling(item, cooldown, now):
+                break
+            deferred.append(item)
+        else:
+            # Todos os candidatos em cooldown: o usado há mais tempo
+            item = min(deferred, key=lambda candidate: self.order[candidate])
+            deferred.remove(item)
+        # Os adiados voltam para a sacola atual
+        for other in deferred:
+            self._insert_in_bag(other)
+        return item
+
+    def use(self, item, now):
+        self.order[item] = now
+        self.order.move_to_end(item)
+        self.used[item] = now
+        self.removed.discard(item)
+
+    def last(self):
+        item = next(reversed(self.order), None)
+        return item if item is not None and self.order[item] else None
+
+    def changes(self):
+        """Mudanças pendentes (ou None); continuam pendentes até saved()"""
+        if not (self.used or self.removed or self.bag_dirty or self.bag_popped):
+            return None
+        remaining = len(self.bag) if self.bag is not None else None
+        return (self.scope, dict(self.used), set(self.removed), list(self.bag) if self.bag_dirty else None, remaining)
+
+    def saved(self):
+        """Descarta as mudanças pendentes depois que a transação foi gravada"""
+        self.used, self.removed, self.bag_dirty, self.bag_popped = {}, set(), False, False
+
+
+class AssetSelector:
+    """
+    Escolhas sem repetição por escopo (ver state_store.image_scope/audio_scope/category_scope)
+
+    Uso:
+        selector = get_asset_selector()
+        image = selector.pick(image_scope(images_dir), images, mode='lru')
+    """
+
+    def __init__(self, store=None, flush_every=SELECTOR_FLUSH_EVERY):
+        self.store = store or get_state_store()
+        self.flush_every = flush_every
+        self._pools = {}
+        self._pending = 0
+        self._lock = threading.RLock()
+
+    def _pool(self, scope):
+        pool = self._pools.get(scope)
+        if pool is None:
+            used, bag = self.store.selection_state(scope)
+            pool = self._pools[scope] = _Pool(scope, used, bag)
+        return pool
+
+    def pick(self, scope, items, mode='lru', weights=None, cooldown=0, version=None):
+        """
+        Próximo item do pool
+
+        Args:
+            scope: Escopo do pool
+            items: Itens disponíveis agora (arquivos novos ou removidos são acompanhados)
+            mode: 'lru' ou 'shuffle'
+            weights: Dict item -> peso (padrão 1; 0 = só quando não houver outro)
+            cooldown: Segundos mínimos entre dois usos do mesmo item
+            version: Versão de `items` (ex.: mtime da pasta); igual à anterior, a lista não é comparada
+
+        Returns:
+            Item escolhido ou None se `items` estiver vazio
+        """
+        if mode not in MODES:
+            raise ValueError(f"mode deve ser um de {MODES} (recebido {mode!r})")
+        if not items:
+            return None
+        with self._lock:
+            pool = self._pool(scope)
+            if version is None or version != pool.version:
+                pool.sync(items)
+                pool.version = version
+            pool.weights = weights or {}
+            now = time.time()
+            if mode == 'shuffle':
+                item = pool.pick_shuffle(cooldown, now)
+            else:
+                item = pool.pick_lru(cooldown, now)
+            self._use(pool, item, now)
+            return item
+
+    def use(self, scope, item):
+        """Registra um item escolhido por fora (ex.: categoria fixa)"""
+        with self._lock:
+            pool = self._pool(scope)
+            if item not in pool.order:
+                pool.order[item] = 0.0
+            self._use(pool, item, time.time())
+
+    def last(self, scope):
+        """Último item usado no escopo ou None"""
+        with self._lock:
+            return self._pool(scope).last()
+
+    def _use(self, pool, item, now):
+        pool.use(item, now)
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Grava as escolhas pendentes de todos os pools numa transação"""
+        with self._lock:
+            pending = [(pool, pool.changes()) for pool in self._pools.values()]
+            pending = [(pool, change) for pool, change in pending if change]
+            self._pending = 0
+            if not pending:
+                return
+            try:
+                self.store.save_selections([change for _, change in pending])
+            except Exception as e:
+                # As mudanças continuam pendentes e vão no próximo flush
+                logger.warning(f"⚠️  Não foi possível gravar o histórico de seleção: {e}")
+                return
+            for pool, _ in pending:
+                pool.saved()
+
+
+_selector = None
+_selector_lock = threading.Lock()
+
+
+def get_asset_selector():
+    """Seletor compartilhado pelo processo (grava o que faltar na saída)"""
+    global _selector
+    with _selector_lock:
+        if _selector is None:
+            _selector = AssetSelector()
+            atexit.register(_selector.flush)
+        return _selector
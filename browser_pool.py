@@ -0,0 +1,267 @@
+"""
+Pool de sessões do navegador para a automação web (fallback do YouTube Studio)
+Mantém uma sessão headless aquecida e logada (cookies salvos), verificada
+periodicamente e reciclada após N usos ou acima de um limite de memória; os
+fallbacks do LiveManager pegam a sessão emprestada com lease()
+"""
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from youtube_automation import YouTubeAutomation, COOKIES_FILE
+
+
+logger = logging.getLogger(__name__)
+
+# Empréstimos antes de reciclar a sessão
+BROWSER_MAX_USES = int(os.getenv('BROWSER_MAX_USES', 20))
+# Memória (MB) do navegador (driver + processos filhos) acima da qual a sessão é reciclada
+BROWSER_MAX_MEMORY_MB = int(os.getenv('BROWSER_MAX_MEMORY_MB', 600))
+# Intervalo da verificação de saúde (segundos)
+BROWSER_HEALTH_INTERVAL = int(os.getenv('BROWSER_HEALTH_INTERVAL', 120))
+# Espera pela sessão emprestada a outro chamador antes de abrir uma sessão avulsa (segundos)
+BROWSER_LEASE_TIMEOUT = int(os.getenv('BROWSER_LEASE_TIMEOUT', 60))
+# Mantém a sessão aquecida desde a partida (false = só abre no primeiro uso)
+BROWSER_WARM = os.getenv('BROWSER_WARM', 'true').lower() == 'true'
+
+
+def _children_map():
+    """pid pai -> pids filhos (de /proc)"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'rb') as f:
+                ppid = int(f.read().rsplit(b') ', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+
+def process_tree_memory_mb(pid):
+    """RSS (MB) do processo e de todos os descendentes"""
+    if not pid:
+        return 0.0
+    children = _children_map()
+    total_kb = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        stack.extend(children.get(current, []))
+        try:
+            with open(f'/proc/{current}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+                        break
+        except (OSError, ValueError):
+            continue
+    return total_kb / 1024
+
+
+class BrowserPool:
+    """
+    Uma sessão YouTubeAutomation aquecida, emprestada a um chamador por vez
+
+    - warm() abre o navegador e faz login com os cookies salvos (sem aguardar
+      login manual); sem cookies, a sessão não é aquecida
+    - lease() empresta a sessão; se ela não existir ou estiver ocupada, entrega
+      uma sessão avulsa (fechada ao fim do empréstimo), como antes do pool
+    - A sessão é reciclada após BROWSER_MAX_USES empréstimos, acima de
+      BROWSER_MAX_MEMORY_MB, quando falha na verificação de saúde (inclusive
+      cookies que expiraram), quando o chamador sai com exceção ou avisa uma
+      falha com report_failure(); health_check() volta a aquecê-la
+    """
+
+    def __init__(self, max_uses=BROWSER_MAX_USES, max_memory_mb=BROWSER_MAX_MEMORY_MB):
+        """
+        Args:
+            max_uses: Empréstimos antes de reciclar a sessão
+            max_memory_mb: Limite de memória do navegador (MB)
+        """
+        self.max_uses = max_uses
+        self.max_memory_mb = max_memory_mb
+        self._lock = threading.Lock()
+        self._session = None
+        self._uses = 0
+        self._failed = False
+        self.sessions_created = 0
+        self.sessions_recycled = 0
+        self.leases = 0
+        self.cold_leases = 0
+
+    def _driver_pid(self):
+        try:
+            return self._session.driver.service.process.pid
+        except AttributeError:
+            return None
+
+    def memory_mb(self):
+        """Memória atual da sessão aquecida (MB)"""
+        return process_tree_memory_mb(self._driver_pid()) if self._session else 0.0
+
+    def _healthy(self):
+        try:
+            return self._session.driver.execute_script('return document.readyState') is not None
+        except Exception as e:
+            logger.warning(f"⚠️  Sessão do navegador não responde: {e}")
+            return False
+
+    def _create(self):
+        if not os.path.exists(COOKIES_FILE):
+            logger.info(f"💡 Sem cookies em {COOKIES_FILE}: sessão do navegador não será aquecida")
+            return None
+        started = time.monotonic()
+        session = YouTubeAutomation(headless=True)
+        session.keep_open_seconds = 0
+        if not session.login_youtube(wait_for_login=False):
+            logger.warning("⚠️  Sessão do navegador não aquecida (login com cookies falhou)")
+            session.close()
+            return None
+        self._session = session
+        self._uses = 0
+        self.sessions_created += 1
+        logger.info(f"🔥 Sessão do navegador aquecida em {time.monotonic() - started:.1f}s "
+                    f"({self.memory_mb():.0f} MB)")
+        return session
+
+    def _recycle(self, reason):
+        if not self._session:
+            return
+        logger.info(f"♻️  Reciclando sessão do navegador ({reason})")
+        self._session.close()
+        self._session = None
+        self.sessions_recycled += 1
+
+    def _check(self, validate=False):
+        """
+        Recicla a sessão se ela não responde ou passou do limite de memória
+
+        Com `validate`, confere também se os cookies ainda mantêm o login
+        (uma requisição ao Studio; feita na verificação periódica).
+        """
+        if not self._session:
+            return
+        if not self._healthy():
+            self._recycle('não responde')
+            return
+        if validate and self._session.session_valid() is False:
+            self._recycle('login expirou')
+            return
+        memory = self.memory_mb()
+        if memory > self.max_memory_mb:
+            self._recycle(f'{memory:.0f} MB > {self.max_memory_mb} MB')
+
+    def warm(self):
+        """Garante uma sessão aquecida (bloqueante: roda no pool 'browser' do plano)"""
+        with self._lock:
+            self._check(validate=True)
+            return self._session is not None or self._create() is not None
+
+    def health_check(self):
+        """Verificação periódica; pula se a sessão estiver emprestada"""
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._check(validate=True)
+            if not self._session and BROWSER_WARM:
+                self._create()
+        finally:
+            self._lock.release()
+
+    @contextmanager
+    def lease(self, headless=True, timeout=BROWSER_LEASE_TIMEOUT):
+        """
+        Empresta a sessão aquecida (ou uma sessão avulsa)
+
+        Args:
+            headless: Modo da sessão avulsa (a aquecida é sempre headless)
+            timeout: Espera pela sessão emprestada a outro chamador (segundos)
+
+        Yields:
+            YouTubeAutomation
+        """
+        if not self._lock.acquire(timeout=timeout):
+            logger.warning("⚠️  Sessão do navegador ocupada: usando uma sessão avulsa")
+            with self._cold(headless) as session:
+                yield session
+            return
+
+        try:
+            self._check()
+            session = self._session
+            if session is None:
+                with self._cold(headless) as session:
+                    yield session
+                return
+
+            self.leases += 1
+            self._uses += 1
+            self._failed = False
+            ok = False
+            try:
+                yield session
+                ok = True
+            finally:
+                if not ok:
+                    self._recycle('erro durante o uso')
+                elif self._failed:
+                    self._recycle('automação falhou')
+                elif self._uses >= self.max_uses:
+                    self._recycle(f'{self._uses} usos')
+                else:
+                    self._check()
+        finally:
+            self._lock.release()
+
+    def report_failure(self, session):
+        """
+        Avisa que a automação com a sessão emprestada falhou (retornou False)
+
+        A sessão aquecida é reciclada ao ser devolvida: a próxima começa limpa,
+        com login novo. Sessões avulsas são fechadas de qualquer forma.
+        """
+        if session is self._session:
+            self._failed = True
+
+    @contextmanager
+    def _cold(self, headless):
+        self.cold_leases += 1
+        session = YouTubeAutomation(headless=headless)
+        try:
+            yield session
+        finally:
+            session.close()
+
+    def stats(self):
+        """Estado do pool (para logs)"""
+        return {
+            'warm': self._session is not None,
+            'uses': self._uses,
+            'memory_mb': round(self.memory_mb(), 1),
+            'sessions_created': self.sessions_created,
+            'sessions_recycled': self.sessions_recycled,
+            'leases': self.leases,
+            'cold_leases': self.cold_leases,
+        }
+
+    def close(self):
+        """Fecha a sessão aquecida"""
+        with self._lock:
+            self._recycle('encerramento')
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool():
+    """Pool de navegador compartilhado pelo processo"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+        return _pool
@@ -0,0 +1,96 @@
+"""
+Perfil leve do navegador para a automação web
+A automação só precisa da sala de controle do Studio para clicar num botão:
+vídeos, imagens, fontes e hosts de terceiros (anúncios, métricas) são
+bloqueados via Chrome DevTools Protocol, o throttling de abas em segundo plano
+é desligado e a memória do renderer é limitada
+"""
+import os
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+# Perfil leve ligado por padrão (false = carrega a interface completa)
+BROWSER_LIGHTWEIGHT = os.getenv('BROWSER_LIGHTWEIGHT', 'true').lower() == 'true'
+# Limite do heap JavaScript de cada renderer (MB)
+BROWSER_RENDERER_MEMORY_MB = int(os.getenv('BROWSER_RENDERER_MEMORY_MB', 512))
+# Processos de renderer simultâneos
+BROWSER_RENDERER_LIMIT = int(os.getenv('BROWSER_RENDERER_LIMIT', 2))
+
+# Extensões de mídia, imagem e fonte
+BLOCKED_EXTENSIONS = (
+    'mp4', 'webm', 'm4a', 'mp3', 'ogg', 'm3u8', 'ts',
+    'jpg', 'jpeg', 'png', 'gif', 'webp', 'avif', 'svg', 'ico',
+    'woff', 'woff2', 'ttf', 'otf', 'eot',
+)
+# Hosts de vídeo, miniaturas, avatares, fontes, anúncios e métricas
+BLOCKED_HOSTS = (
+    'googlevideo.com', 'i.ytimg.com', 'i9.ytimg.com', 'yt3.ggpht.com', 'yt3.googleusercontent.com',
+    'fonts.gstatic.com', 'fonts.googleapis.com',
+    'doubleclick.net', 'googlesyndication.com', 'googleadservices.com',
+    'google-analytics.com', 'googletagmanager.com', 'play.google.com',
+)
+
+# Argumentos do Chrome: sem throttling em segundo plano e memória do renderer limitada
+LIGHTWEIGHT_CHROME_ARGUMENTS = (
+    '--disable-background-timer-throttling',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-renderer-backgrounding',
+    '--disable-features=IntensiveWakeUpThrottling,CalculateNativeWinOcclusion,MediaRouter',
+    '--disable-background-networking',
+    '--blink-settings=imagesEnabled=false',
+    '--autoplay-policy=user-gesture-required',
+    '--mute-audio',
+    f'--renderer-process-limit={BROWSER_RENDERER_LIMIT}',
+    f'--js-flags=--max-old-space-size={BROWSER_RENDERER_MEMORY_MB}',
+)
+
+
+def blocked_hosts():
+    """Hosts bloqueados (BLOCKED_HOSTS + BROWSER_BLOCK_HOSTS, separados por vírgula)"""
+    extra = [host.strip() for host in os.getenv('BROWSER_BLOCK_HOSTS', '').split(',') if host.strip()]
+    return list(BLOCKED_HOSTS) + extra
+
+
+def blocked_url_patterns():
+    """Padrões para Network.setBlockedURLs (curinga '*')"""
+    patterns = [f'*.{extension}' for extension in BLOCKED_EXTENSIONS]
+    patterns += [f'*.{extension}?*' for extension in BLOCKED_EXTENSIONS]
+    for host in blocked_hosts():
+        patterns += [f'*://{host}/*', f'*://*.{host}/*', f'*://{host}:*']
+    return patterns
+
+
+def apply_chrome_options(options):
+    """Adiciona os argumentos do perfil leve às opções do Chrome"""
+    for argument in LIGHTWEIGHT_CHROME_ARGUMENTS:
+        options.add_argument(argument)
+
+
+def apply_firefox_options(options):
+    """Equivalente no Firefox (sem CDP): imagens, fontes remotas e autoplay desligados"""
+    options.set_preference('permissions.default.image', 2)
+    options.set_preference('gfx.downloadable_fonts.enabled', False)
+    options.set_preference('media.autoplay.default', 5)
+    options.set_preference('dom.min_background_timeout_value', 4)
+
+
+def block_requests(driver):
+    """
+    Bloqueia mídia, imagens, fontes e hosts de terceiros via CDP (Chrome/Chromium)
+
+    Returns:
+        True se o bloqueio foi aplicado
+    """
+    if not hasattr(driver, 'execute_cdp_cmd'):
+        return False
+    try:
+        patterns = blocked_url_patterns()
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+        logger.info(f"🪶 Perfil leve: {len(patterns)} padrões de URL bloqueados")
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️  Não foi possível bloquear requisições via CDP: {e}")
+        return False
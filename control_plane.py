@@ -0,0 +1,581 @@
+"""
+Plano de controle assíncrono dos bots
+Um único event loop coordena agendas, lives e processos do FFmpeg de todos os
+canais; chamadas à API e renders (bloqueantes) rodam em pools de threads
+"""
+import os
+import re
+import signal
+import asyncio
+import logging
+import queue
+import functools
+import threading
+import collections
+from concurrent.futures import Executor, Future
+from datetime import datetime, timedelta
+from upload_manager import upload_status_summary
+from scheduler_engine import SchedulerEngine
+
+
+logger = logging.getLogger(__name__)
+
+# Esperas longas são fatiadas para acompanhar ajustes do relógio e suspensão da máquina
+MAX_TIMER_SLICE = 300
+
+
+def _next_hour(now):
+    return now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+
+
+class FfmpegProcess:
+    """
+    FFmpeg gerenciado pelo event loop
+
+    O stderr é drenado em segundo plano (as últimas linhas ficam para
+    diagnóstico) e a parada não bloqueia o loop. Expõe poll()/returncode como
+    subprocess.Popen, então LiveManager.streaming_count() continua funcionando.
+
+    Com `log_path`, o stderr vai para um arquivo em vez de um pipe: o ffmpeg
+    sobrevive a uma queda do bot e pode ser readotado (AdoptedFfmpeg).
+    """
+
+    # Compatível com LiveManager.is_streaming_active (o stderr é lido pelo loop)
+    stderr = None
+
+    def __init__(self, cmd, tail_lines=30, log_path=None):
+        self.cmd = cmd
+        self.log_path = log_path
+        self.process = None
+        self.stderr_tail = collections.deque(maxlen=tail_lines)
+        self.sending = asyncio.Event()
+        self._drain_task = None
+
+    async def start(self):
+        """Inicia o processo (FileNotFoundError se o ffmpeg não estiver instalado)"""
+        if self.log_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.log_path)), exist_ok=True)
+            with open(self.log_path, 'wb') as log_file:
+                self.process = await asyncio.create_subprocess_exec(
+                    *self.cmd,
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=log_file
+                )
+            self._drain_task = asyncio.ensure_future(self._drain_file())
+        else:
+            self.process = await asyncio.create_subprocess_exec(
+                *self.cmd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
+            )
+            self._drain_task = asyncio.ensure_future(self._drain())
+        return self
+
+    def _feed(self, buffer):
+        # O progresso do ffmpeg ("frame= ...") termina em \r, não em \n
+        *lines, buffer = re.split(rb'[\r\n]', buffer)
+        for line in lines:
+            text = line.decode('utf-8', errors='ignore').strip()
+            if not text:
+                continue
+            self.stderr_tail.append(text)
+            if 'frame=' in text or 'size=' in text:
+                self.sending.set()
+        return buffer
+
+    async def _drain(self):
+        buffer = b''
+        while True:
+            data = await self.process.stderr.read(4096)
+            if not data:
+                break
+            buffer = self._feed(buffer + data)
+
+    async def _drain_file(self, from_end=False):
+        buffer = b''
+        with open(self.log_path, 'rb') as log_file:
+            if from_end:
+                log_file.seek(0, os.SEEK_END)
+            while True:
+                data = log_file.read(4096)
+                if data:
+                    buffer = self._feed(buffer + data)
+                elif self.poll() is not None:
+                    break
+                else:
+                    await asyncio.sleep(0.5)
+
+    @property
+    def pid(self):
+        return self.process.pid if self.process else None
+
+    @property
+    def returncode(self):
+        return self.process.returncode if self.process else None
+
+    def poll(self):
+        return self.returncode
+
+    async def wait(self):
+        """Aguarda o processo terminar e retorna o código de saída"""
+        returncode = await self.process.wait()
+        if self._drain_task:
+            await self._drain_task
+        return returncode
+
+    async def wait_started(self, grace=20):
+        """
+        Aguarda o ffmpeg se firmar: sai cedo ao ver frames sendo enviados
+
+        Returns:
+            True se o processo continua rodando
+        """
+        exited = asyncio.ensure_future(self.process.wait())
+        sending = asyncio.ensure_future(self.sending.wait())
+        await asyncio.wait({exited, sending}, timeout=grace, return_when=asyncio.FIRST_COMPLETED)
+        for task in (exited, sending):
+            task.cancel()
+        return self.process.returncode is None
+
+    async def stop(self, timeout=10):
+        """Encerra o processo (SIGTERM e, se não sair a tempo, SIGKILL)"""
+        if self.process is None or self.process.returncode is not None:
+            return
+        self.process.terminate()
+        try:
+            await asyncio.wait_for(self.process.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("⚠️  Forçando encerramento do ffmpeg...")
+            self.process.kill()
+            await self.process.wait()
+
+
+class AdoptedFfmpeg(FfmpegProcess):
+    """
+    FFmpeg de uma execução anterior do bot (não é processo filho deste)
+
+    Acompanhado pelo PID; o progresso vem do arquivo de log do stderr.
+    """
+
+    def __init__(self, pid, log_path=None):
+        super().__init__(cmd=None, log_path=log_path)
+        self._pid = pid
+        self._returncode = None
+
+    @classmethod
+    def adopt(cls, pid, marker, log_path=None):
+        """
+        Readota o processo se ele ainda for o ffmpeg que transmite para `marker`
+
+        Returns:
+            AdoptedFfmpeg ou None
+        """
+        try:
+            with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                cmdline = f.read()
+        except (OSError, TypeError):
+            return None
+        if b'ffmpeg' not in cmdline or marker.encode() not in cmdline:
+            return None
+        process = cls(pid, log_path)
+        if log_path and os.path.exists(log_path):
+            process._drain_task = asyncio.ensure_future(process._drain_file(from_end=True))
+        return process
+
+    @property
+    def pid(self):
+        return self._pid
+
+    @property
+    def returncode(self):
+        if self._returncode is None and not self._alive():
+            self._returncode = -1  # Código real desconhecido (não é processo filho)
+        return self._returncode
+
+    def _alive(self):
+        try:
+            with open(f'/proc/{self._pid}/stat', 'rb') as f:
+                return f.read().split(b') ')[-1][:1] != b'Z'
+        except OSError:
+            return False
+
+    async def wait(self):
+        while self.poll() is None:
+            await asyncio.sleep(1)
+        return self.returncode
+
+    async def wait_started(self, grace=20):
+        return self.poll() is None
+
+    async def stop(self, timeout=10):
+        if self.poll() is not None:
+            return
+        try:
+            os.kill(self._pid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+        for _ in range(int(timeout * 10)):
+            if self.poll() is not None:
+                return
+            await asyncio.sleep(0.1)
+        logger.warning("⚠️  Forçando encerramento do ffmpeg...")
+        try:
+            os.kill(self._pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+class DaemonThreadPool(Executor):
+    """
+    Pool de threads daemon para o ControlPlane
+
+    Diferente do ThreadPoolExecutor, uma chamada ainda bloqueada (ex: a espera
+    pelo horário agendado da live) não impede o processo de encerrar.
+    """
+
+    def __init__(self, max_workers, name):
+        self.max_workers = max_workers
+        self.name = name
+        self._queue = queue.SimpleQueue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("Pool encerrado")
+            self._queue.put((future, fn, args, kwargs))
+            if not self._threads:
+                for index in range(self.max_workers):
+                    thread = threading.Thread(target=self._worker, name=f'{self.name}-{index + 1}', daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+        return future
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, fn, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        with self._lock:
+            self._shutdown = True
+            threads = list(self._threads)
+        if cancel_futures:
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    item[0].cancel()
+        for _ in threads:
+            self._queue.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+
+class ControlPlane:
+    """
+    Event loop único para todos os canais
+
+    - Janelas diárias ficam no `scheduler` (SchedulerEngine); every() e
+      sleep_until() cobrem os demais timers, sem loops de time.sleep
+    - call() executa código bloqueante num pool: 'api' para a YouTube API,
+      'render' para gerar vídeos (poucos workers, é pesado)
+    - spawn() registra tarefas; erros são logados e não derrubam o loop
+    - SIGINT/SIGTERM encerram as tarefas e rodam os hooks de on_shutdown()
+    - stats() mostra tarefas ativas e o atraso máximo dos timers
+    """
+
+    def __init__(self, api_workers=None, render_workers=None):
+        """
+        Args:
+            api_workers: Threads para chamadas à API (padrão: CONTROL_API_WORKERS ou 8)
+            render_workers: Threads para renders (padrão: CONTROL_RENDER_WORKERS ou 1)
+        """
+        self.pool_sizes = {
+            'api': api_workers or int(os.getenv('CONTROL_API_WORKERS', 8)),
+            'render': render_workers or int(os.getenv('CONTROL_RENDER_WORKERS', 1)),
+        }
+        self.scheduler = SchedulerEngine(self)
+        self.loop = None
+        self.timers_fired = 0
+        self.timer_lag_max = 0.0
+        self._executors = {}
+        self._tasks = set()
+        self._startup = []
+        self._shutdown = []
+        self._stopping = None
+
+    def on_start(self, func):
+        """Registra func(plane) (função ou corrotina) para rodar quando o loop iniciar"""
+        self._startup.append(func)
+
+    def on_shutdown(self, func):
+        """Registra uma corrotina func() para rodar no encerramento"""
+        self._shutdown.append(func)
+
+    def _executor(self, pool):
+        if pool not in self._executors:
+            self._executors[pool] = DaemonThreadPool(self.pool_sizes.get(pool, 1), f'plane-{pool}')
+        return self._executors[pool]
+
+    async def call(self, func, *args, pool='api', **kwargs):
+        """Executa uma função bloqueante no pool indicado sem travar o loop"""
+        return await self.loop.run_in_executor(self._executor(pool), functools.partial(func, *args, **kwargs))
+
+    async def api(self, request):
+        """Executa uma requisição do googleapiclient (request.execute()) no pool da API"""
+        return await self.call(request.execute, pool='api')
+
+    def spawn(self, coro, name=None):
+        """Agenda uma corrotina como tarefa do plano"""
+        task = self.loop.create_task(coro, name=name)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return task
+
+    def _task_done(self, task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"❌ Tarefa {task.get_name()} falhou: {task.exception()}",
+                         exc_info=task.exception())
+
+    def _record_lag(self, lag):
+        self.timers_fired += 1
+        self.timer_lag_max = max(self.timer_lag_max, lag)
+
+    async def sleep_until(self, when):
+        """Dorme até `when` (datetime local ou com fuso)"""
+        while True:
+            remaining = (when - datetime.now(when.tzinfo)).total_seconds()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(remaining, MAX_TIMER_SLICE))
+        self._record_lag((datetime.now(when.tzinfo) - when).total_seconds())
+
+    def every(self, interval, coro_fn, name):
+        """Executa coro_fn() a cada `interval` segundos (sem sobreposição)"""
+        async def timer():
+            next_run = self.loop.time() + interval
+            while True:
+                await asyncio.sleep(max(0.0, next_run - self.loop.time()))
+                self._record_lag(self.loop.time() - next_run)
+                try:
+                    await coro_fn()
+                except Exception as e:
+                    logger.error(f"❌ Erro em {name}: {e}")
+                next_run = max(next_run + interval, self.loop.time())
+        return self.spawn(timer(), name=f'every:{name}')
+
+    @property
+    def stopping(self):
+        """True depois de SIGINT/SIGTERM ou stop() (tarefas canceladas pelo encerramento)"""
+        return bool(self._stopping and self._stopping.is_set())
+
+    def stop(self):
+        """Pede o encerramento do plano (pode ser chamado de qualquer thread)"""
+        if self.loop and self._stopping:
+            self.loop.call_soon_threadsafe(self._stopping.set)
+
+    def stats(self):
+        """Tarefas ativas, timers disparados e maior atraso de timer (segundos)"""
+        return {
+            'tasks': len(self._tasks),
+            'timers_fired': self.timers_fired + self.scheduler.events_fired,
+            'timer_lag_max': round(max(self.timer_lag_max, self.scheduler.lag_max), 3),
+        }
+
+    def run(self):
+        """Roda o loop até SIGINT/SIGTERM ou stop()"""
+        asyncio.run(self._main())
+
+    async def _main(self):
+        self.loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                self.loop.add_signal_handler(sig, self._stopping.set)
+            except NotImplementedError:
+                # Windows: handler clássico, mas o encerramento continua sendo o do plano
+                signal.signal(sig, lambda signum, frame: self.stop())
+            except RuntimeError:
+                pass  # Loop fora da thread principal
+
+        self.scheduler.start()
+        for func in self._startup:
+            result = func(self)
+            if asyncio.iscoroutine(result):
+                await result
+
+        await self._stopping.wait()
+        logger.info("🛑 Encerrando plano de controle...")
+
+        # Tarefas canceladas encerram as próprias lives (blocos finally)
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        for func in self._shutdown:
+            try:
+                await func()
+            except Exception as e:
+                logger.error(f"❌ Erro no encerramento: {e}")
+
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        logger.info("✅ Plano de controle encerrado")
+
+
+async def run_live_window(plane, live_manager, video_path, title, description, end_at,
+                          log=logger, max_restarts=3, restart_delay=10, privacy_status="public",
+                          journal=None, resume=None):
+    """
+    Cria uma live e transmite o vídeo em loop até `end_at`
+
+    A queda do ffmpeg é percebida assim que o processo sai (não a cada minuto)
+    e o streaming é reiniciado até `max_restarts` vezes seguidas. A live é
+    encerrada no fim da janela ou se a tarefa for cancelada.
+
+    Com `journal` (SlotJournal), broadcast, stream, vídeo e PID do ffmpeg são
+    registrados a cada passo; se o processo for encerrado (plane.stopping) a
+    live não é finalizada e uma nova execução a retoma via `resume`.
+
+    Args:
+        plane: ControlPlane em execução
+        live_manager: LiveManager do canal
+        video_path: Vídeo transmitido em loop
+        title, description: Metadados da live
+        end_at: Fim da janela (datetime local ou com fuso)
+        log: Logger do bot
+        max_restarts: Reinícios seguidos do ffmpeg antes de desistir
+        restart_delay: Espera antes de reiniciar (segundos)
+        privacy_status: Privacidade da live (public, unlisted, private)
+        journal: SlotJournal do slot (None = sem retomada)
+        resume: Entrada do journal de uma live já criada (não cria outra)
+
+    Returns:
+        True se a live foi criada e transmitida
+    """
+    log_path = journal.ffmpeg_log if journal else None
+    if resume:
+        broadcast_id, stream_id = resume['broadcast_id'], resume.get('stream_id')
+        stream_key, rtmp_url = resume['stream_key'], resume['rtmp_url']
+        if not await plane.call(live_manager.initialize_uploader):
+            log.error("❌ Falha ao conectar ao YouTube")
+            return False
+        live_manager.current_broadcast_id = broadcast_id
+        live_manager.current_stream_key = stream_key
+        live_manager.current_rtmp_url = rtmp_url
+        log.info(f"♻️  Retomando live {broadcast_id} ({resume.get('lifecycle') or 'status desconhecido'})")
+    else:
+        broadcast_id, stream_id, stream_key, rtmp_url = await plane.call(
+            live_manager.create_live,
+            title=title,
+            description=description,
+            scheduled_minutes=0,
+            privacy_status=privacy_status
+        )
+        if not broadcast_id:
+            log.error("❌ Falha ao criar live")
+            return False
+        if not stream_key or not rtmp_url:
+            log.error("❌ Stream Key ou RTMP URL não disponíveis")
+            return False
+        if journal:
+            journal.record(broadcast_id=broadcast_id, stream_id=stream_id, stream_key=stream_key,
+                           rtmp_url=rtmp_url, video_path=video_path, close_at=end_at.isoformat(),
+                           stream_config=live_manager.stream_config_file, ffmpeg_pid=None,
+                           title=title, privacy=privacy_status)
+
+    publish = None
+    try:
+        adopted = resume and live_manager.adopt_streaming(resume.get('ffmpeg_pid'), stream_key, log_path)
+        if adopted:
+            log.info(f"♻️  FFmpeg {resume['ffmpeg_pid']} ainda transmitindo: readotado")
+        else:
+            log.info("📡 Iniciando streaming IMEDIATAMENTE...")
+            if not await live_manager.start_streaming_async(video_path, stream_key, rtmp_url, log_path=log_path):
+                log.error("❌ Falha ao iniciar streaming")
+                return False
+            log.info("✅ Streaming iniciado!")
+        if journal:
+            journal.record(ffmpeg_pid=live_manager.ffmpeg_process.pid)
+
+        # A publicação (que pode esperar o horário agendado) roda no pool da API
+        # enquanto o loop já supervisiona o ffmpeg
+        if not resume or resume.get('lifecycle') != 'live':
+            publish = asyncio.ensure_future(plane.call(live_manager.publish_live, broadcast_id))
+            publish.add_done_callback(
+                lambda task: task.cancelled() or task.exception() is None
+                or log.error(f"❌ Erro ao publicar live: {task.exception()}")
+            )
+
+        log.info(f"🔄 Monitorando até {end_at.strftime('%d/%m %H:%M')}...")
+        restarts = 0
+        next_status = _next_hour(datetime.now(end_at.tzinfo))
+        while datetime.now(end_at.tzinfo) < end_at:
+            process = live_manager.ffmpeg_process
+            if process is None or process.poll() is not None:
+                if restarts >= max_restarts:
+                    log.error("❌ Máximo de tentativas atingido. Encerrando live.")
+                    break
+                restarts += 1
+                log.warning(f"⚠️  Streaming parou! Tentando reiniciar ({restarts}/{max_restarts})...")
+                await asyncio.sleep(restart_delay)
+                if await live_manager.start_streaming_async(video_path, stream_key, rtmp_url, log_path=log_path):
+                    restarts = 0
+                    log.info("✅ Streaming reiniciado com sucesso!")
+                    if journal:
+                        journal.record(ffmpeg_pid=live_manager.ffmpeg_process.pid)
+                else:
+                    log.error(f"❌ Falha ao reiniciar streaming (tentativa {restarts})")
+                continue
+
+            exited = asyncio.ensure_future(process.wait())
+            timer = asyncio.ensure_future(plane.sleep_until(min(end_at, next_status)))
+            try:
+                await asyncio.wait({exited, timer}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                exited.cancel()
+                timer.cancel()
+
+            now = datetime.now(end_at.tzinfo)
+            if now >= next_status:
+                next_status = _next_hour(now)
+                log.info(f"📊 Live ativa - {now.strftime('%H:%M')} - Até {end_at.strftime('%H:%M')}")
+                upload_summary = upload_status_summary()
+                if upload_summary:
+                    log.info(f"📤 Uploads: {upload_summary}")
+
+        log.info("✅ Janela da live concluída")
+        return True
+    finally:
+        if publish:
+            publish.cancel()
+        if journal and plane.stopping:
+            # Processo encerrando (ex: reinício do container): a live continua no
+            # YouTube e o journal permite retomá-la na próxima execução
+            await live_manager.stop_ffmpeg_async()
+            log.info("💾 Live mantida no YouTube para retomada após o reinício")
+        else:
+            await live_manager.stop_streaming_async(plane)
+            if journal:
+                journal.clear()
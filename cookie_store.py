@@ -0,0 +1,199 @@
+"""
+Cookies da sessão do YouTube para a automação web
+Injeta todos os cookies (de todos os domínios) numa única chamada CDP
+Network.setCookies antes da primeira navegação, captura os cookies via CDP
+sem abrir páginas e valida a sessão com uma requisição HTTP leve ao Studio
+"""
+import time
+import logging
+import urllib.error
+import urllib.request
+from urllib.parse import urlparse
+from state_files import load_json, save_json_atomic
+
+
+logger = logging.getLogger(__name__)
+
+# Tempo máximo da requisição de validação (segundos)
+VALIDATE_TIMEOUT = 10
+VALIDATE_USER_AGENT = ('Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 '
+                       '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+
+_SAME_SITE = {'strict': 'Strict', 'lax': 'Lax', 'none': 'None'}
+
+
+def to_cdp(cookie):
+    """Cookie no formato do Selenium -> Network.CookieParam do CDP"""
+    param = {
+        'name': cookie['name'],
+        'value': cookie.get('value', ''),
+        'domain': cookie.get('domain', ''),
+        'path': cookie.get('path', '/'),
+        'secure': bool(cookie.get('secure', False)),
+        'httpOnly': bool(cookie.get('httpOnly', False)),
+    }
+    if cookie.get('expiry'):
+        param['expires'] = float(cookie['expiry'])
+    same_site = _SAME_SITE.get(str(cookie.get('sameSite', '')).lower())
+    if same_site:
+        param['sameSite'] = same_site
+    return param
+
+
+def from_cdp(cookie):
+    """Network.Cookie do CDP -> formato do Selenium (o mesmo do arquivo)"""
+    converted = {
+        'name': cookie['name'],
+        'value': cookie.get('value', ''),
+        'domain': cookie.get('domain', ''),
+        'path': cookie.get('path', '/'),
+        'secure': bool(cookie.get('secure', False)),
+        'httpOnly': bool(cookie.get('httpOnly', False)),
+    }
+    if not cookie.get('session') and cookie.get('expires', -1) > 0:
+        converted['expiry'] = int(cookie['expires'])
+    if cookie.get('sameSite'):
+        converted['sameSite'] = cookie['sameSite']
+    return converted
+
+
+def _domain_matches(host, domain):
+    domain = domain.lstrip('.').lower()
+    return host == domain or host.endswith('.' + domain)
+
+
+class CookieStore:
+    """Arquivo de cookies (formato do Selenium) e sua aplicação no navegador"""
+
+    def __init__(self, cookies_file):
+        self.cookies_file = cookies_file
+
+    def load(self):
+        """Cookies válidos do arquivo (os expirados são ignorados)"""
+        now = time.time()
+        return [cookie for cookie in load_json(self.cookies_file, []) or []
+                if cookie.get('name') and (not cookie.get('expiry') or cookie['expiry'] > now)]
+
+    def save(self, cookies):
+        # Sem duplicatas (nome, domínio, caminho)
+        unique = {}
+        for cookie in cookies:
+            unique[(cookie.get('name'), cookie.get('domain'), cookie.get('path', '/'))] = cookie
+        save_json_atomic(self.cookies_file, list(unique.values()))
+        logger.info(f"✅ {len(unique)} cookies salvos em {self.cookies_file}")
+        return len(unique)
+
+    def inject(self, driver, fallback_url=None):
+        """
+        Coloca os cookies salvos no navegador
+
+        No Chrome/Chromium é uma única chamada Network.setCookies, sem navegar;
+        nos demais navegadores abre `fallback_url` e adiciona um a um.
+
+        Returns:
+            Quantidade de cookies injetados
+        """
+        cookies = self.load()
+        if not cookies:
+            logger.info("💡 Nenhum cookie salvo encontrado")
+            return 0
+
+        if hasattr(driver, 'execute_cdp_cmd'):
+            try:
+                driver.execute_cdp_cmd('Network.enable', {})
+                driver.execute_cdp_cmd('Network.setCookies', {'cookies': [to_cdp(c) for c in cookies]})
+                logger.info(f"✅ {len(cookies)} cookies injetados via CDP de {self.cookies_file}")
+                return len(cookies)
+            except Exception as e:
+                logger.warning(f"⚠️  Network.setCookies falhou ({e}); adicionando um a um")
+
+        if not fallback_url:
+            return 0
+        driver.get(fallback_url)
+        host = urlparse(fallback_url).hostname or ''
+        added = 0
+        for cookie in cookies:
+            if not _domain_matches(host, cookie.get('domain', host)):
+                continue
+            cookie_copy = dict(cookie)
+            cookie_copy.pop('sameSite', None)
+            try:
+                driver.add_cookie(cookie_copy)
+                added += 1
+            except Exception as e:
+                logger.debug(f"⚠️  Erro ao adicionar cookie: {e}")
+        logger.info(f"✅ {added} cookies carregados de {self.cookies_file}")
+        return added
+
+    def capture(self, driver, fallback_urls=()):
+        """
+        Salva os cookies do navegador (todos os domínios via Network.getAllCookies)
+
+        Sem CDP, visita `fallback_urls` e junta os cookies de cada página.
+
+        Returns:
+            Quantidade de cookies salvos
+        """
+        cookies = None
+        if hasattr(driver, 'execute_cdp_cmd'):
+            try:
+                result = driver.execute_cdp_cmd('Network.getAllCookies', {})
+                cookies = [from_cdp(cookie) for cookie in result.get('cookies', [])]
+            except Exception as e:
+                logger.warning(f"⚠️  Network.getAllCookies falhou ({e}); visitando as páginas")
+        if cookies is None:
+            cookies = []
+            for url in fallback_urls:
+                try:
+                    driver.get(url)
+                    cookies.extend(driver.get_cookies())
+                except Exception:
+                    pass
+        return self.save(cookies)
+
+    def cookie_header(self, url):
+        """Cabeçalho Cookie dos cookies salvos que valem para `url`"""
+        parsed = urlparse(url)
+        host = (parsed.hostname or '').lower()
+        path = parsed.path or '/'
+        pairs = [f"{c['name']}={c.get('value', '')}" for c in self.load()
+                 if _domain_matches(host, c.get('domain', host))
+                 and path.startswith(c.get('path', '/'))
+                 and (parsed.scheme == 'https' or not c.get('secure'))]
+        return '; '.join(pairs)
+
+    def validate(self, url, is_login_url):
+        """
+        Confere a sessão com uma requisição ao Studio (sem seguir redirecionamentos)
+
+        Args:
+            url: Página do Studio
+            is_login_url: Função que reconhece a URL da tela de login
+
+        Returns:
+            True (sessão válida), False (redireciona para login) ou None (não foi possível verificar)
+        """
+        header = self.cookie_header(url)
+        if not header:
+            return False
+
+        class NoRedirect(urllib.request.HTTPRedirectHandler):
+            def redirect_request(self, *args, **kwargs):
+                return None
+
+        request = urllib.request.Request(url, headers={'Cookie': header, 'User-Agent': VALIDATE_USER_AGENT})
+        opener = urllib.request.build_opener(NoRedirect)
+        try:
+            with opener.open(request, timeout=VALIDATE_TIMEOUT) as response:
+                status, location = response.status, response.headers.get('Location', '')
+        except urllib.error.HTTPError as e:
+            status, location = e.code, e.headers.get('Location', '')
+        except (urllib.error.URLError, OSError) as e:
+            logger.warning(f"⚠️  Não foi possível validar a sessão: {e}")
+            return None
+
+        if 300 <= status < 400:
+            return not is_login_url(location)
+        if status in (401, 403):
+            return False
+        return status == 200 or None
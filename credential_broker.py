@@ -0,0 +1,431 @@
+"""
+Broker de credenciais OAuth do YouTube
+Renova o token em segundo plano antes de expirar e persiste em JSON (sem pickle),
+com escrita atômica e lock de arquivo entre processos
+"""
+import os
+import json
+import time
+import pickle
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from google.oauth2.credentials import Credentials
+from google_auth_oauthlib.flow import InstalledAppFlow
+from google.auth.transport.requests import Request
+from google.auth.exceptions import GoogleAuthError, RefreshError
+from state_files import load_json, save_json_atomic
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+SCOPES = ['https://www.googleapis.com/auth/youtube.upload',
+          'https://www.googleapis.com/auth/youtube.force-ssl']
+
+DEFAULT_TOKEN_FILE = 'credentials/token.json'
+
+
+class SerializedCredentials(Credentials):
+    """
+    Credenciais OAuth cuja renovação é serializada entre threads
+
+    Várias threads podem detectar o token expirado ao mesmo tempo; só a primeira
+    renova, as demais aguardam o lock e reaproveitam o token novo.
+    """
+
+    _refresh_lock = threading.RLock()
+
+    def refresh(self, request):
+        token_before = self.token
+        with self._refresh_lock:
+            if self.token != token_before and self.valid:
+                # Outra thread renovou enquanto esta aguardava
+                return
+            start = time.monotonic()
+            super().refresh(request)
+            on_refresh = getattr(self, '_on_refresh', None)
+            if on_refresh:
+                on_refresh(self, time.monotonic() - start)
+
+    def before_request(self, request, method, url, headers):
+        if not self.valid:
+            self.refresh(request)
+        with self._refresh_lock:
+            self.apply(headers)
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state.pop('_on_refresh', None)
+        return state
+
+
+def ensure_installed_credentials(credentials_file):
+    """Converte credenciais web para installed se necessário"""
+    try:
+        with open(credentials_file, 'r') as f:
+            creds_data = json.load(f)
+
+        # Se tiver "web" mas não "installed", converte
+        if 'web' in creds_data and 'installed' not in creds_data:
+            print("📝 Convertendo credenciais web para desktop...")
+            creds_data['installed'] = creds_data['web']
+
+            # Salva o arquivo convertido
+            with open(credentials_file, 'w') as f:
+                json.dump(creds_data, f, indent=2)
+            print("✅ Credenciais convertidas com sucesso!")
+    except Exception as e:
+        print(f"⚠️  Aviso ao converter credenciais: {e}")
+
+
+class CredentialBroker:
+    """
+    Mantém o token OAuth válido fora do caminho crítico
+
+    - O token fica em `token.json` (formato authorized_user do google-auth),
+      gravado de forma atômica sob lock de arquivo; um `token.pickle` antigo é
+      migrado automaticamente
+    - Uma thread em segundo plano renova o token `refresh_margin` segundos antes
+      de expirar; se outro processo já renovou, o token do arquivo é reaproveitado
+    - `metrics()` expõe idade do token e latência das renovações
+    - Na carga, uma falha de rede é tentada de novo; refresh token recusado
+      não abre o navegador: é preciso rodar `renovar_token.py`
+    - YOUTUBE_TOKEN_URI substitui o endpoint de token (útil para testar contra
+      um servidor OAuth local)
+    """
+
+    def __init__(self, token_file=DEFAULT_TOKEN_FILE, credentials_file='credentials/credentials.json',
+                 refresh_margin=600, retry_interval=30, max_retry_interval=300, token_uri=None,
+                 min_refresh_interval=60, load_attempts=5):
+        """
+        Args:
+            token_file: Arquivo do token (.json; um .pickle é convertido para .json)
+            credentials_file: Arquivo JSON com credenciais da API (fluxo interativo)
+            refresh_margin: Segundos antes da expiração em que o token é renovado
+            retry_interval: Espera inicial após uma renovação com falha (segundos)
+            max_retry_interval: Espera máxima entre tentativas com falha (segundos)
+            token_uri: Endpoint de token (padrão: YOUTUBE_TOKEN_URI ou o do token salvo)
+            min_refresh_interval: Espera mínima após uma renovação bem-sucedida (segundos)
+            load_attempts: Tentativas de renovação ao carregar um token expirado
+        """
+        base = os.path.splitext(token_file)[0]
+        self.token_file = base + '.json'
+        self.legacy_token_file = base + '.pickle'
+        self.lock_file = self.token_file + '.lock'
+        self.credentials_file = credentials_file
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self.min_refresh_interval = min_refresh_interval
+        self.load_attempts = load_attempts
+        self.token_uri = token_uri or os.getenv('YOUTUBE_TOKEN_URI')
+        self.credentials = None
+        # True quando o Google recusou o refresh token (revogado/expirado): só renovar_token.py resolve
+        self.rejected = False
+        self._issued_at = None
+        self._refreshes = 0
+        self._failures = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self._last_latency = None
+        self._lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @contextmanager
+    def _file_lock(self):
+        """Lock exclusivo entre processos sobre o arquivo de token"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.lock_file)), exist_ok=True)
+        with open(self.lock_file, 'a') as lock:
+            if fcntl:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def _from_info(self, info):
+        creds = SerializedCredentials.from_authorized_user_info(info, info.get('scopes') or SCOPES)
+        if self.token_uri:
+            # from_authorized_user_info sempre usa o endpoint do Google
+            creds._token_uri = self.token_uri
+        creds._on_refresh = self._on_refresh
+        return creds
+
+    def _read_token_file(self):
+        """Lê token.json (ou migra o token.pickle antigo); None se não houver token"""
+        info = load_json(self.token_file)
+        if info:
+            try:
+                return self._from_info(info)
+            except ValueError as e:
+                print(f"⚠️  Token inválido em {self.token_file}: {e}")
+                return None
+
+        if os.path.exists(self.legacy_token_file):
+            try:
+                with open(self.legacy_token_file, 'rb') as token:
+                    legacy = pickle.load(token)
+                creds = self._from_info(json.loads(legacy.to_json()))
+            except Exception as e:
+                print(f"⚠️  Não foi possível migrar {self.legacy_token_file}: {e}")
+                return None
+            self._write_token_file(creds)
+            print(f"🔁 Token migrado de {self.legacy_token_file} para {self.token_file}")
+            return creds
+        return None
+
+    def _write_token_file(self, creds):
+        save_json_atomic(self.token_file, json.loads(creds.to_json()))
+
+    def load(self, interactive=True):
+        """
+        Carrega o token, renovando se necessário
+
+        O login no navegador só é aberto quando não existe arquivo de token; um
+        token que não pode ser renovado exige `python renovar_token.py`.
+
+        Args:
+            interactive: Se True, abre o fluxo de login no navegador quando não há token
+
+        Returns:
+            SerializedCredentials ou None
+        """
+        with self._file_lock():
+            token_exists = os.path.exists(self.token_file) or os.path.exists(self.legacy_token_file)
+            creds = self._read_token_file()
+
+        if creds is None:
+            if interactive and not token_exists:
+                return self.authorize()
+            if not token_exists:
+                print(f"❌ Token não encontrado: {self.token_file}")
+            print("💡 Gere um novo token com: python renovar_token.py")
+            return None
+
+        if not creds.valid:
+            if not creds.refresh_token:
+                print(f"❌ Token expirado sem refresh token: {self.token_file}")
+                print("💡 Gere um novo token com: python renovar_token.py")
+                return None
+            self.credentials = creds
+            if not self._refresh_on_load():
+                return None
+            creds = self.credentials
+
+        with self._lock:
+            self.credentials = creds
+            if self._issued_at is None:
+                self._issued_at = self._estimate_issued_at(creds)
+        return creds
+
+    def _refresh_on_load(self):
+        """Renova o token carregado com espera crescente entre tentativas; desiste se o refresh token for recusado"""
+        wait = 1.0
+        for attempt in range(1, self.load_attempts + 1):
+            if self.refresh_now():
+                return True
+            if self.rejected:
+                print("❌ Refresh token recusado pelo Google (revogado ou expirado)")
+                print("💡 Gere um novo token com: python renovar_token.py")
+                return False
+            if attempt < self.load_attempts:
+                print(f"⏳ Nova tentativa de renovação em {wait:.0f}s ({attempt}/{self.load_attempts})...")
+                time.sleep(wait)
+                wait = min(self.retry_interval, wait * 2)
+        print(f"❌ Não foi possível renovar o token após {self.load_attempts} tentativas")
+        return False
+
+    def authorize(self):
+        """Fluxo interativo de login (abre o navegador) e salva o token novo"""
+        if not os.path.exists(self.credentials_file):
+            print(f"❌ Arquivo de credenciais não encontrado: {self.credentials_file}")
+            print("📝 Crie um arquivo credentials.json com suas credenciais do Google Cloud Console")
+            print("🔗 https://console.cloud.google.com/apis/credentials")
+            return None
+
+        # Converte credenciais web para installed se necessário
+        ensure_installed_credentials(self.credentials_file)
+
+        flow = InstalledAppFlow.from_client_secrets_file(self.credentials_file, SCOPES)
+        creds = self._from_info(json.loads(flow.run_local_server(port=0).to_json()))
+        with self._file_lock():
+            self._write_token_file(creds)
+        with self._lock:
+            self.credentials = creds
+            self._issued_at = time.time()
+            self.rejected = False
+        return creds
+
+    def refresh_now(self):
+        """
+        Renova o token imediatamente
+
+        Se outro processo já gravou um token com validade maior, ele é
+        reaproveitado sem chamar o endpoint de token.
+
+        Returns:
+            True se há um token válido após a chamada
+        """
+        creds = self.credentials
+        if creds is None:
+            return False
+
+        # Mesmo lock da renovação durante requisições: uma renovação por vez no processo
+        with SerializedCredentials._refresh_lock:
+            with self._file_lock():
+                on_disk = self._read_token_file()
+            if on_disk and on_disk.valid and self._expiry_ts(on_disk) > self._expiry_ts(creds) + 60:
+                self._adopt(on_disk)
+                return True
+
+            try:
+                creds.refresh(Request())
+            except RefreshError as e:
+                with self._lock:
+                    self._failures += 1
+                # Erros não retentáveis (invalid_grant etc.) significam refresh token recusado
+                self.rejected = not e.retryable
+                print(f"⚠️  Falha ao renovar token: {e}")
+                return False
+            except (GoogleAuthError, OSError) as e:
+                with self._lock:
+                    self._failures += 1
+                print(f"⚠️  Falha ao renovar token: {e}")
+                return False
+            self.rejected = False
+            return True
+
+    def _adopt(self, other):
+        """Copia o token de outras credenciais (gravadas por outro processo); requer o lock de renovação"""
+        creds = self.credentials
+        creds.token = other.token
+        creds.expiry = other.expiry
+        creds._refresh_token = other.refresh_token
+        self._issued_at = self._estimate_issued_at(creds)
+
+    def _on_refresh(self, creds, latency):
+        """Chamado após cada renovação (em segundo plano ou durante uma requisição)"""
+        with self._lock:
+            previous_age = self.token_age()
+            self._issued_at = time.time()
+            self._refreshes += 1
+            self._last_latency = latency
+            self._latency_total += latency
+            self._latency_max = max(self._latency_max, latency)
+        try:
+            with self._file_lock():
+                self._write_token_file(creds)
+        except OSError as e:
+            print(f"⚠️  Erro ao salvar token: {e}")
+        age_text = f", token anterior com {previous_age / 60:.0f}min" if previous_age is not None else ''
+        print(f"🔑 Token renovado em {latency * 1000:.0f}ms{age_text}")
+
+    @staticmethod
+    def _expiry_ts(creds):
+        if not creds.expiry:
+            return 0.0
+        return creds.expiry.replace(tzinfo=timezone.utc).timestamp()
+
+    def _estimate_issued_at(self, creds):
+        # Tokens do Google valem 1h; sem a data de emissão, estima pela expiração
+        expiry = self._expiry_ts(creds)
+        return expiry - 3600 if expiry else time.time()
+
+    def expires_in(self):
+        """Segundos até o token expirar (None se desconhecido)"""
+        creds = self.credentials
+        if creds is None or not creds.expiry:
+            return None
+        return self._expiry_ts(creds) - time.time()
+
+    def token_age(self):
+        """Idade do token atual em segundos (None se não há token)"""
+        if self._issued_at is None:
+            return None
+        return time.time() - self._issued_at
+
+    def metrics(self):
+        """Métricas do token e das renovações"""
+        with self._lock:
+            return {
+                'token_age': self.token_age(),
+                'expires_in': self.expires_in(),
+                'refreshes': self._refreshes,
+                'failures': self._failures,
+                'last_refresh_latency': self._last_latency,
+                'avg_refresh_latency': self._latency_total / self._refreshes if self._refreshes else None,
+                'max_refresh_latency': self._latency_max if self._refreshes else None,
+                'checked_at': datetime.now(timezone.utc).isoformat(),
+            }
+
+    def start(self):
+        """Inicia a renovação em segundo plano (idempotente)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name='credential-broker', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Para a renovação em segundo plano"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _refresh_wait(self, refreshed, unknown_wait):
+        """
+        Segundos até a próxima renovação em segundo plano
+
+        Logo após uma renovação a espera nunca é zero: um token novo que vive
+        menos que `refresh_margin` é renovado na metade da validade (mínimo
+        `min_refresh_interval`), e sem expiração conhecida espera `unknown_wait`.
+        """
+        expires_in = self.expires_in()
+        if expires_in is None:
+            return unknown_wait if refreshed else 0
+        wait = expires_in - self.refresh_margin
+        if refreshed:
+            wait = max(self.min_refresh_interval, wait, expires_in / 2)
+        return wait
+
+    def _run(self):
+        retry = self.retry_interval
+        unknown_wait = self.min_refresh_interval
+        refreshed = False
+        while not self._stop_event.is_set():
+            wait = self._refresh_wait(refreshed, unknown_wait)
+            if wait > 0:
+                if refreshed and self.expires_in() is None:
+                    # Expiração desconhecida: espera dobra a cada renovação (até 1h)
+                    unknown_wait = min(3600, unknown_wait * 2)
+                refreshed = False
+                self._stop_event.wait(wait)
+                continue
+
+            if self.refresh_now():
+                retry = self.retry_interval
+                refreshed = True
+                if self.expires_in() is not None:
+                    unknown_wait = self.min_refresh_interval
+            else:
+                self._stop_event.wait(retry)
+                retry = min(self.max_retry_interval, retry * 2)
+
+
+_brokers = {}
+_brokers_lock = threading.Lock()
+
+
+def get_credential_broker(token_file=DEFAULT_TOKEN_FILE, credentials_file='credentials/credentials.json'):
+    """Broker compartilhado pelo processo para o arquivo de token"""
+    key = os.path.abspath(os.path.splitext(token_file)[0])
+    with _brokers_lock:
+        if key not in _brokers:
+            _brokers[key] = CredentialBroker(token_file, credentials_file)
+        return _brokers[key]
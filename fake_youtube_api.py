@@ -0,0 +1,843 @@
+"""
+Servidor local que imita a YouTube Data API para testes e medições
+Implementa os endpoints usados pelo projeto (liveBroadcasts, liveStreams, videos,
+batch, discovery e o endpoint de token OAuth) e um receptor RTMP mínimo que
+controla o status dos streams
+
+Uso:
+    python fake_youtube_api.py --port 8765 --rtmp-port 1935 --latency 0.1
+
+    YOUTUBE_API_BASE_URL=http://127.0.0.1:8765/ \\
+    YOUTUBE_RTMP_URL=rtmp://127.0.0.1:1935/live2 \\
+    YOUTUBE_TOKEN_URI=http://127.0.0.1:8765/token python main.py --morning-now
+"""
+import io
+import sys
+import json
+import time
+import uuid
+import random
+import struct
+import socket
+import argparse
+import threading
+from datetime import datetime, timezone
+from email.parser import BytesParser
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from googleapiclient import discovery_cache
+
+
+FIXED_STREAM_KEY = "19cr-ehfp-pycp-m8yj-2m85"
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+def _new_id():
+    return uuid.uuid4().hex[:22]
+
+
+class FakeApiError(Exception):
+    """Erro no formato da API do Google ({"error": {"code", "errors": [{"reason"}]}})"""
+
+    def __init__(self, status, reason, message=''):
+        super().__init__(message or reason)
+        self.status = status
+        self.reason = reason
+        self.message = message or reason
+
+    def to_json(self):
+        return {'error': {'code': self.status, 'message': self.message,
+                          'errors': [{'domain': 'youtube.api', 'reason': self.reason,
+                                      'message': self.message}]}}
+
+
+class FakeYouTubeState:
+    """
+    Estado em memória de broadcasts, streams e vídeos
+
+    Ciclo de vida dos broadcasts: created -> ready (bind) -> testStarting ->
+    testing -> liveStarting -> live -> complete. As etapas *Starting duram
+    `start_delay` segundos. O status do stream ('active'/'inactive') vem do
+    receptor RTMP (ou de set_publishing).
+    """
+
+    def __init__(self, start_delay=2.0, stream_key=FIXED_STREAM_KEY, rtmp_url='rtmp://127.0.0.1:1935/live2',
+                 token_lifetime=3600):
+        self.start_delay = start_delay
+        self.token_lifetime = token_lifetime
+        self.stream_key = stream_key
+        self.rtmp_url = rtmp_url
+        self.broadcasts = {}
+        self.streams = {}
+        self.videos = {}
+        self.uploads = {}
+        self.publishing = {}
+        self.tokens = []
+        self.events = []
+        self.calls = {}
+        self._errors = []
+        self._lock = threading.RLock()
+
+    # ---- controle (erros injetados, eventos, contadores) ----
+
+    def inject_error(self, endpoint, status=500, reason='backendError', count=1):
+        """Faz as próximas `count` chamadas a `endpoint` ('*' = qualquer) falharem"""
+        with self._lock:
+            self._errors.append({'endpoint': endpoint, 'status': status,
+                                 'reason': reason, 'count': count})
+
+    def check_call(self, endpoint):
+        """Conta a chamada e levanta o erro injetado, se houver"""
+        with self._lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+            for rule in self._errors:
+                if rule['endpoint'] in (endpoint, '*') and rule['count'] > 0:
+                    rule['count'] -= 1
+                    raise FakeApiError(rule['status'], rule['reason'], f"Erro injetado em {endpoint}")
+            self._errors = [rule for rule in self._errors if rule['count'] > 0]
+
+    def _event(self, kind, resource_id, status):
+        self.events.append({'time': time.time(), 'kind': kind, 'id': resource_id, 'status': status})
+
+    def snapshot(self):
+        """Estado completo (usado por GET /_fake/state)"""
+        with self._lock:
+            self._advance()
+            broadcasts = {bid: {k: v for k, v in broadcast.items() if not k.startswith('_')}
+                          for bid, broadcast in self.broadcasts.items()}
+            return {'broadcasts': broadcasts, 'streams': self.streams, 'videos': self.videos,
+                    'publishing': self.publishing, 'tokens': self.tokens, 'events': self.events, 'calls': self.calls,
+                    'go_live_latency': self.go_live_latency()}
+
+    def go_live_latency(self):
+        """Segundos entre a criação e o 'live' de cada broadcast"""
+        created = {}
+        latency = {}
+        for event in self.events:
+            if event['kind'] != 'broadcast':
+                continue
+            if event['status'] == 'created':
+                created[event['id']] = event['time']
+            elif event['status'] == 'live' and event['id'] in created:
+                latency[event['id']] = round(event['time'] - created[event['id']], 3)
+        return latency
+
+    # ---- OAuth ----
+
+    def issue_token(self, form):
+        """
+        Troca um refresh_token por um access token que vale `token_lifetime` segundos
+
+        Qualquer refresh_token não vazio é aceito; erros seguem o formato OAuth
+        ({"error": "invalid_grant"}) quando o grant é inválido.
+        """
+        self.check_call('oauth2.token')
+        if form.get('grant_type') != 'refresh_token' or not form.get('refresh_token'):
+            raise FakeApiError(400, 'invalid_grant', 'grant_type=refresh_token e refresh_token obrigatórios')
+        with self._lock:
+            token = {'access_token': 'fake-' + uuid.uuid4().hex, 'issued_at': time.time(),
+                     'expires_in': self.token_lifetime}
+            self.tokens.append(token)
+        return {'access_token': token['access_token'], 'expires_in': token['expires_in'],
+                'token_type': 'Bearer', 'scope': form.get('scope', '')}
+
+    # ---- streams ----
+
+    def _stream_resource(self, stream_id, title, stream_key):
+        return {
+            'kind': 'youtube#liveStream',
+            'id': stream_id,
+            'snippet': {'title': title, 'publishedAt': _now_iso()},
+            'cdn': {
+                'ingestionType': 'rtmp',
+                'resolution': '1080p',
+                'frameRate': '30fps',
+                'ingestionInfo': {'streamName': stream_key, 'streamKey': stream_key,
+                                  'ingestionAddress': self.rtmp_url},
+            },
+            'status': {'streamStatus': 'ready', 'healthStatus': {'status': 'noData'}},
+        }
+
+    def insert_stream(self, body):
+        with self._lock:
+            stream_id = _new_id()
+            self.streams[stream_id] = self._stream_resource(
+                stream_id, body.get('snippet', {}).get('title', ''), self.stream_key
+            )
+            self._refresh_stream(self.streams[stream_id])
+            self._event('stream', stream_id, 'created')
+            return self.streams[stream_id]
+
+    def ensure_stream(self, stream_id):
+        """Streams permanentes salvos em stream_config.json são criados sob demanda"""
+        with self._lock:
+            if stream_id not in self.streams:
+                self.streams[stream_id] = self._stream_resource(stream_id, 'Stream permanente', self.stream_key)
+                self._refresh_stream(self.streams[stream_id])
+            return self.streams[stream_id]
+
+    def list_streams(self, ids):
+        with self._lock:
+            return [self.ensure_stream(stream_id) for stream_id in ids]
+
+    def _refresh_stream(self, stream):
+        key = stream['cdn']['ingestionInfo']['streamKey']
+        status = stream['status']
+        if self.publishing.get(key, 0) > 0:
+            status['streamStatus'] = 'active'
+            status['healthStatus'] = {'status': 'good'}
+        elif status['streamStatus'] == 'active':
+            status['streamStatus'] = 'inactive'
+            status['healthStatus'] = {'status': 'noData'}
+
+    def set_publishing(self, stream_key, active):
+        """Chamado pelo receptor RTMP quando um publish começa/termina"""
+        with self._lock:
+            count = self.publishing.get(stream_key, 0) + (1 if active else -1)
+            self.publishing[stream_key] = max(0, count)
+            for stream in self.streams.values():
+                if stream['cdn']['ingestionInfo']['streamKey'] == stream_key:
+                    self._refresh_stream(stream)
+                    self._event('stream', stream['id'], stream['status']['streamStatus'])
+
+    # ---- broadcasts ----
+
+    def insert_broadcast(self, body):
+        with self._lock:
+            broadcast_id = _new_id()
+            snippet = dict(body.get('snippet', {}))
+            snippet.setdefault('publishedAt', _now_iso())
+            status = dict(body.get('status', {}))
+            status.update({'lifeCycleStatus': 'created', 'recordingStatus': 'notRecording'})
+            content_details = dict(body.get('contentDetails', {}))
+            content_details.setdefault('monitorStream', {'enableMonitorStream': True})
+            self.broadcasts[broadcast_id] = {
+                'kind': 'youtube#liveBroadcast',
+                'id': broadcast_id,
+                'snippet': snippet,
+                'status': status,
+                'contentDetails': content_details,
+            }
+            self._event('broadcast', broadcast_id, 'created')
+            return self.broadcasts[broadcast_id]
+
+    def _broadcast(self, broadcast_id):
+        broadcast = self.broadcasts.get(broadcast_id)
+        if broadcast is None:
+            raise FakeApiError(404, 'liveBroadcastNotFound', f"Broadcast {broadcast_id} não encontrado")
+        return broadcast
+
+    def list_broadcasts(self, ids):
+        with self._lock:
+            self._advance()
+            return [self.broadcasts[b] for b in ids if b in self.broadcasts]
+
+    def bind(self, broadcast_id, stream_id):
+        with self._lock:
+            broadcast = self._broadcast(broadcast_id)
+            self.ensure_stream(stream_id)
+            broadcast['contentDetails']['boundStreamId'] = stream_id
+            if broadcast['status']['lifeCycleStatus'] == 'created':
+                self._set_status(broadcast, 'ready')
+            return broadcast
+
+    def _set_status(self, broadcast, status):
+        broadcast['status']['lifeCycleStatus'] = status
+        broadcast.pop('_pending', None)
+        if status in ('liveStarting', 'testStarting'):
+            target = 'live' if status == 'liveStarting' else 'testing'
+            broadcast['_pending'] = (target, time.monotonic() + self.start_delay)
+        if status == 'live':
+            broadcast['status']['recordingStatus'] = 'recording'
+            broadcast['snippet']['actualStartTime'] = _now_iso()
+        elif status == 'complete':
+            broadcast['status']['recordingStatus'] = 'recorded'
+            broadcast['snippet']['actualEndTime'] = _now_iso()
+        self._event('broadcast', broadcast['id'], status)
+
+    def _advance(self):
+        """Conclui transições *Starting cujo prazo passou"""
+        now = time.monotonic()
+        for broadcast in self.broadcasts.values():
+            pending = broadcast.get('_pending')
+            if pending and now >= pending[1]:
+                self._set_status(broadcast, pending[0])
+
+    def transition(self, broadcast_id, target):
+        with self._lock:
+            self._advance()
+            broadcast = self._broadcast(broadcast_id)
+            current = broadcast['status']['lifeCycleStatus']
+            monitor = broadcast['contentDetails'].get('monitorStream', {}).get('enableMonitorStream', True)
+
+            if current == target or (current, target) in (('liveStarting', 'live'), ('testStarting', 'testing')):
+                raise FakeApiError(403, 'redundantTransition', f"Broadcast já está em {current}")
+
+            allowed = {
+                'testing': ('ready',),
+                'live': ('testing',) if monitor else ('ready', 'testing'),
+                'complete': ('live', 'testing'),
+            }.get(target)
+            if allowed is None:
+                raise FakeApiError(400, 'invalidBroadcastStatus', f"Status inválido: {target}")
+            if current not in allowed:
+                raise FakeApiError(403, 'invalidTransition', f"Transição inválida: {current} -> {target}")
+
+            if target in ('testing', 'live'):
+                stream = self.streams.get(broadcast['contentDetails'].get('boundStreamId', ''))
+                if not stream:
+                    raise FakeApiError(403, 'invalidTransition', "Broadcast sem stream vinculado")
+                self._refresh_stream(stream)
+                if stream['status']['streamStatus'] != 'active':
+                    raise FakeApiError(403, 'errorStreamInactive', "Stream não está ativo")
+                self._set_status(broadcast, 'testStarting' if target == 'testing' else 'liveStarting')
+            else:
+                self._set_status(broadcast, 'complete')
+            return broadcast
+
+    # ---- vídeos ----
+
+    def start_upload(self, body):
+        with self._lock:
+            session_id = _new_id()
+            self.uploads[session_id] = {'body': body, 'data': io.BytesIO(), 'size': 0}
+            return session_id
+
+    def upload_chunk(self, session_id, first, data, total):
+        """
+        Recebe um chunk do upload resumable
+
+        Returns:
+            Recurso do vídeo se o upload terminou, senão o número de bytes recebidos
+        """
+        with self._lock:
+            upload = self.uploads.get(session_id)
+            if upload is None:
+                raise FakeApiError(404, 'uploadSessionNotFound', "Sessão de upload não encontrada")
+            if first is not None:
+                if first != upload['size']:
+                    raise FakeApiError(400, 'badContentRange', f"Offset {first} != {upload['size']}")
+                upload['data'].write(data)
+                upload['size'] += len(data)
+            if total is not None and upload['size'] == total:
+                del self.uploads[session_id]
+                return self.insert_video(upload['body'], upload['size'])
+            return upload['size']
+
+    def insert_video(self, body, size):
+        with self._lock:
+            video_id = _new_id()[:11]
+            video = {'kind': 'youtube#video', 'id': video_id, 'snippet': body.get('snippet', {}),
+                     'status': dict(body.get('status', {}), uploadStatus='uploaded'), 'size': size}
+            self.videos[video_id] = video
+            self._event('video', video_id, 'uploaded')
+            return {k: v for k, v in video.items() if k != 'size'}
+
+
+def _filter_parts(resource, part):
+    """Mantém só as partes pedidas em `part` (além de kind/id)"""
+    parts = {p.strip() for p in (part or '').split(',') if p.strip()}
+    return {k: v for k, v in resource.items()
+            if not k.startswith('_') and (k in ('kind', 'id') or k in parts)}
+
+
+def _list_response(kind, items, part):
+    return {'kind': f'youtube#{kind}ListResponse',
+            'pageInfo': {'totalResults': len(items), 'resultsPerPage': len(items)},
+            'items': [_filter_parts(item, part) for item in items]}
+
+
+class FakeYouTubeApi:
+    """Roteia requisições HTTP (diretas ou dentro de um batch) para o estado"""
+
+    def __init__(self, state, base_url, latency=0.0):
+        self.state = state
+        self.base_url = base_url
+        self.latency = latency
+
+    def discovery_document(self):
+        document = json.loads(discovery_cache.get_static_doc('youtube', 'v3'))
+        document['rootUrl'] = self.base_url
+        document['baseUrl'] = self.base_url
+        return document
+
+    def handle(self, method, raw_path, headers, body):
+        """
+        Returns:
+            (status, headers, corpo em bytes)
+        """
+        parsed = urlparse(raw_path)
+        path = parsed.path.rstrip('/')
+        query = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        try:
+            if path == '/discovery/v1/apis/youtube/v3/rest':
+                return self._json(200, self.discovery_document())
+            if path == '/batch':
+                return self._batch(headers, body)
+            if path.startswith('/_fake/'):
+                return self._control(method, path, body)
+            if path == '/token' and method == 'POST':
+                return self._token(body)
+            if path.startswith('/upload/session/'):
+                return self._upload_chunk(path.rsplit('/', 1)[1], headers, body)
+            if path == '/upload/youtube/v3/videos':
+                return self._upload_start(query, headers, body)
+            return self._json(200, self._api(method, path, query, body))
+        except FakeApiError as e:
+            return self._json(e.status, e.to_json())
+
+    def _token(self, body):
+        """Endpoint de token OAuth (formulário x-www-form-urlencoded, como o do Google)"""
+        form = {k: v[-1] for k, v in parse_qs(body.decode('utf-8')).items()}
+        try:
+            return self._json(200, self.state.issue_token(form))
+        except FakeApiError as e:
+            if e.status >= 500:
+                raise
+            return self._json(e.status, {'error': e.reason, 'error_description': e.message})
+
+    def _json(self, status, data, extra_headers=None):
+        headers = {'Content-Type': 'application/json; charset=UTF-8'}
+        headers.update(extra_headers or {})
+        return status, headers, json.dumps(data).encode('utf-8')
+
+    def _api(self, method, path, query, body):
+        routes = {
+            ('GET', '/youtube/v3/liveBroadcasts'): 'liveBroadcasts.list',
+            ('POST', '/youtube/v3/liveBroadcasts'): 'liveBroadcasts.insert',
+            ('POST', '/youtube/v3/liveBroadcasts/bind'): 'liveBroadcasts.bind',
+            ('POST', '/youtube/v3/liveBroadcasts/transition'): 'liveBroadcasts.transition',
+            ('GET', '/youtube/v3/liveStreams'): 'liveStreams.list',
+            ('POST', '/youtube/v3/liveStreams'): 'liveStreams.insert',
+        }
+        endpoint = routes.get((method, path))
+        if endpoint is None:
+            raise FakeApiError(404, 'notFound', f"{method} {path} não implementado")
+        self.state.check_call(endpoint)
+
+        part = query.get('part', '')
+        ids = [i for i in query.get('id', '').split(',') if i]
+        payload = json.loads(body or b'{}')
+
+        if endpoint == 'liveBroadcasts.list':
+            return _list_response('liveBroadcast', self.state.list_broadcasts(ids), part)
+        if endpoint == 'liveBroadcasts.insert':
+            return _filter_parts(self.state.insert_broadcast(payload), part)
+        if endpoint == 'liveBroadcasts.bind':
+            return _filter_parts(self.state.bind(query.get('id'), query.get('streamId')), part)
+        if endpoint == 'liveBroadcasts.transition':
+            return _filter_parts(self.state.transition(query.get('id'), query.get('broadcastStatus')), part)
+        if endpoint == 'liveStreams.list':
+            return _list_response('liveStream', self.state.list_streams(ids), part)
+        return _filter_parts(self.state.insert_stream(payload), part)
+
+    def _upload_start(self, query, headers, body):
+        self.state.check_call('videos.insert')
+        upload_type = query.get('uploadType', 'resumable')
+        if upload_type == 'resumable':
+            session_id = self.state.start_upload(json.loads(body or b'{}'))
+            return 200, {'Location': f"{self.base_url}upload/session/{session_id}",
+                         'Content-Length': '0'}, b''
+        # Upload multipart (metadados + mídia na mesma requisição)
+        message = BytesParser().parsebytes(
+            f"Content-Type: {headers.get('Content-Type', '')}\r\n\r\n".encode() + body
+        )
+        parts = message.get_payload() if message.is_multipart() else []
+        metadata = json.loads(parts[0].get_payload(decode=True) or b'{}') if parts else {}
+        media = parts[1].get_payload(decode=True) if len(parts) > 1 else b''
+        return self._json(200, self.state.insert_video(metadata, len(media)))
+
+    def _upload_chunk(self, session_id, headers, body):
+        content_range = headers.get('Content-Range', '')
+        first = total = None
+        if content_range.startswith('bytes '):
+            span, _, size = content_range[len('bytes '):].partition('/')
+            if span != '*':
+                first = int(span.split('-')[0])
+            if size != '*':
+                total = int(size)
+        result = self.state.upload_chunk(session_id, first, body, total)
+        if isinstance(result, dict):
+            return self._json(200, result)
+        range_headers = {'Range': f'bytes=0-{result - 1}'} if result else {}
+        range_headers['Content-Length'] = '0'
+        return 308, range_headers, b''
+
+    def _batch(self, headers, body):
+        content_type = headers.get('Content-Type', '')
+        message = BytesParser().parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+        if not message.is_multipart():
+            raise FakeApiError(400, 'badRequest', "Batch sem partes")
+
+        boundary = uuid.uuid4().hex
+        output = io.BytesIO()
+        for part in message.get_payload():
+            raw = part.get_payload(decode=True) or b''
+            request_line, _, rest = raw.partition(b'\n')
+            sub_method, sub_path, _ = request_line.decode().strip().split(' ', 2)
+            header_block, _, sub_body = rest.replace(b'\r\n', b'\n').partition(b'\n\n')
+            sub_headers = {}
+            for line in header_block.decode().split('\n'):
+                if ':' in line:
+                    name, value = line.split(':', 1)
+                    sub_headers[name.strip()] = value.strip()
+            status, response_headers, response_body = self.handle(sub_method, sub_path, sub_headers, sub_body)
+
+            content_id = part.get('Content-ID', '<>')
+            output.write(f"--{boundary}\r\nContent-Type: application/http\r\n"
+                         f"Content-ID: <response-{content_id[1:-1]}>\r\n\r\n".encode())
+            output.write(f"HTTP/1.1 {status} {'OK' if status < 400 else 'Error'}\r\n".encode())
+            for name, value in response_headers.items():
+                output.write(f"{name}: {value}\r\n".encode())
+            output.write(b"\r\n" + response_body + b"\r\n")
+        output.write(f"--{boundary}--\r\n".encode())
+        return 200, {'Content-Type': f'multipart/mixed; boundary={boundary}'}, output.getvalue()
+
+    def _control(self, method, path, body):
+        """Endpoints de controle: estado, latência, erros e publish manual"""
+        payload = json.loads(body or b'{}') if method == 'POST' else {}
+        if path == '/_fake/state':
+            return self._json(200, self.state.snapshot())
+        if path == '/_fake/latency' and method == 'POST':
+            self.latency = float(payload.get('seconds', 0))
+            return self._json(200, {'latency': self.latency})
+        if path == '/_fake/errors' and method == 'POST':
+            self.state.inject_error(payload.get('endpoint', '*'), int(payload.get('status', 500)),
+                                    payload.get('reason', 'backendError'), int(payload.get('count', 1)))
+            return self._json(200, {'ok': True})
+        if path == '/_fake/token_lifetime' and method == 'POST':
+            self.state.token_lifetime = int(payload.get('seconds', 3600))
+            return self._json(200, {'token_lifetime': self.state.token_lifetime})
+        if path == '/_fake/publish' and method == 'POST':
+            self.state.set_publishing(payload.get('stream_key', self.state.stream_key),
+                                      bool(payload.get('active', True)))
+            return self._json(200, {'ok': True})
+        raise FakeApiError(404, 'notFound', path)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _dispatch(self):
+        length = int(self.headers.get('Content-Length', 0) or 0)
+        body = self.rfile.read(length) if length else b''
+        api = self.server.api
+        if api.latency > 0 and not self.path.startswith('/_fake/'):
+            time.sleep(api.latency)
+        status, headers, response_body = api.handle(self.command, self.path, self.headers, body)
+        self.send_response(status)
+        for name, value in headers.items():
+            if name.lower() != 'content-length':
+                self.send_header(name, value)
+        self.send_header('Content-Length', str(len(response_body)))
+        self.end_headers()
+        self.wfile.write(response_body)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _dispatch
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+# ---- RTMP ----
+
+def _amf0_encode(value):
+    if value is None:
+        return b'\x05'
+    if isinstance(value, bool):
+        return b'\x01' + (b'\x01' if value else b'\x00')
+    if isinstance(value, (int, float)):
+        return b'\x00' + struct.pack('>d', float(value))
+    if isinstance(value, str):
+        data = value.encode('utf-8')
+        return b'\x02' + struct.pack('>H', len(data)) + data
+    if isinstance(value, dict):
+        out = b'\x03'
+        for key, item in value.items():
+            data = key.encode('utf-8')
+            out += struct.pack('>H', len(data)) + data + _amf0_encode(item)
+        return out + b'\x00\x00\x09'
+    raise TypeError(f"Tipo AMF0 não suportado: {type(value)}")
+
+
+def _amf0_decode_all(data):
+    values = []
+    offset = 0
+    while offset < len(data):
+        value, offset = _amf0_decode(data, offset)
+        values.append(value)
+    return values
+
+
+def _amf0_decode(data, offset):
+    marker = data[offset]
+    offset += 1
+    if marker == 0x00:
+        return struct.unpack_from('>d', data, offset)[0], offset + 8
+    if marker == 0x01:
+        return bool(data[offset]), offset + 1
+    if marker == 0x02:
+        length = struct.unpack_from('>H', data, offset)[0]
+        return data[offset + 2:offset + 2 + length].decode('utf-8', 'replace'), offset + 2 + length
+    if marker in (0x03, 0x08):
+        if marker == 0x08:
+            offset += 4
+        obj = {}
+        while True:
+            length = struct.unpack_from('>H', data, offset)[0]
+            offset += 2
+            if length == 0 and data[offset] == 0x09:
+                return obj, offset + 1
+            key = data[offset:offset + length].decode('utf-8', 'replace')
+            obj[key], offset = _amf0_decode(data, offset + length)
+    if marker in (0x05, 0x06):
+        return None, offset
+    if marker == 0x0A:
+        count = struct.unpack_from('>I', data, offset)[0]
+        offset += 4
+        items = []
+        for _ in range(count):
+            item, offset = _amf0_decode(data, offset)
+            items.append(item)
+        return items, offset
+    raise ValueError(f"Marcador AMF0 não suportado: {marker:#x}")
+
+
+class _RtmpConnection:
+    """Uma conexão RTMP: handshake, leitura de chunks e respostas aos comandos"""
+
+    def __init__(self, sock, state):
+        self.sock = sock
+        self.state = state
+        self.in_chunk_size = 128
+        self.out_chunk_size = 128
+        self.ack_window = 0
+        self.received = 0
+        self.last_ack = 0
+        self.published_key = None
+        self._streams = {}
+
+    def _recv(self, size):
+        data = b''
+        while len(data) < size:
+            chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("Conexão RTMP encerrada")
+            data += chunk
+        self.received += size
+        if self.ack_window and self.received - self.last_ack >= self.ack_window:
+            self.last_ack = self.received
+            self._send(2, 3, 0, struct.pack('>I', self.received & 0xFFFFFFFF))
+        return data
+
+    def _handshake(self):
+        self._recv(1)  # C0 (versão)
+        c1 = self._recv(1536)
+        s1 = struct.pack('>II', 0, 0) + bytes(random.getrandbits(8) for _ in range(1528))
+        self.sock.sendall(b'\x03' + s1 + c1)
+        self._recv(1536)  # C2
+
+    def _send(self, csid, msg_type, stream_id, payload, timestamp=0):
+        header = bytes([csid & 0x3F]) + struct.pack('>I', timestamp)[1:] + struct.pack('>I', len(payload))[1:]
+        header += bytes([msg_type]) + struct.pack('<I', stream_id)
+        out = header + payload[:self.out_chunk_size]
+        for offset in range(self.out_chunk_size, len(payload), self.out_chunk_size):
+            out += bytes([0xC0 | (csid & 0x3F)]) + payload[offset:offset + self.out_chunk_size]
+        self.sock.sendall(out)
+
+    def _send_command(self, stream_id, *values):
+        self._send(3 if stream_id == 0 else 5, 20, stream_id, b''.join(_amf0_encode(v) for v in values))
+
+    def _read_message(self):
+        """Lê chunks até completar uma mensagem; retorna (tipo, stream_id, payload)"""
+        while True:
+            first = self._recv(1)[0]
+            fmt, csid = first >> 6, first & 0x3F
+            if csid == 0:
+                csid = 64 + self._recv(1)[0]
+            elif csid == 1:
+                extra = self._recv(2)
+                csid = 64 + extra[0] + extra[1] * 256
+
+            stream = self._streams.setdefault(csid, {'timestamp': 0, 'length': 0, 'type': 0,
+                                                     'stream_id': 0, 'extended': False, 'buffer': b''})
+            if fmt == 0:
+                header = self._recv(11)
+                timestamp = int.from_bytes(header[0:3], 'big')
+                stream['length'] = int.from_bytes(header[3:6], 'big')
+                stream['type'] = header[6]
+                stream['stream_id'] = struct.unpack('<I', header[7:11])[0]
+            elif fmt == 1:
+                header = self._recv(7)
+                timestamp = int.from_bytes(header[0:3], 'big')
+                stream['length'] = int.from_bytes(header[3:6], 'big')
+                stream['type'] = header[6]
+            elif fmt == 2:
+                timestamp = int.from_bytes(self._recv(3), 'big')
+            else:
+                timestamp = 0xFFFFFF if stream['extended'] else 0
+
+            stream['extended'] = timestamp == 0xFFFFFF
+            if stream['extended']:
+                self._recv(4)
+
+            remaining = stream['length'] - len(stream['buffer'])
+            stream['buffer'] += self._recv(min(self.in_chunk_size, remaining))
+            if len(stream['buffer']) >= stream['length']:
+                payload, stream['buffer'] = stream['buffer'], b''
+                return stream['type'], stream['stream_id'], payload
+
+    def serve(self):
+        try:
+            self._handshake()
+            while True:
+                msg_type, stream_id, payload = self._read_message()
+                if msg_type == 1:
+                    self.in_chunk_size = struct.unpack('>I', payload[:4])[0] & 0x7FFFFFFF
+                elif msg_type == 5:
+                    self.ack_window = struct.unpack('>I', payload[:4])[0]
+                elif msg_type == 20:
+                    self._handle_command(stream_id, _amf0_decode_all(payload))
+        except (ConnectionError, OSError, ValueError, struct.error):
+            pass
+        finally:
+            if self.published_key is not None:
+                self.state.set_publishing(self.published_key, False)
+            self.sock.close()
+
+    def _handle_command(self, stream_id, values):
+        name = values[0] if values else ''
+        transaction = values[1] if len(values) > 1 else 0
+        if name == 'connect':
+            self._send(2, 5, 0, struct.pack('>I', 5000000))
+            self._send(2, 6, 0, struct.pack('>IB', 5000000, 2))
+            self._send_command(0, '_result', transaction,
+                               {'fmsVer': 'FMS/3,0,1,123', 'capabilities': 31},
+                               {'level': 'status', 'code': 'NetConnection.Connect.Success',
+                                'description': 'Connection succeeded.', 'objectEncoding': 0})
+        elif name == 'createStream':
+            self._send_command(0, '_result', transaction, None, 1)
+        elif name == 'publish':
+            key = values[3] if len(values) > 3 else ''
+            if self.published_key is None:
+                self.published_key = key
+                self.state.set_publishing(key, True)
+            self._send_command(stream_id or 1, 'onStatus', 0, None,
+                               {'level': 'status', 'code': 'NetStream.Publish.Start',
+                                'description': f'{key} is now published.', 'details': key})
+        elif name in ('FCUnpublish', 'deleteStream', 'closeStream'):
+            if self.published_key is not None:
+                self.state.set_publishing(self.published_key, False)
+                self.published_key = None
+        elif name in ('releaseStream', 'FCPublish'):
+            self._send_command(0, '_result', transaction, None, None)
+
+
+class RtmpSink:
+    """Receptor RTMP mínimo: aceita publish, descarta a mídia e atualiza o status dos streams"""
+
+    def __init__(self, state, host='127.0.0.1', port=1935):
+        self.state = state
+        self.host = host
+        self.port = port
+        self._socket = None
+
+    def start(self):
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((self.host, self.port))
+        self._socket.listen(8)
+        self.port = self._socket.getsockname()[1]
+        threading.Thread(target=self._accept_loop, name='fake-rtmp', daemon=True).start()
+        return self
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn, _ = self._socket.accept()
+            except OSError:
+                return
+            threading.Thread(target=_RtmpConnection(conn, self.state).serve, daemon=True).start()
+
+    def stop(self):
+        if self._socket:
+            self._socket.close()
+
+
+class FakeYouTubeServer:
+    """
+    API falsa + receptor RTMP rodando em threads
+
+    Uso em testes:
+        server = FakeYouTubeServer(latency=0.05, token_lifetime=120).start()
+        os.environ['YOUTUBE_API_BASE_URL'] = server.base_url
+        os.environ['YOUTUBE_RTMP_URL'] = server.rtmp_url
+        os.environ['YOUTUBE_TOKEN_URI'] = server.token_uri
+        server.state.inject_error('liveBroadcasts.transition', 503)
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, rtmp_port=0, latency=0.0, start_delay=2.0,
+                 verbose=False, token_lifetime=3600):
+        self.state = FakeYouTubeState(start_delay=start_delay, token_lifetime=token_lifetime)
+        self.rtmp = RtmpSink(self.state, host, rtmp_port)
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.verbose = verbose
+        self.host = host
+        self.base_url = f"http://{host}:{self.httpd.server_address[1]}/"
+        self.httpd.api = FakeYouTubeApi(self.state, self.base_url, latency)
+
+    @property
+    def rtmp_url(self):
+        return f"rtmp://{self.host}:{self.rtmp.port}/live2"
+
+    @property
+    def token_uri(self):
+        return self.base_url + 'token'
+
+    def start(self):
+        self.rtmp.start()
+        self.state.rtmp_url = self.rtmp_url
+        threading.Thread(target=self.httpd.serve_forever, name='fake-youtube-api', daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.rtmp.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor local que imita a YouTube Data API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rtmp-port', type=int, default=1935)
+    parser.add_argument('--latency', type=float, default=0.0, help='Latência de cada requisição (segundos)')
+    parser.add_argument('--start-delay', type=float, default=2.0,
+                        help='Duração de testStarting/liveStarting (segundos)')
+    parser.add_argument('--token-lifetime', type=int, default=3600,
+                        help='Validade dos access tokens emitidos em /token (segundos)')
+    parser.add_argument('--verbose', action='store_true', help='Loga cada requisição')
+    args = parser.parse_args()
+
+    server = FakeYouTubeServer(args.host, args.port, args.rtmp_port, args.latency,
+                               args.start_delay, args.verbose, args.token_lifetime).start()
+    print(f"🧪 API falsa do YouTube em {server.base_url}")
+    print(f"📡 Receptor RTMP em {server.rtmp_url}")
+    print(f"💡 export YOUTUBE_API_BASE_URL={server.base_url}")
+    print(f"💡 export YOUTUBE_RTMP_URL={server.rtmp_url}")
+    print(f"💡 export YOUTUBE_TOKEN_URI={server.token_uri}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
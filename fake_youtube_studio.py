@@ -0,0 +1,206 @@
+"""
+Servidor local que imita as páginas do YouTube Studio usadas pela automação web
+Serve as páginas de fixtures/youtube_studio (painel, login e sala de controle
+da live) e registra os cliques (ajuda, início automático, "Transmitir ao vivo").
+A sala de controle carrega imagens, vídeo e fonte de outro host (localhost),
+com tamanho e latência configuráveis, para medir o perfil leve do navegador
+
+Uso:
+    python fake_youtube_studio.py --port 8766 --render-delay 0.5 --enable-delay 3
+
+    YOUTUBE_STUDIO_URL=http://127.0.0.1:8766/ YOUTUBE_WEB_URL=http://127.0.0.1:8766/ \\
+    GOOGLE_ACCOUNTS_URL=http://127.0.0.1:8766/signin python salvar_login_youtube.py
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, quote
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'youtube_studio')
+
+_LIVE_PATH = re.compile(r'^/video/([\w-]+)/livestreaming/?$')
+
+_ASSET_TYPES = {
+    '.jpg': 'image/jpeg', '.webp': 'image/webp', '.mp4': 'video/mp4', '.woff2': 'font/woff2',
+}
+
+
+class FakeStudioState:
+    """Configuração das páginas e eventos registrados pelos cliques"""
+
+    def __init__(self, render_delay=0.5, enable_delay=3.0, require_login=False,
+                 asset_kb=200, asset_delay=0.3):
+        """
+        Args:
+            render_delay: Atraso até a sala de controle ser montada (segundos)
+            enable_delay: Atraso até o botão "Transmitir ao vivo" ser habilitado (segundos)
+            require_login: Redireciona para /signin sem o cookie de sessão
+            asset_kb: Tamanho de cada imagem/vídeo/fonte (KB)
+            asset_delay: Latência de cada imagem/vídeo/fonte (segundos)
+        """
+        self.render_delay = render_delay
+        self.enable_delay = enable_delay
+        self.require_login = require_login
+        self.asset_kb = asset_kb
+        self.asset_delay = asset_delay
+        self.assets_url = None
+        self.asset_requests = 0
+        self.events = []
+        self._lock = threading.Lock()
+
+    def record(self, event, broadcast_id=None):
+        with self._lock:
+            self.events.append({'event': event, 'broadcast_id': broadcast_id, 'time': time.time()})
+
+    def count_asset(self):
+        with self._lock:
+            self.asset_requests += 1
+
+    def events_named(self, event):
+        with self._lock:
+            return [e for e in self.events if e['event'] == event]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'FakeYouTubeStudio/1.0'
+
+    def log_message(self, format, *args):
+        if getattr(self.server, 'verbose', False):
+            sys.stderr.write(f"🧪 {self.address_string()} {format % args}\n")
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def _logged_in(self):
+        return 'SID=' in (self.headers.get('Cookie') or '')
+
+    def _send(self, status, body=b'', content_type='text/html; charset=utf-8', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _page(self, name, **values):
+        with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+            html = f.read()
+        for key, value in values.items():
+            html = html.replace('{{' + key + '}}', str(value))
+        self._send(200, html.encode('utf-8'))
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path.startswith('/signin'):
+            return self._page('signin.html')
+        if path == '/favicon.ico':
+            return self._send(404)
+        if path.startswith('/_assets/'):
+            return self._asset(path)
+
+        if self.state.require_login and not self._logged_in():
+            return self._send(302, headers={'Location': f"/signin?continue={quote(self.path)}"})
+
+        match = _LIVE_PATH.match(path)
+        if match:
+            return self._page('livestreaming.html', BROADCAST_ID=match.group(1),
+                              ASSETS_URL=self.state.assets_url,
+                              RENDER_DELAY_MS=int(self.state.render_delay * 1000),
+                              ENABLE_DELAY_MS=int(self.state.enable_delay * 1000))
+        if path in ('/', ''):
+            return self._page('studio.html')
+        self._send(404, b'not found', 'text/plain')
+
+    def _asset(self, path):
+        content_type = _ASSET_TYPES.get(os.path.splitext(path)[1])
+        if not content_type:
+            return self._send(404, b'not found', 'text/plain')
+        self.state.count_asset()
+        time.sleep(self.state.asset_delay)
+        self._send(200, os.urandom(self.state.asset_kb * 1024), content_type)
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/_events':
+            return self._send(404, b'not found', 'text/plain')
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return self._send(400, b'invalid json', 'text/plain')
+        self.state.record(payload.get('event'), payload.get('broadcast_id'))
+        self._send(204)
+
+
+class FakeStudioServer:
+    """
+    Páginas falsas do Studio rodando numa thread
+
+    Uso em testes:
+        server = FakeStudioServer(enable_delay=2).start()
+        os.environ['YOUTUBE_STUDIO_URL'] = server.base_url
+        os.environ['YOUTUBE_WEB_URL'] = server.base_url
+        ...
+        assert server.state.events_named('go_live')
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, render_delay=0.5, enable_delay=3.0,
+                 require_login=False, asset_kb=200, asset_delay=0.3, verbose=False):
+        self.state = FakeStudioState(render_delay, enable_delay, require_login, asset_kb, asset_delay)
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.verbose = verbose
+        self.httpd.state = self.state
+        self.base_url = f"http://{host}:{self.httpd.server_address[1]}/"
+        # Recursos pesados vêm de outro host (terceiros), como no Studio
+        self.assets_host = 'localhost' if host == '127.0.0.1' else host
+        self.state.assets_url = f"http://{self.assets_host}:{self.httpd.server_address[1]}/"
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, name='fake-youtube-studio', daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor local que imita as páginas do YouTube Studio')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--render-delay', type=float, default=0.5,
+                        help='Atraso até a sala de controle ser montada (segundos)')
+    parser.add_argument('--enable-delay', type=float, default=3.0,
+                        help='Atraso até o botão "Transmitir ao vivo" ser habilitado (segundos)')
+    parser.add_argument('--require-login', action='store_true', help='Exige login (cookie SID)')
+    parser.add_argument('--asset-kb', type=int, default=200, help='Tamanho de cada imagem/vídeo/fonte (KB)')
+    parser.add_argument('--asset-delay', type=float, default=0.3,
+                        help='Latência de cada imagem/vídeo/fonte (segundos)')
+    parser.add_argument('--verbose', action='store_true', help='Loga cada requisição')
+    args = parser.parse_args()
+
+    server = FakeStudioServer(args.host, args.port, args.render_delay, args.enable_delay,
+                              args.require_login, args.asset_kb, args.asset_delay, args.verbose).start()
+    print(f"🧪 YouTube Studio falso em {server.base_url}")
+    print(f"💡 export YOUTUBE_STUDIO_URL={server.base_url}")
+    print(f"💡 export YOUTUBE_WEB_URL={server.base_url}")
+    print(f"💡 export GOOGLE_ACCOUNTS_URL={server.base_url}signin")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,31 +5,51 @@ Gerencia criação, streaming e encerramento de lives
 import os
 import sys
 import time
+import asyncio
 import subprocess
 import logging
+import weakref
 from datetime import datetime, timedelta, timezone
 from youtube_uploader import YouTubeUploader
-from youtube_automation import YouTubeAutomation
+from browser_pool import get_browser_pool
+from control_plane import FfmpegProcess, AdoptedFfmpeg
 
 
 class LiveManager:
     """Gerenciador de lives no YouTube"""
     
-    def __init__(self):
+    # Instâncias do processo (a fila de uploads reduz a banda enquanto alguma transmite)
+    _instances = weakref.WeakSet()
+    
+    def __init__(self, stream_config_file='credentials/stream_config.json', stream_key=None):
+        """
+        Args:
+            stream_config_file: Stream permanente usado pelas lives deste gerenciador
+            stream_key: Stream key do destino (None = FIXED_STREAM_KEY do youtube_uploader)
+        """
+        self.stream_config_file = stream_config_file
+        self.stream_key = stream_key
         self.uploader = None
         self.current_broadcast_id = None
         self.current_stream_key = None
         self.current_rtmp_url = None
         self.ffmpeg_process = None
-        self.automation = None  # Referência para automação web
         self.logger = logging.getLogger(__name__)
+        LiveManager._instances.add(self)
+    
+    @classmethod
+    def streaming_count(cls):
+        """Quantidade de LiveManagers do processo com ffmpeg transmitindo"""
+        return sum(1 for manager in list(cls._instances)
+                   if manager.ffmpeg_process and manager.ffmpeg_process.poll() is None)
     
     def initialize_uploader(self, max_retries=3, retry_delay=30):
         """Inicializa o uploader do YouTube com retry"""
         for attempt in range(max_retries):
             try:
                 if not self.uploader:
-                    self.uploader = YouTubeUploader()
+                    self.uploader = YouTubeUploader(stream_config_file=self.stream_config_file,
+                                                    stream_key=self.stream_key)
                 return True
             except Exception as e:
                 error_str = str(e).lower()
@@ -115,6 +135,44 @@ class LiveManager:
             traceback.print_exc()
             return None, None, None, None
     
+    def build_ffmpeg_command(self, video_path, rtmp_full_url):
+        """Comando do ffmpeg que transmite o vídeo em loop para o RTMP"""
+        # Comando ffmpeg otimizado para streaming RTMP
+        # Configurações baseadas nas recomendações oficiais do YouTube:
+        # - Codec: H.264 (libx264) para vídeo, AAC para áudio
+        # - Resolução: 1920x1080 (1080p) - detectada automaticamente do vídeo
+        # - Frame rate: 30fps - detectado automaticamente do vídeo
+        # - Bitrate vídeo: 6800k (exatamente o recomendado pelo YouTube)
+        # - Bitrate áudio: 128k (recomendado: 128k)
+        # - Sample rate: 44100 Hz (recomendado: 44.1kHz ou 48kHz)
+        # - Formato: FLV (RTMP requer FLV)
+        return [
+            'ffmpeg',
+            '-re',  # Lê na taxa de reprodução (tempo real)
+            '-stream_loop', '-1',  # Loop infinito do vídeo
+            '-i', video_path,
+            '-c:v', 'libx264',  # Codec de vídeo H.264 (recomendado pelo YouTube)
+            '-preset', 'veryfast',  # Preset rápido para baixa latência
+            '-tune', 'zerolatency',  # Otimização para baixa latência
+            '-profile:v', 'high',  # Perfil High (recomendado para 1080p)
+            '-level', '4.0',  # Nível H.264 4.0 (compatível com YouTube)
+            '-b:v', '6800k',  # Bitrate de vídeo: 6800k (exatamente o recomendado pelo YouTube)
+            '-maxrate', '6800k',  # Bitrate máximo: 6800k
+            '-minrate', '3400k',  # Bitrate mínimo: 50% do máximo (para evitar quedas)
+            '-bufsize', '13600k',  # Buffer size: 2x o bitrate máximo (recomendado)
+            '-g', '60',  # GOP size: 60 frames (2 segundos a 30fps - recomendado)
+            '-keyint_min', '60',  # Keyframe mínimo: igual ao GOP
+            '-sc_threshold', '0',  # Desabilita scene change detection (melhor para loop)
+            '-c:a', 'aac',  # Codec de áudio AAC (recomendado pelo YouTube)
+            '-b:a', '128k',  # Bitrate de áudio: 128k (recomendado)
+            '-ar', '44100',  # Sample rate: 44.1kHz (recomendado)
+            '-ac', '2',  # Canais de áudio: stereo (recomendado)
+            '-f', 'flv',  # Formato de saída: FLV (RTMP requer FLV)
+            '-flvflags', 'no_duration_filesize',  # Flag para FLV (otimização)
+            '-loglevel', 'warning',  # Nível de log: warning (reduz spam)
+            rtmp_full_url
+        ]
+    
     def start_streaming(self, video_path, stream_key=None, rtmp_url=None, use_automation_fallback=False):
         """
         Inicia transmissão do vídeo em loop usando ffmpeg
@@ -150,7 +208,7 @@ class LiveManager:
         # Verifica conectividade de rede antes de tentar streaming
         try:
             import socket
-            rtmp_host = rtmp_url.replace('rtmp://', '').split('/')[0]
+            rtmp_host = rtmp_url.replace('rtmp://', '').split('/')[0].split(':')[0]
             self.logger.info(f"🔍 Verificando conectividade com {rtmp_host}...")
             socket.gethostbyname(rtmp_host)
             self.logger.info("✅ DNS resolvido com sucesso")
@@ -165,41 +223,7 @@ class LiveManager:
             self.logger.info(f"📍 RTMP URL: {rtmp_url}")
             self.logger.info(f"🔑 Stream Key: {stream_key[:10]}...")
             
-            # Comando ffmpeg otimizado para streaming RTMP
-            # Configurações baseadas nas recomendações oficiais do YouTube:
-            # - Codec: H.264 (libx264) para vídeo, AAC para áudio
-            # - Resolução: 1920x1080 (1080p) - detectada automaticamente do vídeo
-            # - Frame rate: 30fps - detectado automaticamente do vídeo
-            # - Bitrate vídeo: 6800k (exatamente o recomendado pelo YouTube)
-            # - Bitrate áudio: 128k (recomendado: 128k)
-            # - Sample rate: 44100 Hz (recomendado: 44.1kHz ou 48kHz)
-            # - Formato: FLV (RTMP requer FLV)
-            ffmpeg_cmd = [
-                'ffmpeg',
-                '-re',  # Lê na taxa de reprodução (tempo real)
-                '-stream_loop', '-1',  # Loop infinito do vídeo
-                '-i', video_path,
-                '-c:v', 'libx264',  # Codec de vídeo H.264 (recomendado pelo YouTube)
-                '-preset', 'veryfast',  # Preset rápido para baixa latência
-                '-tune', 'zerolatency',  # Otimização para baixa latência
-                '-profile:v', 'high',  # Perfil High (recomendado para 1080p)
-                '-level', '4.0',  # Nível H.264 4.0 (compatível com YouTube)
-                '-b:v', '6800k',  # Bitrate de vídeo: 6800k (exatamente o recomendado pelo YouTube)
-                '-maxrate', '6800k',  # Bitrate máximo: 6800k
-                '-minrate', '3400k',  # Bitrate mínimo: 50% do máximo (para evitar quedas)
-                '-bufsize', '13600k',  # Buffer size: 2x o bitrate máximo (recomendado)
-                '-g', '60',  # GOP size: 60 frames (2 segundos a 30fps - recomendado)
-                '-keyint_min', '60',  # Keyframe mínimo: igual ao GOP
-                '-sc_threshold', '0',  # Desabilita scene change detection (melhor para loop)
-                '-c:a', 'aac',  # Codec de áudio AAC (recomendado pelo YouTube)
-                '-b:a', '128k',  # Bitrate de áudio: 128k (recomendado)
-                '-ar', '44100',  # Sample rate: 44.1kHz (recomendado)
-                '-ac', '2',  # Canais de áudio: stereo (recomendado)
-                '-f', 'flv',  # Formato de saída: FLV (RTMP requer FLV)
-                '-flvflags', 'no_duration_filesize',  # Flag para FLV (otimização)
-                '-loglevel', 'warning',  # Nível de log: warning (reduz spam)
-                rtmp_full_url
-            ]
+            ffmpeg_cmd = self.build_ffmpeg_command(video_path, rtmp_full_url)
             
             self.logger.info("🎥 Tentando iniciar streaming com ffmpeg...")
             self.logger.info(f"📝 Comando: {' '.join(ffmpeg_cmd[:5])}... [video em loop]")
@@ -368,31 +392,27 @@ class LiveManager:
             return False
         
         self.logger.info("🤖 Iniciando automação web para clicar em 'Transmitir ao vivo'...")
-        self.logger.info("💡 Isso abrirá um navegador automaticamente")
         
         try:
             # No Docker, usa headless=True
-            import os
             is_docker = os.getenv('DOCKER_CONTAINER', 'false').lower() == 'true'
             headless_mode = is_docker or os.getenv('HEADLESS', 'false').lower() == 'true'
             
-            automation = YouTubeAutomation(headless=headless_mode)
-            
-            success = automation.start_live_automation(
-                broadcast_id=self.current_broadcast_id,
-                enable_auto_start=True,
-                wait_for_login=not is_docker  # No Docker, não espera login (usa cookies)
-            )
+            # Sessão aquecida do browser_pool (ou avulsa, se não houver)
+            with get_browser_pool().lease(headless=headless_mode) as automation:
+                success = automation.start_live_automation(
+                    broadcast_id=self.current_broadcast_id,
+                    enable_auto_start=True,
+                    wait_for_login=not is_docker  # No Docker, não espera login (usa cookies)
+                )
+                if not success:
+                    get_browser_pool().report_failure(automation)
             
             if success:
                 self.logger.info("✅ Live iniciada via automação web!")
-                self.logger.info("💡 O navegador permanecerá aberto. Você pode fechá-lo manualmente.")
-                # Mantém referência para poder fechar depois
-                self.automation = automation
                 return True
             else:
                 self.logger.error("❌ Falha na automação web")
-                automation.close()
                 return False
                 
         except Exception as e:
@@ -407,8 +427,8 @@ class LiveManager:
         
         Args:
             broadcast_id: ID do broadcast (usa self.current_broadcast_id se None)
-            max_retries: Número máximo de tentativas (aumentado para 10)
-            retry_delay: Segundos entre tentativas (aumentado para 30)
+            max_retries: Número máximo de tentativas de transição
+            retry_delay: Segundos por tentativa (tempo total = max_retries * retry_delay)
         
         Returns:
             True se sucesso, False caso contrário
@@ -419,60 +439,46 @@ class LiveManager:
             return False
         
         # Primeiro, verifica se precisa aguardar o scheduledStartTime
+        # O snapshot fica em cache no poller e é reaproveitado pela transição
         try:
-            from datetime import datetime, timezone
-            broadcast_info = self.uploader.youtube.liveBroadcasts().list(
-                part='snippet',
-                id=broadcast_id
-            ).execute()
+            snapshot = self.uploader.status_poller.snapshot(broadcast_id)
+            scheduled_start_time = snapshot.scheduled_start_time
             
-            if broadcast_info.get('items'):
-                snippet = broadcast_info['items'][0].get('snippet', {})
-                scheduled_start_time_str = snippet.get('scheduledStartTime', '')
+            if scheduled_start_time:
+                now_utc = datetime.now(timezone.utc)
                 
-                if scheduled_start_time_str:
-                    scheduled_start_time = datetime.fromisoformat(scheduled_start_time_str.replace('Z', '+00:00'))
-                    now_utc = datetime.now(timezone.utc)
-                    
-                    if scheduled_start_time > now_utc:
-                        wait_seconds = (scheduled_start_time - now_utc).total_seconds()
-                        if wait_seconds > 0:
-                            self.logger.info(f"⏰ Broadcast agendado para: {scheduled_start_time_str}")
-                            self.logger.info(f"⏰ Horário atual: {now_utc.isoformat()}")
-                            self.logger.info(f"⏳ Aguardando {wait_seconds:.0f} segundos ({wait_seconds/60:.1f} minutos) até o horário agendado...")
-                            
-                            # Aguarda em blocos de 30 segundos para mostrar progresso
-                            total_wait = int(wait_seconds)
-                            blocks = max(1, total_wait // 30)
-                            for i in range(blocks):
-                                sleep_time = min(30, total_wait - (i * 30))
-                                if sleep_time > 0:
-                                    time.sleep(sleep_time)
-                                    remaining = total_wait - ((i + 1) * 30)
-                                    if remaining > 0:
-                                        self.logger.info(f"⏳ Aguardando horário agendado... {remaining}s restantes")
-                            
-                            self.logger.info("✅ Horário agendado chegou!")
+                if scheduled_start_time > now_utc:
+                    wait_seconds = (scheduled_start_time - now_utc).total_seconds()
+                    if wait_seconds > 0:
+                        self.logger.info(f"⏰ Broadcast agendado para: {scheduled_start_time.isoformat()}")
+                        self.logger.info(f"⏰ Horário atual: {now_utc.isoformat()}")
+                        self.logger.info(f"⏳ Aguardando {wait_seconds:.0f} segundos ({wait_seconds/60:.1f} minutos) até o horário agendado...")
+                        
+                        # Aguarda em blocos de 30 segundos para mostrar progresso
+                        total_wait = int(wait_seconds)
+                        blocks = max(1, total_wait // 30)
+                        for i in range(blocks):
+                            sleep_time = min(30, total_wait - (i * 30))
+                            if sleep_time > 0:
+                                time.sleep(sleep_time)
+                                remaining = total_wait - ((i + 1) * 30)
+                                if remaining > 0:
+                                    self.logger.info(f"⏳ Aguardando horário agendado... {remaining}s restantes")
+                        
+                        self.logger.info("✅ Horário agendado chegou!")
         except Exception as e:
             self.logger.warning(f"⚠️  Erro ao verificar scheduledStartTime: {e}")
             # Continua mesmo se não conseguir verificar
         
-        self.logger.info("⏳ Aguardando YouTube detectar stream e publicar automaticamente...")
-        self.logger.info("💡 Isso pode levar 3-5 minutos. O YouTube precisa detectar o stream ativo.")
+        # Não há espera fixa: a transição consulta o status com intervalo adaptativo
+        # (rápido enquanto o stream fica 'active', mais lento quando nada muda)
+        self.logger.info("⏳ Aguardando YouTube detectar stream ativo e publicar...")
+        self.logger.info(f"🔄 Até {max_retries} transições em no máximo {max_retries * retry_delay}s...")
         
-        # Aguarda mais tempo para o YouTube detectar o stream
-        # O YouTube geralmente precisa de 3-5 minutos para detectar um stream RTMP ativo
-        self.logger.info("⏱️  Aguardando 3 minutos para o YouTube processar o stream...")
-        for i in range(6):  # 6 x 30 segundos = 3 minutos
-            time.sleep(30)
-            remaining = 6 - i - 1
-            if remaining > 0:
-                self.logger.info(f"⏳ Aguardando... {remaining * 30}s restantes")
+        published = self.uploader.transition_broadcast_to_live(broadcast_id, max_retries=max_retries, retry_delay=retry_delay)
+        self.logger.info(f"📈 Quota da API hoje: {self.uploader.quota_ledger.summary()}")
         
-        self.logger.info("🔄 Tentando publicar live...")
-        self.logger.info(f"🔄 Tentando até {max_retries} vezes com intervalo de {retry_delay}s...")
-        
-        if self.uploader.transition_broadcast_to_live(broadcast_id, max_retries=max_retries, retry_delay=retry_delay):
+        if published:
             self.logger.info("✅ Live publicada automaticamente!")
             return True
         else:
@@ -504,34 +510,31 @@ class LiveManager:
         
         try:
             # No Docker, usa headless=True
-            import os
             is_docker = os.getenv('DOCKER_CONTAINER', 'false').lower() == 'true'
             headless_mode = is_docker or os.getenv('HEADLESS', 'false').lower() == 'true'
             
-            automation = YouTubeAutomation(headless=headless_mode)
-            
-            # Faz login
-            if not automation.login_youtube():
-                self.logger.error("❌ Falha ao fazer login no YouTube")
-                automation.close()
-                return False
-            
-            # Navega para a página da live
-            if not automation.go_to_live_stream(broadcast_id):
-                self.logger.error("❌ Falha ao navegar para a página da live")
-                automation.close()
-                return False
-            
-            # Clica no botão "Transmitir ao vivo"
-            if automation.click_go_live_button():
-                self.logger.info("✅ Botão 'Transmitir ao vivo' clicado com sucesso!")
-                # Mantém referência para poder fechar depois
-                self.automation = automation
-                return True
-            else:
-                self.logger.error("❌ Falha ao clicar no botão 'Transmitir ao vivo'")
-                automation.close()
-                return False
+            # Sessão aquecida do browser_pool (ou avulsa, se não houver)
+            with get_browser_pool().lease(headless=headless_mode) as automation:
+                # Faz login (imediato numa sessão aquecida)
+                if not automation.login_youtube():
+                    self.logger.error("❌ Falha ao fazer login no YouTube")
+                    get_browser_pool().report_failure(automation)
+                    return False
+                
+                # Navega para a página da live
+                if not automation.go_to_live_stream(broadcast_id):
+                    self.logger.error("❌ Falha ao navegar para a página da live")
+                    get_browser_pool().report_failure(automation)
+                    return False
+                
+                # Clica no botão "Transmitir ao vivo"
+                if automation.click_go_live_button():
+                    self.logger.info("✅ Botão 'Transmitir ao vivo' clicado com sucesso!")
+                    return True
+                else:
+                    self.logger.error("❌ Falha ao clicar no botão 'Transmitir ao vivo'")
+                    get_browser_pool().report_failure(automation)
+                    return False
                 
         except Exception as e:
             self.logger.error(f"❌ Erro na automação web: {e}")
@@ -593,16 +596,6 @@ class LiveManager:
             finally:
                 self.ffmpeg_process = None
         
-        # Fecha automação web se estiver ativa
-        if self.automation:
-            try:
-                self.automation.close()
-                self.logger.info("✅ Navegador de automação fechado")
-            except Exception as e:
-                self.logger.warning(f"⚠️  Erro ao fechar automação: {e}")
-            finally:
-                self.automation = None
-        
         # Encerra live no YouTube
         if self.current_broadcast_id and self.uploader:
             try:
@@ -612,3 +605,88 @@ class LiveManager:
             except Exception as e:
                 self.logger.error(f"❌ Erro ao encerrar live: {e}")
 
+    
+    async def start_streaming_async(self, video_path, stream_key=None, rtmp_url=None, grace=20, log_path=None):
+        """
+        Versão assíncrona de start_streaming para o ControlPlane
+        O ffmpeg é acompanhado pelo event loop (sem esperas fixas nem threads)
+        
+        Args:
+            video_path: Caminho do vídeo
+            stream_key: Stream key (usa self.current_stream_key se None)
+            rtmp_url: RTMP URL (usa self.current_rtmp_url se None)
+            grace: Segundos para o ffmpeg se firmar antes de considerar iniciado
+            log_path: Arquivo do stderr do ffmpeg (permite readotar o processo após um reinício)
+        
+        Returns:
+            True se sucesso, False caso contrário
+        """
+        stream_key = stream_key or self.current_stream_key
+        rtmp_url = rtmp_url or self.current_rtmp_url
+        
+        if not stream_key or not rtmp_url:
+            self.logger.error("❌ Stream Key ou RTMP URL não disponíveis")
+            return False
+        
+        if not os.path.exists(video_path):
+            self.logger.error(f"❌ Arquivo de vídeo não encontrado: {video_path}")
+            return False
+        
+        # Evita "More than one ingestion is using the primary URL"
+        if isinstance(self.ffmpeg_process, FfmpegProcess) and self.ffmpeg_process.poll() is None:
+            self.logger.info("🛑 Parando stream anterior antes de iniciar novo...")
+            await self.ffmpeg_process.stop()
+            await asyncio.sleep(2)
+        
+        rtmp_host = rtmp_url.replace('rtmp://', '').split('/')[0].split(':')[0]
+        try:
+            await asyncio.get_running_loop().getaddrinfo(rtmp_host, None)
+        except OSError as e:
+            self.logger.warning(f"⚠️  Aviso ao verificar DNS: {e}")
+        
+        process = FfmpegProcess(self.build_ffmpeg_command(video_path, f"{rtmp_url}/{stream_key}"), log_path=log_path)
+        self.logger.info(f"🎥 Iniciando streaming com ffmpeg para {rtmp_url}...")
+        try:
+            await process.start()
+        except FileNotFoundError:
+            self.logger.error("❌ ffmpeg não encontrado!")
+            return False
+        self.ffmpeg_process = process
+        
+        if await process.wait_started(grace):
+            self.logger.info("✅ Streaming iniciado com sucesso via ffmpeg!")
+            return True
+        
+        await process.wait()
+        self.logger.error(f"❌ ffmpeg terminou com código {process.returncode}")
+        for line in process.stderr_tail:
+            self.logger.error(f"   ❌ {line}")
+        return False
+    
+    def adopt_streaming(self, pid, stream_key, log_path=None):
+        """
+        Readota o ffmpeg de uma execução anterior que ainda transmite com `stream_key`
+        
+        Returns:
+            True se o processo foi readotado
+        """
+        if not pid:
+            return False
+        process = AdoptedFfmpeg.adopt(pid, stream_key, log_path)
+        if process is None or process.poll() is not None:
+            return False
+        self.ffmpeg_process = process
+        return True
+    
+    async def stop_ffmpeg_async(self):
+        """Para só o ffmpeg (a live continua no YouTube)"""
+        process = self.ffmpeg_process
+        if isinstance(process, FfmpegProcess):
+            await process.stop()
+            self.ffmpeg_process = None
+            self.logger.info("✅ Streaming parado")
+    
+    async def stop_streaming_async(self, plane):
+        """Versão assíncrona de stop_streaming: para o ffmpeg no loop e encerra a live no pool da API"""
+        await self.stop_ffmpeg_async()
+        await plane.call(self.stop_streaming)
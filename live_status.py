@@ -0,0 +1,305 @@
+"""
+Consulta de status das lives no YouTube
+Combina broadcast e stream em um único snapshot, com cache curto e intervalo adaptativo
+"""
+import time
+import threading
+from datetime import datetime
+from api_batch import BatchReader
+
+
+class LiveStatusSnapshot:
+    """Retrato combinado do status de um broadcast e do stream vinculado a ele"""
+
+    def __init__(self, broadcast_id, broadcast=None, stream=None, fetched_at=None):
+        self.broadcast_id = broadcast_id
+        self.broadcast = broadcast or {}
+        self.stream = stream or {}
+        self.fetched_at = time.monotonic() if fetched_at is None else fetched_at
+
+    @property
+    def exists(self):
+        """True se o broadcast foi encontrado na API"""
+        return bool(self.broadcast)
+
+    @property
+    def lifecycle_status(self):
+        return self.broadcast.get('status', {}).get('lifeCycleStatus', '')
+
+    @property
+    def recording_status(self):
+        return self.broadcast.get('status', {}).get('recordingStatus', '')
+
+    @property
+    def bound_stream_id(self):
+        return self.broadcast.get('contentDetails', {}).get('boundStreamId', '')
+
+    @property
+    def stream_status(self):
+        return self.stream.get('status', {}).get('streamStatus', '')
+
+    @property
+    def health_status(self):
+        return self.stream.get('status', {}).get('healthStatus', {})
+
+    @property
+    def scheduled_start_time(self):
+        """scheduledStartTime como datetime (UTC) ou None"""
+        value = self.broadcast.get('snippet', {}).get('scheduledStartTime', '')
+        if not value:
+            return None
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+    def state_key(self):
+        """Chave usada para detectar mudanças entre dois snapshots"""
+        return (self.lifecycle_status, self.stream_status,
+                self.health_status.get('status', ''))
+
+    def age(self):
+        """Idade do snapshot em segundos"""
+        return time.monotonic() - self.fetched_at
+
+    def describe(self):
+        """Resumo legível para logs"""
+        return (f"broadcast={self.lifecycle_status or '?'} "
+                f"stream={self.stream_status or '?'} "
+                f"health={self.health_status.get('status', '?')}")
+
+
+class LiveStatusPoller:
+    """
+    Consulta o status de broadcasts com cache curto e intervalo adaptativo
+
+    - Um único snapshot traz broadcast + stream vinculado (no mesmo batch HTTP)
+    - Snapshots ficam em cache por `ttl` segundos, então chamadores concorrentes
+      (bot, LiveManager, transição) reaproveitam a mesma resposta
+    - O intervalo entre consultas começa em `min_interval` e cresce até
+      `max_interval` enquanto nada muda; volta ao mínimo a cada mudança
+    - Enquanto broadcast ou stream caminham para o ar (transitional()), as
+      consultas usam `fast_interval` e ignoram o cache (max_age_after())
+    - Cada chamada à API é contada em `api_calls`
+    """
+
+    # Estados em que uma mudança é iminente: consulta rápida
+    TRANSITIONAL_BROADCAST_STATUSES = ('liveStarting', 'testStarting')
+    # Broadcast ainda fora do ar: um stream que não está 'active' deve ficar a qualquer momento
+    PRE_LIVE_BROADCAST_STATUSES = ('created', 'ready', 'testing')
+
+    def __init__(self, youtube, ttl=5.0, min_interval=5.0, max_interval=60.0, backoff=1.6,
+                 budget=None, fast_interval=2.0):
+        """
+        Args:
+            youtube: Cliente da YouTube Data API (googleapiclient)
+            ttl: Segundos que um snapshot permanece válido no cache
+            min_interval: Intervalo mínimo entre consultas (segundos)
+            max_interval: Intervalo máximo entre consultas (segundos)
+            backoff: Fator de crescimento do intervalo quando nada muda
+            budget: QuotaLedger opcional; com orçamento baixo o intervalo é multiplicado
+            fast_interval: Intervalo enquanto broadcast ou stream caminham para o ar (segundos)
+        """
+        self.youtube = youtube
+        self.ttl = ttl
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.budget = budget
+        self.fast_interval = fast_interval
+        self.api_calls = {}
+        self._cache = {}
+        self._bound_streams = {}
+        self._history = {}
+        self._lock = threading.Lock()
+        self._fetch_locks = {}
+
+    def count_call(self, endpoint):
+        """Registra uma chamada à API"""
+        with self._lock:
+            self.api_calls[endpoint] = self.api_calls.get(endpoint, 0) + 1
+
+    def total_api_calls(self):
+        """Total de chamadas à API registradas"""
+        with self._lock:
+            return sum(self.api_calls.values())
+
+    def invalidate(self, broadcast_id=None):
+        """Descarta snapshots em cache (de um broadcast ou de todos)"""
+        with self._lock:
+            if broadcast_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(broadcast_id, None)
+
+    def snapshot(self, broadcast_id, max_age=None):
+        """
+        Retorna o snapshot combinado de broadcast e stream
+
+        Args:
+            broadcast_id: ID do broadcast
+            max_age: Idade máxima aceita do cache (None = usa o ttl, 0 = força consulta)
+
+        Returns:
+            LiveStatusSnapshot (exists=False se o broadcast não foi encontrado)
+        """
+        max_age = self.ttl if max_age is None else max_age
+
+        cached = self._cached(broadcast_id, max_age)
+        if cached:
+            return cached
+
+        # Apenas uma consulta por broadcast em andamento; os demais aguardam o resultado
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(broadcast_id, threading.Lock())
+
+        with fetch_lock:
+            cached = self._cached(broadcast_id, max_age)
+            if cached:
+                return cached
+
+            snapshot = self._fetch(broadcast_id)
+            with self._lock:
+                self._cache[broadcast_id] = snapshot
+            return snapshot
+
+    def _cached(self, broadcast_id, max_age):
+        with self._lock:
+            cached = self._cache.get(broadcast_id)
+        if cached and max_age > 0 and cached.age() < max_age:
+            return cached
+        return None
+
+    def _fetch(self, broadcast_id):
+        """
+        Consulta a API e monta o snapshot
+
+        Quando o stream vinculado já é conhecido, broadcast e stream são lidos
+        no mesmo batch (um único round trip HTTP).
+        """
+        with self._lock:
+            known_stream_id = self._bound_streams.get(broadcast_id)
+
+        batch = BatchReader(self.youtube, ledger=self.budget, label='status')
+        batch.add('broadcast', self.youtube.liveBroadcasts().list(
+            part='snippet,status,contentDetails',
+            id=broadcast_id
+        ))
+        if known_stream_id:
+            batch.add('stream', self.youtube.liveStreams().list(
+                part='status,cdn',
+                id=known_stream_id
+            ))
+        batch.execute()
+        self.count_call('liveBroadcasts.list')
+        if known_stream_id:
+            self.count_call('liveStreams.list')
+
+        items = batch.result('broadcast').get('items', [])
+        if not items:
+            return LiveStatusSnapshot(broadcast_id)
+
+        broadcast = items[0]
+        stream_id = broadcast.get('contentDetails', {}).get('boundStreamId', '')
+        stream = {}
+        if stream_id and stream_id == known_stream_id and 'stream' not in batch.errors:
+            stream_items = batch.result('stream').get('items', [])
+            stream = stream_items[0] if stream_items else {}
+        elif stream_id:
+            # Primeira consulta (ou stream revinculado): lê o stream separadamente
+            with self._lock:
+                self._bound_streams[broadcast_id] = stream_id
+            stream_info = self.youtube.liveStreams().list(
+                part='status,cdn',
+                id=stream_id
+            ).execute()
+            self.count_call('liveStreams.list')
+            stream_items = stream_info.get('items', [])
+            if stream_items:
+                stream = stream_items[0]
+
+        return LiveStatusSnapshot(broadcast_id, broadcast, stream)
+
+    def prime(self, broadcast, stream=None):
+        """Coloca no cache um snapshot montado a partir de recursos já lidos"""
+        snapshot = LiveStatusSnapshot(broadcast['id'], broadcast, stream)
+        with self._lock:
+            if snapshot.bound_stream_id:
+                self._bound_streams[snapshot.broadcast_id] = snapshot.bound_stream_id
+            self._cache[snapshot.broadcast_id] = snapshot
+        return snapshot
+
+    def observe(self, snapshot):
+        """
+        Registra um snapshot no histórico do broadcast
+
+        Returns:
+            True se o estado mudou desde a observação anterior
+        """
+        with self._lock:
+            previous_key, stale_polls = self._history.get(snapshot.broadcast_id, (None, 0))
+            changed = previous_key != snapshot.state_key()
+            stale_polls = 0 if changed else stale_polls + 1
+            self._history[snapshot.broadcast_id] = (snapshot.state_key(), stale_polls)
+        return changed
+
+    def transitional(self, snapshot):
+        """True se o broadcast está entrando no ar ou o stream ainda não ficou 'active'"""
+        if snapshot.lifecycle_status in self.TRANSITIONAL_BROADCAST_STATUSES:
+            return True
+        return snapshot.lifecycle_status in self.PRE_LIVE_BROADCAST_STATUSES and snapshot.stream_status != 'active'
+
+    def max_age_after(self, snapshot):
+        """Idade de cache aceita na consulta seguinte a `snapshot` (0 em transição, None = ttl)"""
+        # O ttl pode ser maior que o intervalo rápido: em transição o cache esconderia a mudança
+        if snapshot is not None and self.transitional(snapshot):
+            return 0
+        return None
+
+    def next_interval(self, snapshot):
+        """Calcula o próximo intervalo de consulta para o broadcast"""
+        factor = self.budget.delay_factor() if self.budget is not None else 1.0
+
+        if snapshot is None:
+            return self.min_interval * factor
+        if self.transitional(snapshot):
+            return min(self.fast_interval, self.min_interval) * factor
+
+        with self._lock:
+            _, stale_polls = self._history.get(snapshot.broadcast_id, (None, 0))
+        return min(self.max_interval, self.min_interval * (self.backoff ** stale_polls)) * factor
+
+    def wait(self, snapshot, deadline=None):
+        """
+        Aguarda o próximo intervalo de consulta
+
+        Args:
+            snapshot: Último snapshot observado (ou None)
+            deadline: time.monotonic() limite; não aguarda além dele
+
+        Returns:
+            Segundos aguardados
+        """
+        interval = self.next_interval(snapshot)
+        if deadline is not None:
+            interval = max(0.0, min(interval, deadline - time.monotonic()))
+        if interval > 0:
+            time.sleep(interval)
+        return interval
+
+    def wait_for(self, broadcast_id, predicate, timeout):
+        """
+        Consulta até `predicate(snapshot)` ser verdadeiro ou o tempo acabar
+
+        Returns:
+            Snapshot que satisfez a condição ou None
+        """
+        deadline = time.monotonic() + timeout
+        snapshot = None
+        while True:
+            if self.budget is not None and not self.budget.polling_allowed():
+                return None
+            snapshot = self.snapshot(broadcast_id, max_age=self.max_age_after(snapshot))
+            self.observe(snapshot)
+            if predicate(snapshot):
+                return snapshot
+            if time.monotonic() >= deadline:
+                return None
+            self.wait(snapshot, deadline)
@@ -0,0 +1,288 @@
+"""
+Gerador procedural de batidas LOFI (áudio), ao lado do LofiUltraGenerator
+Sintetiza compasso a compasso, sem samples: bateria (bumbo, caixa e chimbal
+sintetizados), acordes com sétima num pad abafado, baixo e chiado de vinil.
+
+- A semente escolhe andamento, tom e modo; cada seção de 8 compassos sorteia
+  padrão de bateria e progressão, então horas de áudio não se repetem
+- Determinístico: um compasso depende só da semente e do seu índice
+- Saída em blocos int16 (frames, 2) de um compasso, para write_wav/encode_aac
+  do pcm_cache ou qualquer consumidor de fluxo; nunca o arquivo inteiro
+
+Uso:
+    python lofi_beat_generator.py --seed 42 --seconds 3600 --output lofi.m4a
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from pcm_cache import PCM_SAMPLE_RATE, PCM_CHANNELS, write_wav, encode_aac
+
+
+# Nível médio da saída (dBFS RMS)
+LOFI_BEAT_LEVEL_DB = float(os.getenv('LOFI_BEAT_LEVEL_DB', -18))
+LOFI_BEAT_AAC_BITRATE = os.getenv('LOFI_BEAT_AAC_BITRATE', '192k')
+# Faixa de andamento sorteada pela semente (BPM)
+TEMPO_RANGE = (68, 88)
+# Compassos por seção (padrão de bateria e variação) e seções por progressão
+SECTION_BARS = 8
+PROGRESSION_SECTIONS = 4
+# Cauda dos sons que passam para o compasso seguinte (segundos)
+TAIL_SECONDS = 1.5
+
+NOTE_NAMES = ('C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B')
+
+CHORDS = {
+    'maj7': (0, 4, 7, 11),
+    'm7': (0, 3, 7, 10),
+    '7': (0, 4, 7, 10),
+    'm9': (0, 3, 7, 10, 14),
+    'maj9': (0, 4, 7, 11, 14),
+}
+# Progressões (grau em semitons a partir da tônica, tipo do acorde)
+PROGRESSIONS = {
+    'major': (
+        ((2, 'm7'), (7, '7'), (0, 'maj7'), (9, 'm7')),
+        ((0, 'maj9'), (9, 'm7'), (2, 'm9'), (7, '7')),
+        ((5, 'maj7'), (4, 'm7'), (2, 'm7'), (0, 'maj7')),
+    ),
+    'minor': (
+        ((0, 'm9'), (5, 'm7'), (10, '7'), (3, 'maj7')),
+        ((0, 'm7'), (8, 'maj7'), (3, 'maj7'), (10, '7')),
+        ((5, 'm9'), (10, '7'), (0, 'm7'), (0, 'm7')),
+    ),
+}
+# Bumbo: passos (semicolcheias 0-15) de cada padrão
+KICK_PATTERNS = ((0, 10), (0, 7, 10), (0, 3, 10), (0, 8, 10, 11), (0, 6, 10))
+SNARE_STEPS = (4, 12)
+
+
+def midi_frequency(note):
+    return 440.0 * 2 ** ((note - 69) / 12)
+
+
+def _lowpass(signal, cutoff, sample_rate):
+    """Passa-baixas suave no domínio da frequência (ao longo do eixo 0)"""
+    n = len(signal)
+    freqs = np.fft.rfftfreq(n, 1 / sample_rate)
+    response = 1 / np.sqrt(1 + (freqs / cutoff) ** 4)
+    return np.fft.irfft(np.fft.rfft(signal, axis=0) * response.reshape(-1, *[1] * (signal.ndim - 1)), n=n, axis=0)
+
+
+class LofiBeatGenerator:
+    """
+    Batida LOFI infinita em blocos de um compasso
+
+    Uso:
+        beat = LofiBeatGenerator(seed=42)
+        print(beat.describe())            # ex: '78 BPM, A minor'
+        for block in beat.blocks(60):     # int16 (frames, 2)
+            ...
+    """
+
+    def __init__(self, seed=None, sample_rate=PCM_SAMPLE_RATE):
+        self.seed = int(time.time()) if seed is None else int(seed)
+        self.sample_rate = sample_rate
+        rng = np.random.default_rng([self.seed, 0])
+        self.bpm = int(rng.integers(TEMPO_RANGE[0], TEMPO_RANGE[1] + 1))
+        self.key = int(rng.integers(0, 12))
+        self.mode = 'minor' if rng.random() < 0.6 else 'major'
+        self.swing = float(rng.uniform(0.08, 0.2))
+        self.pad_cutoff = float(rng.uniform(1400, 2600))
+
+        self.step_frames = int(round(60.0 / self.bpm / 4 * sample_rate))
+        self.bar_frames = self.step_frames * 16
+        self.tail_frames = int(TAIL_SECONDS * sample_rate)
+        self.kick = self._kick(rng)
+        self.snare = self._snare(rng)
+        self.hat = self._hat(rng)
+        self._bars = {}
+
+        self.gain = 1.0
+        rms = np.sqrt(np.mean([np.mean(np.square(self._render_bar(i), dtype=np.float64)) for i in (0, 3, 9, 14)]))
+        self.gain = 10 ** (LOFI_BEAT_LEVEL_DB / 20) / max(float(rms), 1e-9)
+        self._bars = {}
+
+    def describe(self):
+        return f"{self.bpm} BPM, {NOTE_NAMES[self.key]} {self.mode}"
+
+    # ---- sons da bateria (sintetizados uma vez por semente) ----
+
+    def _envelope(self, seconds, decay):
+        t = np.arange(int(seconds * self.sample_rate)) / self.sample_rate
+        return t, np.exp(-t * decay)
+
+    def _kick(self, rng):
+        t, envelope = self._envelope(0.45, rng.uniform(7, 10))
+        frequency = 48 + 110 * np.exp(-t * 32)
+        phase = 2 * np.pi * np.cumsum(frequency) / self.sample_rate
+        click = np.exp(-t * 400) * 0.3
+        return (np.sin(phase) * envelope + click) * 0.9
+
+    def _snare(self, rng):
+        t, envelope = self._envelope(0.3, rng.uniform(14, 20))
+        noise = _lowpass(rng.standard_normal(len(t)), 5000, self.sample_rate)
+        noise -= _lowpass(noise, 900, self.sample_rate)
+        body = np.sin(2 * np.pi * rng.uniform(170, 200) * t) * np.exp(-t * 30)
+        return (noise * 0.5 * envelope + body * 0.5) * 0.55
+
+    def _hat(self, rng):
+        t, envelope = self._envelope(0.08, rng.uniform(55, 75))
+        noise = rng.standard_normal(len(t))
+        noise -= _lowpass(noise, 6000, self.sample_rate)
+        return noise * envelope * 0.18
+
+    # ---- compasso ----
+
+    def _section(self, bar):
+        """Configuração da seção do compasso (sorteada pela semente e pelo índice da seção)"""
+        section = bar // SECTION_BARS
+        rng = np.random.default_rng([self.seed, 1, section])
+        progression_rng = np.random.default_rng([self.seed, 2, section // PROGRESSION_SECTIONS])
+        progressions = PROGRESSIONS[self.mode]
+        return {
+            'kick': KICK_PATTERNS[int(rng.integers(len(KICK_PATTERNS)))],
+            'drums': section % 6 != 5 or rng.random() < 0.3,  # algumas seções só com pad
+            'hat_density': float(rng.uniform(0.6, 1.0)),
+            'progression': progressions[int(progression_rng.integers(len(progressions)))],
+        }
+
+    def _place(self, buffer, sound, step, velocity, pan=0.0):
+        """Soma `sound` no passo `step` (com swing nas semicolcheias ímpares)"""
+        start = step * self.step_frames + (int(self.swing * self.step_frames) if step % 2 else 0)
+        end = min(len(buffer), start + len(sound))
+        buffer[start:end, 0] += sound[:end - start] * velocity * np.sqrt((1 - pan) / 2) * np.sqrt(2)
+        buffer[start:end, 1] += sound[:end - start] * velocity * np.sqrt((1 + pan) / 2) * np.sqrt(2)
+
+    def _pad(self, rng, chord_root, chord, frames):
+        """Acorde com sétima: harmônicos levemente desafinados, ataque lento e passa-baixas"""
+        t = np.arange(frames) / self.sample_rate
+        duration = self.bar_frames / self.sample_rate
+        attack = np.minimum(t / 0.25, 1.0)
+        release = np.clip((duration + 0.6 - t) / 0.6, 0.0, 1.0)
+        envelope = attack * release
+        pad = np.zeros((frames, 2))
+        for voice, interval in enumerate(CHORDS[chord]):
+            frequency = midi_frequency(48 + chord_root + interval)
+            for channel, detune in enumerate((-0.004, 0.004)):
+                phase = rng.uniform(0, 2 * np.pi)
+                wave = np.zeros(frames)
+                for harmonic in (1, 2, 3):
+                    wave += np.sin(2 * np.pi * frequency * harmonic * (1 + detune) * t + phase * harmonic) / harmonic ** 1.6
+                pad[:, channel] += wave
+        pad = _lowpass(pad, self.pad_cutoff, self.sample_rate)
+        tremolo = 1 + 0.06 * np.sin(2 * np.pi * 4.5 * t)
+        return pad * (envelope * tremolo)[:, None] * 0.09
+
+    def _bass(self, chord_root, steps, frames):
+        bass = np.zeros(frames)
+        frequency = midi_frequency(36 + chord_root)
+        length = self.step_frames * 3
+        t = np.arange(length) / self.sample_rate
+        note = np.tanh(1.8 * np.sin(2 * np.pi * frequency * t)) * np.exp(-t * 3.5)
+        for step in steps:
+            start = step * self.step_frames
+            end = min(frames, start + length)
+            bass[start:end] += note[:end - start]
+        return bass * 0.22
+
+    def _crackle(self, rng, frames):
+        """Chiado de vinil: estalos esparsos e ruído de fundo abafado"""
+        crackle = np.zeros((frames, 2))
+        count = rng.poisson(7 * frames / self.sample_rate)
+        positions = rng.integers(0, frames - 32, count)
+        channels = rng.integers(0, 2, count)
+        amplitudes = (rng.pareto(2.5, count) * 0.02 + 0.01) * rng.choice((-1, 1), count)
+        for offset, decay in enumerate(np.exp(-np.arange(32) / 4)):
+            np.add.at(crackle, (positions + offset, channels), amplitudes * decay)
+        hiss = _lowpass(rng.standard_normal((frames, 2)), 4000, self.sample_rate) * 0.004
+        return crackle + hiss
+
+    def _render_bar(self, bar):
+        """Compasso `bar` com a cauda (bar_frames + tail_frames) em float"""
+        section = self._section(bar)
+        rng = np.random.default_rng([self.seed, 3, bar])
+        frames = self.bar_frames + self.tail_frames
+        buffer = np.zeros((frames, 2))
+
+        degree, chord = section['progression'][bar % len(section['progression'])]
+        chord_root = (self.key + degree) % 12
+        buffer += self._pad(rng, chord_root, chord, frames)
+
+        if section['drums']:
+            for step in section['kick']:
+                self._place(buffer, self.kick, step, rng.uniform(0.85, 1.0))
+            for step in SNARE_STEPS:
+                self._place(buffer, self.snare, step, rng.uniform(0.8, 1.0), pan=0.05)
+            if rng.random() < 0.25:
+                self._place(buffer, self.snare, int(rng.choice((7, 9, 15))), 0.25, pan=0.05)
+            for step in range(0, 16, 2):
+                if rng.random() < section['hat_density']:
+                    self._place(buffer, self.hat, step, rng.uniform(0.5, 1.0), pan=0.3)
+            if rng.random() < 0.3:
+                self._place(buffer, self.hat, int(rng.choice((11, 13, 15))), 0.4, pan=0.3)
+            buffer[:, :] += self._bass(chord_root, section['kick'], frames)[:, None]
+
+        buffer += self._crackle(rng, frames)
+        return buffer * self.gain
+
+    def bar(self, index):
+        """Compasso `index` (int16 (bar_frames, 2)), somado à cauda do anterior"""
+        current = self._bars.get(index)
+        if current is None:
+            current = self._render_bar(index)
+        previous = self._bars.get(index - 1)
+        if previous is None and index > 0:
+            previous = self._render_bar(index - 1)
+        # Só o compasso atual fica guardado (a cauda dele entra no próximo)
+        self._bars = {index: current}
+        out = current[:self.bar_frames].copy()
+        if previous is not None:
+            out[:self.tail_frames] += previous[self.bar_frames:]
+        # Limitador suave: picos arredondados, nível médio quase intacto
+        return (np.tanh(out) * 32767).astype(np.int16)
+
+    def blocks(self, seconds, start=0.0):
+        """
+        `seconds` de áudio a partir de `start`, em blocos de até um compasso
+
+        Memória limitada a dois compassos, qualquer que seja a duração.
+        """
+        remaining = int(round(seconds * self.sample_rate))
+        position = int(round(start * self.sample_rate))
+        while remaining > 0:
+            index, offset = divmod(position, self.bar_frames)
+            chunk = self.bar(index)[offset:offset + remaining]
+            remaining -= len(chunk)
+            position += len(chunk)
+            yield chunk
+
+
+def write_beat(seconds, output_path, seed=None):
+    """Grava `seconds` de batida em WAV (PCM 16 bits) e retorna o gerador usado"""
+    beat = LofiBeatGenerator(seed)
+    write_wav(output_path, beat.blocks(seconds), beat.sample_rate, PCM_CHANNELS)
+    return beat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera batidas LOFI procedurais')
+    parser.add_argument('--seed', type=int, default=None, help='Semente (andamento, tom e padrões)')
+    parser.add_argument('--seconds', type=float, default=60)
+    parser.add_argument('--output', required=True, help='Arquivo .m4a/.aac (AAC) ou .wav')
+    args = parser.parse_args()
+
+    beat = LofiBeatGenerator(args.seed)
+    started = time.time()
+    if args.output.lower().endswith('.wav'):
+        write_wav(args.output, beat.blocks(args.seconds), beat.sample_rate, PCM_CHANNELS)
+    else:
+        encode_aac(args.output, beat.blocks(args.seconds), beat.sample_rate, bitrate=LOFI_BEAT_AAC_BITRATE)
+    elapsed = time.time() - started
+    print(f"✅ {args.seconds:g}s de LOFI ({beat.describe()}, semente {beat.seed}) em {args.output} "
+          f"({args.seconds / max(elapsed, 1e-9):.0f}x tempo real)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
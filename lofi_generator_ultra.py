@@ -8,6 +8,7 @@ from datetime import datetime
 from PIL import Image, ImageDraw, ImageFont, ImageFilter
 import numpy as np
 import math
+from asset_ingest import cached_image
 
 
 class LofiUltraGenerator:
@@ -223,10 +224,15 @@ class LofiUltraGenerator:
         
         # Se há imagem base, usa ela; senão gera nova
         if base_image_path and os.path.exists(base_image_path):
-            base_img = Image.open(base_image_path)
-            # Redimensiona se necessário
-            if base_img.size != (width, height):
-                base_img = base_img.resize((width, height), Image.Resampling.LANCZOS)
+            # Versão pré-escalada do asset_ingest (sem decodificar nem redimensionar)
+            base_img = cached_image(base_image_path, width, height)
+            if base_img is not None:
+                print(f"   ⚡ Imagem pré-escalada do cache ({width}x{height})")
+            else:
+                base_img = Image.open(base_image_path)
+                # Redimensiona se necessário
+                if base_img.size != (width, height):
+                    base_img = base_img.resize((width, height), Image.Resampling.LANCZOS)
         else:
             # Gera nova imagem
             base_img_path = os.path.join(output_dir, "base_image.png")
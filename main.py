@@ -1,13 +1,11 @@
 """
-Script principal para executar os bots de live (manhã e noite)
+Script principal para executar os bots de live (slots de schedules.json)
 """
 import os
 import sys
-import time
-import threading
-import signal
-from morning_bot import MorningBot
-from night_bot import NightBot
+from slot_runner import SlotRunner
+from schedule_config import DEFAULT_SCHEDULE_FILE
+from control_plane import ControlPlane
 import logging
 
 logging.basicConfig(
@@ -18,97 +16,87 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+MORNING_SLOT = 'manhã'
+NIGHT_SLOT = 'noite'
+
 
 class LiveBotManager:
-    """Gerencia ambos os bots (manhã e noite)"""
-    
-    def __init__(self):
-        self.morning_bot = None
-        self.night_bot = None
-        self.setup_signal_handlers()
-    
-    def setup_signal_handlers(self):
-        """Configura handlers para parar bots graciosamente"""
-        def signal_handler(sig, frame):
-            logger.info("Recebido sinal de interrupção, parando bots...")
-            self.stop_all()
-            sys.exit(0)
-        
-        signal.signal(signal.SIGINT, signal_handler)
-        signal.signal(signal.SIGTERM, signal_handler)
-    
-    def start_morning_bot(self, execute_now=False):
-        """Inicia bot da manhã"""
-        logger.info("🌅 Iniciando bot da manhã...")
-        self.morning_bot = MorningBot()
-        # execute_now=False porque o bot detecta automaticamente o horário
-        morning_thread = threading.Thread(
-            target=self.morning_bot.run,
-            args=(False,),  # Bot detecta horário automaticamente
-            daemon=True
-        )
-        morning_thread.start()
-        return morning_thread
-    
-    def start_night_bot(self, execute_now=False):
-        """Inicia bot da noite"""
-        logger.info("🌙 Iniciando bot da noite...")
-        self.night_bot = NightBot()
-        # execute_now=False porque o bot detecta automaticamente o horário
-        night_thread = threading.Thread(
-            target=self.night_bot.run,
-            args=(False,),  # Bot detecta horário automaticamente
-            daemon=True
-        )
-        night_thread.start()
-        return night_thread
-    
+    """Gerencia todos os slots da agenda num único event loop"""
+
+    def __init__(self, config_file=DEFAULT_SCHEDULE_FILE):
+        self.config_file = config_file
+        self.runner = None
+        self.plane = ControlPlane()
+        self.plane.on_shutdown(self._log_stats)
+
+    async def _log_stats(self):
+        stats = self.plane.stats()
+        logger.info(f"📈 Plano de controle: {stats['timers_fired']} timers, "
+                    f"atraso máximo {stats['timer_lag_max']}s")
+
+    def start_slots(self, slot_names=None, run_now=()):
+        """
+        Registra os slots no plano de controle
+
+        Args:
+            slot_names: Slots executados (None = todos os habilitados)
+            run_now: Slots abertos imediatamente
+        """
+        self.runner = SlotRunner(self.config_file, slot_names=slot_names)
+        for slot in self.runner.selected_slots():
+            logger.info(f"📺 Slot {slot['name']}: {slot['start']} - {slot['end']} "
+                        f"({slot['content']}, {slot['mode']})")
+        # Os slots detectam o horário automaticamente; run_now força a execução
+        self.plane.on_start(lambda plane: self.runner.register(plane, run_now))
+        return self.runner
+
     def stop_all(self):
-        """Para todos os bots"""
+        """Para todos os bots (as lives são encerradas pelo plano de controle)"""
         logger.info("🛑 Parando todos os bots...")
-        if self.morning_bot:
-            self.morning_bot.live_manager.stop_streaming()
-        if self.night_bot:
-            self.night_bot.live_manager.stop_streaming()
-        logger.info("✅ Todos os bots parados")
-    
-    def run(self, morning_execute_now=False, night_execute_now=False):
-        """Executa ambos os bots"""
+        self.plane.stop()
+
+    def run(self, slot_names=None, run_now=()):
+        """Executa os slots selecionados"""
         from datetime import datetime
         current_hour = datetime.now().hour
-        
+
         logger.info("=" * 60)
         logger.info("🚀 Iniciando Sistema de Live Bots")
         logger.info("=" * 60)
         logger.info(f"🕐 Horário atual: {current_hour}h")
-        logger.info("🌅 Bot da Manhã: 7h - 19h (LOFI)")
-        logger.info("🌙 Bot da Noite: 20h - 3h (Sons da Natureza)")
+        logger.info(f"📋 Agenda: {self.config_file}")
+        self.start_slots(slot_names, run_now)
         logger.info("=" * 60)
-        logger.info("💡 Os bots detectam automaticamente o horário e executam o fluxo apropriado")
+        logger.info("💡 Os slots detectam automaticamente o horário e executam o fluxo apropriado")
         logger.info("=" * 60)
-        
-        # Inicia ambos os bots (eles detectam o horário automaticamente)
-        morning_thread = self.start_morning_bot(execute_now=False)
-        night_thread = self.start_night_bot(execute_now=False)
-        
-        logger.info("✅ Ambos os bots iniciados")
         logger.info("🔄 Sistema rodando... (Ctrl+C para parar)")
-        
-        # Mantém o processo vivo
-        try:
-            while True:
-                time.sleep(3600)  # Verifica a cada hora
-        except KeyboardInterrupt:
-            logger.info("\n⚠️  Sistema interrompido pelo usuário")
-            self.stop_all()
-            sys.exit(0)
+
+        # Um único event loop mantém agendas e lives até SIGINT/SIGTERM
+        self.plane.run()
+        logger.info("✅ Todos os bots parados")
 
 
 def main():
     """Função principal"""
     import argparse
-    
+
     parser = argparse.ArgumentParser(description="Sistema de Live Bots para YouTube")
+    parser.add_argument(
+        '--config',
+        default=DEFAULT_SCHEDULE_FILE,
+        help='Arquivo da agenda de slots (padrão: schedules.json)'
+    )
+    parser.add_argument(
+        '--slot',
+        action='append',
+        help='Executa apenas este slot (pode repetir)'
+    )
+    parser.add_argument(
+        '--now',
+        action='append',
+        default=[],
+        help='Abre este slot imediatamente (pode repetir)'
+    )
     parser.add_argument(
         '--morning-now',
         action='store_true',
@@ -129,28 +117,27 @@ def main():
         action='store_true',
         help='Executa apenas o bot da noite'
     )
-    
+
     args = parser.parse_args()
-    
-    manager = LiveBotManager()
-    
+
+    slot_names = args.slot
+    if args.morning_only:
+        logger.info("🌅 Executando apenas bot da manhã...")
+        slot_names = [MORNING_SLOT]
+    elif args.night_only:
+        logger.info("🌙 Executando apenas bot da noite...")
+        slot_names = [NIGHT_SLOT]
+
+    run_now = list(args.now)
+    if args.morning_now:
+        run_now.append(MORNING_SLOT)
+    if args.night_now:
+        run_now.append(NIGHT_SLOT)
+
+    manager = LiveBotManager(args.config)
+
     try:
-        if args.morning_only:
-            logger.info("🌅 Executando apenas bot da manhã...")
-            manager.start_morning_bot(execute_now=args.morning_now)
-            while True:
-                time.sleep(3600)
-        elif args.night_only:
-            logger.info("🌙 Executando apenas bot da noite...")
-            manager.start_night_bot(execute_now=args.night_now)
-            while True:
-                time.sleep(3600)
-        else:
-            # Executa ambos
-            manager.run(
-                morning_execute_now=args.morning_now,
-                night_execute_now=args.night_now
-            )
+        manager.run(slot_names=slot_names, run_now=run_now)
     except KeyboardInterrupt:
         logger.info("\n⚠️  Sistema interrompido pelo usuário")
         manager.stop_all()
@@ -165,4 +152,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
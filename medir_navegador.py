@@ -0,0 +1,80 @@
+"""
+Mede o perfil leve do navegador (browser_profile) nas páginas de teste do Studio
+Compara a interface completa com o perfil leve: tempo até a sala de controle
+ficar pronta, memória (RSS do driver + navegador) e recursos pesados baixados
+
+Uso:
+    python medir_navegador.py --runs 5 --asset-kb 500 --asset-delay 0.5
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+
+def measure(server, lightweight, runs, headless=True):
+    """Abre o navegador uma vez e carrega a sala de controle `runs` vezes"""
+    from youtube_automation import YouTubeAutomation, LIVE_PAGE_XPATH
+    from ui_waits import wait_for, first_match, document_ready
+    from browser_pool import process_tree_memory_mb
+
+    automation = YouTubeAutomation(headless=headless, lightweight=lightweight)
+    if not automation._setup_driver():
+        raise RuntimeError('navegador não disponível')
+    driver = automation.driver
+    results = {'ready': [], 'rss': [], 'assets': []}
+    try:
+        for run in range(runs):
+            assets_before = server.state.asset_requests
+            started = time.monotonic()
+            driver.get(f"{server.base_url}video/medicao{run}/livestreaming")
+            wait_for(driver, document_ready, 30)
+            if not wait_for(driver, first_match(LIVE_PAGE_XPATH, enabled=False), 30):
+                raise RuntimeError('sala de controle não carregou')
+            results['ready'].append(time.monotonic() - started)
+            results['rss'].append(process_tree_memory_mb(driver.service.process.pid))
+            results['assets'].append(server.state.asset_requests - assets_before)
+    finally:
+        automation.close()
+    return {key: statistics.median(values) for key, values in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mede o perfil leve do navegador')
+    parser.add_argument('--runs', type=int, default=5, help='Carregamentos por perfil')
+    parser.add_argument('--asset-kb', type=int, default=500, help='Tamanho de cada imagem/vídeo/fonte (KB)')
+    parser.add_argument('--asset-delay', type=float, default=0.5,
+                        help='Latência de cada imagem/vídeo/fonte (segundos)')
+    parser.add_argument('--show', action='store_true', help='Abre o navegador com interface')
+    args = parser.parse_args()
+
+    from fake_youtube_studio import FakeStudioServer
+    server = FakeStudioServer(render_delay=0.2, enable_delay=0, asset_kb=args.asset_kb,
+                              asset_delay=args.asset_delay).start()
+    # Os recursos pesados vêm de "localhost" (terceiros): bloqueados no perfil leve
+    os.environ['BROWSER_BLOCK_HOSTS'] = server.assets_host
+    print(f"🧪 Páginas de teste em {server.base_url} (recursos de {server.state.assets_url})")
+
+    try:
+        full = measure(server, lightweight=False, runs=args.runs, headless=not args.show)
+        light = measure(server, lightweight=True, runs=args.runs, headless=not args.show)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        server.stop()
+
+    print("=" * 60)
+    print(f"{'Perfil':<12}{'Pronta (s)':>12}{'RSS (MB)':>12}{'Recursos':>12}")
+    for name, result in (('completo', full), ('leve', light)):
+        print(f"{name:<12}{result['ready']:>12.2f}{result['rss']:>12.0f}{result['assets']:>12.0f}")
+    print("=" * 60)
+    print(f"⚡ Sala de controle pronta {full['ready'] - light['ready']:.2f}s antes "
+          f"({(1 - light['ready'] / full['ready']) * 100:.0f}%)")
+    print(f"💾 {full['rss'] - light['rss']:.0f} MB a menos de RSS "
+          f"({(1 - light['rss'] / full['rss']) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
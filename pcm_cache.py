@@ -0,0 +1,334 @@
+"""
+Cache de áudio decodificado (PCM cru em arquivos mapeáveis na memória)
+Cada faixa é decodificada uma única vez para int16 intercalado
+(PCM_SAMPLE_RATE, PCM_CHANNELS) em cache/pcm/, a partir da versão
+normalizada do asset_ingest quando ela existir. O índice (tabela pcm_index do
+state_store) guarda duração, pontos de loop e níveis de cada faixa.
+
+Recortar, repetir e analisar são views NumPy sobre o np.memmap (sem cópia);
+só os trechos de crossfade são calculados. render_audio() monta o áudio de
+um render e playlist_blocks() gera o fluxo contínuo de uma playlist em blocos;
+write_wav() e encode_aac() gravam qualquer fluxo de blocos (faixas, sons
+sintetizados) sem montar o arquivo inteiro na memória.
+"""
+import os
+import wave
+import hashlib
+import logging
+import threading
+import subprocess
+import numpy as np
+from state_store import get_state_store
+from asset_ingest import ffmpeg_binary, cached_audio
+
+
+logger = logging.getLogger(__name__)
+
+PCM_CACHE_DIR = os.getenv('PCM_CACHE_DIR', 'cache/pcm')
+PCM_SAMPLE_RATE = int(os.getenv('PCM_SAMPLE_RATE', 48000))
+PCM_CHANNELS = 2
+# Crossfade nas emendas do loop e entre faixas da playlist (segundos)
+PCM_CROSSFADE = float(os.getenv('PCM_CROSSFADE', 1.5))
+# Abaixo disso (dBFS) o trecho conta como silêncio no início/fim da faixa
+SILENCE_DB = -50.0
+# Região no fim da faixa onde o ponto de loop é procurado (segundos)
+LOOP_SEARCH_SECONDS = 2.0
+# Diferença aceita no ponto de loop (fração da escala)
+LOOP_TOLERANCE = 0.01
+# Bloco entregue por playlist_blocks (segundos)
+BLOCK_SECONDS = 1.0
+
+_FULL_SCALE = 32768.0
+
+
+def to_db(value):
+    """Amplitude (0-1) em dBFS"""
+    return float(20 * np.log10(max(float(value), 1e-9)))
+
+
+class PcmTrack:
+    """
+    Faixa decodificada: `samples` é um np.memmap (frames, canais) int16 somente leitura
+    """
+
+    def __init__(self, entry):
+        self.source = entry['source']
+        self.sample_rate = entry['sample_rate']
+        self.channels = entry['channels']
+        self.frames = entry['frames']
+        self.loop_start = entry['loop_start']
+        self.loop_end = entry['loop_end']
+        self.peak_db = entry['peak_db']
+        self.rms_db = entry['rms_db']
+        self.key = (entry['pcm_path'], entry['frames'], entry['loop_start'], entry['loop_end'])
+        self.samples = np.memmap(entry['pcm_path'], dtype=np.int16, mode='r',
+                                 shape=(self.frames, self.channels))
+
+    @property
+    def duration(self):
+        return self.frames / self.sample_rate
+
+    def frame(self, seconds):
+        return max(0, min(self.frames, int(round(seconds * self.sample_rate))))
+
+    def slice(self, start, end=None):
+        """View dos segundos [start, end) (sem cópia)"""
+        return self.samples[self.frame(start):self.frame(end) if end is not None else self.frames]
+
+    def loop_region(self):
+        """View da região de loop (sem cópia)"""
+        return self.samples[self.loop_start:self.loop_end]
+
+    def levels(self, window=1.0):
+        """RMS (dBFS) por janela de `window` segundos, lido direto do memmap"""
+        return window_levels(self.samples, int(window * self.sample_rate))
+
+
+def window_levels(samples, window_frames):
+    """RMS (dBFS) de cada janela completa de `samples` (lido em pedaços de ~10 s)"""
+    windows = len(samples) // window_frames
+    if not windows:
+        return np.array([])
+    # reshape de uma fatia contígua: continua sendo uma view
+    blocks = samples[:windows * window_frames].reshape(windows, window_frames * samples.shape[1])
+    step = max(1, (10 * PCM_SAMPLE_RATE) // window_frames)
+    rms = np.concatenate([
+        np.sqrt(np.mean(np.square(blocks[row:row + step], dtype=np.float64), axis=1))
+        for row in range(0, windows, step)
+    ]) / _FULL_SCALE
+    return 20 * np.log10(np.maximum(rms, 1e-9))
+
+
+def peak_level(samples):
+    """Maior amplitude absoluta (0-1), lida em pedaços de ~10 s"""
+    step = 10 * PCM_SAMPLE_RATE
+    peak = 0
+    for offset in range(0, len(samples), step):
+        chunk = samples[offset:offset + step]
+        peak = max(peak, int(chunk.max()), -int(chunk.min()))
+    return peak / _FULL_SCALE
+
+
+def crossfade(tail, head):
+    """Mistura equal-power de dois trechos do mesmo tamanho (único trecho copiado)"""
+    frames = min(len(tail), len(head))
+    if not frames:
+        return tail[:0]
+    t = np.linspace(0.0, 1.0, frames, dtype=np.float32)[:, None]
+    mixed = (tail[-frames:].astype(np.float32) * np.cos(t * np.pi / 2)
+             + head[:frames].astype(np.float32) * np.sin(t * np.pi / 2))
+    return np.clip(mixed, -_FULL_SCALE, _FULL_SCALE - 1).astype(np.int16)
+
+
+def find_loop_points(samples, sample_rate):
+    """
+    Pontos de loop: ignora silêncio no início e no fim e escolhe, no fim da
+    faixa, o ponto cujo valor e inclinação mais se parecem com os do início
+
+    Returns:
+        (loop_start, loop_end) em frames
+    """
+    frames = len(samples)
+    window = max(1, sample_rate // 100)
+    levels = window_levels(samples, window)
+    audible = np.nonzero(levels > SILENCE_DB)[0]
+    if not len(audible):
+        return 0, frames
+    loop_start = int(audible[0]) * window
+    loop_end = min(frames, (int(audible[-1]) + 1) * window)
+
+    search = min(int(LOOP_SEARCH_SECONDS * sample_rate), (loop_end - loop_start) // 4)
+    if search < 2:
+        return loop_start, loop_end
+    mono = samples[loop_end - search - 1:loop_end].mean(axis=1)
+    start_value = float(samples[loop_start].mean())
+    start_slope = float(samples[min(loop_start + 1, frames - 1)].mean()) - start_value
+    slopes = np.diff(mono)
+    distance = np.abs(mono[1:] - start_value) + np.where(np.sign(slopes) == np.sign(start_slope), 0, _FULL_SCALE)
+    # O candidato bom mais próximo do fim (perde o mínimo da faixa)
+    good = np.nonzero(distance <= distance.min() + LOOP_TOLERANCE * _FULL_SCALE)[0]
+    loop_end = loop_end - search + int(good[-1])
+    return loop_start, max(loop_end, loop_start + 1)
+
+
+def _pcm_path(source):
+    digest = hashlib.sha1(os.path.abspath(source).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(PCM_CACHE_DIR, f'{digest}_{PCM_SAMPLE_RATE}hz.pcm')
+
+
+def _decode(decoded_from, target):
+    """Decodifica para int16 intercalado; WAV já no formato é copiado sem ffmpeg"""
+    temp_target = f'{target}.tmp'
+    os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+    try:
+        with wave.open(decoded_from, 'rb') as wav:
+            if (wav.getsampwidth(), wav.getnchannels(), wav.getframerate()) == (2, PCM_CHANNELS, PCM_SAMPLE_RATE):
+                with open(temp_target, 'wb') as out:
+                    while True:
+                        chunk = wav.readframes(PCM_SAMPLE_RATE * 10)
+                        if not chunk:
+                            break
+                        out.write(chunk)
+                os.replace(temp_target, target)
+                return
+    except (wave.Error, EOFError):
+        pass
+    with open(temp_target, 'wb') as out:
+        process = subprocess.run(
+            [ffmpeg_binary(), '-hide_banner', '-nostats', '-loglevel', 'error', '-i', decoded_from, '-vn',
+             '-f', 's16le', '-acodec', 'pcm_s16le', '-ar', str(PCM_SAMPLE_RATE), '-ac', str(PCM_CHANNELS), '-'],
+            stdout=out, stderr=subprocess.PIPE, text=True, errors='replace'
+        )
+    if process.returncode != 0:
+        os.remove(temp_target)
+        raise RuntimeError(f'ffmpeg terminou com código {process.returncode}: {process.stderr[-500:]}')
+    os.replace(temp_target, target)
+
+
+def build_track(source, store=None):
+    """
+    Decodifica `source` para o cache e atualiza o índice (se ainda não estiver atualizado)
+
+    Returns:
+        Entrada do índice
+    """
+    store = store or get_state_store()
+    source = os.path.abspath(source)
+    stat = os.stat(source)
+    decoded_from = os.path.abspath(cached_audio(source))
+    entry = store.pcm_entry(source)
+    if (entry and entry['decoded_from'] == decoded_from and entry['source_mtime'] == stat.st_mtime
+            and entry['source_size'] == stat.st_size and entry['sample_rate'] == PCM_SAMPLE_RATE
+            and os.path.exists(entry['pcm_path'])):
+        return entry
+
+    target = _pcm_path(source)
+    _decode(decoded_from, target)
+    frames = os.path.getsize(target) // (2 * PCM_CHANNELS)
+    if not frames:
+        raise RuntimeError(f'{os.path.basename(source)} não tem áudio')
+    samples = np.memmap(target, dtype=np.int16, mode='r', shape=(frames, PCM_CHANNELS))
+    loop_start, loop_end = find_loop_points(samples, PCM_SAMPLE_RATE)
+    peak = peak_level(samples)
+    rms_levels = window_levels(samples, PCM_SAMPLE_RATE)
+    rms = float(np.sqrt(np.mean(np.power(10, rms_levels / 10)))) if len(rms_levels) else 0.0
+    del samples
+
+    entry = {
+        'source': source, 'decoded_from': decoded_from,
+        'source_mtime': stat.st_mtime, 'source_size': stat.st_size,
+        'pcm_path': target, 'sample_rate': PCM_SAMPLE_RATE, 'channels': PCM_CHANNELS, 'frames': frames,
+        'loop_start': loop_start, 'loop_end': loop_end, 'peak_db': to_db(peak), 'rms_db': to_db(rms),
+    }
+    store.save_pcm_entry(entry)
+    logger.info(f"🎚️  PCM em cache: {os.path.basename(source)} ({frames / PCM_SAMPLE_RATE:.1f}s, "
+                f"loop {loop_start / PCM_SAMPLE_RATE:.2f}-{loop_end / PCM_SAMPLE_RATE:.2f}s, "
+                f"pico {entry['peak_db']:.1f} dBFS, RMS {entry['rms_db']:.1f} dBFS)")
+    return entry
+
+
+_tracks = {}
+_tracks_lock = threading.Lock()
+
+
+def get_track(source):
+    """Faixa decodificada de `source` (decodifica na primeira vez; memmaps reaproveitados no processo)"""
+    entry = build_track(source)
+    key = (entry['pcm_path'], entry['frames'], entry['loop_start'], entry['loop_end'])
+    with _tracks_lock:
+        track = _tracks.get(entry['source'])
+        if track is None or track.key != key:
+            track = PcmTrack(entry)
+            _tracks[entry['source']] = track
+        return track
+
+
+def playlist_blocks(tracks, seconds, crossfade_seconds=PCM_CROSSFADE):
+    """
+    Fluxo contínuo das faixas em sequência (repetindo a lista), com crossfade
+
+    A primeira passagem de cada faixa começa do início; as seguintes usam a
+    região de loop. Os trechos entregues são views do memmap, exceto os
+    crossfades.
+
+    Yields:
+        Arrays int16 (frames, canais) que somam exatamente `seconds`
+    """
+    remaining = int(round(seconds * PCM_SAMPLE_RATE))
+    fade = int(crossfade_seconds * PCM_SAMPLE_RATE)
+    played = set()
+    tail = None
+    index = 0
+    while remaining > 0:
+        track = tracks[index % len(tracks)]
+        index += 1
+        start = track.loop_start if track.source in played else 0
+        played.add(track.source)
+        piece = track.samples[start:track.loop_end]
+        if not len(piece):
+            continue
+
+        if tail is not None:
+            frames = min(len(tail), len(piece) // 2)
+            for block in (tail[:len(tail) - frames], crossfade(tail[len(tail) - frames:], piece[:frames])):
+                block = block[:remaining]
+                if len(block):
+                    remaining -= len(block)
+                    yield block
+            piece = piece[frames:]
+            tail = None
+            if remaining <= 0:
+                break
+
+        # O fim da faixa fica guardado para o crossfade com a próxima
+        if fade and len(piece) > 2 * fade and len(piece) < remaining:
+            piece, tail = piece[:-fade], piece[-fade:]
+        block_frames = int(BLOCK_SECONDS * PCM_SAMPLE_RATE)
+        for offset in range(0, len(piece), block_frames):
+            block = piece[offset:offset + block_frames][:remaining]
+            remaining -= len(block)
+            yield block
+            if remaining <= 0:
+                break
+
+
+def write_wav(path, blocks, sample_rate=PCM_SAMPLE_RATE, channels=PCM_CHANNELS):
+    """Grava os blocos num WAV PCM 16 bits sem juntar tudo na memória"""
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        for block in blocks:
+            wav.writeframes(np.ascontiguousarray(block).tobytes())
+
+
+def encode_aac(output_path, blocks, sample_rate=PCM_SAMPLE_RATE, channels=PCM_CHANNELS, bitrate='192k'):
+    """Codifica os blocos int16 direto em AAC (ffmpeg lendo PCM pelo stdin, bloco a bloco)"""
+    process = subprocess.Popen(
+        [ffmpeg_binary(), '-hide_banner', '-nostats', '-loglevel', 'error', '-y',
+         '-f', 's16le', '-ar', str(sample_rate), '-ac', str(channels), '-i', 'pipe:0',
+         '-c:a', 'aac', '-b:a', bitrate, output_path],
+        stdin=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    try:
+        for block in blocks:
+            process.stdin.write(np.ascontiguousarray(block).tobytes())
+        process.stdin.close()
+    except BrokenPipeError:
+        pass
+    stderr = process.stderr.read().decode('utf-8', 'replace')
+    if process.wait() != 0:
+        raise RuntimeError(f"ffmpeg terminou com código {process.returncode}: {stderr[-500:]}")
+    return output_path
+
+
+def render_audio(source, seconds, output_path):
+    """
+    Áudio de um render: `seconds` da faixa (em loop com crossfade se for menor) em WAV
+
+    Returns:
+        A faixa usada (PcmTrack)
+    """
+    track = get_track(source)
+    write_wav(output_path, playlist_blocks([track], seconds))
+    return track
@@ -0,0 +1,203 @@
+"""
+Pré-render dos slots com previsão de duração
+O vídeo do próximo slot é gerado antes da abertura da janela (com prioridade
+baixa de CPU), a partir do histórico de tempos de render por resolução,
+quantidade de frames e preset do encoder (tabela render_cache do state_store)
+"""
+import os
+import logging
+import threading
+import statistics
+from datetime import datetime, timedelta
+from state_store import get_state_store
+from scheduler_engine import Window
+
+
+logger = logging.getLogger(__name__)
+
+# Renders guardados no histórico (os mais recentes)
+HISTORY_LIMIT = 100
+# Amostras usadas na previsão (as mais recentes do mesmo perfil)
+PREDICTION_SAMPLES = 10
+# Sem histórico: segundos por frame em 1920x1080 com preset 'medium'
+DEFAULT_SECONDS_PER_FRAME = 0.5
+# Custo relativo dos presets do x264 (usado só para extrapolar de outro preset)
+PRESET_COST = {
+    'ultrafast': 0.4, 'superfast': 0.5, 'veryfast': 0.6, 'faster': 0.75, 'fast': 0.85,
+    'medium': 1.0, 'slow': 1.4, 'slower': 2.2, 'veryslow': 3.5,
+}
+# Folga sobre a previsão: fator multiplicativo e margem fixa (segundos)
+PRERENDER_SAFETY = float(os.getenv('PRERENDER_SAFETY', 1.5))
+PRERENDER_MARGIN = int(os.getenv('PRERENDER_MARGIN', 5 * 60))
+# nice do processo de pré-render (o ffmpeg do encode herda)
+PRERENDER_NICE = int(os.getenv('PRERENDER_NICE', 15))
+
+
+def render_profile(video_creator, slot):
+    """Perfil do render do slot: resolução, frames e preset"""
+    return {
+        'content': slot['content'],
+        'width': video_creator.width,
+        'height': video_creator.height,
+        'frames': int(slot['video_duration'] * video_creator.fps),
+        'preset': video_creator.preset,
+    }
+
+
+class RenderHistory:
+    """Histórico de tempos de render (render_cache do state_store)"""
+
+    def __init__(self, store=None):
+        self.store = store or get_state_store()
+        self._lock = threading.Lock()
+        self.records = self.store.renders(HISTORY_LIMIT)
+
+    def record(self, profile, seconds, video_path=None):
+        """Registra a duração de um render concluído"""
+        with self._lock:
+            self.store.record_render(profile, round(seconds, 1), video_path, keep=HISTORY_LIMIT)
+            self.records.append(dict(profile, seconds=round(seconds, 1), video_path=video_path))
+            self.records = self.records[-HISTORY_LIMIT:]
+
+    def predict(self, profile):
+        """
+        Duração prevista do render (segundos)
+
+        Usa a mediana de segundos por frame dos renders mais recentes com a
+        mesma resolução e preset (preferindo o mesmo conteúdo); sem amostras
+        do perfil, extrapola dos demais pela área e pelo custo do preset.
+        """
+        pixels = profile['width'] * profile['height']
+        same = [r for r in self.records
+                if (r['width'], r['height'], r['preset']) == (profile['width'], profile['height'], profile['preset'])
+                and r['frames'] > 0]
+        same_content = [r for r in same if r.get('content') == profile['content']]
+        samples = (same_content or same)[-PREDICTION_SAMPLES:]
+        if samples:
+            per_frame = statistics.median(r['seconds'] / r['frames'] for r in samples)
+        else:
+            others = [r for r in self.records if r['frames'] > 0][-PREDICTION_SAMPLES:]
+            cost = PRESET_COST.get(profile['preset'], 1.0)
+            if others:
+                per_frame = statistics.median(
+                    r['seconds'] / r['frames'] * pixels / (r['width'] * r['height'])
+                    * cost / PRESET_COST.get(r['preset'], 1.0)
+                    for r in others
+                )
+            else:
+                per_frame = DEFAULT_SECONDS_PER_FRAME * pixels / (1920 * 1080) * cost
+        return per_frame * profile['frames']
+
+
+class RenderPlanner:
+    """
+    Agenda o pré-render do próximo slot e entrega o vídeo pronto na abertura
+
+    - O render começa em abertura - (previsão * PRERENDER_SAFETY + PRERENDER_MARGIN)
+    - Roda no render_pool com nice PRERENDER_NICE, para não disputar CPU com
+      o ffmpeg de uma live em andamento
+    - take() entrega o vídeo pronto (ou aguarda o pré-render em andamento);
+      um vídeo de uma configuração antiga do slot é descartado
+    """
+
+    def __init__(self, runner):
+        """
+        Args:
+            runner: SlotRunner (render e configuração dos slots)
+        """
+        self.runner = runner
+        self.history = RenderHistory()
+        self._entries = {}
+        self._pending = {}
+        self._ready = {}
+
+    async def timed_render(self, plane, slot, log, nice=None):
+        """Render do slot (render_pool) com o tempo registrado no histórico"""
+        video_path, category, elapsed = await self.runner.render(plane, slot, log, nice)
+        if video_path:
+            await plane.call(self.history.record, render_profile(self.runner.video_creator, slot), elapsed, video_path)
+            await plane.call(self.history.store.record_metric, 'render_seconds', elapsed,
+                             slot=slot['name'], content=slot['content'])
+            log.info(f"⏱️  Render concluído em {elapsed / 60:.1f} min")
+        return video_path, category
+
+    def lead_time(self, slot):
+        """Antecedência do pré-render em relação à abertura do slot"""
+        predicted = self.history.predict(render_profile(self.runner.video_creator, slot))
+        return timedelta(seconds=predicted * PRERENDER_SAFETY + PRERENDER_MARGIN)
+
+    def plan(self, plane, slot):
+        """Agenda o pré-render da próxima abertura do slot (substitui o agendamento anterior)"""
+        name = slot['name']
+        self.cancel(name)
+        scheduler = plane.scheduler
+        window = Window(name, slot['start'], slot['end'], scheduler.tz)
+        now = datetime.now(scheduler.tz)
+        open_at, close_at = window.current_or_next(now)
+        if open_at <= now:
+            open_at, close_at = window.occurrence(open_at.astimezone(scheduler.tz).date() + timedelta(days=1))
+
+        start_at = max(open_at - self.lead_time(slot), now)
+        self._entries[name] = scheduler.at(
+            start_at, lambda: self._start(plane, slot, close_at), f'{name}:pré-render')
+        logger.info(f"🗓️  Pré-render de {name} às {start_at.strftime('%d/%m %H:%M')} "
+                    f"(abertura {open_at.strftime('%d/%m %H:%M')})")
+
+    def cancel(self, name):
+        """Cancela o pré-render agendado do slot e descarta o vídeo pronto"""
+        entry = self._entries.pop(name, None)
+        if entry:
+            entry[4] = False
+        self._discard(self._ready.pop(name, None))
+
+    def _start(self, plane, slot, close_at):
+        name = slot['name']
+        self._entries.pop(name, None)
+        self._pending[name] = (close_at, plane.spawn(self._prerender(plane, slot, close_at), name=f'{name}:pré-render'))
+
+    async def _prerender(self, plane, slot, close_at):
+        from slot_runner import slot_logger
+        name = slot['name']
+        log = slot_logger(slot)
+        log.info(f"🎬 Pré-render de {name} (prioridade baixa, nice {PRERENDER_NICE})")
+        try:
+            video_path, category = await self.timed_render(plane, slot, log, PRERENDER_NICE)
+        finally:
+            self._pending.pop(name, None)
+        if video_path:
+            self._ready[name] = {'video_path': video_path, 'category': category,
+                                 'close_at': close_at, 'slot': slot}
+            log.info(f"✅ Vídeo de {name} pronto antes da abertura: {video_path}")
+        return video_path, category
+
+    async def take(self, slot, close_at):
+        """
+        Vídeo pré-renderizado para a janela que fecha em `close_at`
+
+        Returns:
+            (video_path, categoria) ou None se não houver (o slot renderiza na hora)
+        """
+        name = slot['name']
+        pending = self._pending.get(name)
+        if pending and pending[0] == close_at:
+            logger.info(f"⏳ Aguardando pré-render de {name} em andamento...")
+            try:
+                await pending[1]
+            except Exception:
+                pass
+
+        artifact = self._ready.pop(name, None)
+        if not artifact:
+            return None
+        if artifact['close_at'] != close_at or artifact['slot'] != slot or not os.path.exists(artifact['video_path']):
+            self._discard(artifact)
+            return None
+        return artifact['video_path'], artifact['category']
+
+    @staticmethod
+    def _discard(artifact):
+        if artifact and os.path.exists(artifact['video_path']):
+            try:
+                os.remove(artifact['video_path'])
+            except OSError:
+                pass
@@ -0,0 +1,387 @@
+"""
+Pool de processos para renders
+Cada job roda num processo próprio (fora do GIL do bot), com prioridade (nice)
+e afinidade de CPU configuráveis; o processo termina ao fim do job, devolvendo
+toda a memória ao sistema
+"""
+import os
+import time
+import queue
+import signal
+import logging
+import itertools
+import threading
+import traceback
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future
+
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+
+# Processo que saiu sem resultado é dado como falho após esta espera (segundos)
+EXIT_GRACE = 2.0
+# Espera entre SIGTERM e SIGKILL ao cancelar (segundos)
+CANCEL_TIMEOUT = 5.0
+# Jobs terminados mantidos para consulta (os mais recentes)
+FINISHED_LIMIT = 50
+
+
+class RenderJobError(Exception):
+    """Falha de um job do pool de render"""
+
+
+def _cpus_env(name):
+    value = os.getenv(name, '').strip()
+    if not value:
+        return None
+    return sorted({int(cpu) for cpu in value.split(',') if cpu.strip()})
+
+
+# Estado do processo filho: destino dos relatórios de progresso
+_progress_queue = None
+_progress_job = None
+
+
+def report_progress(fraction, stage=''):
+    """
+    Informa o progresso do job atual ao processo pai (sem efeito fora de um job)
+
+    Args:
+        fraction: 0.0 a 1.0
+        stage: Etapa legível (ex: 'frames')
+    """
+    if _progress_queue is not None:
+        try:
+            _progress_queue.put(('progress', _progress_job, float(fraction), stage))
+        except Exception:
+            pass
+
+
+def _job_main(messages, job_id, func, args, kwargs, nice, cpus):
+    """Entrada do processo filho"""
+    global _progress_queue, _progress_job
+    _progress_queue, _progress_job = messages, job_id
+    # Grupo de processos próprio: cancelar encerra também o ffmpeg do encode
+    os.setpgrp()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if nice:
+        try:
+            os.nice(nice)
+        except OSError:
+            pass
+    if cpus and hasattr(os, 'sched_setaffinity'):
+        try:
+            os.sched_setaffinity(0, cpus)
+        except OSError:
+            pass
+
+    try:
+        result = func(*args, **kwargs)
+        messages.put(('done', job_id, result, _peak_memory_mb()))
+    except BaseException as e:
+        messages.put(('error', job_id, f"{type(e).__name__}: {e}", traceback.format_exc()))
+
+
+def _peak_memory_mb():
+    try:
+        import resource
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        usage += resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        return round(usage / 1024, 1)  # Linux: KB
+    except (ImportError, OSError):
+        return None
+
+
+class RenderJob:
+    """Job do pool: estado, progresso e resultado (future)"""
+
+    def __init__(self, job_id, func, args, kwargs, nice, cpus, name, on_progress):
+        self.id = job_id
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.nice = nice
+        self.cpus = cpus
+        self.name = name or getattr(func, '__name__', 'render')
+        self.on_progress = on_progress
+        self.state = JOB_QUEUED
+        self.progress = 0.0
+        self.stage = ''
+        self.pid = None
+        self.peak_memory_mb = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = Future()
+        self._process = None
+        self._exited_at = None
+
+    @property
+    def elapsed(self):
+        if not self.started_at:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def done(self):
+        return self.state in (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+    def result(self, timeout=None):
+        """Resultado da função (RenderJobError se falhou, CancelledError se cancelado)"""
+        return self.future.result(timeout)
+
+    def __repr__(self):
+        return f"RenderJob({self.id} {self.name} {self.state} {self.progress:.0%})"
+
+
+class RenderPool:
+    """
+    Pool de processos para renders com API de jobs
+
+    - submit() enfileira func(*args, **kwargs) (função de módulo, importável
+      pelo processo filho) e devolve um RenderJob
+    - progress() / job.progress: relatado pelo filho com report_progress()
+    - cancel(): SIGTERM no grupo do processo (inclui o ffmpeg), SIGKILL se preciso
+    - result() / job.future: resultado; asyncio.wrap_future(job.future) no event loop
+    - Processos criados com 'spawn': o filho não herda threads nem o estado do bot
+    """
+
+    def __init__(self, max_workers=None, nice=None, cpus=None):
+        """
+        Args:
+            max_workers: Jobs simultâneos (padrão: RENDER_WORKERS ou 1)
+            nice: nice padrão dos jobs (padrão: RENDER_NICE ou 10)
+            cpus: CPUs permitidas aos jobs, ex: [2, 3] (padrão: RENDER_CPUS, ex: '2,3')
+        """
+        self.max_workers = max_workers or int(os.getenv('RENDER_WORKERS', 1))
+        self.nice = nice if nice is not None else int(os.getenv('RENDER_NICE', 10))
+        self.cpus = cpus if cpus is not None else _cpus_env('RENDER_CPUS')
+        self._context = multiprocessing.get_context('spawn')
+        self._messages = None
+        self._jobs = {}
+        self._pending = deque()
+        self._running = {}
+        self._terminating = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._stopping = False
+        self._dispatcher = None
+
+    def _ensure_started(self):
+        if self._dispatcher is None:
+            self._messages = self._context.Queue()
+            self._dispatcher = threading.Thread(target=self._dispatch, name='render-pool', daemon=True)
+            self._dispatcher.start()
+
+    def submit(self, func, *args, nice=None, cpus=None, name=None, on_progress=None, **kwargs):
+        """
+        Enfileira um job
+
+        Args:
+            func: Função de módulo executada no processo filho
+            nice: nice do job (padrão: o do pool)
+            cpus: CPUs do job (padrão: as do pool)
+            name: Nome para logs
+            on_progress: on_progress(job) chamado a cada relatório (thread do pool)
+
+        Returns:
+            RenderJob
+        """
+        with self._lock:
+            if self._stopping:
+                raise RenderJobError("Pool de render encerrado")
+            self._ensure_started()
+            job = RenderJob(f"r{next(self._ids)}", func, args, kwargs,
+                            self.nice if nice is None else nice,
+                            self.cpus if cpus is None else cpus, name, on_progress)
+            self._jobs[job.id] = job
+            self._pending.append(job)
+        self._wake()
+        return job
+
+    def _wake(self):
+        if self._messages is not None:
+            self._messages.put(('wake', None))
+
+    def job(self, job_id):
+        return self._jobs.get(job_id)
+
+    def progress(self, job_id):
+        """(fração, etapa) do job"""
+        job = self._jobs[job_id]
+        return job.progress, job.stage
+
+    def result(self, job_id, timeout=None):
+        return self._jobs[job_id].result(timeout)
+
+    def cancel(self, job_id):
+        """
+        Cancela um job (na fila ou em execução)
+
+        Returns:
+            True se o job ainda não tinha terminado
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.done():
+                return False
+            if job.state == JOB_QUEUED:
+                self._pending.remove(job)
+                self._finish(job, JOB_CANCELLED)
+                return True
+            process = job._process
+            logger.info(f"🛑 Cancelando render {job.name} ({job.id})")
+            # Não bloqueia: o despachante manda SIGKILL se o processo não sair a tempo
+            self._signal(process, signal.SIGTERM)
+            self._running.pop(job.id, None)
+            self._terminating.append((process, time.time() + CANCEL_TIMEOUT))
+            self._finish(job, JOB_CANCELLED)
+        self._wake()
+        return True
+
+    @staticmethod
+    def _signal(process, sig):
+        try:
+            os.killpg(process.pid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def stats(self):
+        """Jobs por estado"""
+        counts = {state: 0 for state in (JOB_QUEUED, JOB_RUNNING, JOB_DONE, JOB_FAILED, JOB_CANCELLED)}
+        for job in list(self._jobs.values()):
+            counts[job.state] += 1
+        return counts
+
+    def shutdown(self):
+        """Cancela todos os jobs e para o despachante"""
+        with self._lock:
+            self._stopping = True
+            job_ids = [job.id for job in self._jobs.values() if not job.done()]
+        for job_id in job_ids:
+            self.cancel(job_id)
+        self._wake()
+
+    def _finish(self, job, state, result=None, error=None):
+        # Chamado com self._lock
+        job.state = state
+        job.finished_at = time.time()
+        if state == JOB_DONE:
+            job.progress = 1.0
+            job.future.set_result(result)
+        elif state == JOB_FAILED:
+            job.future.set_exception(RenderJobError(error))
+        else:
+            job.future.cancel()
+
+    def _start(self, job):
+        # Chamado com self._lock
+        process = self._context.Process(
+            target=_job_main,
+            args=(self._messages, job.id, job.func, job.args, job.kwargs, job.nice, job.cpus),
+            name=f'render-{job.id}',
+            daemon=True
+        )
+        process.start()
+        job._process = process
+        job.pid = process.pid
+        job.state = JOB_RUNNING
+        job.started_at = time.time()
+        self._running[job.id] = job
+        cpus = ','.join(map(str, job.cpus)) if job.cpus else 'todas'
+        logger.info(f"🎬 Render {job.name} ({job.id}) no processo {job.pid} (nice {job.nice}, CPUs {cpus})")
+
+    def _handle(self, message):
+        kind, job_id = message[0], message[1]
+        if kind == 'wake':
+            return
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.done():
+                return
+            if kind == 'progress':
+                job.progress, job.stage = message[2], message[3]
+                callback = job.on_progress
+            else:
+                self._running.pop(job_id, None)
+                if kind == 'done':
+                    job.peak_memory_mb = message[3]
+                    self._finish(job, JOB_DONE, result=message[2])
+                    logger.info(f"✅ Render {job.name} ({job.id}) concluído em {job.elapsed / 60:.1f} min "
+                                f"(pico de memória {job.peak_memory_mb} MB)")
+                else:
+                    self._finish(job, JOB_FAILED, error=message[2])
+                    logger.error(f"❌ Render {job.name} ({job.id}) falhou: {message[2]}\n{message[3]}")
+                callback = None
+        if callback:
+            try:
+                callback(job)
+            except Exception as e:
+                logger.warning(f"⚠️  Erro no callback de progresso: {e}")
+
+    def _reap(self):
+        """Processos que saíram sem mandar resultado (morte por sinal, OOM...)"""
+        now = time.time()
+        with self._lock:
+            for process, kill_at in list(self._terminating):
+                if not process.is_alive():
+                    process.join(0)
+                    self._terminating.remove((process, kill_at))
+                elif now >= kill_at:
+                    self._signal(process, signal.SIGKILL)
+            for job in list(self._running.values()):
+                process = job._process
+                if process.is_alive():
+                    continue
+                if job._exited_at is None:
+                    job._exited_at = now  # O resultado pode ainda estar na fila
+                elif now - job._exited_at > EXIT_GRACE:
+                    self._running.pop(job.id, None)
+                    self._finish(job, JOB_FAILED, error=f"processo saiu com código {process.exitcode}")
+                    logger.error(f"❌ Render {job.name} ({job.id}) terminou sem resultado "
+                                 f"(código {process.exitcode})")
+            finished = [job for job in self._jobs.values() if job.done()]
+            for job in finished:
+                if job._process is not None and job._process.exitcode is not None:
+                    job._process.join(0)  # Recolhe o processo encerrado
+                    job._process = None
+            for job in finished[:max(0, len(finished) - FINISHED_LIMIT)]:
+                self._jobs.pop(job.id, None)
+
+    def _dispatch(self):
+        while True:
+            with self._lock:
+                if self._stopping and not self._running and not self._pending and not self._terminating:
+                    return
+                # Um processo ainda encerrando (cancelado) ocupa sua vaga até sair
+                while (self._pending and not self._stopping
+                       and len(self._running) + len(self._terminating) < self.max_workers):
+                    self._start(self._pending.popleft())
+            try:
+                message = self._messages.get(timeout=0.5)
+            except queue.Empty:
+                message = None
+            except (EOFError, OSError):
+                return
+            if message is not None:
+                self._handle(message)
+            self._reap()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_render_pool():
+    """Pool de render compartilhado pelo processo"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = RenderPool()
+        return _pool
@@ -1,23 +1,24 @@
 #!/usr/bin/env python3
 """
 Script para renovar o token de autenticação do YouTube
-Execute este script quando o token expirar
+O token é renovado automaticamente em segundo plano (credential_broker.py);
+execute este script só se o refresh token for revogado ou expirar
 """
 import os
 import sys
-from youtube_uploader import YouTubeUploader
+from credential_broker import CredentialBroker
 
 def main():
     print("=" * 60)
     print("🔄 RENOVANDO TOKEN DE AUTENTICAÇÃO DO YOUTUBE")
     print("=" * 60)
     
-    # Remove token antigo se existir
-    token_file = 'credentials/token.pickle'
-    if os.path.exists(token_file):
-        print(f"🗑️  Removendo token antigo: {token_file}")
-        os.remove(token_file)
-        print("✅ Token antigo removido")
+    # Remove token antigo se existir (inclusive o formato pickle anterior)
+    for token_file in ('credentials/token.json', 'credentials/token.pickle'):
+        if os.path.exists(token_file):
+            print(f"🗑️  Removendo token antigo: {token_file}")
+            os.remove(token_file)
+            print("✅ Token antigo removido")
     
     # Verifica se credentials.json existe
     credentials_file = 'credentials/credentials.json'
@@ -32,10 +33,10 @@ def main():
     print("💡 Após fazer login, o token será salvo automaticamente\n")
     
     try:
-        # Cria novo uploader (isso vai solicitar nova autenticação)
-        uploader = YouTubeUploader()
+        # Solicita nova autenticação e salva credentials/token.json
+        broker = CredentialBroker(credentials_file=credentials_file)
         
-        if uploader.youtube:
+        if broker.authorize():
             print("\n✅ Token renovado com sucesso!")
             print("✅ Você pode usar o bot normalmente agora")
             return True
@@ -0,0 +1,237 @@
+"""
+Upload resumable em chunks para o YouTube
+A sessão de upload (URI + bytes confirmados) é persistida a cada chunk, então um
+bot reiniciado continua o upload de onde parou
+"""
+import os
+import time
+import threading
+from datetime import datetime
+from googleapiclient.http import MediaFileUpload
+from googleapiclient.errors import HttpError
+from state_files import load_json, save_json_atomic
+
+
+# O protocolo resumable exige chunks múltiplos de 256KB
+CHUNK_ALIGNMENT = 256 * 1024
+DEFAULT_CHUNK_MB = 8
+# Sessões de upload do Google expiram em cerca de uma semana
+SESSION_MAX_AGE = 6 * 24 * 3600
+RETRYABLE_STATUS = (500, 502, 503, 504)
+
+
+def chunk_size_bytes(chunk_mb=None):
+    """
+    Tamanho de chunk em bytes, alinhado a 256KB
+
+    Args:
+        chunk_mb: Tamanho em MB (padrão: UPLOAD_CHUNK_MB ou 8)
+    """
+    if chunk_mb is None:
+        chunk_mb = float(os.getenv('UPLOAD_CHUNK_MB', DEFAULT_CHUNK_MB))
+    size = int(chunk_mb * 1024 * 1024)
+    return max(CHUNK_ALIGNMENT, size - size % CHUNK_ALIGNMENT)
+
+
+def file_fingerprint(path):
+    """Identifica um arquivo pelo caminho, tamanho e data de modificação"""
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}:{stat.st_size}:{int(stat.st_mtime)}"
+
+
+class UploadSessionStore:
+    """Sessões de upload em andamento, persistidas em JSON"""
+
+    def __init__(self, sessions_file='credentials/upload_sessions.json'):
+        self.sessions_file = sessions_file
+        self._lock = threading.Lock()
+
+    def _load(self):
+        sessions = load_json(self.sessions_file, {}) or {}
+        now = time.time()
+        return {key: session for key, session in sessions.items()
+                if now - session.get('created_at', 0) < SESSION_MAX_AGE}
+
+    def get(self, key):
+        """Sessão salva para o arquivo (ou None)"""
+        with self._lock:
+            return self._load().get(key)
+
+    def save(self, key, resumable_uri, progress, title=''):
+        """Grava URI da sessão e bytes já confirmados pelo servidor"""
+        with self._lock:
+            sessions = self._load()
+            session = sessions.setdefault(key, {'created_at': time.time(), 'title': title})
+            session['resumable_uri'] = resumable_uri
+            session['progress'] = progress
+            session['updated_at'] = datetime.now().isoformat()
+            save_json_atomic(self.sessions_file, sessions)
+
+    def remove(self, key):
+        """Descarta a sessão (upload concluído ou sessão expirada)"""
+        with self._lock:
+            sessions = self._load()
+            if sessions.pop(key, None) is not None:
+                save_json_atomic(self.sessions_file, sessions)
+
+
+class ResumableUploader:
+    """
+    Envia vídeos em chunks com retomada após falhas
+
+    - Cada chunk tem `chunk_size` bytes; erros transitórios repetem só o chunk
+      que falhou (o servidor informa quantos bytes já recebeu)
+    - Depois de cada chunk a URI da sessão e o offset são salvos; um upload
+      interrompido (queda do processo) continua da mesma sessão
+    - A vazão de cada chunk é reportada no progresso
+    """
+
+    def __init__(self, youtube, session_store=None, chunk_size=None, num_retries=5,
+                 max_chunk_failures=10, retry_delay=10, throttle=None, chunk_limit=None):
+        """
+        Args:
+            youtube: Cliente da YouTube Data API (googleapiclient)
+            session_store: UploadSessionStore (padrão: credentials/upload_sessions.json)
+            chunk_size: Bytes por chunk (padrão: UPLOAD_CHUNK_MB, alinhado a 256KB)
+            num_retries: Tentativas do googleapiclient por chunk (5xx/429, com backoff)
+            max_chunk_failures: Falhas seguidas de um chunk antes de desistir
+            retry_delay: Espera inicial entre falhas seguidas (segundos)
+            throttle: Função opcional chamada com o tamanho de cada chunk antes do envio
+                      (ex: limitador de banda; pode bloquear)
+            chunk_limit: Função opcional com o tamanho máximo do próximo chunk em bytes
+                         (None = chunk_size); ex: chunks menores enquanto uma live transmite
+        """
+        self.youtube = youtube
+        self.session_store = session_store or UploadSessionStore()
+        self.chunk_size = chunk_size or chunk_size_bytes()
+        self.num_retries = num_retries
+        self.max_chunk_failures = max_chunk_failures
+        self.retry_delay = retry_delay
+        self.throttle = throttle
+        self.chunk_limit = chunk_limit
+
+    def _create_request(self, video_file, body, media=None):
+        if media is None:
+            media = MediaFileUpload(video_file, chunksize=self.chunk_size, resumable=True)
+        return self.youtube.videos().insert(
+            part=','.join(body.keys()),
+            body=body,
+            media_body=media
+        )
+
+    def upload(self, video_file, body, progress_callback=None, media=None):
+        """
+        Envia o vídeo (retomando uma sessão salva, se existir)
+
+        Args:
+            video_file: Caminho do arquivo de vídeo
+            body: Corpo do videos.insert (snippet/status)
+            progress_callback: Função opcional (bytes_enviados, total_bytes, bytes_por_segundo);
+                               total_bytes é None enquanto o tamanho final não é conhecido
+            media: MediaUpload opcional no lugar do arquivo inteiro (ex: GrowingFileUpload);
+                   a sessão não é persistida, pois o arquivo ainda está sendo gerado
+
+        Returns:
+            Resposta do videos.insert
+        """
+        persistent = media is None
+        key = file_fingerprint(video_file) if persistent else None
+        request = self._create_request(video_file, body, media)
+        media = request.resumable
+
+        session = self.session_store.get(key) if persistent else None
+        if session and session.get('resumable_uri'):
+            print(f"♻️  Retomando upload de {session.get('progress', 0) / 1024 / 1024:.1f}MB "
+                  f"de {media.size() / 1024 / 1024:.1f}MB")
+            request.resumable_uri = session['resumable_uri']
+            request.resumable_progress = session.get('progress', 0)
+            # Força a consulta de status: o servidor informa o offset real antes do próximo chunk
+            request._in_error_state = True
+
+        title = body.get('snippet', {}).get('title', '')
+        failures = 0
+        started = time.monotonic()
+        response = None
+        while response is None:
+            offset = request.resumable_progress
+            total = media.size()
+            if total is not None and offset == total and request.resumable_uri:
+                # Todos os bytes já foram enviados com tamanho desconhecido ('*'):
+                # a consulta de status com o total finaliza o upload
+                request._in_error_state = True
+            chunk_size = self._next_chunk_size(media)
+            if self.throttle:
+                self.throttle(chunk_size if total is None else min(chunk_size, total - offset))
+            chunk_start = time.monotonic()
+            try:
+                status, response = request.next_chunk(num_retries=self.num_retries)
+            except HttpError as e:
+                if e.resp.status in (404, 410) and session:
+                    # Sessão expirada no servidor: recomeça do zero
+                    print("⚠️  Sessão de upload expirada, reiniciando upload")
+                    self.session_store.remove(key)
+                    session = None
+                    request = self._create_request(video_file, body)
+                    continue
+                if e.resp.status not in RETRYABLE_STATUS:
+                    raise
+                failures = self._chunk_failed(e, failures)
+                continue
+            except OSError as e:
+                failures = self._chunk_failed(e, failures)
+                continue
+
+            failures = 0
+            elapsed = time.monotonic() - chunk_start
+            total = media.size()
+            if response is not None:
+                done = total
+            else:
+                done = request.resumable_progress
+                if persistent:
+                    self.session_store.save(key, request.resumable_uri, done, title)
+            rate = (done - offset) / elapsed if elapsed > 0 else 0.0
+
+            if total:
+                print(f"📊 Progresso: {int(done * 100 / total)}% "
+                      f"({done / 1024 / 1024:.1f}/{total / 1024 / 1024:.1f}MB, "
+                      f"chunk a {rate / 1024 / 1024:.2f}MB/s)")
+            else:
+                print(f"📊 Enviado: {done / 1024 / 1024:.1f}MB (encode em andamento, "
+                      f"chunk a {rate / 1024 / 1024:.2f}MB/s)")
+            if progress_callback:
+                progress_callback(done, total, rate)
+
+        if persistent:
+            self.session_store.remove(key)
+        total = media.size() or 0
+        elapsed = time.monotonic() - started
+        print(f"⏱️  Upload concluído em {elapsed:.1f}s "
+              f"({total / 1024 / 1024 / elapsed if elapsed > 0 else 0:.2f}MB/s em média)")
+        return response
+
+    def _next_chunk_size(self, media):
+        """
+        Tamanho do próximo chunk (chunk_size ou o limite de chunk_limit, alinhado a 256KB)
+
+        O googleapiclient lê media.chunksize() a cada next_chunk(), então o
+        tamanho pode mudar no meio do upload: com o limitador de banda, chunks
+        menores viram rajadas curtas em vez de vários MB à velocidade da linha.
+        """
+        size = self.chunk_size
+        limit = self.chunk_limit() if self.chunk_limit else None
+        if limit:
+            size = max(CHUNK_ALIGNMENT, min(size, limit - limit % CHUNK_ALIGNMENT))
+        media._chunksize = size
+        return size
+
+    def _chunk_failed(self, error, failures):
+        """Aguarda antes de repetir o chunk; levanta o erro após falhas demais"""
+        failures += 1
+        if failures > self.max_chunk_failures:
+            raise error
+        delay = min(300, self.retry_delay * (2 ** (failures - 1)))
+        print(f"⚠️  Falha no chunk ({error}), tentativa {failures}/{self.max_chunk_failures} "
+              f"em {delay}s")
+        time.sleep(delay)
+        return failures
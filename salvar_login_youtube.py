@@ -30,7 +30,8 @@ def main():
     print("\n💡 Você só precisa fazer isso UMA VEZ")
     print("=" * 70)
     
-    automation = YouTubeAutomation(headless=False)
+    # Interface completa: a tela de login do Google precisa de imagens (captcha)
+    automation = YouTubeAutomation(headless=False, lightweight=False)
     
     try:
         print("\n🌐 Abrindo navegador...")
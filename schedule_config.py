@@ -0,0 +1,220 @@
+"""
+Configuração declarativa dos slots de transmissão (schedules.json)
+Cada slot define janela, pastas de recursos, rotação de categorias, modo
+(live ou upload) e destino; o arquivo é validado e recarregado sem reiniciar
+"""
+import os
+import copy
+from state_files import load_json
+from youtube_uploader import RTMP_URL, FIXED_STREAM_KEY
+
+
+DEFAULT_SCHEDULE_FILE = 'schedules.json'
+
+CONTENT_KINDS = ('lofi', 'nature')
+MODES = ('live', 'upload')
+ROTATIONS = ('random', 'round_robin', 'lru', 'shuffle')
+
+SLOT_DEFAULTS = {
+    'enabled': True,
+    'content': 'lofi',
+    'mode': 'live',
+    'video_duration': 30,
+    'pipeline': False,
+    'assets': {'images': 'images', 'audios': 'audios'},
+    'categories': {'rotation': 'random', 'include': [], 'weights': {}, 'cooldown_hours': 0},
+    'category_titles': {},
+    'default_category_title': '',
+    'destination': {'stream_config': 'credentials/stream_config.json', 'stream_key': None, 'privacy': 'public'},
+    'title': '{date}',
+    'description': '',
+    'tags': [],
+    'log_file': None,
+    'execute_now_minutes': None,
+}
+
+
+class ScheduleConfigError(Exception):
+    """schedules.json inválido"""
+
+
+def _clock_minutes(value, field, name):
+    try:
+        hour, minute = value.split(':')
+        hour, minute = int(hour), int(minute)
+    except (AttributeError, ValueError):
+        raise ScheduleConfigError(f"Slot '{name}': {field} deve ser 'HH:MM' (recebido {value!r})")
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ScheduleConfigError(f"Slot '{name}': {field} fora do intervalo (recebido {value!r})")
+    return hour * 60 + minute
+
+
+def window_intervals(slot):
+    """Intervalos [início, fim) em minutos do dia; janelas após a meia-noite viram dois"""
+    start = _clock_minutes(slot['start'], 'start', slot['name'])
+    end = _clock_minutes(slot['end'], 'end', slot['name'])
+    if end > start:
+        return [(start, end)]
+    return [(start, 24 * 60), (0, end)]
+
+
+def ingest_key(slot):
+    """
+    URL de ingestão que o ffmpeg do slot vai usar (RTMP + stream key)
+
+    O youtube_uploader sempre transmite com a stream key do destino
+    (destination.stream_key, ou FIXED_STREAM_KEY quando não há), qualquer que
+    seja o stream_config; então é ela que identifica o destino real.
+    """
+    return f"{RTMP_URL}/{slot['destination']['stream_key'] or FIXED_STREAM_KEY}"
+
+
+def find_ingest_conflicts(slots):
+    """
+    Slots ao vivo que transmitem para a mesma URL de ingestão em horários sobrepostos
+
+    Returns:
+        Lista de (slot_a, slot_b, stream key mascarada)
+    """
+    live = [slot for slot in slots if slot['enabled'] and slot['mode'] == 'live']
+    conflicts = []
+    for index, slot_a in enumerate(live):
+        for slot_b in live[index + 1:]:
+            if ingest_key(slot_a) != ingest_key(slot_b):
+                continue
+            overlap = any(a_start < b_end and b_start < a_end
+                          for a_start, a_end in window_intervals(slot_a)
+                          for b_start, b_end in window_intervals(slot_b))
+            if overlap:
+                stream_key = ingest_key(slot_a).rsplit('/', 1)[-1]
+                conflicts.append((slot_a['name'], slot_b['name'], f"stream key {stream_key[:4]}..."))
+    return conflicts
+
+
+def normalize_slot(raw):
+    """Aplica os valores padrão e valida um slot"""
+    if not isinstance(raw, dict) or not raw.get('name'):
+        raise ScheduleConfigError(f"Slot sem nome: {raw!r}")
+    slot = copy.deepcopy(SLOT_DEFAULTS)
+    for key, value in raw.items():
+        if isinstance(value, dict) and isinstance(slot.get(key), dict):
+            slot[key].update(value)
+        else:
+            slot[key] = value
+
+    name = slot['name']
+    for field in ('start', 'end'):
+        if field not in slot:
+            raise ScheduleConfigError(f"Slot '{name}': campo '{field}' obrigatório")
+    window_intervals(slot)
+    if slot['start'] == slot['end']:
+        raise ScheduleConfigError(f"Slot '{name}': start e end iguais")
+    if slot['content'] not in CONTENT_KINDS:
+        raise ScheduleConfigError(f"Slot '{name}': content deve ser um de {CONTENT_KINDS}")
+    if slot['mode'] not in MODES:
+        raise ScheduleConfigError(f"Slot '{name}': mode deve ser um de {MODES}")
+    if slot['categories']['rotation'] not in ROTATIONS:
+        raise ScheduleConfigError(f"Slot '{name}': categories.rotation deve ser um de {ROTATIONS}")
+    weights = slot['categories']['weights']
+    if not isinstance(weights, dict) or not all(isinstance(w, (int, float)) and w >= 0 for w in weights.values()):
+        raise ScheduleConfigError(f"Slot '{name}': categories.weights deve mapear categoria -> peso >= 0")
+    cooldown_hours = slot['categories']['cooldown_hours']
+    if not isinstance(cooldown_hours, (int, float)) or cooldown_hours < 0:
+        raise ScheduleConfigError(f"Slot '{name}': categories.cooldown_hours não pode ser negativo")
+    stream_key = slot['destination']['stream_key']
+    if stream_key is not None and (not isinstance(stream_key, str) or not stream_key.strip()):
+        raise ScheduleConfigError(f"Slot '{name}': destination.stream_key deve ser texto não vazio ou null")
+    if not isinstance(slot['pipeline'], bool):
+        raise ScheduleConfigError(f"Slot '{name}': pipeline deve ser true ou false")
+    if slot['pipeline'] and slot['mode'] != 'upload':
+        raise ScheduleConfigError(f"Slot '{name}': pipeline só vale para mode 'upload'")
+    if not isinstance(slot['video_duration'], (int, float)) or slot['video_duration'] <= 0:
+        raise ScheduleConfigError(f"Slot '{name}': video_duration deve ser positivo")
+    return slot
+
+
+def parse_schedule(data):
+    """
+    Valida o conteúdo de schedules.json
+
+    Returns:
+        Dict nome -> slot normalizado (na ordem do arquivo)
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('slots'), list):
+        raise ScheduleConfigError("schedules.json deve ter uma lista 'slots'")
+
+    slots = {}
+    for raw in data['slots']:
+        slot = normalize_slot(raw)
+        if slot['name'] in slots:
+            raise ScheduleConfigError(f"Slot '{slot['name']}' duplicado")
+        slots[slot['name']] = slot
+
+    conflicts = find_ingest_conflicts(list(slots.values()))
+    if conflicts:
+        details = '; '.join(f"'{a}' e '{b}' ({key})" for a, b, key in conflicts)
+        raise ScheduleConfigError(f"Slots ao vivo com a mesma stream key em horários sobrepostos: {details}; "
+                                  f"defina destination.stream_key diferente em cada um")
+    return slots
+
+
+class ScheduleConfig:
+    """schedules.json carregado, com recarga quando o arquivo muda"""
+
+    def __init__(self, config_file=DEFAULT_SCHEDULE_FILE):
+        self.config_file = config_file
+        self.slots = {}
+        self._mtime = None
+
+    def _file_mtime(self):
+        try:
+            return os.path.getmtime(self.config_file)
+        except OSError:
+            return None
+
+    def load(self):
+        """
+        Lê e valida o arquivo
+
+        Returns:
+            Dict nome -> slot (ScheduleConfigError se inválido)
+        """
+        mtime = self._file_mtime()
+        if mtime is None:
+            raise ScheduleConfigError(f"Arquivo de agenda não encontrado: {self.config_file}")
+        data = load_json(self.config_file)
+        if data is None:
+            raise ScheduleConfigError(f"Não foi possível ler {self.config_file}")
+        self.slots = parse_schedule(data)
+        self._mtime = mtime
+        return self.slots
+
+    def reload_if_changed(self):
+        """
+        Recarrega se o arquivo mudou; uma versão inválida é ignorada (mantém a anterior)
+
+        Returns:
+            Novos slots, ou None se nada mudou ou a nova versão é inválida
+        """
+        mtime = self._file_mtime()
+        if mtime is None or mtime == self._mtime:
+            return None
+        self._mtime = mtime
+        try:
+            data = load_json(self.config_file)
+            if data is None:
+                raise ScheduleConfigError(f"Não foi possível ler {self.config_file}")
+            slots = parse_schedule(data)
+        except ScheduleConfigError as e:
+            print(f"⚠️  {self.config_file} inválido, mantendo a agenda anterior: {e}")
+            return None
+        self.slots = slots
+        return slots
+
+    def slot(self, name):
+        """Slot atual (ou None se foi removido)"""
+        return self.slots.get(name)
+
+    def enabled(self):
+        """Slots habilitados"""
+        return [slot for slot in self.slots.values() if slot['enabled']]
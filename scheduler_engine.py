@@ -0,0 +1,264 @@
+"""
+Agendador por eventos para as janelas das lives
+Um heap de timers dispara abertura e fechamento das janelas no horário exato,
+no fuso de TZ (ex: America/Sao_Paulo), com tratamento de horário de verão e
+recuperação de janelas em andamento após um reinício
+"""
+import os
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+
+logger = logging.getLogger(__name__)
+
+# Mesmo com o heap, esperas longas são fatiadas para perceber ajustes do relógio
+MAX_WAIT_SLICE = 60
+# Ao retomar uma janela em andamento, exige pelo menos este tempo restante (segundos)
+DEFAULT_MIN_REMAINING = 10 * 60
+
+
+def schedule_timezone(name=None):
+    """
+    Fuso das agendas: `name`, SCHEDULE_TZ ou TZ; sem nenhum, o fuso local do sistema
+
+    Returns:
+        tzinfo
+    """
+    name = (name or os.getenv('SCHEDULE_TZ') or os.getenv('TZ') or '').lstrip(':')
+    if name:
+        try:
+            return ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            logger.warning(f"⚠️  Fuso '{name}' desconhecido, usando o fuso local do sistema")
+    return datetime.now().astimezone().tzinfo
+
+
+def parse_clock(value):
+    """'07:00' -> (7, 0)"""
+    hour, minute = value.split(':')
+    return int(hour), int(minute)
+
+
+def resolve_local(day, clock, tz):
+    """
+    Converte data + 'HH:MM' locais em datetime com fuso
+
+    - Horário inexistente (início do horário de verão): avança o tamanho do
+      salto (ex: 00:30 num salto de 00:00 para 01:00 vira 01:30)
+    - Horário ambíguo (fim do horário de verão): usa a primeira ocorrência
+    """
+    hour, minute = clock
+    wall = datetime(day.year, day.month, day.day, hour, minute, tzinfo=tz)
+    # A ida e volta por UTC normaliza o horário (fold=0 usa o offset anterior à transição)
+    return wall.astimezone(timezone.utc).astimezone(tz)
+
+
+class Window:
+    """Janela diária [start, end) no fuso `tz`; end <= start atravessa a meia-noite"""
+
+    def __init__(self, name, start, end, tz):
+        self.name = name
+        self.start = parse_clock(start)
+        self.end = parse_clock(end)
+        self.tz = tz
+
+    @property
+    def crosses_midnight(self):
+        return self.end <= self.start
+
+    def occurrence(self, day):
+        """(abertura, fechamento) da janela que abre na data local `day`"""
+        open_at = resolve_local(day, self.start, self.tz)
+        close_day = day + timedelta(days=1) if self.crosses_midnight else day
+        return open_at, resolve_local(close_day, self.end, self.tz)
+
+    def current_or_next(self, now=None):
+        """Ocorrência em andamento em `now` ou, se não houver, a próxima"""
+        now = now or datetime.now(self.tz)
+        today = now.astimezone(self.tz).date()
+        for offset in (-1, 0, 1, 2):
+            open_at, close_at = self.occurrence(today + timedelta(days=offset))
+            if close_at > now:
+                return open_at, close_at
+        raise RuntimeError(f"Janela {self.name} sem próxima ocorrência")
+
+    def __repr__(self):
+        return f"Window({self.name} {self.start[0]:02d}:{self.start[1]:02d}-{self.end[0]:02d}:{self.end[1]:02d})"
+
+
+class SchedulerEngine:
+    """
+    Heap de timers único para todas as janelas
+
+    - Cada evento tem um deadline absoluto (UTC); o loop dorme até o próximo
+      e acorda na hora exata (ou antes, se um evento mais cedo for agendado)
+    - Abertura: executa on_open(open_at, close_at) como tarefa do ControlPlane
+    - Fechamento: cancela a tarefa da janela se ela ainda estiver rodando
+    - Reinício no meio de uma janela: retoma se restar pelo menos
+      `min_remaining` segundos (catch_up=True), senão espera a próxima
+    - Um evento de abertura atrasado (máquina suspensa) só é executado se a
+      janela ainda não fechou
+    """
+
+    def __init__(self, plane, tz=None):
+        """
+        Args:
+            plane: ControlPlane que executa as tarefas das janelas
+            tz: Fuso das janelas (padrão: schedule_timezone())
+        """
+        self.plane = plane
+        self.tz = tz or schedule_timezone()
+        self.windows = {}
+        self.events_fired = 0
+        self.lag_max = 0.0
+        self._heap = []
+        self._seq = itertools.count()
+        self._tasks = {}
+        self._pending_open = {}
+        self._pending_close = {}
+        self._wakeup = None
+        self._runner = None
+
+    def start(self):
+        """Inicia o loop de timers (chamado pelo ControlPlane)"""
+        self._wakeup = asyncio.Event()
+        self._runner = self.plane.spawn(self._run(), name='scheduler')
+
+    def at(self, when, callback, name):
+        """
+        Agenda callback() (função comum, rápida) para o instante `when`
+
+        Returns:
+            Entrada do heap; cancel(entry) a descarta
+        """
+        entry = [when.timestamp(), next(self._seq), callback, name, True]
+        heapq.heappush(self._heap, entry)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return entry
+
+    @staticmethod
+    def cancel(entry):
+        entry[4] = False
+
+    def add_window(self, name, start, end, on_open, catch_up=True, min_remaining=DEFAULT_MIN_REMAINING):
+        """
+        Registra uma janela diária
+
+        Args:
+            name: Nome da janela (ex: 'manhã')
+            start, end: Horários locais 'HH:MM'
+            on_open: Corrotina on_open(open_at, close_at) executada na abertura
+            catch_up: Retoma a janela em andamento ao registrar (ex: após reinício)
+            min_remaining: Tempo mínimo restante para retomar (segundos)
+        """
+        window = Window(name, start, end, self.tz)
+        self.windows[name] = (window, on_open)
+        open_at, close_at = window.current_or_next()
+        now = datetime.now(self.tz)
+
+        if open_at <= now:
+            remaining = (close_at - now).total_seconds()
+            if catch_up and remaining >= min_remaining:
+                logger.info(f"♻️  Janela {name} em andamento: retomando até {close_at.strftime('%H:%M')} "
+                            f"({remaining / 60:.0f} min restantes)")
+                self._schedule_occurrence(window, open_at, close_at, fire_at=now)
+            else:
+                logger.info(f"⏭️  Janela {name} em andamento ignorada ({remaining / 60:.0f} min restantes)")
+                open_at, close_at = window.occurrence(open_at.astimezone(self.tz).date() + timedelta(days=1))
+                self._schedule_occurrence(window, open_at, close_at)
+        else:
+            self._schedule_occurrence(window, open_at, close_at)
+        return window
+
+    def remove_window(self, name):
+        """
+        Remove a janela da agenda (a ocorrência em andamento, se houver,
+        continua até o fechamento já agendado)
+        """
+        self.windows.pop(name, None)
+        entry = self._pending_open.pop(name, None)
+        if entry:
+            self.cancel(entry)
+
+    def run_now(self, name):
+        """Abre a janela imediatamente, até o próximo fechamento dela"""
+        window, _ = self.windows[name]
+        _, close_at = window.current_or_next()
+        logger.info(f"🚀 Janela {name} aberta manualmente até {close_at.strftime('%d/%m %H:%M')}")
+        self._open(window, close_at)
+
+    def _schedule_occurrence(self, window, open_at, close_at, fire_at=None):
+        self._pending_open[window.name] = self.at(
+            fire_at or open_at, lambda: self._fire_open(window, open_at, close_at), f'{window.name}:abre')
+        logger.info(f"📅 Janela {window.name}: {open_at.strftime('%d/%m %H:%M')} → "
+                    f"{close_at.strftime('%d/%m %H:%M %Z')}")
+
+    def _fire_open(self, window, open_at, close_at):
+        # Agenda já a próxima ocorrência (pela data local, não +24h: respeita o horário de verão)
+        next_open, next_close = window.occurrence(open_at.astimezone(self.tz).date() + timedelta(days=1))
+        self._schedule_occurrence(window, next_open, next_close)
+
+        if datetime.now(self.tz) >= close_at:
+            logger.warning(f"⏭️  Janela {window.name} perdida (o processo estava parado)")
+            return
+        self._open(window, close_at)
+
+    def _open(self, window, close_at):
+        task = self._tasks.get(window.name)
+        if task and not task.done():
+            logger.warning(f"⚠️  Janela {window.name} já em execução, ignorando...")
+            return
+        _, on_open = self.windows[window.name]
+        now = datetime.now(self.tz)
+        self._tasks[window.name] = self.plane.spawn(on_open(now, close_at), name=window.name)
+        previous = self._pending_close.get(window.name)
+        if previous:
+            self.cancel(previous)
+        self._pending_close[window.name] = self.at(close_at, lambda: self._fire_close(window), f'{window.name}:fecha')
+
+    def _fire_close(self, window):
+        self._pending_close.pop(window.name, None)
+        task = self._tasks.pop(window.name, None)
+        logger.info(f"🕐 Fim da janela {window.name}")
+        if task and not task.done():
+            task.cancel()
+
+    def upcoming(self, limit=10):
+        """Próximos eventos: [(datetime, nome)]"""
+        entries = sorted(entry for entry in self._heap if entry[4])[:limit]
+        return [(datetime.fromtimestamp(entry[0], self.tz), entry[3]) for entry in entries]
+
+    async def _run(self):
+        while True:
+            while self._heap and not self._heap[0][4]:
+                heapq.heappop(self._heap)
+
+            self._wakeup.clear()
+            if self._heap:
+                delay = min(self._heap[0][0] - time.time(), MAX_WAIT_SLICE)
+            else:
+                delay = MAX_WAIT_SLICE
+            if delay > 0:
+                # asyncio.wait (e não wait_for) para não perder um cancelamento
+                # que chega junto com o wakeup (Python < 3.12)
+                waiter = asyncio.ensure_future(self._wakeup.wait())
+                try:
+                    await asyncio.wait({waiter}, timeout=delay)
+                finally:
+                    waiter.cancel()
+                continue
+
+            when, _, callback, name, _ = heapq.heappop(self._heap)
+            lag = time.time() - when
+            self.events_fired += 1
+            self.lag_max = max(self.lag_max, lag)
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"❌ Erro no evento {name}: {e}")
@@ -0,0 +1,448 @@
+"""
+Executor genérico dos slots de schedules.json
+Um único fluxo (render → live ou upload) atende todos os slots; a agenda é
+recarregada quando o arquivo muda, sem reiniciar o processo
+"""
+import os
+import random
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from video_creator import VideoCreator, render_video
+from render_pool import get_render_pool, RenderJobError
+from live_manager import LiveManager
+from control_plane import run_live_window, AdoptedFfmpeg
+from render_planner import RenderPlanner
+from browser_pool import get_browser_pool, BROWSER_WARM, BROWSER_HEALTH_INTERVAL
+from scheduler_engine import DEFAULT_MIN_REMAINING
+from schedule_config import ScheduleConfig, ScheduleConfigError, DEFAULT_SCHEDULE_FILE
+from state_store import category_scope
+from asset_selector import get_asset_selector
+from asset_ingest import get_asset_ingest, INGEST_ENABLED, INGEST_SCAN_INTERVAL
+from workflow_journal import WorkflowJournal, broadcast_lifecycle, entry_close_at, FINISHED_LIFECYCLES
+
+
+logger = logging.getLogger(__name__)
+
+# Intervalo de verificação de mudanças em schedules.json (segundos)
+RELOAD_INTERVAL = int(os.getenv('SCHEDULE_RELOAD_INTERVAL', 30))
+
+# Campos que mudam a agenda; os demais valem a partir da próxima execução do slot
+TIMING_FIELDS = ('start', 'end', 'enabled')
+
+
+def slot_logger(slot):
+    """Logger do slot, gravando também em slot['log_file'] se definido"""
+    log = logging.getLogger(f"slot.{slot['name']}")
+    log_file = slot.get('log_file')
+    if log_file:
+        path = os.path.abspath(log_file)
+        if os.path.isdir(path):
+            # Volume do Docker montado antes do arquivo existir vira diretório
+            import shutil
+            shutil.rmtree(path)
+        if not any(getattr(handler, 'baseFilename', None) == path for handler in log.handlers):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            handler = logging.FileHandler(path)
+            handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+            log.addHandler(handler)
+    return log
+
+
+class SlotRunner:
+    """
+    Registra os slots de schedules.json no ControlPlane e executa cada janela
+
+    - content 'lofi' usa create_morning_video; 'nature' usa create_night_video
+      com a categoria escolhida pela rotação do slot
+    - mode 'live' transmite em loop até o fim da janela; 'upload' renderiza e
+      enfileira o vídeo (upload_manager), ou com `pipeline: true` envia
+      enquanto o render grava o MP4 fragmentado (upload_pipeline, VODs longos)
+    - Um LiveManager por stream de destino; a validação da agenda impede dois
+      slots ao vivo no mesmo stream em horários sobrepostos
+    - O vídeo de cada slot é pré-renderizado antes da abertura (render_planner)
+      num processo do render_pool, fora do processo do bot
+    - Lives em andamento ficam no workflow_journal: após um reinício a live
+      do slot é retomada (mesmo broadcast) em vez de renderizar e criar outra
+    """
+
+    def __init__(self, config_file=DEFAULT_SCHEDULE_FILE, slot_names=None):
+        """
+        Args:
+            config_file: Arquivo da agenda (schedules.json)
+            slot_names: Slots executados por este processo (None = todos)
+        """
+        self.config = ScheduleConfig(config_file)
+        self.config.load()
+        self.slot_names = slot_names
+        self.selector = get_asset_selector()
+        self.video_creator = VideoCreator()
+        self.render_pool = get_render_pool()
+        self.journal = WorkflowJournal()
+        self.live_managers = {}
+        self.planner = RenderPlanner(self)
+        self._registered = {}
+        self._planned = {}
+
+        for name in slot_names or []:
+            if not self.config.slot(name):
+                raise ScheduleConfigError(f"Slot '{name}' não existe em {config_file}")
+
+    def selected_slots(self):
+        """Slots habilitados que este processo executa"""
+        return [slot for slot in self.config.enabled()
+                if self.slot_names is None or slot['name'] in self.slot_names]
+
+    def live_manager(self, slot):
+        """LiveManager do stream de destino do slot"""
+        return self.live_manager_for(slot['destination']['stream_config'], slot['destination']['stream_key'])
+
+    def live_manager_for(self, stream_config, stream_key=None):
+        key = (os.path.abspath(stream_config), stream_key)
+        if key not in self.live_managers:
+            self.live_managers[key] = LiveManager(stream_config_file=stream_config, stream_key=stream_key)
+        return self.live_managers[key]
+
+    def pick_category(self, slot):
+        """
+        Próxima categoria do slot ('nature'), conforme categories.rotation
+
+        Returns:
+            Nome da categoria ou None se nenhuma pasta existir
+        """
+        assets = slot['assets']
+        categories = self.video_creator.get_categories(assets['images'], assets['audios'])
+        include = slot['categories']['include']
+        if include:
+            categories = [category for category in categories if category in include]
+        if not categories:
+            return None
+
+        rotation = slot['categories']['rotation']
+        scope = category_scope(slot['name'])
+        if rotation == 'round_robin':
+            last = self.selector.last(scope)
+            index = categories.index(last) + 1 if last in categories else 0
+            category = categories[index % len(categories)]
+            self.selector.use(scope, category)
+        elif rotation == 'random':
+            # Aleatória, evitando repetir a anterior quando houver alternativa
+            last = self.selector.last(scope)
+            category = random.choice([c for c in categories if c != last] or categories)
+            self.selector.use(scope, category)
+        else:
+            category = self.selector.pick(scope, categories, mode=rotation,
+                                          weights=slot['categories']['weights'],
+                                          cooldown=slot['categories']['cooldown_hours'] * 3600)
+        return category
+
+    async def render(self, plane, slot, log, nice=None):
+        """
+        Renderiza o vídeo do slot num processo do render_pool
+
+        Args:
+            nice: Prioridade do processo de render (padrão: a do pool)
+
+        Returns:
+            (video_path, categoria, segundos de render) ou (None, None, None)
+        """
+        assets = slot['assets']
+        category = None
+        if slot['content'] == 'nature':
+            category = await plane.call(self.pick_category, slot)
+            if not category:
+                log.error(f"❌ Nenhuma categoria em '{assets['images']}' e '{assets['audios']}'")
+                return None, None, None
+
+        job = self.render_pool.submit(
+            render_video, slot['content'], slot['video_duration'], assets['images'], assets['audios'], category,
+            nice=nice, name=slot['name'],
+            on_progress=lambda job: log.info(f"   🎞️  Render {job.name}: {job.stage} ({job.progress:.0%})")
+        )
+        try:
+            video_path = await asyncio.wrap_future(job.future)
+        except RenderJobError as e:
+            log.error(f"❌ Erro ao criar vídeo: {e}")
+            return None, None, None
+        except asyncio.CancelledError:
+            # Janela encerrada (ou bot parando) durante o render: encerra o processo
+            self.render_pool.cancel(job.id)
+            raise
+        log.info(f"✅ Vídeo criado: {video_path}")
+        return video_path, category, job.elapsed
+
+    def live_details(self, slot, category=None):
+        """Título e descrição a partir dos modelos do slot ({date}, {category})"""
+        category_title = slot['category_titles'].get(category) or slot['default_category_title'] or (category or '')
+        date = datetime.now().strftime('%d/%m/%Y')
+        fill = lambda template: template.replace('{date}', date).replace('{category}', category_title)
+        return fill(slot['title']), fill(slot['description'])
+
+    async def run_slot(self, plane, name, close_at):
+        """Executa uma janela do slot: render no pool e depois live ou upload"""
+        slot = self.config.slot(name)
+        if not slot:
+            logger.warning(f"⚠️  Slot {name} não existe mais na agenda, ignorando...")
+            return
+        log = slot_logger(slot)
+        log.info("=" * 60)
+        log.info(f"🎬 Slot {name}: {slot['content']} ({slot['mode']}) até {close_at.strftime('%d/%m %H:%M')}")
+        log.info("=" * 60)
+
+        if await self.resume_live(plane, slot, log):
+            return
+        if slot['pipeline']:
+            await self.pipeline_upload(plane, slot, log)
+            return
+
+        artifact = await self.planner.take(slot, close_at)
+        self._plan(plane, slot)
+        if artifact:
+            video_path, category = artifact
+            log.info(f"🎯 Usando vídeo pré-renderizado: {video_path}")
+        else:
+            video_path, category = await self.planner.timed_render(plane, slot, log)
+        if not video_path:
+            log.error("❌ Falha ao criar vídeo")
+            return
+        title, description = self.live_details(slot, category)
+        live_manager = self.live_manager(slot)
+        live_manager.logger = log
+        privacy = slot['destination']['privacy']
+
+        if slot['mode'] == 'upload':
+            if not await plane.call(live_manager.initialize_uploader):
+                log.error("❌ Falha ao conectar ao YouTube")
+                return
+            job_id = await plane.call(live_manager.uploader.queue_upload, video_path, title, description,
+                                      tags=slot['tags'], privacy_status=privacy)
+            if job_id:
+                log.info(f"📤 Upload enfileirado: {title}")
+            else:
+                log.error("❌ Falha ao enfileirar upload")
+            return
+
+        end_at = close_at
+        if slot['execute_now_minutes'] and os.getenv('EXECUTE_NOW', 'false').lower() == 'true':
+            log.info(f"🧪 Modo teste: Monitorando por {slot['execute_now_minutes']} minutos...")
+            end_at = min(close_at, datetime.now(close_at.tzinfo) + timedelta(minutes=slot['execute_now_minutes']))
+
+        if await run_live_window(plane, live_manager, video_path, title, description, end_at, log,
+                                 privacy_status=privacy, journal=self.journal.slot(name)):
+            log.info("✅ Live encerrada conforme agendado")
+        else:
+            log.error("❌ Falha ao iniciar live")
+
+    async def pipeline_upload(self, plane, slot, log):
+        """
+        Upload durante o encode (slot 'upload' com pipeline: true)
+
+        O render roda num processo do render_pool gravando MP4 fragmentado e o
+        upload (pool 'pipeline', sob o limite de banda da fila) envia os
+        fragmentos já gravados; o VOD fica pronto logo depois do encode.
+        """
+        assets = slot['assets']
+        category = None
+        if slot['content'] == 'nature':
+            category = await plane.call(self.pick_category, slot)
+            if not category:
+                log.error(f"❌ Nenhuma categoria em '{assets['images']}' e '{assets['audios']}'")
+                return
+        live_manager = self.live_manager(slot)
+        live_manager.logger = log
+        if not await plane.call(live_manager.initialize_uploader):
+            log.error("❌ Falha ao conectar ao YouTube")
+            return
+
+        os.makedirs('output', exist_ok=True)
+        output_path = os.path.abspath(os.path.join(
+            'output', f"{slot['name'].replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4"))
+        jobs = []
+
+        def render(path):
+            # Thread do encoder (upload_pipeline): aguarda o processo do render_pool
+            job = self.render_pool.submit(
+                render_video, slot['content'], slot['video_duration'], assets['images'], assets['audios'], category,
+                output_path=path, fragmented=True, name=slot['name'],
+                on_progress=lambda job: log.info(f"   🎞️  Render {job.name}: {job.stage} ({job.progress:.0%})")
+            )
+            jobs.append(job)
+            job.result()
+
+        title, description = self.live_details(slot, category)
+        log.info(f"📤 Upload durante o encode: {title}")
+        try:
+            video_id = await plane.call(live_manager.uploader.upload_while_encoding, render, output_path,
+                                        title, description, tags=slot['tags'],
+                                        privacy_status=slot['destination']['privacy'], pool='pipeline')
+        except asyncio.CancelledError:
+            # Janela encerrada (ou bot parando): o fim do render interrompe o upload
+            for job in jobs:
+                self.render_pool.cancel(job.id)
+            raise
+        if video_id:
+            log.info(f"✅ VOD enviado durante o encode: {video_id}")
+        else:
+            log.error("❌ Falha no upload durante o encode")
+
+    def _resumable(self, slot, entry):
+        end_at = entry_close_at(entry)
+        return (slot['mode'] == 'live'
+                and end_at is not None and end_at > datetime.now(end_at.tzinfo)
+                and entry.get('broadcast_id') and entry.get('stream_key')
+                and entry.get('stream_config') == slot['destination']['stream_config']
+                and os.path.exists(entry.get('video_path') or ''))
+
+    async def resume_live(self, plane, slot, log):
+        """
+        Retoma a live registrada no journal (após um reinício no meio da janela)
+
+        Uma chamada à API confere o broadcast; se ele ainda existe, o ffmpeg
+        que ainda transmite é readotado (ou reiniciado) no mesmo broadcast.
+
+        Returns:
+            True se a janela foi atendida pela live retomada
+        """
+        name = slot['name']
+        entry = self.journal.entry(name)
+        if not entry:
+            return False
+        if not self._resumable(slot, entry):
+            await self._discard_entry(plane, entry, log)
+            return False
+
+        live_manager = self.live_manager(slot)
+        live_manager.logger = log
+        lifecycle = await broadcast_lifecycle(plane, live_manager, entry['broadcast_id'])
+        if lifecycle == '' or lifecycle in FINISHED_LIFECYCLES:
+            log.info(f"ℹ️  Live {entry['broadcast_id']} do journal já terminou ({lifecycle or 'não encontrada'}); criando outra")
+            await self._discard_entry(plane, entry, log, end_broadcast=False)
+            return False
+
+        entry['lifecycle'] = lifecycle
+        if await run_live_window(plane, live_manager, entry['video_path'], None, None, entry_close_at(entry), log,
+                                 privacy_status=slot['destination']['privacy'],
+                                 journal=self.journal.slot(name), resume=entry):
+            log.info("✅ Live encerrada conforme agendado")
+        else:
+            log.error("❌ Falha ao retomar live")
+        return True
+
+    async def _discard_entry(self, plane, entry, log, end_broadcast=True):
+        """Encerra o que sobrou de uma live que não será retomada e limpa o journal"""
+        process = AdoptedFfmpeg.adopt(entry.get('ffmpeg_pid'), entry.get('stream_key') or '')
+        if process:
+            log.info(f"🛑 Parando ffmpeg {process.pid} de uma execução anterior")
+            await process.stop()
+        if end_broadcast and entry.get('broadcast_id') and entry.get('stream_config'):
+            live_manager = self.live_manager_for(entry['stream_config'])
+            if await plane.call(live_manager.initialize_uploader):
+                log.info(f"🛑 Encerrando live {entry['broadcast_id']} de uma execução anterior")
+                await plane.call(live_manager.uploader.end_broadcast, entry['broadcast_id'])
+        self.journal.clear(entry['slot'])
+
+    async def _cleanup_journal(self, plane):
+        """Entradas de slots removidos ou de janelas já encerradas"""
+        for name, entry in list(self.journal.entries.items()):
+            slot = self.config.slot(name)
+            if slot is not None and self.slot_names is not None and name not in self.slot_names:
+                continue  # Slot de outro processo
+            if slot is None or not slot['enabled'] or not self._resumable(slot, entry):
+                await self._discard_entry(plane, dict(entry), slot_logger(slot) if slot else logger)
+
+    def _add_window(self, plane, slot):
+        name = slot['name']
+        entry = self.journal.entry(name)
+        # Uma live retomável volta ao ar mesmo perto do fim da janela (não há render)
+        min_remaining = 0 if entry and self._resumable(slot, entry) else DEFAULT_MIN_REMAINING
+        plane.scheduler.add_window(
+            name, slot['start'], slot['end'],
+            lambda open_at, close_at: self.run_slot(plane, name, close_at),
+            min_remaining=min_remaining
+        )
+        self._registered[name] = {field: slot[field] for field in TIMING_FIELDS}
+        if INGEST_ENABLED:
+            get_asset_ingest().watch(slot['assets']['images'])
+            get_asset_ingest().watch(slot['assets']['audios'])
+        self._plan(plane, slot)
+
+    def _plan(self, plane, slot):
+        if slot['pipeline']:
+            # Render e upload juntos na abertura: nada a pré-renderizar
+            self.planner.cancel(slot['name'])
+        else:
+            self.planner.plan(plane, slot)
+        self._planned[slot['name']] = slot
+
+    def register(self, plane, run_now=()):
+        """
+        Registra os slots no scheduler do ControlPlane e a recarga da agenda
+
+        Args:
+            plane: ControlPlane
+            run_now: Slots abertos imediatamente (ex: ['manhã'])
+        """
+        plane.spawn(self._cleanup_journal(plane), name='journal')
+        for slot in self.selected_slots():
+            self._add_window(plane, slot)
+        for name in run_now:
+            if name in self._registered:
+                plane.scheduler.run_now(name)
+            else:
+                logger.warning(f"⚠️  Slot {name} desabilitado ou fora deste processo")
+        plane.every(RELOAD_INTERVAL, lambda: self.reload(plane), 'schedules.json')
+        plane.on_shutdown(self._shutdown_renders)
+        self._register_browser(plane)
+        self._register_ingest(plane)
+
+    def _register_browser(self, plane):
+        """Sessão do navegador aquecida para os fallbacks de automação das lives"""
+        if not BROWSER_WARM or not any(slot['mode'] == 'live' for slot in self.selected_slots()):
+            return
+        browser_pool = get_browser_pool()
+        plane.spawn(plane.call(browser_pool.warm, pool='browser'), name='navegador')
+        plane.every(BROWSER_HEALTH_INTERVAL, lambda: plane.call(browser_pool.health_check, pool='browser'), 'navegador')
+
+        async def close_browser():
+            browser_pool.close()
+        plane.on_shutdown(close_browser)
+
+    def _register_ingest(self, plane):
+        """Normalização em segundo plano dos recursos novos (asset_ingest)"""
+        if not INGEST_ENABLED:
+            return
+        ingest = get_asset_ingest()
+        plane.spawn(plane.call(ingest.scan), name='ingestão')
+        plane.every(INGEST_SCAN_INTERVAL, lambda: plane.call(ingest.scan), 'ingestão')
+
+        async def stop_ingest():
+            ingest.shutdown()
+        plane.on_shutdown(stop_ingest)
+
+    async def _shutdown_renders(self):
+        self.render_pool.shutdown()
+        self.selector.flush()
+
+    async def reload(self, plane):
+        """Aplica mudanças de schedules.json (janelas novas, removidas ou com horário alterado)"""
+        if self.config.reload_if_changed() is None:
+            return
+        logger.info(f"🔄 {self.config.config_file} alterado, atualizando agenda...")
+        current = {slot['name']: slot for slot in self.selected_slots()}
+
+        for name in list(self._registered):
+            slot = current.get(name)
+            if slot is None or self._registered[name] != {field: slot[field] for field in TIMING_FIELDS}:
+                plane.scheduler.remove_window(name)
+                del self._registered[name]
+                if slot is None:
+                    self.planner.cancel(name)
+                    self._planned.pop(name, None)
+                    logger.info(f"🗑️  Slot {name} removido da agenda")
+
+        for name, slot in current.items():
+            if name not in self._registered:
+                self._add_window(plane, slot)
+            elif self._planned.get(name) != slot:
+                # Recursos, duração ou título mudaram: o pré-render é refeito
+                self._plan(plane, slot)
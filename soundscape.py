@@ -0,0 +1,287 @@
+"""
+Sintetizador procedural de sons da natureza (NumPy)
+Chuva, ondas do mar, fogueira e vozes ao fundo gerados em blocos de memória
+limitada, para as categorias noturnas que têm imagens mas não têm gravações.
+
+- Determinístico: cada bloco depende só da semente e do seu índice
+  (np.random.default_rng([semente, índice])), então qualquer trecho pode ser
+  gerado de novo sem gerar o que veio antes
+- Em loop: os índices se repetem a cada SOUNDSCAPE_LOOP_SECONDS e as emendas
+  entre blocos (inclusive a do loop) são cruzadas, sem cliques
+- Saída em blocos int16 (como o pcm_cache), em WAV ou direto em AAC (ffmpeg)
+
+Uso:
+    python soundscape.py --kind rain --seconds 60 --output chuva.m4a
+"""
+import os
+import sys
+import zlib
+import argparse
+import unicodedata
+import numpy as np
+from pcm_cache import PCM_SAMPLE_RATE, PCM_CHANNELS, write_wav, encode_aac
+
+
+# Usa o sintetizador nas categorias noturnas sem áudio
+SOUNDSCAPE_ENABLED = os.getenv('SOUNDSCAPE_ENABLED', 'true').lower() == 'true'
+# Período do loop (segundos): depois disso o áudio se repete exatamente
+SOUNDSCAPE_LOOP_SECONDS = int(os.getenv('SOUNDSCAPE_LOOP_SECONDS', 600))
+# Nível médio da saída (dBFS RMS)
+SOUNDSCAPE_LEVEL_DB = float(os.getenv('SOUNDSCAPE_LEVEL_DB', -20))
+SOUNDSCAPE_AAC_BITRATE = os.getenv('SOUNDSCAPE_AAC_BITRATE', '192k')
+# Tamanho de cada bloco e da emenda cruzada entre blocos (segundos)
+BLOCK_SECONDS = 1.0
+OVERLAP_SECONDS = 0.05
+# Blocos medidos para calibrar o nível de cada som
+CALIBRATION_BLOCKS = 8
+
+KINDS = ('rain', 'surf', 'fire', 'crowd')
+
+# Nome da categoria (sem acentos, minúsculo) -> som
+CATEGORY_KINDS = {
+    'chuva': 'rain',
+    'praia': 'surf',
+    'fogueira': 'fire',
+    'som de pessoas': 'crowd',
+}
+# Palavras que indicam o som quando o nome não está em CATEGORY_KINDS
+KIND_KEYWORDS = {
+    'rain': ('chuva', 'tempestade', 'garoa', 'rain'),
+    'surf': ('praia', 'mar', 'onda', 'oceano', 'beach', 'ocean', 'surf'),
+    'fire': ('fogueira', 'lareira', 'fogo', 'fire'),
+    'crowd': ('pessoas', 'multidao', 'cafe', 'restaurante', 'crowd', 'people'),
+}
+
+
+def _plain(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower().strip()
+
+
+def soundscape_kind(category):
+    """Som sintetizado de uma categoria ('rain', 'surf', 'fire', 'crowd') ou None"""
+    name = _plain(category)
+    if name in CATEGORY_KINDS:
+        return CATEGORY_KINDS[name]
+    for kind, keywords in KIND_KEYWORDS.items():
+        if any(keyword in name for keyword in keywords):
+            return kind
+    return None
+
+
+def category_seed(category):
+    """Semente estável por categoria (o mesmo nome gera sempre o mesmo som)"""
+    return zlib.crc32(_plain(category).encode('utf-8'))
+
+
+class Soundscape:
+    """
+    Gerador de um som em blocos
+
+    Uso:
+        scape = Soundscape('rain', seed=1)
+        for block in scape.blocks(30):   # int16 (frames, 2)
+            ...
+    """
+
+    def __init__(self, kind, seed=0, sample_rate=PCM_SAMPLE_RATE, loop_seconds=SOUNDSCAPE_LOOP_SECONDS):
+        if kind not in KINDS:
+            raise ValueError(f"kind deve ser um de {KINDS} (recebido {kind!r})")
+        self.kind = kind
+        self.seed = seed
+        self.sample_rate = sample_rate
+        self.block_frames = int(BLOCK_SECONDS * sample_rate)
+        self.overlap = int(OVERLAP_SECONDS * sample_rate)
+        self.loop_blocks = max(2, int(round(loop_seconds / BLOCK_SECONDS)))
+        self.loop_frames = self.loop_blocks * self.block_frames
+        self._freqs = np.fft.rfftfreq(self.block_frames + self.overlap, 1 / sample_rate)
+        self._cache = {}
+        # Calibração com ganho 1; os blocos medidos são descartados
+        self.gain = 1.0
+        self.gain = 10 ** (SOUNDSCAPE_LEVEL_DB / 20) * 32767 / self._measure_rms()
+        self._cache = {}
+
+    # ---- blocos de construção ----
+
+    def _band(self, low, high, slope=2):
+        """Resposta em magnitude de um passa-faixa suave, normalizada para RMS 1"""
+        f = np.maximum(self._freqs, 1.0)
+        response = np.ones_like(f)
+        if low:
+            response /= 1 + (low / f) ** (2 * slope)
+        if high:
+            response /= 1 + (f / high) ** (2 * slope)
+        response[0] = 0.0
+        return response / np.sqrt(np.mean(response ** 2))
+
+    def _noise(self, rng, response, width=0.6):
+        """Ruído estéreo filtrado no domínio da frequência (`width` = descorrelação L/R)"""
+        n = self.block_frames + self.overlap
+        white = rng.standard_normal((3, n)).astype(np.float32)
+        shaped = np.fft.irfft(np.fft.rfft(white, axis=1) * response, n=n, axis=1)
+        shared = shaped[0] * np.sqrt(1 - width)
+        return np.stack([shared + shaped[1] * np.sqrt(width), shared + shaped[2] * np.sqrt(width)], axis=1)
+
+    def _impulses(self, rng, rate, decay, response, spread=0.8):
+        """Estalos/gotas: impulsos esparsos (Poisson) com decaimento exponencial e cor `response`"""
+        n = self.block_frames + self.overlap
+        count = rng.poisson(rate * n / self.sample_rate)
+        train = np.zeros((2, n), dtype=np.float32)
+        if count:
+            positions = rng.integers(0, n, count)
+            amplitudes = rng.pareto(3.0, count).astype(np.float32) + 0.2
+            pan = rng.uniform(-spread, spread, count)
+            np.add.at(train[0], positions, amplitudes * np.sqrt((1 - pan) / 2))
+            np.add.at(train[1], positions, amplitudes * np.sqrt((1 + pan) / 2))
+        kernel = np.exp(-np.arange(n) / (decay * self.sample_rate)).astype(np.float32)
+        kernel *= rng.standard_normal(n).astype(np.float32)
+        spectrum = np.fft.rfft(train, axis=1) * np.fft.rfft(kernel) * response
+        return np.fft.irfft(spectrum, n=n, axis=1).T
+
+    def _times(self, index):
+        """Tempo (segundos) de cada frame do bloco, dentro do período do loop"""
+        start = index * self.block_frames
+        frames = (start + np.arange(self.block_frames + self.overlap)) % self.loop_frames
+        return frames / self.sample_rate
+
+    def _periodic(self, index, cycles, phase=0.0):
+        """Onda lenta com `cycles` ciclos exatos por loop (fecha o loop sem salto)"""
+        t = self._times(index)
+        loop_seconds = self.loop_frames / self.sample_rate
+        return np.sin(2 * np.pi * cycles * t / loop_seconds + phase)
+
+    # ---- sons ----
+
+    def _rain(self, rng, index):
+        bed = self._noise(rng, self._band(400, 9000)) * 0.8
+        rumble = self._noise(rng, self._band(60, 400), width=0.3) * 0.35
+        drops = self._impulses(rng, 180, 0.004, self._band(1500, 12000)) * 0.25
+        intensity = 1 + 0.2 * self._periodic(index, 3) + 0.1 * self._periodic(index, 11, 1.3)
+        return (bed + rumble + drops) * intensity[:, None]
+
+    def _surf(self, rng, index):
+        # Ondas de ~8 s; a altura de cada uma sorteada pela semente
+        waves = max(1, int(round(self.loop_frames / self.sample_rate / 8)))
+        position = self._times(index) / (self.loop_frames / self.sample_rate) * waves
+        wave = np.floor(position).astype(int) % waves
+        heights = np.random.default_rng([self.seed, 1_000_003]).uniform(0.55, 1.0, waves)
+        phase = position - np.floor(position)
+        swell = np.where(phase < 0.35, (phase / 0.35) ** 2, np.exp(-(phase - 0.35) * 5))
+        envelope = 0.2 + heights[wave] * swell
+        wash = self._noise(rng, self._band(150, 2500)) * 0.9
+        foam = self._noise(rng, self._band(2000, 9000)) * 0.35 * swell[:, None]
+        return (wash * envelope[:, None] + foam) * 1.1
+
+    def _fire(self, rng, index):
+        roar = self._noise(rng, self._band(40, 350), width=0.2) * 0.45
+        hiss = self._noise(rng, self._band(3000, 10000)) * 0.06
+        crackles = self._impulses(rng, 25, 0.002, self._band(800, 8000)) * 0.6
+        pops = self._impulses(rng, 1.5, 0.012, self._band(200, 3000), spread=0.5) * 0.9
+        flicker = 1 + 0.15 * self._periodic(index, 37) * self._periodic(index, 5, 0.7)
+        return (roar * flicker[:, None] + hiss + crackles + pops)
+
+    def _crowd(self, rng, index):
+        n = self.block_frames + self.overlap
+        # Vozes: ruído nas faixas dos formantes, modulado no ritmo das sílabas (3-6 Hz)
+        control_rate = 100
+        control = rng.standard_normal((6, n * control_rate // self.sample_rate + 2))
+        kernel = np.ones(8) / 8
+        control = np.array([np.convolve(row, kernel, mode='same') for row in control])
+        points = np.linspace(0, control.shape[1] - 1, n)
+        babble = np.zeros((n, 2), dtype=np.float32)
+        formants = ((300, 900), (800, 2000), (1800, 3500))
+        for voice in range(6):
+            syllables = np.maximum(np.interp(points, np.arange(control.shape[1]), control[voice]), 0)
+            low, high = formants[voice % len(formants)]
+            pan = (voice / 5.0) * 1.4 - 0.7
+            voice_noise = self._noise(rng, self._band(low, high), width=0.1)[:, 0] * syllables
+            babble[:, 0] += voice_noise * np.sqrt((1 - pan) / 2)
+            babble[:, 1] += voice_noise * np.sqrt((1 + pan) / 2)
+        room = self._noise(rng, self._band(100, 1200)) * 0.25
+        clinks = self._impulses(rng, 0.8, 0.03, self._band(2500, 9000)) * 0.2
+        return babble * 0.45 + room + clinks
+
+    # ---- blocos ----
+
+    def _measure_rms(self, samples=CALIBRATION_BLOCKS):
+        """RMS bruto de alguns blocos espalhados pelo loop (calibra SOUNDSCAPE_LEVEL_DB)"""
+        indices = [k * self.loop_blocks // samples for k in range(samples)]
+        power = np.mean([np.mean(np.square(self._generate(index), dtype=np.float64)) for index in indices])
+        return max(float(np.sqrt(power)), 1e-9)
+
+    def _generate(self, index):
+        """Bloco bruto (block_frames + overlap) em float, em escala de saída"""
+        index %= self.loop_blocks
+        raw = self._cache.get(index)
+        if raw is None:
+            rng = np.random.default_rng([self.seed, index])
+            raw = getattr(self, f'_{self.kind}')(rng, index) * self.gain
+            # Só o bloco anterior é necessário para a emenda
+            self._cache = {index: raw}
+        return raw
+
+    def block(self, index):
+        """Bloco `index` (int16 (block_frames, 2)); a emenda com o anterior é cruzada"""
+        previous = self._generate(index - 1)[self.block_frames:]
+        current = self._generate(index)
+        out = current[:self.block_frames].copy()
+        t = np.linspace(0.0, 1.0, self.overlap, dtype=np.float32)[:, None]
+        out[:self.overlap] = previous * np.cos(t * np.pi / 2) + current[:self.overlap] * np.sin(t * np.pi / 2)
+        # Limitador suave: os picos dos impulsos (fogo, chuva) são arredondados em vez de cortados
+        return (np.tanh(out / 32767) * 32767).astype(np.int16)
+
+    def blocks(self, seconds, start=0.0):
+        """
+        `seconds` de áudio a partir de `start`, em blocos int16 (frames, 2)
+
+        Memória limitada a dois blocos, qualquer que seja a duração.
+        """
+        remaining = int(round(seconds * self.sample_rate))
+        position = int(round(start * self.sample_rate))
+        while remaining > 0:
+            index, offset = divmod(position, self.block_frames)
+            chunk = self.block(index)[offset:offset + remaining]
+            remaining -= len(chunk)
+            position += len(chunk)
+            yield chunk
+
+
+def write_soundscape(category, seconds, output_path, seed=None):
+    """Grava `seconds` do som da categoria em WAV (PCM 16 bits)"""
+    kind = soundscape_kind(category)
+    if not kind:
+        raise ValueError(f"Nenhum som sintetizado para a categoria '{category}'")
+    scape = Soundscape(kind, category_seed(category) if seed is None else seed)
+    write_wav(output_path, scape.blocks(seconds), scape.sample_rate, PCM_CHANNELS)
+    return kind
+
+
+def encode_soundscape(scape, seconds, output_path, bitrate=SOUNDSCAPE_AAC_BITRATE, start=0.0):
+    """Codifica `seconds` do som direto em AAC (sem montar o arquivo inteiro na memória)"""
+    return encode_aac(output_path, scape.blocks(seconds, start), scape.sample_rate, bitrate=bitrate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera sons da natureza procedurais')
+    parser.add_argument('--kind', choices=KINDS, help='Som (ou use --category)')
+    parser.add_argument('--category', help='Categoria noturna (ex: Chuva)')
+    parser.add_argument('--seconds', type=float, default=60)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', required=True, help='Arquivo .m4a/.aac (AAC) ou .wav')
+    args = parser.parse_args()
+
+    kind = args.kind or soundscape_kind(args.category)
+    if not kind:
+        print("❌ Informe --kind ou uma --category com som sintetizado")
+        sys.exit(1)
+    seed = args.seed if args.seed is not None else category_seed(args.category or kind)
+    scape = Soundscape(kind, seed)
+    if args.output.lower().endswith('.wav'):
+        write_wav(args.output, scape.blocks(args.seconds), scape.sample_rate, PCM_CHANNELS)
+    else:
+        encode_soundscape(scape, args.seconds, args.output)
+    print(f"✅ {args.seconds:g}s de '{kind}' (semente {seed}) em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
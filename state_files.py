@@ -0,0 +1,51 @@
+"""
+Leitura e escrita segura de arquivos de estado em JSON
+A escrita é atômica: grava em arquivo temporário e substitui com os.replace
+"""
+import os
+import json
+import tempfile
+
+
+def load_json(path, default=None):
+    """
+    Carrega um arquivo JSON
+
+    Args:
+        path: Caminho do arquivo
+        default: Valor retornado se o arquivo não existir ou estiver corrompido
+
+    Returns:
+        Conteúdo do arquivo ou `default`
+    """
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def save_json_atomic(path, data):
+    """
+    Salva `data` em JSON de forma atômica
+
+    Um leitor concorrente vê sempre o arquivo antigo ou o novo completo, nunca
+    um arquivo pela metade.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,506 @@
+"""
+Estado de execução num único banco SQLite (credentials/state.db, modo WAL)
+Tabelas tipadas para histórico de seleção, stream permanente, broadcasts,
+journal das lives, índice dos renders, cache de recursos normalizados, índice
+do cache de PCM e métricas. Bots, threads e processos
+do render_pool acessam o mesmo banco com segurança: cada thread de cada
+processo tem a própria conexão e as escritas usam BEGIN IMMEDIATE.
+
+Na primeira abertura, os arquivos JSON antigos (.image_history.json das
+pastas de imagens, stream_config.json, slot_state.json, workflow_journal.json
+e render_history.json) são importados uma única vez.
+"""
+import os
+import json
+import time
+import glob
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+from state_files import load_json
+
+
+logger = logging.getLogger(__name__)
+
+STATE_DB_FILE = os.getenv('STATE_DB_FILE', 'credentials/state.db')
+# Espera por um lock de escrita de outro processo (segundos)
+BUSY_TIMEOUT = 30
+# Pastas de imagens com .image_history.json a importar
+LEGACY_IMAGE_DIRS = ('images', 'imagens noite')
+LEGACY_STREAM_CONFIGS = 'credentials/stream_config*.json'
+LEGACY_JOURNAL_FILE = 'credentials/workflow_journal.json'
+LEGACY_RENDER_HISTORY_FILE = 'credentials/render_history.json'
+LEGACY_SLOT_STATE_FILE = 'credentials/slot_state.json'
+
+# 2: selection_bags (sacola embaralhada do asset_selector)
+# 3: asset_cache (recursos normalizados do asset_ingest)
+# 4: pcm_index (áudio decodificado do pcm_cache)
+SCHEMA_VERSION = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS selection_history (
+    scope TEXT NOT NULL,
+    item TEXT NOT NULL,
+    used_at REAL NOT NULL,
+    PRIMARY KEY (scope, item)
+);
+CREATE INDEX IF NOT EXISTS selection_history_recent ON selection_history (scope, used_at);
+CREATE TABLE IF NOT EXISTS selection_bags (
+    scope TEXT PRIMARY KEY,
+    bag TEXT NOT NULL,
+    remaining INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stream_config (
+    config_file TEXT PRIMARY KEY,
+    stream_id TEXT NOT NULL,
+    stream_key TEXT NOT NULL,
+    rtmp_url TEXT NOT NULL,
+    is_fixed_key INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT
+);
+CREATE TABLE IF NOT EXISTS broadcasts (
+    broadcast_id TEXT PRIMARY KEY,
+    slot TEXT,
+    stream_id TEXT,
+    title TEXT,
+    privacy TEXT,
+    lifecycle TEXT,
+    created_at REAL NOT NULL,
+    ended_at REAL
+);
+CREATE TABLE IF NOT EXISTS workflow_journal (
+    slot TEXT PRIMARY KEY,
+    entry TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS render_cache (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    video_path TEXT,
+    content TEXT NOT NULL,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    frames INTEGER NOT NULL,
+    preset TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    finished_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS render_cache_profile ON render_cache (width, height, preset, finished_at);
+CREATE TABLE IF NOT EXISTS asset_cache (
+    source TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    source_mtime REAL NOT NULL,
+    source_size INTEGER NOT NULL,
+    cache_path TEXT NOT NULL,
+    loudness TEXT,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (source, variant)
+);
+CREATE TABLE IF NOT EXISTS pcm_index (
+    source TEXT PRIMARY KEY,
+    decoded_from TEXT NOT NULL,
+    source_mtime REAL NOT NULL,
+    source_size INTEGER NOT NULL,
+    pcm_path TEXT NOT NULL,
+    sample_rate INTEGER NOT NULL,
+    channels INTEGER NOT NULL,
+    frames INTEGER NOT NULL,
+    loop_start INTEGER NOT NULL,
+    loop_end INTEGER NOT NULL,
+    peak_db REAL,
+    rms_db REAL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    value REAL NOT NULL,
+    labels TEXT,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS metrics_name ON metrics (name, recorded_at);
+"""
+
+
+class StateStore:
+    """
+    Acesso ao banco de estado
+
+    - Uma conexão por thread (e por processo: um filho do render_pool abre a sua)
+    - Leituras não bloqueiam escritas (WAL); escritas concorrentes esperam até BUSY_TIMEOUT
+    """
+
+    def __init__(self, db_file=STATE_DB_FILE, migrate=True):
+        """
+        Args:
+            db_file: Arquivo do banco
+            migrate: Importa os arquivos JSON antigos na primeira abertura
+        """
+        self.db_file = db_file
+        self._local = threading.local()
+        self._create_schema()
+        if migrate:
+            self.migrate_legacy_files()
+
+    # ---- conexão e transações ----
+
+    def _connection(self):
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(os.path.abspath(self.db_file))
+            os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.db_file, timeout=BUSY_TIMEOUT, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT * 1000}')
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    @contextmanager
+    def transaction(self):
+        """Transação de escrita (BEGIN IMMEDIATE: pega o lock de escrita logo no início)"""
+        db = self._connection()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    def _query(self, sql, params=()):
+        return self._connection().execute(sql, params).fetchall()
+
+    def _create_schema(self):
+        db = self._connection()
+        if db.execute('PRAGMA user_version').fetchone()[0] >= SCHEMA_VERSION:
+            return
+        with self.transaction() as db:
+            for statement in SCHEMA.split(';'):
+                if statement.strip():
+                    db.execute(statement)
+            db.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+
+    def close(self):
+        """Fecha a conexão da thread atual"""
+        db = getattr(self._local, 'db', None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+    # ---- histórico de seleção (imagens, áudios) ----
+
+    def recent_items(self, scope, limit):
+        """Itens usados mais recentemente no escopo (do mais antigo ao mais novo)"""
+        rows = self._query('SELECT item FROM selection_history WHERE scope = ? '
+                           'ORDER BY used_at DESC LIMIT ?', (scope, limit))
+        return [row['item'] for row in reversed(rows)]
+
+    def mark_used(self, scope, item, keep=None):
+        """Registra o uso de `item`; com `keep`, mantém só os `keep` mais recentes do escopo"""
+        with self.transaction() as db:
+            db.execute('INSERT OR REPLACE INTO selection_history (scope, item, used_at) VALUES (?, ?, ?)',
+                       (scope, item, time.time()))
+            if keep:
+                db.execute('DELETE FROM selection_history WHERE scope = ? AND item NOT IN '
+                           '(SELECT item FROM selection_history WHERE scope = ? ORDER BY used_at DESC LIMIT ?)',
+                           (scope, scope, keep))
+
+    def clear_used(self, scope):
+        with self.transaction() as db:
+            db.execute('DELETE FROM selection_history WHERE scope = ?', (scope,))
+            db.execute('DELETE FROM selection_bags WHERE scope = ?', (scope,))
+
+    def selection_state(self, scope):
+        """
+        Estado salvo de um pool do asset_selector
+
+        Returns:
+            (lista de (item, used_at) do mais antigo ao mais novo, sacola restante ou None)
+        """
+        used = [(row['item'], row['used_at']) for row in self._query(
+            'SELECT item, used_at FROM selection_history WHERE scope = ? ORDER BY used_at', (scope,))]
+        rows = self._query('SELECT bag, remaining FROM selection_bags WHERE scope = ?', (scope,))
+        return used, json.loads(rows[0]['bag'])[:rows[0]['remaining']] if rows else None
+
+    def save_selections(self, changes):
+        """
+        Grava de uma vez as mudanças de vários pools (uma transação)
+
+        Args:
+            changes: Lista de (scope, {item: used_at}, itens removidos, sacola nova ou None,
+                itens restantes da sacola ou None); as escolhas saem do fim da sacola
+        """
+        now = time.time()
+        with self.transaction() as db:
+            for scope, used, removed, bag, remaining in changes:
+                db.executemany('INSERT OR REPLACE INTO selection_history (scope, item, used_at) VALUES (?, ?, ?)',
+                               [(scope, item, used_at) for item, used_at in used.items()])
+                db.executemany('DELETE FROM selection_history WHERE scope = ? AND item = ?',
+                               [(scope, item) for item in removed])
+                if bag is not None:
+                    db.execute('INSERT OR REPLACE INTO selection_bags (scope, bag, remaining, updated_at) '
+                               'VALUES (?, ?, ?, ?)', (scope, json.dumps(bag), remaining, now))
+                elif remaining is not None:
+                    db.execute('UPDATE selection_bags SET remaining = ?, updated_at = ? WHERE scope = ?',
+                               (remaining, now, scope))
+
+    # ---- stream permanente ----
+
+    def stream_config(self, config_file):
+        """Stream permanente salvo para `config_file` (dict) ou None"""
+        rows = self._query('SELECT * FROM stream_config WHERE config_file = ?', (os.path.normpath(config_file),))
+        if not rows:
+            return None
+        config = dict(rows[0])
+        config['is_fixed_key'] = bool(config['is_fixed_key'])
+        return config
+
+    def save_stream_config(self, config_file, config):
+        with self.transaction() as db:
+            db.execute('INSERT OR REPLACE INTO stream_config '
+                       '(config_file, stream_id, stream_key, rtmp_url, is_fixed_key, created_at) '
+                       'VALUES (?, ?, ?, ?, ?, ?)',
+                       (os.path.normpath(config_file), config['stream_id'], config['stream_key'],
+                        config['rtmp_url'], int(bool(config.get('is_fixed_key'))), config.get('created_at')))
+
+    # ---- broadcasts ----
+
+    def record_broadcast(self, broadcast_id, **fields):
+        """Cria ou atualiza o registro do broadcast (slot, stream_id, title, privacy, lifecycle, ended_at)"""
+        columns = ('slot', 'stream_id', 'title', 'privacy', 'lifecycle', 'ended_at')
+        values = {key: fields[key] for key in columns if key in fields}
+        with self.transaction() as db:
+            db.execute('INSERT OR IGNORE INTO broadcasts (broadcast_id, created_at) VALUES (?, ?)',
+                       (broadcast_id, time.time()))
+            if values:
+                assignments = ', '.join(f'{key} = ?' for key in values)
+                db.execute(f'UPDATE broadcasts SET {assignments} WHERE broadcast_id = ?',
+                           (*values.values(), broadcast_id))
+
+    def broadcast(self, broadcast_id):
+        rows = self._query('SELECT * FROM broadcasts WHERE broadcast_id = ?', (broadcast_id,))
+        return dict(rows[0]) if rows else None
+
+    # ---- journal das lives ----
+
+    def journal_entries(self):
+        """slot -> entrada do journal"""
+        return {row['slot']: json.loads(row['entry'])
+                for row in self._query('SELECT slot, entry FROM workflow_journal')}
+
+    def save_journal_entry(self, slot, entry):
+        with self.transaction() as db:
+            db.execute('INSERT OR REPLACE INTO workflow_journal (slot, entry, updated_at) VALUES (?, ?, ?)',
+                       (slot, json.dumps(entry), time.time()))
+
+    def delete_journal_entry(self, slot):
+        with self.transaction() as db:
+            return db.execute('DELETE FROM workflow_journal WHERE slot = ?', (slot,)).rowcount > 0
+
+    # ---- índice dos renders ----
+
+    def record_render(self, profile, seconds, video_path=None, finished_at=None, keep=None):
+        """Registra um render concluído (perfil de render_planner.render_profile)"""
+        with self.transaction() as db:
+            db.execute('INSERT INTO render_cache (video_path, content, width, height, frames, preset, '
+                       'seconds, finished_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                       (video_path, profile['content'], profile['width'], profile['height'],
+                        profile['frames'], profile['preset'], seconds, finished_at or time.time()))
+            if keep:
+                db.execute('DELETE FROM render_cache WHERE id NOT IN '
+                           '(SELECT id FROM render_cache ORDER BY id DESC LIMIT ?)', (keep,))
+
+    def renders(self, limit):
+        """Renders mais recentes (do mais antigo ao mais novo)"""
+        rows = self._query('SELECT * FROM render_cache ORDER BY id DESC LIMIT ?', (limit,))
+        return [dict(row) for row in reversed(rows)]
+
+    # ---- cache de recursos normalizados ----
+
+    def asset_cache(self, source=None):
+        """Entradas do cache (todas ou as de `source`), com `loudness` já decodificado"""
+        if source is None:
+            rows = self._query('SELECT * FROM asset_cache')
+        else:
+            rows = self._query('SELECT * FROM asset_cache WHERE source = ?', (source,))
+        entries = []
+        for row in rows:
+            entry = dict(row)
+            entry['loudness'] = json.loads(entry['loudness']) if entry['loudness'] else None
+            entries.append(entry)
+        return entries
+
+    def save_asset_cache(self, source, variant, kind, source_mtime, source_size, cache_path, loudness=None):
+        with self.transaction() as db:
+            db.execute('INSERT OR REPLACE INTO asset_cache (source, variant, kind, source_mtime, source_size, '
+                       'cache_path, loudness, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                       (source, variant, kind, source_mtime, source_size, cache_path,
+                        json.dumps(loudness) if loudness else None, time.time()))
+
+    def delete_asset_cache(self, source, variant=None):
+        with self.transaction() as db:
+            if variant is None:
+                db.execute('DELETE FROM asset_cache WHERE source = ?', (source,))
+            else:
+                db.execute('DELETE FROM asset_cache WHERE source = ? AND variant = ?', (source, variant))
+
+    # ---- índice do cache de PCM ----
+
+    def pcm_entry(self, source):
+        rows = self._query('SELECT * FROM pcm_index WHERE source = ?', (source,))
+        return dict(rows[0]) if rows else None
+
+    def pcm_entries(self):
+        return [dict(row) for row in self._query('SELECT * FROM pcm_index')]
+
+    def save_pcm_entry(self, entry):
+        fields = dict(entry, created_at=time.time())
+        columns = ', '.join(fields)
+        with self.transaction() as db:
+            db.execute(f'INSERT OR REPLACE INTO pcm_index ({columns}) VALUES ({", ".join("?" * len(fields))})',
+                       tuple(fields.values()))
+
+    def delete_pcm_entry(self, source):
+        with self.transaction() as db:
+            db.execute('DELETE FROM pcm_index WHERE source = ?', (source,))
+
+    # ---- métricas ----
+
+    def record_metric(self, name, value, **labels):
+        with self.transaction() as db:
+            db.execute('INSERT INTO metrics (name, value, labels, recorded_at) VALUES (?, ?, ?, ?)',
+                       (name, float(value), json.dumps(labels, sort_keys=True) if labels else None, time.time()))
+
+    def metrics(self, name, since=0.0):
+        """Valores da métrica desde `since` (timestamp)"""
+        rows = self._query('SELECT value, labels, recorded_at FROM metrics WHERE name = ? AND recorded_at >= ? '
+                           'ORDER BY recorded_at', (name, since))
+        return [{'value': row['value'], 'labels': json.loads(row['labels']) if row['labels'] else {},
+                 'recorded_at': row['recorded_at']} for row in rows]
+
+    # ---- migração dos arquivos antigos ----
+
+    def migrate_legacy_files(self):
+        """
+        Importa os arquivos JSON antigos (uma única vez por banco)
+
+        Tudo numa transação, com a marca gravada junto: uma falha no meio não
+        deixa importação parcial marcada como feita. Registros inválidos são
+        ignorados (com aviso) em vez de abortar o resto.
+        """
+        with self.transaction() as db:
+            if db.execute("SELECT 1 FROM meta WHERE key = 'legacy_files_migrated'").fetchone():
+                return
+            imported, skipped = self._import_legacy_files(db)
+            db.execute("INSERT INTO meta (key, value) VALUES ('legacy_files_migrated', ?)", (str(time.time()),))
+
+        if imported:
+            logger.info(f"📦 Estado importado para {self.db_file}: {', '.join(sorted(set(imported)))}")
+        for source, error in skipped:
+            logger.warning(f"⚠️  Registro ignorado na importação de {source}: {error!r}")
+
+    def _import_legacy_files(self, db):
+        """Grava o conteúdo dos arquivos antigos na transação `db`; retorna (importados, ignorados)"""
+        imported = []
+        skipped = []
+        now = time.time()
+        for images_dir in LEGACY_IMAGE_DIRS:
+            source = f'{images_dir}/.image_history.json'
+            history = load_json(os.path.join(images_dir, '.image_history.json'), {}) or {}
+            used = history.get('used_images', []) if isinstance(history, dict) else []
+            for position, item in enumerate(used):
+                try:
+                    db.execute('INSERT OR REPLACE INTO selection_history (scope, item, used_at) VALUES (?, ?, ?)',
+                               (image_scope(images_dir), item, now - len(used) + position))
+                    imported.append(source)
+                except (sqlite3.Error, TypeError, ValueError) as e:
+                    skipped.append((source, e))
+
+        for config_file in glob.glob(LEGACY_STREAM_CONFIGS):
+            config = load_json(config_file)
+            if not isinstance(config, dict) or not config.get('stream_id'):
+                continue
+            try:
+                db.execute('INSERT OR IGNORE INTO stream_config '
+                           '(config_file, stream_id, stream_key, rtmp_url, is_fixed_key, created_at) '
+                           'VALUES (?, ?, ?, ?, ?, ?)',
+                           (os.path.normpath(config_file), config['stream_id'], config.get('stream_key', ''),
+                            config.get('rtmp_url', ''), int(bool(config.get('is_fixed_key'))),
+                            config.get('created_at')))
+                imported.append(config_file)
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                skipped.append((config_file, e))
+
+        for slot, slot_state in (load_json(LEGACY_SLOT_STATE_FILE, {}) or {}).items():
+            try:
+                if slot_state.get('last_category'):
+                    db.execute('INSERT OR REPLACE INTO selection_history (scope, item, used_at) VALUES (?, ?, ?)',
+                               (category_scope(slot), slot_state['last_category'], now))
+                    imported.append(LEGACY_SLOT_STATE_FILE)
+            except (AttributeError, sqlite3.Error, TypeError, ValueError) as e:
+                skipped.append((LEGACY_SLOT_STATE_FILE, e))
+
+        for slot, entry in (load_json(LEGACY_JOURNAL_FILE, {}) or {}).items():
+            try:
+                db.execute('INSERT OR REPLACE INTO workflow_journal (slot, entry, updated_at) VALUES (?, ?, ?)',
+                           (slot, json.dumps(entry), now))
+                imported.append(LEGACY_JOURNAL_FILE)
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                skipped.append((LEGACY_JOURNAL_FILE, e))
+
+        history = load_json(LEGACY_RENDER_HISTORY_FILE, {}) or {}
+        for record in (history.get('renders', []) if isinstance(history, dict) else []):
+            try:
+                db.execute('INSERT INTO render_cache (video_path, content, width, height, frames, preset, '
+                           'seconds, finished_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                           (None, record['content'], record['width'], record['height'], record['frames'],
+                            record['preset'], float(record['seconds']), _timestamp(record.get('finished_at'))))
+                imported.append(LEGACY_RENDER_HISTORY_FILE)
+            except (KeyError, sqlite3.Error, TypeError, ValueError) as e:
+                skipped.append((LEGACY_RENDER_HISTORY_FILE, e))
+        return imported, skipped
+
+
+def image_scope(images_dir):
+    """Escopo do histórico de imagens de uma pasta"""
+    return 'images:' + os.path.normpath(images_dir)
+
+
+def audio_scope(audios_dir):
+    """Escopo do histórico de áudios de uma pasta"""
+    return 'audios:' + os.path.normpath(audios_dir)
+
+
+def category_scope(slot_name):
+    """Escopo do histórico de categorias de um slot"""
+    return 'category:' + slot_name
+
+
+def _timestamp(iso_value):
+    try:
+        return datetime.fromisoformat(iso_value).timestamp()
+    except (TypeError, ValueError):
+        return time.time()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_state_store():
+    """Banco de estado compartilhado pelo processo"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = StateStore()
+        return _store
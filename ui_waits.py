@@ -0,0 +1,125 @@
+"""
+Esperas por condição para a automação web (Selenium)
+Em vez de pausas fixas, cada etapa consulta a condição real do DOM com um
+intervalo curto; vários seletores viram uma única XPath combinada (uma
+consulta por verificação) e o tempo de cada etapa fica registrado
+"""
+import os
+import time
+import logging
+from contextlib import contextmanager
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException, WebDriverException
+
+
+logger = logging.getLogger(__name__)
+
+# Intervalo entre verificações das condições (segundos)
+UI_POLL_INTERVAL = float(os.getenv('UI_POLL_INTERVAL', 0.2))
+
+# Indícios de página de login na URL
+LOGIN_URL_MARKERS = ('accounts.google.com', 'signin', 'login')
+
+_UPPER = 'ABCDEFGHIJKLMNOPQRSTUVWXYZÁÀÂÃÉÊÍÓÔÕÚÇ'
+_LOWER = 'abcdefghijklmnopqrstuvwxyzáàâãéêíóôõúç'
+
+
+def xpath_union(selectors):
+    """Une as XPaths numa só (uma consulta ao DOM por verificação)"""
+    return ' | '.join(f'({selector})' for selector in selectors)
+
+
+def xpath_text(tag, *texts):
+    """XPath de `tag` cujo texto visível contém algum dos textos (sem diferenciar maiúsculas)"""
+    text = f"translate(normalize-space(.), '{_UPPER}', '{_LOWER}')"
+    conditions = ' or '.join(f"contains({text}, '{value.lower()}')" for value in texts)
+    return f'//{tag}[{conditions}]'
+
+
+def is_login_url(url):
+    url = (url or '').lower()
+    return any(marker in url for marker in LOGIN_URL_MARKERS)
+
+
+def wait_for(driver, condition, timeout, poll=UI_POLL_INTERVAL):
+    """
+    Aguarda condition(driver) retornar um valor verdadeiro
+
+    Returns:
+        O valor retornado pela condição, ou None se o tempo esgotar
+    """
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=poll,
+                             ignored_exceptions=(StaleElementReferenceException,)).until(condition)
+    except TimeoutException:
+        return None
+
+
+def _usable(element, enabled):
+    return element.is_displayed() and (not enabled or element.is_enabled())
+
+
+def first_match(xpath, enabled=True):
+    """Condição: primeiro elemento visível (e habilitado) da XPath combinada"""
+    def condition(driver):
+        for element in driver.find_elements(By.XPATH, xpath):
+            if _usable(element, enabled):
+                return element
+        return None
+    return condition
+
+
+def document_ready(driver):
+    """Condição: documento carregado (readyState 'complete')"""
+    try:
+        return driver.execute_script('return document.readyState') == 'complete'
+    except WebDriverException:
+        return False
+
+
+def settled_url(driver):
+    """Condição: página carregada; retorna a URL atual"""
+    return document_ready(driver) and driver.current_url
+
+
+def logged_in_url(driver):
+    """Condição: página carregada fora da tela de login"""
+    url = settled_url(driver)
+    return url and not is_login_url(url) and url
+
+
+def gone(element):
+    """Condição: o elemento saiu da página, ficou oculto, desabilitado ou mudou de texto (ex: após o clique)"""
+    try:
+        text = element.text
+    except StaleElementReferenceException:
+        text = None
+
+    def condition(driver):
+        try:
+            return not _usable(element, enabled=True) or element.text != text
+        except StaleElementReferenceException:
+            return True
+    return condition
+
+
+class StepTimer:
+    """Tempo gasto em cada etapa da automação (segundos, acumulado por etapa)"""
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def step(self, name):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.monotonic() - started
+
+    def reset(self):
+        self.timings = {}
+
+    def summary(self):
+        return ', '.join(f'{name} {seconds:.1f}s' for name, seconds in self.timings.items())
@@ -0,0 +1,366 @@
+"""
+Fila de uploads com workers concorrentes e limite de banda
+A fila é persistida em JSON; enquanto uma live está transmitindo, os uploads
+reduzem a banda para não competir com o envio RTMP
+"""
+import os
+import time
+import uuid
+import queue
+import threading
+from datetime import datetime
+from state_files import load_json, save_json_atomic
+from resumable_upload import ResumableUploader, chunk_size_bytes
+
+
+JOB_QUEUED = 'queued'
+JOB_UPLOADING = 'uploading'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+
+# Chunk máximo (KB) enquanto uma live transmite: o limite de banda passa a valer
+# em rajadas curtas, não só na média (padrão: 256KB, o mínimo do protocolo)
+UPLOAD_LIVE_CHUNK_KB = float(os.getenv('UPLOAD_LIVE_CHUNK_KB', 256))
+
+
+class UploadCancelled(Exception):
+    """Upload interrompido porque o manager foi parado"""
+
+
+def _mbps_env(name, default):
+    return float(os.getenv(name, default))
+
+
+def live_streaming_active():
+    """True se algum LiveManager do processo está transmitindo"""
+    from live_manager import LiveManager
+    return LiveManager.streaming_count() > 0
+
+
+class TokenBucket:
+    """
+    Limitador de banda (token bucket) em bytes por segundo
+
+    `consume(n)` bloqueia até haver tokens para `n` bytes. Pedidos maiores que a
+    capacidade são aceitos e deixam o bucket negativo; o próximo pedido espera a
+    dívida ser paga. rate=0 desativa o limite.
+    """
+
+    def __init__(self, rate, burst=None):
+        """
+        Args:
+            rate: Bytes por segundo (0 = sem limite)
+            burst: Capacidade do bucket em bytes (padrão: 1 segundo de rate)
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = self._capacity()
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _capacity(self):
+        return self.burst if self.burst is not None else self.rate
+
+    def set_rate(self, rate):
+        """Altera a taxa (aplica-se aos próximos pedidos)"""
+        with self._lock:
+            if rate != self.rate:
+                self._refill()
+                self.rate = rate
+                self._tokens = min(self._tokens, self._capacity())
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.rate > 0:
+            self._tokens = min(self._capacity(), self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def consume(self, amount):
+        """
+        Reserva `amount` bytes, aguardando se necessário
+
+        Returns:
+            Segundos aguardados
+        """
+        with self._lock:
+            if self.rate <= 0:
+                return 0.0
+            self._refill()
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class UploadManager:
+    """
+    Fila persistente de uploads de vídeo
+
+    - Jobs ficam em `queue_file`; um job interrompido volta para a fila ao
+      reiniciar e o upload continua da sessão salva (resumable_upload)
+    - `workers` threads enviam em paralelo, todas sob o mesmo limite de banda
+    - Enquanto um LiveManager transmite, o limite cai para `live_rate_mbps` e
+      os chunks para UPLOAD_LIVE_CHUNK_KB (sem rajadas de vários MB sobre o RTMP)
+    - `jobs()` e `stats()` expõem estado e vazão para os bots
+    """
+
+    def __init__(self, youtube, queue_file='credentials/upload_queue.json', workers=None,
+                 rate_mbps=None, live_rate_mbps=None, streaming_probe=None):
+        """
+        Args:
+            youtube: Cliente da YouTube Data API (googleapiclient)
+            queue_file: Arquivo onde a fila é persistida
+            workers: Uploads simultâneos (padrão: UPLOAD_WORKERS ou 1)
+            rate_mbps: Limite em Mbps sem live ativa (padrão: UPLOAD_RATE_MBPS ou 0 = sem limite)
+            live_rate_mbps: Limite em Mbps com live ativa (padrão: UPLOAD_LIVE_RATE_MBPS ou 1)
+            streaming_probe: Função que diz se há live transmitindo (padrão: LiveManager)
+        """
+        self.youtube = youtube
+        self.queue_file = queue_file
+        self.workers = workers or int(os.getenv('UPLOAD_WORKERS', 1))
+        self.rate_mbps = _mbps_env('UPLOAD_RATE_MBPS', 0) if rate_mbps is None else rate_mbps
+        self.live_rate_mbps = _mbps_env('UPLOAD_LIVE_RATE_MBPS', 1) if live_rate_mbps is None else live_rate_mbps
+        self.streaming_probe = streaming_probe or live_streaming_active
+        self.bucket = TokenBucket(self._bytes_per_second(self.rate_mbps))
+        self.live_chunk_bytes = chunk_size_bytes(UPLOAD_LIVE_CHUNK_KB / 1024)
+        self._lock = threading.Lock()
+        self._done_condition = threading.Condition(self._lock)
+        self._queue = queue.Queue()
+        self._threads = []
+        self._stop_event = threading.Event()
+        self._jobs = (load_json(queue_file, {}) or {}).get('jobs', {})
+
+        # Jobs interrompidos voltam para a fila (o upload é retomado da sessão salva)
+        for job_id, job in sorted(self._jobs.items(), key=lambda item: item[1].get('created_at', '')):
+            if job['state'] in (JOB_QUEUED, JOB_UPLOADING):
+                job['state'] = JOB_QUEUED
+                job['rate'] = 0.0
+                self._queue.put(job_id)
+
+    @staticmethod
+    def _bytes_per_second(mbps):
+        return mbps * 1000 * 1000 / 8
+
+    def _save_locked(self):
+        try:
+            save_json_atomic(self.queue_file, {'jobs': self._jobs})
+        except OSError as e:
+            print(f"⚠️  Erro ao salvar fila de uploads: {e}")
+
+    def submit(self, video_file, title, description="", tags=None, category_id="22",
+               privacy_status="private"):
+        """
+        Adiciona um vídeo à fila
+
+        Returns:
+            ID do job
+        """
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            'id': job_id,
+            'video_file': os.path.abspath(video_file),
+            'title': title,
+            'description': description,
+            'tags': tags or [],
+            'category_id': category_id,
+            'privacy_status': privacy_status,
+            'state': JOB_QUEUED,
+            'bytes_done': 0,
+            'bytes_total': os.path.getsize(video_file) if os.path.exists(video_file) else 0,
+            'rate': 0.0,
+            'video_id': None,
+            'error': None,
+            'attempts': 0,
+            'created_at': datetime.now().isoformat(),
+            'finished_at': None,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._save_locked()
+        self._queue.put(job_id)
+        print(f"📥 Upload enfileirado: {title} (job {job_id})")
+        self.start()
+        return job_id
+
+    def start(self):
+        """Inicia os workers (idempotente)"""
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            self._stop_event.clear()
+            for index in range(len(self._threads), self.workers):
+                thread = threading.Thread(target=self._worker, name=f'upload-worker-{index + 1}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        """Para os workers depois do chunk em andamento (a sessão fica salva para retomar)"""
+        self._stop_event.set()
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _worker(self):
+        while not self._stop_event.is_set():
+            job_id = self._queue.get()
+            if job_id is None:
+                if self._stop_event.is_set():
+                    return
+                continue
+            self._run_job(job_id)
+
+    def throttle(self, amount):
+        """
+        Aplica o limite de banda antes de cada chunk
+
+        Também usado pelos uploads fora da fila (upload durante o encode), que
+        assim dividem o mesmo limite.
+        """
+        if self._stop_event.is_set():
+            raise UploadCancelled("Upload manager parado")
+        rate_mbps = self.live_rate_mbps if self.streaming_probe() else self.rate_mbps
+        self.bucket.set_rate(self._bytes_per_second(rate_mbps))
+        self.bucket.consume(amount)
+
+    def chunk_limit(self):
+        """Tamanho máximo do próximo chunk: menor enquanto uma live transmite (None = sem limite)"""
+        return self.live_chunk_bytes if self.streaming_probe() else None
+
+    def _run_job(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job['state'] != JOB_QUEUED:
+                return
+            job['state'] = JOB_UPLOADING
+            job['attempts'] += 1
+            self._save_locked()
+
+        last = {'done': None, 'time': time.monotonic()}
+
+        def on_progress(done, total, rate):
+            # Vazão efetiva desde o chunk anterior (inclui a espera do limitador)
+            now = time.monotonic()
+            if last['done'] is not None and now > last['time']:
+                rate = (done - last['done']) / (now - last['time'])
+            last['done'], last['time'] = done, now
+            with self._lock:
+                job['bytes_done'] = done
+                job['bytes_total'] = total
+                job['rate'] = rate
+
+        body = {
+            'snippet': {
+                'title': job['title'],
+                'description': job['description'],
+                'tags': job['tags'],
+                'categoryId': job['category_id']
+            },
+            'status': {
+                'privacyStatus': job['privacy_status'],
+                'selfDeclaredMadeForKids': False
+            }
+        }
+
+        try:
+            uploader = ResumableUploader(self.youtube, throttle=self.throttle, chunk_limit=self.chunk_limit)
+            response = uploader.upload(job['video_file'], body, progress_callback=on_progress)
+        except UploadCancelled:
+            with self._lock:
+                job['state'] = JOB_QUEUED
+                job['rate'] = 0.0
+                self._save_locked()
+            self._queue.put(job_id)
+            return
+        except Exception as e:
+            print(f"❌ Upload falhou ({job['title']}): {e}")
+            with self._lock:
+                job['state'] = JOB_FAILED
+                job['error'] = str(e)
+                job['rate'] = 0.0
+                job['finished_at'] = datetime.now().isoformat()
+                self._save_locked()
+                self._done_condition.notify_all()
+            return
+
+        with self._lock:
+            job['state'] = JOB_DONE
+            job['video_id'] = response.get('id')
+            job['rate'] = 0.0
+            job['finished_at'] = datetime.now().isoformat()
+            self._save_locked()
+            self._done_condition.notify_all()
+        print(f"✅ Upload concluído: {job['title']} → https://www.youtube.com/watch?v={job['video_id']}")
+
+    def job(self, job_id):
+        """Cópia do estado de um job (ou None)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def jobs(self, state=None):
+        """Cópia dos jobs (opcionalmente filtrados por estado)"""
+        with self._lock:
+            return [dict(job) for job in self._jobs.values() if state is None or job['state'] == state]
+
+    def wait(self, job_id, timeout=None):
+        """
+        Aguarda um job terminar
+
+        Returns:
+            Estado final do job (ou o atual, se o tempo acabar)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while self._jobs.get(job_id, {}).get('state') in (JOB_QUEUED, JOB_UPLOADING):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._done_condition.wait(remaining)
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def stats(self):
+        """Contagem de jobs por estado, vazão atual (bytes/s) e limite em vigor"""
+        with self._lock:
+            counts = {JOB_QUEUED: 0, JOB_UPLOADING: 0, JOB_DONE: 0, JOB_FAILED: 0}
+            throughput = 0.0
+            for job in self._jobs.values():
+                counts[job['state']] = counts.get(job['state'], 0) + 1
+                if job['state'] == JOB_UPLOADING:
+                    throughput += job.get('rate', 0.0)
+        counts['throughput'] = throughput
+        counts['rate_limit'] = self.bucket.rate
+        return counts
+
+    def summary(self):
+        """Resumo legível para logs"""
+        stats = self.stats()
+        limit = f"{stats['rate_limit'] * 8 / 1000 / 1000:.1f}Mbps" if stats['rate_limit'] else 'sem limite'
+        return (f"{stats[JOB_UPLOADING]} enviando, {stats[JOB_QUEUED]} na fila, "
+                f"{stats[JOB_DONE]} concluídos, {stats[JOB_FAILED]} com falha - "
+                f"{stats['throughput'] * 8 / 1000 / 1000:.1f}Mbps (limite: {limit})")
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_upload_manager(youtube=None):
+    """Fila de uploads compartilhada pelo processo (criada na primeira chamada com cliente)"""
+    global _manager
+    with _manager_lock:
+        if _manager is None and youtube is not None:
+            _manager = UploadManager(youtube)
+            if _manager.jobs(JOB_QUEUED):
+                _manager.start()
+        return _manager
+
+
+def upload_status_summary():
+    """Resumo da fila para os logs dos bots (None se não há fila ativa)"""
+    manager = get_upload_manager()
+    if manager is None or not manager.jobs():
+        return None
+    return manager.summary()
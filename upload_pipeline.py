@@ -0,0 +1,156 @@
+"""
+Upload durante o encode para VODs longos
+O vídeo é gerado em MP4 fragmentado e os fragmentos já gravados são enviados
+enquanto o encode continua; o upload termina logo depois do encode
+"""
+import os
+import json
+import time
+import threading
+from googleapiclient.http import MediaUpload
+from resumable_upload import ResumableUploader, chunk_size_bytes
+
+
+class EncodeFailed(Exception):
+    """O encode falhou enquanto o upload estava em andamento"""
+
+
+class GrowingFileUpload(MediaUpload):
+    """
+    MediaUpload de um arquivo que ainda está sendo escrito
+
+    Enquanto o encode não termina, size() é None (tamanho desconhecido) e
+    getbytes() espera até haver um chunk inteiro disponível. Um chunk menor que
+    `chunksize` só é devolvido depois do fim do encode: para o protocolo
+    resumable isso marca o último chunk.
+    """
+
+    def __init__(self, filename, finished_event, mimetype='video/mp4', chunksize=None,
+                 poll_interval=1.0):
+        """
+        Args:
+            filename: Arquivo sendo gerado pelo encoder
+            finished_event: threading.Event sinalizado quando o encode termina
+            mimetype: Tipo do arquivo
+            chunksize: Bytes por chunk (padrão: UPLOAD_CHUNK_MB, alinhado a 256KB)
+            poll_interval: Intervalo para verificar se o arquivo cresceu (segundos)
+        """
+        self._filename = filename
+        self._finished = finished_event
+        self._mimetype = mimetype
+        self._chunksize = chunksize or chunk_size_bytes()
+        self._poll_interval = poll_interval
+        self.error = None
+
+    def chunksize(self):
+        return self._chunksize
+
+    def mimetype(self):
+        return self._mimetype
+
+    def size(self):
+        if self._finished.is_set() and self.error is None and os.path.exists(self._filename):
+            return os.path.getsize(self._filename)
+        return None
+
+    def resumable(self):
+        return True
+
+    def has_stream(self):
+        return False
+
+    def _available(self):
+        return os.path.getsize(self._filename) if os.path.exists(self._filename) else 0
+
+    def getbytes(self, begin, length):
+        while True:
+            finished = self._finished.is_set()
+            if self.error is not None:
+                raise EncodeFailed(f"Encode falhou: {self.error}")
+            available = self._available() - begin
+            if available >= length or finished:
+                with open(self._filename, 'rb') as f:
+                    f.seek(begin)
+                    return f.read(max(0, min(length, available)))
+            time.sleep(self._poll_interval)
+
+    def to_json(self):
+        """
+        Serializa no formato do MediaUpload (recriado com MediaUpload.new_from_json)
+
+        O Event do encode não é serializável: vai só o estado atual ('finished').
+        O ResumableUploader não persiste sessões de um GrowingFileUpload (o
+        arquivo ainda cresce); isto serve a quem guardar a requisição.
+        """
+        data = json.loads(self._to_json(strip=['_finished', 'error']))
+        data['finished'] = self._finished.is_set() and self.error is None
+        return json.dumps(data)
+
+    @staticmethod
+    def from_json(s):
+        data = json.loads(s)
+        finished = threading.Event()
+        if data.get('finished'):
+            finished.set()
+        return GrowingFileUpload(data['_filename'], finished, data['_mimetype'], data['_chunksize'],
+                                 data['_poll_interval'])
+
+
+def encode_and_upload(youtube, render, output_path, title, description="", tags=None,
+                      category_id="22", privacy_status="private", throttle=None, chunk_limit=None):
+    """
+    Gera o vídeo e envia ao YouTube ao mesmo tempo
+
+    Args:
+        youtube: Cliente da YouTube Data API (googleapiclient)
+        render: Função render(output_path) que gera o MP4 fragmentado
+                (ex: lambda path: creator.create_night_video(3600, output_path=path, fragmented=True))
+        output_path: Caminho do vídeo gerado
+        title, description, tags, category_id, privacy_status: Metadados do vídeo
+        throttle: Limitador de banda opcional (ver upload_manager.TokenBucket)
+        chunk_limit: Tamanho máximo opcional de cada chunk (ver ResumableUploader)
+
+    Returns:
+        Tupla (video_id, output_path)
+    """
+    if os.path.exists(output_path):
+        os.remove(output_path)
+
+    finished = threading.Event()
+    media = GrowingFileUpload(output_path, finished)
+
+    def run_render():
+        try:
+            render(output_path)
+        except Exception as e:
+            media.error = e
+        finally:
+            finished.set()
+
+    encoder = threading.Thread(target=run_render, name='vod-encoder', daemon=True)
+    started = time.monotonic()
+    encoder.start()
+
+    body = {
+        'snippet': {
+            'title': title,
+            'description': description,
+            'tags': tags or [],
+            'categoryId': category_id
+        },
+        'status': {
+            'privacyStatus': privacy_status,
+            'selfDeclaredMadeForKids': False
+        }
+    }
+
+    print(f"📤 Upload durante o encode: {title}")
+    response = ResumableUploader(youtube, throttle=throttle, chunk_limit=chunk_limit).upload(
+        output_path, body, media=media)
+    encoder.join()
+
+    encode_elapsed = time.monotonic() - started
+    video_id = response['id']
+    print(f"✅ Vídeo enviado durante o encode em {encode_elapsed:.1f}s. ID: {video_id}")
+    print(f"🔗 https://www.youtube.com/watch?v={video_id}")
+    return video_id, output_path
@@ -6,17 +6,40 @@ import os
 import sys
 import shutil
 import glob
-import random
-import json
 import time
 from datetime import datetime
 from moviepy.editor import ImageSequenceClip, AudioFileClip, concatenate_audioclips
 from lofi_generator_ultra import LofiUltraGenerator
+from render_pool import report_progress
+from asset_ingest import cached_audio
+from pcm_cache import render_audio
+from soundscape import SOUNDSCAPE_ENABLED, soundscape_kind, write_soundscape
+from lofi_beat_generator import write_beat
+from state_store import image_scope, audio_scope, category_scope
+from asset_selector import (get_asset_selector, folder_weights, folder_version,
+                            IMAGE_SELECTION, AUDIO_SELECTION, ASSET_COOLDOWN_HOURS)
+
+
+# MP4 fragmentado: o arquivo só cresce durante o encode (moov vazio no início,
+# um fragmento por keyframe), então pode ser enviado enquanto é gerado
+FRAGMENTED_MP4_PARAMS = ['-movflags', 'frag_keyframe+empty_moov+default_base_moof']
+
+# Áudio da manhã: 'files' (pasta de áudios), 'generated' (lofi_beat_generator)
+# ou 'mixed' (a batida gerada entra na rotação com metade das escolhas)
+LOFI_AUDIO_SOURCE = os.getenv('LOFI_AUDIO_SOURCE', 'mixed').lower()
+# Item da rotação de áudios que representa a batida gerada
+GENERATED_AUDIO = 'generated:lofi'
 
 
 class VideoCreator:
     """Criador de vídeos unificado para manhã e noite"""
     
+    # Perfil de render (também usado pelo render_planner para prever a duração)
+    width = 1920
+    height = 1080
+    fps = 30
+    preset = 'medium'
+    
     def __init__(self):
         self.generator = LofiUltraGenerator()
     
@@ -49,16 +72,23 @@ class VideoCreator:
         return sorted(image_files)
     
     def get_categories(self, images_dir, audios_dir):
-        """Obtém categorias disponíveis (pastas que existem em ambos os diretórios)"""
-        if not os.path.exists(images_dir) or not os.path.exists(audios_dir):
+        """
+        Obtém categorias disponíveis: pastas que existem em ambos os diretórios e,
+        com SOUNDSCAPE_ENABLED, as de imagens sem áudio que têm som sintetizado
+        """
+        if not os.path.exists(images_dir):
             return []
         
         image_categories = [d for d in os.listdir(images_dir) 
                            if os.path.isdir(os.path.join(images_dir, d))]
-        audio_categories = [d for d in os.listdir(audios_dir) 
-                           if os.path.isdir(os.path.join(audios_dir, d))]
-        
-        categories = list(set(image_categories) & set(audio_categories))
+        audio_categories = []
+        if os.path.exists(audios_dir):
+            audio_categories = [d for d in os.listdir(audios_dir) 
+                               if os.path.isdir(os.path.join(audios_dir, d))]
+        
+        categories = set(image_categories) & set(audio_categories)
+        if SOUNDSCAPE_ENABLED:
+            categories |= {c for c in image_categories if soundscape_kind(c)}
         return sorted(categories)
     
     def find_images_in_category(self, category, images_dir):
@@ -91,41 +121,69 @@ class VideoCreator:
         return sorted(audios)
     
     def select_image_with_history(self, images, images_dir):
-        """Seleciona imagem evitando repetições recentes"""
-        history_file = os.path.join(images_dir, '.image_history.json')
-        used_images = []
-        
-        if os.path.exists(history_file):
-            try:
-                with open(history_file, 'r') as f:
-                    history = json.load(f)
-                    used_images = history.get('used_images', [])
-            except:
-                used_images = []
-        
-        # Filtra imagens já usadas recentemente (últimas 5)
-        available_images = [img for img in images if img not in used_images[-5:]]
-        
-        if not available_images:
-            available_images = images
-            used_images = []
-        
-        selected_image = random.choice(available_images)
+        """Seleciona imagem evitando repetições (asset_selector, ordem IMAGE_SELECTION)"""
+        return get_asset_selector().pick(image_scope(images_dir), images, mode=IMAGE_SELECTION,
+                                         weights=folder_weights(images_dir), version=folder_version(images_dir),
+                                         cooldown=ASSET_COOLDOWN_HOURS * 3600)
+    
+    def select_audio_with_history(self, audios, audios_dir, generated=False):
+        """
+        Seleciona áudio evitando repetições (asset_selector, ordem AUDIO_SELECTION)
         
-        # Atualiza histórico
-        used_images.append(selected_image)
-        if len(used_images) > 10:
-            used_images = used_images[-10:]
+        Com `generated` (fluxo da manhã) e LOFI_AUDIO_SOURCE='mixed', GENERATED_AUDIO
+        entra no pool com peso igual ao número de arquivos (metade das escolhas);
+        sem arquivos, ou com 'generated', retorna sempre GENERATED_AUDIO.
+        """
+        if generated and (LOFI_AUDIO_SOURCE == 'generated' or not audios):
+            return GENERATED_AUDIO
+        weights = folder_weights(audios_dir)
+        version = folder_version(audios_dir)
+        if generated and LOFI_AUDIO_SOURCE == 'mixed':
+            audios = list(audios) + [GENERATED_AUDIO]
+            weights[GENERATED_AUDIO] = float(len(audios) - 1)
+            version = (version, GENERATED_AUDIO)
+        return get_asset_selector().pick(audio_scope(audios_dir), audios, mode=AUDIO_SELECTION,
+                                         weights=weights, version=version,
+                                         cooldown=ASSET_COOLDOWN_HOURS * 3600)
+    
+    def write_audio(self, selected_audio, video_duration, audio_path):
+        """
+        Grava `video_duration` segundos do áudio em `audio_path` (WAV)
         
+        Usa o pcm_cache (faixa decodificada uma vez; recorte e loop com crossfade
+        sem decodificar de novo); sem ele, decodifica com o moviepy como antes.
+        """
         try:
-            with open(history_file, 'w') as f:
-                json.dump({'used_images': used_images}, f, indent=2)
-        except:
-            pass
+            track = render_audio(selected_audio, video_duration, audio_path)
+            print(f"   ⏱️  Duração do áudio: {track.duration:.1f}s (PCM em cache)")
+            if track.duration < video_duration:
+                print(f"   🔁 Áudio menor que vídeo, loop com crossfade...")
+            return
+        except Exception as e:
+            print(f"   ⚠️  Cache de PCM indisponível ({e}); decodificando com moviepy")
+        
+        # Versão normalizada do asset_ingest, se já existir
+        audio_source = cached_audio(selected_audio)
+        if audio_source != selected_audio:
+            print("   🔊 Usando áudio normalizado (EBU R128) do cache")
+        audio_clip = AudioFileClip(audio_source)
+        print(f"   ⏱️  Duração do áudio: {audio_clip.duration:.1f}s")
         
-        return selected_image
+        if audio_clip.duration > video_duration:
+            print(f"   ✂️  Cortando áudio para {video_duration}s...")
+            audio_clip = audio_clip.subclip(0, video_duration)
+        elif audio_clip.duration < video_duration:
+            print(f"   🔁 Áudio menor que vídeo, fazendo loop...")
+            loops_needed = int(video_duration / audio_clip.duration) + 1
+            audio_clip = concatenate_audioclips([audio_clip] * loops_needed)
+            audio_clip = audio_clip.subclip(0, video_duration)
+        
+        print("   💾 Processando áudio...")
+        audio_clip.write_audiofile(audio_path, logger=None, verbose=False)
+        audio_clip.close()
     
-    def create_morning_video(self, video_duration=30, images_dir="images", audios_dir="audios"):
+    def create_morning_video(self, video_duration=30, images_dir="images", audios_dir="audios",
+                             output_path=None, fragmented=False):
         """
         Cria vídeo LOFI para o fluxo da manhã
         
@@ -133,6 +191,8 @@ class VideoCreator:
             video_duration: Duração do vídeo em segundos
             images_dir: Pasta com imagens
             audios_dir: Pasta com áudios
+            output_path: Caminho do vídeo (None = output/lofi_video_<timestamp>.mp4)
+            fragmented: Gera MP4 fragmentado (permite upload durante o encode)
         
         Returns:
             Caminho do vídeo criado
@@ -140,41 +200,34 @@ class VideoCreator:
         print("🎬 Criando Vídeo LOFI (Manhã)...")
         print("=" * 50)
         
-        audio_path = "lofi_temp_audio.wav"
-        frames_dir = "lofi_temp_frames"
+        # Sufixo do PID: renders simultâneos (RENDER_WORKERS > 1) não dividem temporários
+        audio_path = f"lofi_temp_audio_{os.getpid()}.wav"
+        frames_dir = f"lofi_temp_frames_{os.getpid()}"
         frames_dir = os.path.abspath(frames_dir)
         os.makedirs(frames_dir, exist_ok=True)
         
         # Procura áudios
         print("\n1️⃣  Procurando áudio...")
+        report_progress(0.0, 'áudio')
         audio_files = self.find_audio_files(audios_dir)
         
-        if not audio_files:
+        if not audio_files and LOFI_AUDIO_SOURCE == 'files':
             raise Exception(f"❌ Nenhum áudio encontrado em '{audios_dir}/'!")
         
-        selected_audio = random.choice(audio_files)
-        print(f"   🎵 Usando áudio: {os.path.basename(selected_audio)}")
+        selected_audio = self.select_audio_with_history(audio_files, audios_dir, generated=True)
         
         # Processa áudio
-        audio_clip = AudioFileClip(selected_audio)
-        print(f"   ⏱️  Duração do áudio: {audio_clip.duration:.1f}s")
-        
-        if audio_clip.duration > video_duration:
-            print(f"   ✂️  Cortando áudio para {video_duration}s...")
-            audio_clip = audio_clip.subclip(0, video_duration)
-        elif audio_clip.duration < video_duration:
-            print(f"   🔁 Áudio menor que vídeo, fazendo loop...")
-            loops_needed = int(video_duration / audio_clip.duration) + 1
-            audio_clip = concatenate_audioclips([audio_clip] * loops_needed)
-            audio_clip = audio_clip.subclip(0, video_duration)
-        
-        print("   💾 Processando áudio...")
-        audio_clip.write_audiofile(audio_path, logger=None, verbose=False)
-        audio_clip.close()
+        if selected_audio == GENERATED_AUDIO:
+            beat = write_beat(video_duration, audio_path)
+            print(f"   🥁 Usando batida gerada: {beat.describe()} (semente {beat.seed})")
+        else:
+            print(f"   🎵 Usando áudio: {os.path.basename(selected_audio)}")
+            self.write_audio(selected_audio, video_duration, audio_path)
         
         # Gera frames
         print("\n2️⃣  Gerando frames animados...")
-        fps = 30
+        report_progress(0.1, 'frames')
+        fps = self.fps
         num_frames = int(video_duration * fps)
         
         background_images = self.find_images_in_dir(images_dir)
@@ -188,8 +241,8 @@ class VideoCreator:
         
         # Gera frames animadas
         frame_paths, scene_type = self.generator.generate_animated_frames(
-            width=1920,
-            height=1080,
+            width=self.width,
+            height=self.height,
             num_frames=num_frames,
             fps=fps,
             output_dir=frames_dir,
@@ -197,6 +250,7 @@ class VideoCreator:
         )
         
         print(f"\n3️⃣  Criando vídeo com {num_frames} frames...")
+        report_progress(0.5, 'montagem')
         
         # Valida frames
         print("   🔍 Verificando frames...")
@@ -239,18 +293,21 @@ class VideoCreator:
         os.makedirs(output_folder, exist_ok=True)
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_path = os.path.join(output_folder, f"lofi_video_{timestamp}.mp4")
+        if output_path is None:
+            output_path = os.path.join(output_folder, f"lofi_video_{timestamp}.mp4")
         
         print(f"\n4️⃣  Exportando vídeo para: {output_path}")
+        report_progress(0.6, 'encode')
         print("    ⏳ Isso pode demorar alguns minutos...")
         video_clip.write_videofile(
             output_path,
-            fps=30,
+            fps=fps,
             codec='libx264',
             audio_codec='aac',
             bitrate='10M',
             threads=4,
-            preset='medium'
+            preset=self.preset,
+            ffmpeg_params=FRAGMENTED_MP4_PARAMS if fragmented else None
         )
         
         # Limpa recursos
@@ -268,7 +325,8 @@ class VideoCreator:
         print(f"\n✅ Vídeo criado com sucesso: {output_path}")
         return output_path
     
-    def create_night_video(self, video_duration=30, images_dir="imagens noite", audios_dir="audio_noite", category=None):
+    def create_night_video(self, video_duration=30, images_dir="imagens noite", audios_dir="audio_noite", category=None,
+                           output_path=None, fragmented=False):
         """
         Cria vídeo noturno com sons da natureza
         
@@ -277,6 +335,8 @@ class VideoCreator:
             images_dir: Pasta base com imagens por categoria
             audios_dir: Pasta base com áudios por categoria
             category: Categoria específica (None = seleciona aleatória)
+            output_path: Caminho do vídeo (None = output/night_video_<categoria>_<timestamp>.mp4)
+            fragmented: Gera MP4 fragmentado (permite upload durante o encode)
         
         Returns:
             Caminho do vídeo criado
@@ -284,8 +344,9 @@ class VideoCreator:
         print("🌙 Criando Vídeo Noturno (Sons da Natureza)...")
         print("=" * 50)
         
-        audio_path = "lofi_temp_audio.wav"
-        frames_dir = "lofi_temp_frames"
+        # Sufixo do PID: renders simultâneos (RENDER_WORKERS > 1) não dividem temporários
+        audio_path = f"lofi_temp_audio_{os.getpid()}.wav"
+        frames_dir = f"lofi_temp_frames_{os.getpid()}"
         frames_dir = os.path.abspath(frames_dir)
         os.makedirs(frames_dir, exist_ok=True)
         
@@ -294,55 +355,48 @@ class VideoCreator:
             categories = self.get_categories(images_dir, audios_dir)
             if not categories:
                 raise Exception(f"❌ Nenhuma categoria encontrada! Verifique as pastas '{images_dir}' e '{audios_dir}'")
-            category = random.choice(categories)
+            category = get_asset_selector().pick(category_scope(images_dir), categories, mode='shuffle')
         
         print(f"\n📂 Categoria selecionada: {category}")
         
         # Procura imagens da categoria
         print(f"\n1️⃣  Procurando imagens na categoria '{category}'...")
+        report_progress(0.0, 'imagens')
         image_files = self.find_images_in_category(category, images_dir)
         
         if not image_files:
             raise Exception(f"❌ Nenhuma imagem encontrada em '{images_dir}/{category}/'!")
         
-        selected_image = random.choice(image_files)
+        selected_image = self.select_image_with_history(image_files, os.path.join(images_dir, category))
         print(f"   🖼️  Usando imagem: {os.path.basename(selected_image)}")
         
         # Procura áudios da categoria
         print(f"\n2️⃣  Procurando áudios na categoria '{category}'...")
+        report_progress(0.05, 'áudio')
         audio_files = self.find_audios_in_category(category, audios_dir)
         
-        if not audio_files:
+        if audio_files:
+            selected_audio = self.select_audio_with_history(audio_files, os.path.join(audios_dir, category))
+            print(f"   🎵 Usando áudio: {os.path.basename(selected_audio)}")
+            
+            # Processa áudio
+            self.write_audio(selected_audio, video_duration, audio_path)
+        elif SOUNDSCAPE_ENABLED and soundscape_kind(category):
+            # Sem gravações: som sintetizado (determinístico, em blocos)
+            kind = write_soundscape(category, video_duration, audio_path)
+            print(f"   🎛️  Sem áudios em '{audios_dir}/{category}/': som sintetizado '{kind}'")
+        else:
             raise Exception(f"❌ Nenhum áudio encontrado em '{audios_dir}/{category}/'!")
         
-        selected_audio = random.choice(audio_files)
-        print(f"   🎵 Usando áudio: {os.path.basename(selected_audio)}")
-        
-        # Processa áudio
-        audio_clip = AudioFileClip(selected_audio)
-        print(f"   ⏱️  Duração do áudio: {audio_clip.duration:.1f}s")
-        
-        if audio_clip.duration > video_duration:
-            print(f"   ✂️  Cortando áudio para {video_duration}s...")
-            audio_clip = audio_clip.subclip(0, video_duration)
-        elif audio_clip.duration < video_duration:
-            print(f"   🔁 Áudio menor que vídeo, fazendo loop...")
-            loops_needed = int(video_duration / audio_clip.duration) + 1
-            audio_clip = concatenate_audioclips([audio_clip] * loops_needed)
-            audio_clip = audio_clip.subclip(0, video_duration)
-        
-        print("   💾 Processando áudio...")
-        audio_clip.write_audiofile(audio_path, logger=None, verbose=False)
-        audio_clip.close()
-        
         # Gera frames
         print(f"\n3️⃣  Gerando frames animados...")
-        fps = 30
+        report_progress(0.1, 'frames')
+        fps = self.fps
         num_frames = int(video_duration * fps)
         
         frame_paths, scene_type = self.generator.generate_animated_frames(
-            width=1920,
-            height=1080,
+            width=self.width,
+            height=self.height,
             num_frames=num_frames,
             fps=fps,
             output_dir=frames_dir,
@@ -350,6 +404,7 @@ class VideoCreator:
         )
         
         print(f"\n4️⃣  Criando vídeo com {num_frames} frames...")
+        report_progress(0.5, 'montagem')
         
         # Valida frames
         print("   🔍 Verificando frames...")
@@ -392,17 +447,20 @@ class VideoCreator:
         os.makedirs(output_folder, exist_ok=True)
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_path = os.path.join(output_folder, f"night_video_{category.lower().replace(' ', '_')}_{timestamp}.mp4")
+        if output_path is None:
+            output_path = os.path.join(output_folder, f"night_video_{category.lower().replace(' ', '_')}_{timestamp}.mp4")
         
         print(f"\n5️⃣  Salvando vídeo: {output_path}")
+        report_progress(0.6, 'encode')
         print("   ⏳ Isso pode levar alguns minutos...")
         
         # Tenta criar o vídeo com tratamento de erro melhorado
-        max_retries = 3
+        # (MP4 fragmentado pode estar sendo enviado durante o encode: sem novas tentativas)
+        max_retries = 1 if fragmented else 3
         for attempt in range(max_retries):
             try:
                 # Usa preset mais leve nas tentativas seguintes para reduzir uso de recursos
-                preset = 'ultrafast' if attempt > 0 else 'medium'
+                preset = 'ultrafast' if attempt > 0 else self.preset
                 bitrate = '6000k' if attempt > 0 else '8000k'
                 
                 if attempt > 0:
@@ -432,7 +490,8 @@ class VideoCreator:
                     preset=preset,
                     logger=None,
                     verbose=False,
-                    threads=2  # Limita threads para reduzir uso de recursos
+                    threads=2,  # Limita threads para reduzir uso de recursos
+                    ffmpeg_params=FRAGMENTED_MP4_PARAMS if fragmented else None
                 )
                 break  # Sucesso, sai do loop
             except (BrokenPipeError, OSError) as e:
@@ -494,3 +553,23 @@ def create_night_video(video_duration=60, images_dir="imagens noite", audios_dir
     creator = VideoCreator()
     return creator.create_night_video(video_duration, images_dir, audios_dir, category)
 
+
+def render_video(content, video_duration, images_dir, audios_dir, category=None, output_path=None,
+                 fragmented=False):
+    """
+    Render de um slot (executado num processo do render_pool)
+
+    Args:
+        content: 'lofi' (vídeo da manhã) ou 'nature' (vídeo noturno da categoria)
+        output_path: Caminho do vídeo (None = padrão de cada fluxo)
+        fragmented: MP4 fragmentado (upload durante o encode)
+
+    Returns:
+        Caminho do vídeo criado
+    """
+    creator = VideoCreator()
+    if content == 'nature':
+        return creator.create_night_video(video_duration, images_dir, audios_dir, category,
+                                          output_path=output_path, fragmented=fragmented)
+    return creator.create_morning_video(video_duration, images_dir, audios_dir,
+                                        output_path=output_path, fragmented=fragmented)
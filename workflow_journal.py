@@ -0,0 +1,105 @@
+"""
+Journal das lives em andamento (tabela workflow_journal do state_store)
+Guarda slot, broadcast, stream, vídeo e PID do ffmpeg de cada live; após um
+reinício o bot confere o broadcast com uma chamada à API e retoma a live
+"""
+import os
+import time
+import threading
+from datetime import datetime
+from state_store import get_state_store
+
+
+# Logs do stderr do ffmpeg (lidos também pelo processo readotado)
+FFMPEG_LOG_DIR = 'logs'
+
+# Broadcasts que não podem mais ser retomados
+FINISHED_LIFECYCLES = ('complete', 'revoked')
+
+
+class WorkflowJournal:
+    """Entradas por slot, gravadas no state_store a cada mudança"""
+
+    def __init__(self, store=None):
+        self.store = store or get_state_store()
+        self._lock = threading.Lock()
+        self.entries = self.store.journal_entries()
+
+    def record(self, slot_name, **fields):
+        """Atualiza a entrada do slot (e o registro do broadcast)"""
+        with self._lock:
+            entry = self.entries.setdefault(slot_name, {'slot': slot_name})
+            entry.update(fields)
+            entry['updated_at'] = datetime.now().isoformat(timespec='seconds')
+            self.store.save_journal_entry(slot_name, entry)
+        if 'broadcast_id' in fields:
+            self.store.record_broadcast(fields['broadcast_id'], slot=slot_name, stream_id=entry.get('stream_id'),
+                                        title=entry.get('title'), privacy=entry.get('privacy'))
+
+    def entry(self, slot_name):
+        """Cópia da entrada do slot (ou None)"""
+        with self._lock:
+            entry = self.entries.get(slot_name)
+            return dict(entry) if entry else None
+
+    def clear(self, slot_name):
+        """Remove a entrada do slot (a live terminou ou foi descartada)"""
+        with self._lock:
+            entry = self.entries.pop(slot_name, None)
+            self.store.delete_journal_entry(slot_name)
+        if entry and entry.get('broadcast_id'):
+            self.store.record_broadcast(entry['broadcast_id'], ended_at=time.time())
+
+    def slot(self, slot_name):
+        """SlotJournal para run_live_window"""
+        return SlotJournal(self, slot_name)
+
+
+class SlotJournal:
+    """Journal de um slot (interface usada por run_live_window)"""
+
+    def __init__(self, journal, slot_name):
+        self.journal = journal
+        self.slot_name = slot_name
+        safe_name = ''.join(c if c.isalnum() else '_' for c in slot_name)
+        self.ffmpeg_log = os.path.join(FFMPEG_LOG_DIR, f'ffmpeg_{safe_name}.log')
+
+    def record(self, **fields):
+        self.journal.record(self.slot_name, **fields)
+
+    def entry(self):
+        return self.journal.entry(self.slot_name)
+
+    def clear(self):
+        self.journal.clear(self.slot_name)
+
+
+def entry_close_at(entry):
+    """Fim da janela registrado na entrada (datetime com fuso) ou None"""
+    try:
+        return datetime.fromisoformat(entry['close_at'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+async def broadcast_lifecycle(plane, live_manager, broadcast_id):
+    """
+    lifeCycleStatus do broadcast com uma única chamada (liveBroadcasts.list)
+
+    Returns:
+        Status (ex: 'live', 'testing', 'ready'), '' se o broadcast não existe,
+        ou None se não foi possível consultar
+    """
+    if not await plane.call(live_manager.initialize_uploader):
+        return None
+    uploader = live_manager.uploader
+    try:
+        response = await plane.api(uploader.youtube.liveBroadcasts().list(part='status', id=broadcast_id))
+    except Exception as e:
+        live_manager.logger.warning(f"⚠️  Não foi possível consultar o broadcast {broadcast_id}: {e}")
+        return None
+    uploader.status_poller.count_call('liveBroadcasts.list')
+    items = response.get('items', [])
+    if not items:
+        return ''
+    return items[0].get('status', {}).get('lifeCycleStatus', '')
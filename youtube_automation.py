@@ -4,36 +4,87 @@ Automatiza o clique no botão "Transmitir ao vivo" quando ffmpeg não está disp
 """
 import os
 import time
-import json
 import logging
 from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+import browser_profile
+from cookie_store import CookieStore
+from state_store import get_state_store
+from ui_waits import (StepTimer, wait_for, first_match, gone, document_ready, settled_url,
+                      logged_in_url, is_login_url, xpath_union, xpath_text)
 
 logger = logging.getLogger(__name__)
 
 # Arquivo para salvar cookies
 COOKIES_FILE = "credentials/youtube_cookies.json"
 
+# Endereços (YOUTUBE_STUDIO_URL etc. apontam para fake_youtube_studio.py nos testes)
+YOUTUBE_WEB_URL = os.getenv('YOUTUBE_WEB_URL', 'https://www.youtube.com/')
+YOUTUBE_STUDIO_URL = os.getenv('YOUTUBE_STUDIO_URL', 'https://studio.youtube.com/')
+GOOGLE_ACCOUNTS_URL = os.getenv('GOOGLE_ACCOUNTS_URL', 'https://accounts.google.com/')
+
+# Esperas máximas por etapa (segundos); as condições são verificadas a cada UI_POLL_INTERVAL
+PAGE_LOAD_TIMEOUT = 20
+HELP_TIMEOUT = 5
+GO_LIVE_TIMEOUT = 60
+LOGIN_TIMEOUT = 300
+
+# Seletores de cada etapa (unidos numa só XPath)
+HELP_XPATH = xpath_union([
+    "//a[contains(text(), 'Ajuda das configurações de streaming')]",
+    "//button[contains(text(), 'Ajuda das configurações de streaming')]",
+    "//a[contains(text(), 'streaming settings')]",
+    "//button[contains(text(), 'streaming settings')]",
+    "//a[contains(@href, 'streaming')]",
+])
+COMPLETE_XPATH = xpath_union([
+    "//button[contains(text(), 'Concluído')]",
+    "//button[contains(text(), 'Done')]",
+    "//button[contains(@aria-label, 'Concluído')]",
+])
+GO_LIVE_XPATH = xpath_union([
+    "//button[contains(text(), 'Transmitir ao vivo')]",
+    "//button[contains(text(), 'Go live')]",
+    "//button[contains(@aria-label, 'Transmitir ao vivo')]",
+    "//button[contains(@aria-label, 'Go live')]",
+    "//button[contains(@class, 'go-live')]",
+    "//button[@id='go-live-button']",
+    # Texto visível (inclui o texto de elementos filhos, sem diferenciar maiúsculas)
+    xpath_text('button', 'transmitir ao vivo', 'go live'),
+])
+AUTO_START_XPATH = xpath_union([
+    "//label[contains(text(), 'Ativar o início automático')]",
+    "//label[contains(text(), 'Enable automatic start')]",
+    "//input[@type='checkbox' and contains(@aria-label, 'início automático')]",
+    "//input[@type='checkbox' and contains(@aria-label, 'automatic start')]",
+])
+# A sala de controle carregou quando mostra o botão ou a ajuda de streaming
+LIVE_PAGE_XPATH = xpath_union([GO_LIVE_XPATH, HELP_XPATH])
+
 
 class YouTubeAutomation:
     """Automação web para YouTube Studio"""
     
-    def __init__(self, headless=False):
+    def __init__(self, headless=False, lightweight=None):
         """
         Inicializa a automação
         
         Args:
             headless: Se True, executa o navegador em modo headless (sem interface)
+            lightweight: Perfil leve do browser_profile (sem mídia, imagens e fontes);
+                None = BROWSER_LIGHTWEIGHT
         """
         self.driver = None
         self.headless = headless
+        self.lightweight = browser_profile.BROWSER_LIGHTWEIGHT if lightweight is None else lightweight
         self.wait_timeout = 30
         self.cookies_file = COOKIES_FILE
+        self.cookie_store = CookieStore(self.cookies_file)
+        self.logged_in = False
+        # Tempo gasto em cada etapa (login, navegação, ajuda, transmitir...)
+        self.timer = StepTimer()
+        # Segundos com o navegador aberto após start_live_automation (0 em sessões do browser_pool)
+        self.keep_open_seconds = 10
         # Garante que o diretório existe
         os.makedirs(os.path.dirname(self.cookies_file), exist_ok=True)
     
@@ -49,6 +100,8 @@ class YouTubeAutomation:
             chrome_options.add_argument('--user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
             chrome_options.add_argument('--disable-gpu')
             chrome_options.add_argument('--window-size=1920,1080')
+            if self.lightweight:
+                browser_profile.apply_chrome_options(chrome_options)
             
             # Verifica se está no Docker ou precisa de headless
             is_docker = os.path.exists('/.dockerenv') or os.environ.get('DOCKER_CONTAINER') == 'true'
@@ -68,6 +121,8 @@ class YouTubeAutomation:
             try:
                 self.driver = webdriver.Chrome(options=chrome_options)
                 logger.info("✅ Chrome/Chromium driver inicializado")
+                if self.lightweight:
+                    browser_profile.block_requests(self.driver)
                 return True
             except Exception as e:
                 logger.warning(f"⚠️  Chrome/Chromium não encontrado: {e}")
@@ -79,6 +134,8 @@ class YouTubeAutomation:
                     firefox_options = FirefoxOptions()
                     if self.headless or is_docker:
                         firefox_options.add_argument('--headless')
+                    if self.lightweight:
+                        browser_profile.apply_firefox_options(firefox_options)
                     self.driver = webdriver.Firefox(options=firefox_options)
                     logger.info("✅ Firefox driver inicializado")
                     return True
@@ -92,158 +149,93 @@ class YouTubeAutomation:
             return False
     
     def save_cookies(self):
-        """Salva os cookies do navegador para reutilizar depois"""
+        """Salva os cookies do navegador para reutilizar depois (todos os domínios, sem navegar)"""
         if not self.driver:
             return False
         
         try:
-            # Salva cookies de múltiplos domínios
-            cookies_to_save = []
-            
-            # Cookies do YouTube
-            try:
-                self.driver.get("https://www.youtube.com/")
-                time.sleep(1)
-                cookies_to_save.extend(self.driver.get_cookies())
-            except:
-                pass
-            
-            # Cookies do Google
-            try:
-                self.driver.get("https://accounts.google.com/")
-                time.sleep(1)
-                cookies_to_save.extend(self.driver.get_cookies())
-            except:
-                pass
-            
-            # Remove duplicatas
-            seen = set()
-            unique_cookies = []
-            for cookie in cookies_to_save:
-                key = (cookie.get('name'), cookie.get('domain'))
-                if key not in seen:
-                    seen.add(key)
-                    unique_cookies.append(cookie)
-            
-            with open(self.cookies_file, 'w') as f:
-                json.dump(unique_cookies, f, indent=2)
-            
-            logger.info(f"✅ {len(unique_cookies)} cookies salvos em {self.cookies_file}")
-            return True
+            return self.cookie_store.capture(self.driver, fallback_urls=(YOUTUBE_WEB_URL, GOOGLE_ACCOUNTS_URL)) > 0
         except Exception as e:
             logger.warning(f"⚠️  Erro ao salvar cookies: {e}")
             return False
     
+    def session_valid(self):
+        """
+        Confere se a sessão continua logada (cookies atuais do navegador + requisição leve ao Studio)
+        
+        Returns:
+            True, False (sessão expirou: logged_in volta a False) ou None (não foi possível verificar)
+        """
+        self.save_cookies()
+        valid = self.cookie_store.validate(YOUTUBE_STUDIO_URL, is_login_url)
+        if valid is False:
+            self.logged_in = False
+        return valid
+    
     def load_cookies(self):
-        """Carrega cookies salvos no navegador"""
+        """Carrega cookies salvos no navegador (antes da primeira navegação)"""
         if not self.driver:
             return False
         
-        if not os.path.exists(self.cookies_file):
-            logger.info("💡 Nenhum cookie salvo encontrado")
-            return False
-        
         try:
-            # Primeiro acessa o domínio para poder adicionar cookies
-            self.driver.get("https://www.youtube.com/")
-            time.sleep(2)
-            
-            with open(self.cookies_file, 'r') as f:
-                cookies = json.load(f)
-            
-            # Adiciona cada cookie
-            added_count = 0
-            for cookie in cookies:
-                try:
-                    # Remove campos que podem causar problemas
-                    cookie_copy = cookie.copy()
-                    cookie_copy.pop('sameSite', None)
-                    # Mantém expiry mas converte se necessário
-                    if 'expiry' in cookie_copy:
-                        expiry = cookie_copy['expiry']
-                        if isinstance(expiry, float):
-                            cookie_copy['expiry'] = int(expiry)
-                    
-                    # Adiciona cookie
-                    self.driver.add_cookie(cookie_copy)
-                    added_count += 1
-                except Exception as e:
-                    logger.debug(f"⚠️  Erro ao adicionar cookie: {e}")
-                    continue
-            
-            logger.info(f"✅ {added_count} cookies carregados de {self.cookies_file}")
-            return added_count > 0
+            return self.cookie_store.inject(self.driver, fallback_url=YOUTUBE_WEB_URL) > 0
         except Exception as e:
             logger.warning(f"⚠️  Erro ao carregar cookies: {e}")
             return False
     
-    def login_youtube(self):
+    def login_youtube(self, wait_for_login=True, login_timeout=LOGIN_TIMEOUT):
         """
         Verifica se está logado no YouTube
-        Tenta carregar cookies salvos primeiro
+        Injeta os cookies salvos e valida a sessão com uma requisição leve ao
+        Studio; só abre o Studio no navegador se a sessão não for confirmada
+        
+        Args:
+            wait_for_login: Se False, retorna False logo se o login for necessário
+                (sem aguardar login manual)
+            login_timeout: Espera máxima pelo login manual (segundos)
         """
         if not self.driver:
             if not self._setup_driver():
                 return False
         
+        # Sessão já logada (ex: reaproveitada do browser_pool, que revalida com session_valid())
+        if self.logged_in:
+            return True
+        
         try:
-            # Tenta carregar cookies salvos
-            if self.load_cookies():
-                logger.info("🔄 Recarregando página com cookies...")
-                self.driver.get("https://studio.youtube.com/")
-                time.sleep(5)
-            
-            # Verifica se precisa fazer login
-            current_url = self.driver.current_url.lower()
-            
-            if "accounts.google.com" in current_url or "signin" in current_url or "login" in current_url:
-                logger.warning("⚠️  Login necessário detectado")
-                logger.info("💡 Por favor, faça login manualmente no navegador que abriu")
-                logger.info("💡 O script aguardará até você fazer login (pressione Ctrl+C para cancelar)")
+            with self.timer.step('login'):
+                # Cookies salvos + uma requisição ao Studio: sem abrir páginas
+                if self.load_cookies() and self.cookie_store.validate(YOUTUBE_STUDIO_URL, is_login_url):
+                    logger.info("✅ Sessão do YouTube Studio válida (cookies salvos)")
+                    self.logged_in = True
+                    return True
                 
-                # Aguarda indefinidamente até fazer login (verifica a cada 5 segundos)
-                max_wait_time = 300  # 5 minutos máximo
-                waited = 0
+                self.driver.get(YOUTUBE_STUDIO_URL)
                 
-                while waited < max_wait_time:
-                    time.sleep(5)
-                    waited += 5
-                    
-                    # Verifica se ainda está na página de login
-                    try:
-                        current_url = self.driver.current_url.lower()
-                        if "accounts.google.com" not in current_url and "signin" not in current_url and "login" not in current_url:
-                            # Pode ter feito login, verifica se está no YouTube Studio
-                            if "studio.youtube.com" in current_url or "youtube.com" in current_url:
-                                logger.info("✅ Login detectado! Continuando...")
-                                time.sleep(3)  # Aguarda página carregar completamente
-                                # Salva cookies para próxima vez
-                                self.save_cookies()
-                                break
-                    except:
-                        pass
-                    
-                    if waited % 30 == 0:  # A cada 30 segundos
-                        remaining = max_wait_time - waited
-                        logger.info(f"⏳ Aguardando login... ({remaining}s restantes)")
+                # Verifica se precisa fazer login (quando a página terminar de carregar)
+                current_url = wait_for(self.driver, settled_url, PAGE_LOAD_TIMEOUT) or self.driver.current_url
                 
-                # Verifica novamente após o loop
-                try:
-                    self.driver.refresh()
-                    time.sleep(3)
-                    current_url = self.driver.current_url.lower()
+                if is_login_url(current_url):
+                    logger.warning("⚠️  Login necessário detectado")
+                    if not wait_for_login:
+                        return False
+                    logger.info("💡 Por favor, faça login manualmente no navegador que abriu")
+                    logger.info(f"💡 O script aguardará até {login_timeout}s você fazer login (pressione Ctrl+C para cancelar)")
                     
-                    if "accounts.google.com" in current_url or "signin" in current_url:
-                        logger.error("❌ Ainda não está logado após 5 minutos.")
+                    # Acorda assim que o navegador sair da tela de login
+                    if not wait_for(self.driver, logged_in_url, login_timeout, poll=1.0):
+                        logger.error(f"❌ Ainda não está logado após {login_timeout}s.")
                         logger.error("💡 Por favor, faça login manualmente e execute o script novamente.")
                         return False
-                except:
-                    pass
+                    logger.info("✅ Login detectado! Continuando...")
+                    # Salva cookies para próxima vez
+                    self.save_cookies()
             
             logger.info("✅ Acesso ao YouTube Studio confirmado")
             # Salva cookies se ainda não salvou
             if not os.path.exists(self.cookies_file):
                 self.save_cookies()
+            self.logged_in = True
             return True
             
         except Exception as e:
@@ -261,10 +253,13 @@ class YouTubeAutomation:
             return False
         
         try:
-            url = f"https://studio.youtube.com/video/{broadcast_id}/livestreaming"
+            url = f"{YOUTUBE_STUDIO_URL.rstrip('/')}/video/{broadcast_id}/livestreaming"
             logger.info(f"🌐 Navegando para: {url}")
-            self.driver.get(url)
-            time.sleep(5)  # Aguarda página carregar
+            with self.timer.step('navegação'):
+                self.driver.get(url)
+                # Aguarda a sala de controle mostrar o botão ou a ajuda de streaming
+                wait_for(self.driver, document_ready, PAGE_LOAD_TIMEOUT)
+                wait_for(self.driver, first_match(LIVE_PAGE_XPATH, enabled=False), PAGE_LOAD_TIMEOUT)
             
             return True
             
@@ -281,62 +276,28 @@ class YouTubeAutomation:
             return False
         
         try:
-            logger.info("🔍 Procurando 'Ajuda das configurações de streaming'...")
-            
-            # Procura o link/botão de ajuda
-            help_selectors = [
-                "//a[contains(text(), 'Ajuda das configurações de streaming')]",
-                "//button[contains(text(), 'Ajuda das configurações de streaming')]",
-                "//a[contains(text(), 'streaming settings')]",
-                "//button[contains(text(), 'streaming settings')]",
-                "//a[contains(@href, 'streaming')]",
-            ]
-            
-            help_link = None
-            for selector in help_selectors:
-                try:
-                    wait = WebDriverWait(self.driver, 5)
-                    help_link = wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
-                    logger.info("✅ Link de ajuda encontrado")
-                    break
-                except TimeoutException:
-                    continue
-            
-            if help_link:
+            with self.timer.step('ajuda'):
+                logger.info("🔍 Procurando 'Ajuda das configurações de streaming'...")
+                help_link = wait_for(self.driver, first_match(HELP_XPATH), HELP_TIMEOUT)
+                
+                if not help_link:
+                    logger.info("💡 Link de ajuda não encontrado (pode não ser necessário)")
+                    return True
+                
                 logger.info("🖱️  Clicando em 'Ajuda das configurações de streaming'...")
                 help_link.click()
-                time.sleep(3)  # Aguarda modal abrir
                 
-                # Procura botão "Concluído"
+                # Aguarda o modal abrir com o botão "Concluído"
                 logger.info("🔍 Procurando botão 'Concluído'...")
-                complete_selectors = [
-                    "//button[contains(text(), 'Concluído')]",
-                    "//button[contains(text(), 'Concluído') and contains(@class, 'yt-spec-button')]",
-                    "//button[contains(text(), 'Done')]",
-                    "//button[contains(@aria-label, 'Concluído')]",
-                ]
-                
-                complete_button = None
-                for selector in complete_selectors:
-                    try:
-                        wait = WebDriverWait(self.driver, 5)
-                        complete_button = wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
-                        logger.info("✅ Botão 'Concluído' encontrado")
-                        break
-                    except TimeoutException:
-                        continue
+                complete_button = wait_for(self.driver, first_match(COMPLETE_XPATH), HELP_TIMEOUT)
                 
                 if complete_button:
                     logger.info("🖱️  Clicando em 'Concluído'...")
                     complete_button.click()
-                    time.sleep(2)
+                    wait_for(self.driver, gone(complete_button), HELP_TIMEOUT)
                     logger.info("✅ Modal fechado")
-                    return True
                 else:
                     logger.warning("⚠️  Botão 'Concluído' não encontrado (pode já estar fechado)")
-                    return True
-            else:
-                logger.info("💡 Link de ajuda não encontrado (pode não ser necessário)")
                 return True
                 
         except Exception as e:
@@ -360,93 +321,43 @@ class YouTubeAutomation:
         
         # Primeiro, tenta clicar em "Ajuda" e "Concluído" se necessário
         self.click_streaming_help_and_complete()
-        time.sleep(2)
         
         for attempt in range(1, max_retries + 1):
             try:
-                logger.info(f"🔍 Tentativa {attempt}/{max_retries}: Procurando botão 'Transmitir ao vivo'...")
-                
-                # Aguarda página carregar
-                time.sleep(3)
-                
-                # Procura o botão "Transmitir ao vivo" por vários seletores possíveis
-                button_selectors = [
-                    # Seletor em português
-                    "//button[contains(text(), 'Transmitir ao vivo')]",
-                    "//button[contains(text(), 'Go live')]",
-                    "//button[contains(@aria-label, 'Transmitir ao vivo')]",
-                    "//button[contains(@aria-label, 'Go live')]",
-                    # Por classe/ID comum
-                    "//button[contains(@class, 'go-live')]",
-                    "//button[@id='go-live-button']",
-                    # Seletor genérico para botão de ação principal
-                    "//button[contains(@class, 'yt-spec-button-shape-next') and contains(., 'vivo')]",
-                    "//button[contains(@class, 'yt-spec-button-shape-next') and contains(., 'live')]",
-                ]
-                
-                button = None
-                for selector in button_selectors:
-                    try:
-                        wait = WebDriverWait(self.driver, 10)
-                        button = wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
-                        logger.info(f"✅ Botão encontrado com seletor: {selector}")
-                        break
-                    except TimeoutException:
-                        continue
-                
-                if not button:
-                    # Tenta encontrar por texto visível
-                    logger.info("🔍 Tentando encontrar botão por texto visível...")
-                    buttons = self.driver.find_elements(By.TAG_NAME, "button")
-                    for btn in buttons:
-                        text = btn.text.lower()
-                        if "transmitir" in text or "go live" in text or "vivo" in text:
-                            button = btn
-                            logger.info(f"✅ Botão encontrado por texto: {btn.text}")
-                            break
-                
-                if not button:
-                    logger.warning(f"⚠️  Botão não encontrado na tentativa {attempt}")
-                    if attempt < max_retries:
-                        logger.info("⏳ Aguardando 5 segundos antes de tentar novamente...")
-                        time.sleep(5)
-                        # Recarrega a página
-                        logger.info("🔄 Recarregando página...")
-                        self.driver.refresh()
-                        time.sleep(5)
-                        # Tenta ajuda novamente
-                        self.click_streaming_help_and_complete()
-                        time.sleep(2)
-                    continue
-                
-                # Rola até o botão se necessário
-                self.driver.execute_script("arguments[0].scrollIntoView(true);", button)
-                time.sleep(1)
-                
-                # Verifica se o botão está habilitado
-                if not button.is_enabled():
-                    logger.warning("⚠️  Botão encontrado mas está desabilitado")
-                    if attempt < max_retries:
-                        logger.info("⏳ Aguardando 5 segundos...")
-                        time.sleep(60)
-                        continue
-                
-                # Clica no botão
-                logger.info("🖱️  Clicando no botão 'Transmitir ao vivo'...")
-                button.click()
-                time.sleep(3)
-                
-                logger.info("✅ Botão clicado com sucesso!")
-                return True
+                with self.timer.step('transmitir'):
+                    logger.info(f"🔍 Tentativa {attempt}/{max_retries}: Procurando botão 'Transmitir ao vivo'...")
+                    
+                    # Uma XPath com todos os seletores; acorda quando o botão existir e estiver habilitado
+                    button = wait_for(self.driver, first_match(GO_LIVE_XPATH), GO_LIVE_TIMEOUT)
+                    
+                    if button:
+                        # Rola até o botão se necessário
+                        self.driver.execute_script("arguments[0].scrollIntoView(true);", button)
+                        
+                        # Clica no botão
+                        logger.info("🖱️  Clicando no botão 'Transmitir ao vivo'...")
+                        button.click()
+                        wait_for(self.driver, gone(button), HELP_TIMEOUT)
+                        
+                        logger.info("✅ Botão clicado com sucesso!")
+                        return True
+                    
+                    if wait_for(self.driver, first_match(GO_LIVE_XPATH, enabled=False), 0):
+                        logger.warning(f"⚠️  Botão encontrado mas continuou desabilitado por {GO_LIVE_TIMEOUT}s")
+                    else:
+                        logger.warning(f"⚠️  Botão não encontrado na tentativa {attempt}")
                 
             except Exception as e:
                 logger.error(f"❌ Erro na tentativa {attempt}: {e}")
-                if attempt < max_retries:
-                    time.sleep(5)
+            
+            if attempt < max_retries:
+                # Recarrega a página
+                logger.info("🔄 Recarregando página...")
+                with self.timer.step('navegação'):
                     self.driver.refresh()
-                    time.sleep(5)
-                    self.click_streaming_help_and_complete()
-                    time.sleep(2)
+                    wait_for(self.driver, document_ready, PAGE_LOAD_TIMEOUT)
+                # Tenta ajuda novamente
+                self.click_streaming_help_and_complete()
         
         return False
     
@@ -461,31 +372,20 @@ class YouTubeAutomation:
         try:
             logger.info("🔧 Tentando ativar 'Início automático'...")
             
-            # Procura o toggle de início automático
-            toggle_selectors = [
-                "//label[contains(text(), 'Ativar o início automático')]",
-                "//label[contains(text(), 'Enable automatic start')]",
-                "//input[@type='checkbox' and contains(@aria-label, 'início automático')]",
-                "//input[@type='checkbox' and contains(@aria-label, 'automatic start')]",
-            ]
-            
-            for selector in toggle_selectors:
-                try:
-                    wait = WebDriverWait(self.driver, 5)
-                    toggle = wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
-                    # Verifica se já está ativado
-                    if toggle.is_selected() or "checked" in toggle.get_attribute("class").lower():
-                        logger.info("✅ 'Início automático' já está ativado")
-                        return True
-                    # Clica para ativar
-                    toggle.click()
-                    logger.info("✅ 'Início automático' ativado")
+            with self.timer.step('início automático'):
+                toggle = wait_for(self.driver, first_match(AUTO_START_XPATH), HELP_TIMEOUT)
+                if not toggle:
+                    logger.warning("⚠️  Toggle de início automático não encontrado (pode já estar ativado)")
                     return True
-                except TimeoutException:
-                    continue
-            
-            logger.warning("⚠️  Toggle de início automático não encontrado (pode já estar ativado)")
-            return True
+                
+                # Verifica se já está ativado
+                if toggle.is_selected() or "checked" in (toggle.get_attribute("class") or "").lower():
+                    logger.info("✅ 'Início automático' já está ativado")
+                    return True
+                # Clica para ativar
+                toggle.click()
+                logger.info("✅ 'Início automático' ativado")
+                return True
             
         except Exception as e:
             logger.warning(f"⚠️  Erro ao ativar início automático: {e}")
@@ -498,34 +398,27 @@ class YouTubeAutomation:
         Args:
             broadcast_id: ID do broadcast
             enable_auto_start: Se True, tenta ativar início automático
-            wait_for_login: Se True, aguarda indefinidamente até fazer login
+            wait_for_login: Se True, aguarda até LOGIN_TIMEOUT + 2 minutos pelo login manual
         
         Returns:
             True se sucesso, False caso contrário
         """
+        self.timer.reset()
         try:
-            # 1. Configura driver
-            if not self._setup_driver():
+            # 1. Configura driver (ou reaproveita o já aberto)
+            if not self.driver and not self._setup_driver():
                 return False
             
             # 2. Faz login (ou verifica se já está logado)
-            if not self.login_youtube():
+            if not self.login_youtube(wait_for_login=wait_for_login,
+                                      login_timeout=LOGIN_TIMEOUT + 120):
                 if wait_for_login:
-                    logger.warning("⚠️  Login necessário")
-                    logger.info("💡 O navegador está aberto. Por favor, faça login.")
-                    logger.info("💡 O script continuará automaticamente quando você fizer login.")
-                    logger.info("💡 Pressione Ctrl+C no terminal se quiser cancelar.")
-                    # Tenta novamente após aguardar mais tempo
-                    logger.info("💡 Aguardando mais 2 minutos para login...")
-                    time.sleep(120)
-                    if not self.login_youtube():
-                        logger.error("❌ Ainda não está logado. Execute novamente após fazer login.")
-                        return False
+                    logger.error("❌ Ainda não está logado. Execute novamente após fazer login.")
                 else:
                     logger.warning("⚠️  Não foi possível fazer login automaticamente")
                     logger.info("💡 Você precisa estar logado no YouTube no navegador")
                     logger.info("💡 Abra o navegador manualmente e faça login, depois execute novamente")
-                    return False
+                return False
             
             # 3. Navega para a live
             if not self.go_to_live_stream(broadcast_id):
@@ -549,10 +442,20 @@ class YouTubeAutomation:
             traceback.print_exc()
             return False
         finally:
+            logger.info(f"⏱️  Etapas da automação: {self.timer.summary() or 'nenhuma'}")
+            self._record_timings()
             # Mantém o navegador aberto por alguns segundos para verificar
-            if self.driver:
-                logger.info("⏳ Mantendo navegador aberto por 10 segundos para verificação...")
-                time.sleep(10)
+            if self.driver and self.keep_open_seconds:
+                logger.info(f"⏳ Mantendo navegador aberto por {self.keep_open_seconds} segundos para verificação...")
+                time.sleep(self.keep_open_seconds)
+    
+    def _record_timings(self):
+        try:
+            store = get_state_store()
+            for step, seconds in self.timer.timings.items():
+                store.record_metric('automation_step_seconds', seconds, step=step)
+        except Exception as e:
+            logger.debug(f"⚠️  Erro ao registrar tempos da automação: {e}")
     
     def close(self):
         """Fecha o navegador"""
@@ -564,6 +467,7 @@ class YouTubeAutomation:
                 pass
             finally:
                 self.driver = None
+                self.logged_in = False
     
     def __enter__(self):
         """Context manager entry"""
@@ -0,0 +1,157 @@
+"""
+Cliente compartilhado da YouTube Data API
+Um único serviço por processo: token carregado uma vez, discovery em cache local,
+conexões HTTP reaproveitadas por thread e renovação de token serializada
+"""
+import os
+import json
+import threading
+import httplib2
+import google_auth_httplib2
+from google.auth.credentials import AnonymousCredentials
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
+from googleapiclient.http import build_http
+from api_quota import get_quota_ledger, metered_request_builder
+from credential_broker import DEFAULT_TOKEN_FILE, get_credential_broker
+from state_files import load_json, save_json_atomic
+
+
+DISCOVERY_URL = 'https://www.googleapis.com/discovery/v1/apis/youtube/v3/rest'
+DISCOVERY_CACHE_FILE = 'credentials/discovery_youtube_v3.json'
+HTTP_TIMEOUT = 60
+
+
+def local_api_base_url():
+    """URL da API local (YOUTUBE_API_BASE_URL, ex: fake_youtube_api.py) ou None"""
+    base_url = os.getenv('YOUTUBE_API_BASE_URL')
+    if not base_url:
+        return None
+    return base_url if base_url.endswith('/') else base_url + '/'
+
+
+class YouTubeClientService:
+    """
+    Serviço da YouTube Data API compartilhado por bots e managers
+
+    - O token é lido, renovado e gravado só pelo CredentialBroker (os bots não
+      disputam mais o arquivo de token)
+    - O documento de discovery é parseado uma vez por processo e fica em cache
+      em disco, então a inicialização não depende de rede
+    - Cada thread usa seu próprio httplib2.Http (que não é thread-safe), mantido
+      vivo entre chamadas para reaproveitar conexões
+    - Toda requisição passa pelo ledger de quota
+    """
+
+    def __init__(self, credentials_file='credentials/credentials.json',
+                 token_file=DEFAULT_TOKEN_FILE,
+                 discovery_cache_file=DISCOVERY_CACHE_FILE, ledger=None):
+        """
+        Args:
+            credentials_file: Arquivo JSON com credenciais da API
+            token_file: Arquivo para armazenar o token de autenticação
+            discovery_cache_file: Cache local do documento de discovery
+            ledger: QuotaLedger (padrão: ledger compartilhado do processo)
+        """
+        self.credentials_file = credentials_file
+        self.token_file = token_file
+        self.discovery_cache_file = discovery_cache_file
+        self.ledger = ledger or get_quota_ledger()
+        self.broker = get_credential_broker(token_file, credentials_file)
+        self.credentials = None
+        self.http_connections = 0
+        self._youtube = None
+        self._lock = threading.RLock()
+        self._local = threading.local()
+
+    def client(self):
+        """
+        Retorna o cliente da API (criado na primeira chamada)
+
+        Returns:
+            Resource do googleapiclient ou None se não foi possível autenticar
+        """
+        with self._lock:
+            if self._youtube is None:
+                base_url = local_api_base_url()
+                if base_url:
+                    # API local não exige OAuth
+                    print(f"🧪 Usando API local em {base_url}")
+                    self.credentials = AnonymousCredentials()
+                else:
+                    # Nunca abre o login no navegador: o bot pode estar num host sem tela
+                    self.credentials = self.broker.load(interactive=False)
+                    if not self.credentials:
+                        return None
+                    # Renova o token em segundo plano, fora do caminho crítico
+                    self.broker.start()
+                self._youtube = build_from_document(
+                    self._load_discovery_document(),
+                    http=self._thread_http(),
+                    requestBuilder=self._request_builder()
+                )
+                print("🔌 Cliente da YouTube API criado (compartilhado pelo processo)")
+            return self._youtube
+
+    def _load_discovery_document(self):
+        """Documento de discovery: cache local, cópia estática da biblioteca ou rede"""
+        base_url = local_api_base_url()
+        if base_url:
+            response, content = httplib2.Http(timeout=HTTP_TIMEOUT).request(
+                f"{base_url}discovery/v1/apis/youtube/v3/rest"
+            )
+            if response.status >= 400:
+                raise RuntimeError(f"Falha ao baixar discovery da API local ({response.status})")
+            return json.loads(content)
+
+        document = load_json(self.discovery_cache_file)
+        if document:
+            return document
+
+        content = discovery_cache.get_static_doc('youtube', 'v3')
+        if content is None:
+            print("🌐 Baixando documento de discovery da YouTube API...")
+            response, content = httplib2.Http(timeout=HTTP_TIMEOUT).request(DISCOVERY_URL)
+            if response.status >= 400:
+                raise RuntimeError(f"Falha ao baixar discovery ({response.status})")
+
+        document = json.loads(content)
+        try:
+            save_json_atomic(self.discovery_cache_file, document)
+        except OSError as e:
+            print(f"⚠️  Não foi possível salvar cache do discovery: {e}")
+        return document
+
+    def _thread_http(self):
+        """httplib2.Http autorizado da thread atual (criado na primeira chamada)"""
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            # build_http desativa o redirect automático do 308 (usado pelo upload resumable)
+            http = google_auth_httplib2.AuthorizedHttp(self.credentials, http=build_http())
+            self._local.http = http
+            with self._lock:
+                self.http_connections += 1
+        return http
+
+    def _request_builder(self):
+        """requestBuilder que associa cada requisição ao Http da thread que a criou"""
+        request_class = metered_request_builder(self.ledger)
+
+        def build_request(http, *args, **kwargs):
+            return request_class(self._thread_http(), *args, **kwargs)
+
+        return build_request
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_youtube_service(credentials_file='credentials/credentials.json',
+                        token_file=DEFAULT_TOKEN_FILE):
+    """Serviço compartilhado pelo processo para o par credenciais/token"""
+    key = (os.path.abspath(credentials_file), os.path.abspath(os.path.splitext(token_file)[0]))
+    with _services_lock:
+        if key not in _services:
+            _services[key] = YouTubeClientService(credentials_file, token_file)
+        return _services[key]
@@ -2,27 +2,32 @@
 Integração com YouTube API para upload de vídeos e criação de lives
 """
 import os
-import json
+import time
 from datetime import datetime, timedelta, timezone
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
 from googleapiclient.errors import HttpError
-import pickle
+from live_status import LiveStatusPoller
+from api_quota import get_quota_ledger
+from api_batch import BatchReader
+from resumable_upload import ResumableUploader
+from upload_manager import get_upload_manager, UploadCancelled
+from upload_pipeline import encode_and_upload, EncodeFailed
+from youtube_client import get_youtube_service
+from state_store import get_state_store
 
 
-SCOPES = ['https://www.googleapis.com/auth/youtube.upload',
-          'https://www.googleapis.com/auth/youtube.force-ssl']
+# Servidor de ingestão RTMP (YOUTUBE_RTMP_URL aponta para o receptor de fake_youtube_api.py)
+RTMP_URL = os.getenv('YOUTUBE_RTMP_URL', "rtmp://a.rtmp.youtube.com/live2")
+# Stream key fixa dos destinos sem destination.stream_key próprio
+FIXED_STREAM_KEY = os.getenv('YOUTUBE_STREAM_KEY', "19cr-ehfp-pycp-m8yj-2m85")
+DEFAULT_STREAM_ID = "0bvegNwA2fGiIN-7wd633g1762446787467917"
 
 
 class YouTubeUploader:
     """Gerencia upload e lives no YouTube"""
     
     def __init__(self, credentials_file='credentials/credentials.json',
-                 token_file='credentials/token.pickle',
-                 stream_config_file='credentials/stream_config.json'):
+                 token_file='credentials/token.json',
+                 stream_config_file='credentials/stream_config.json', stream_key=None):
         """
         Inicializa o uploader do YouTube
         
@@ -30,68 +35,26 @@ class YouTubeUploader:
             credentials_file: Arquivo JSON com credenciais da API
             token_file: Arquivo para armazenar o token de autenticação
             stream_config_file: Arquivo para armazenar stream permanente
+            stream_key: Stream key do destino (None = FIXED_STREAM_KEY)
         """
         self.credentials_file = credentials_file
         self.token_file = token_file
         self.stream_config_file = stream_config_file
+        self.stream_key = stream_key or FIXED_STREAM_KEY
         self.youtube = None
+        self.quota_ledger = get_quota_ledger()
         self._authenticate()
+        self.status_poller = LiveStatusPoller(self.youtube, budget=self.quota_ledger)
     
     def _authenticate(self):
-        """Autentica com a API do YouTube"""
-        creds = None
-        
-        # Tenta carregar token salvo
-        if os.path.exists(self.token_file):
-            with open(self.token_file, 'rb') as token:
-                creds = pickle.load(token)
-        
-        # Se não há credenciais válidas, solicita autenticação
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                if not os.path.exists(self.credentials_file):
-                    print(f"❌ Arquivo de credenciais não encontrado: {self.credentials_file}")
-                    print("📝 Crie um arquivo credentials.json com suas credenciais do Google Cloud Console")
-                    print("🔗 https://console.cloud.google.com/apis/credentials")
-                    return False
-                
-                # Converte credenciais web para installed se necessário
-                self._ensure_installed_credentials()
-                
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    self.credentials_file, SCOPES
-                )
-                creds = flow.run_local_server(port=0)
-            
-            # Salva credenciais para próxima vez
-            os.makedirs(os.path.dirname(self.token_file), exist_ok=True)
-            with open(self.token_file, 'wb') as token:
-                pickle.dump(creds, token)
-        
-        self.youtube = build('youtube', 'v3', credentials=creds)
+        """Autentica com a API do YouTube (cliente compartilhado pelo processo)"""
+        service = get_youtube_service(self.credentials_file, self.token_file)
+        self.youtube = service.client()
+        if not self.youtube:
+            return False
         print("✅ Autenticado no YouTube com sucesso!")
         return True
     
-    def _ensure_installed_credentials(self):
-        """Converte credenciais web para installed se necessário"""
-        try:
-            with open(self.credentials_file, 'r') as f:
-                creds_data = json.load(f)
-            
-            # Se tiver "web" mas não "installed", converte
-            if 'web' in creds_data and 'installed' not in creds_data:
-                print("📝 Convertendo credenciais web para desktop...")
-                creds_data['installed'] = creds_data['web']
-                
-                # Salva o arquivo convertido
-                with open(self.credentials_file, 'w') as f:
-                    json.dump(creds_data, f, indent=2)
-                print("✅ Credenciais convertidas com sucesso!")
-        except Exception as e:
-            print(f"⚠️  Aviso ao converter credenciais: {e}")
-    
     def upload_video(self, video_file, title, description="", tags=[], 
                      category_id="22", privacy_status="private"):
         """
@@ -132,18 +95,8 @@ class YouTubeUploader:
         }
         
         try:
-            media = MediaFileUpload(video_file, chunksize=-1, resumable=True)
-            insert_request = self.youtube.videos().insert(
-                part=','.join(body.keys()),
-                body=body,
-                media_body=media
-            )
-            
-            response = None
-            while response is None:
-                status, response = insert_request.next_chunk()
-                if status:
-                    print(f"📊 Progresso: {int(status.progress() * 100)}%")
+            # Upload em chunks; a sessão é salva a cada chunk e retomada após um reinício
+            response = ResumableUploader(self.youtube).upload(video_file, body)
             
             video_id = response['id']
             print(f"✅ Vídeo enviado com sucesso! ID: {video_id}")
@@ -154,18 +107,71 @@ class YouTubeUploader:
             print(f"❌ Erro ao enviar vídeo: {e}")
             return None
     
-    def get_or_create_permanent_stream(self):
+    def upload_while_encoding(self, render, output_path, title, description="", tags=None,
+                              category_id="22", privacy_status="private"):
+        """
+        Gera e envia um VOD longo ao mesmo tempo (ver upload_pipeline.py)
+        
+        O envio divide o limite de banda da fila de uploads (upload_manager).
+        
+        Args:
+            render: Função render(output_path) que gera o vídeo em MP4 fragmentado
+            output_path: Caminho do vídeo gerado
+            title: Título do vídeo
+        
+        Returns:
+            ID do vídeo ou None em caso de erro
+        """
+        if not self.youtube:
+            print("❌ Não autenticado no YouTube")
+            return None
+        
+        manager = get_upload_manager(self.youtube)
+        try:
+            video_id, _ = encode_and_upload(
+                self.youtube, render, output_path, title, description, tags,
+                category_id, privacy_status, throttle=manager.throttle, chunk_limit=manager.chunk_limit
+            )
+            return video_id
+        except (HttpError, EncodeFailed, UploadCancelled) as e:
+            print(f"❌ Erro ao gerar/enviar vídeo: {e}")
+            return None
+    
+    def queue_upload(self, video_file, title, description="", tags=None,
+                     category_id="22", privacy_status="private"):
+        """
+        Enfileira um upload sem bloquear (ver upload_manager.py)
+        
+        Returns:
+            ID do job na fila de uploads ou None em caso de erro
+        """
+        if not self.youtube:
+            print("❌ Não autenticado no YouTube")
+            return None
+        
+        if not os.path.exists(video_file):
+            print(f"❌ Arquivo de vídeo não encontrado: {video_file}")
+            return None
+        
+        return get_upload_manager(self.youtube).submit(
+            video_file, title, description, tags, category_id, privacy_status
+        )
+    
+    def get_or_create_permanent_stream(self, verify=True):
         """
         Obtém ou cria um stream permanente que pode ser reutilizado para todas as lives
-        Usa stream key fixa: 19cr-ehfp-pycp-m8yj-2m85
+        Usa sempre a stream key do destino (self.stream_key, padrão FIXED_STREAM_KEY)
+        
+        Args:
+            verify: Se True, confere na API se o stream salvo ainda existe
+                    (create_live_broadcast passa False e confere junto com o broadcast)
         
         Returns:
             (stream_id, stream_key, rtmp_url) ou (None, None, None) se falhar
         """
-        # STREAM KEY FIXA (sempre a mesma)
-        FIXED_STREAM_KEY = "19cr-ehfp-pycp-m8yj-2m85"
-        FIXED_RTMP_URL = "rtmp://a.rtmp.youtube.com/live2"
-        DEFAULT_STREAM_ID = "0bvegNwA2fGiIN-7wd633g1762446787467917"
+        # STREAM KEY FIXA do destino (sempre a mesma)
+        FIXED_STREAM_KEY = self.stream_key
+        FIXED_RTMP_URL = RTMP_URL
         
         if not self.youtube:
             print("❌ Não autenticado no YouTube")
@@ -173,43 +179,45 @@ class YouTubeUploader:
             print(f"💡 Usando stream key fixa: {FIXED_STREAM_KEY[:10]}...")
             return DEFAULT_STREAM_ID, FIXED_STREAM_KEY, FIXED_RTMP_URL
         
-        # Tenta carregar stream permanente salvo
-        if os.path.exists(self.stream_config_file):
+        # Tenta carregar stream permanente salvo (state_store, chave = stream_config_file)
+        try:
+            config = get_state_store().stream_config(self.stream_config_file)
+        except Exception as e:
+            print(f"⚠️  Erro ao carregar stream permanente: {e}")
+            print(f"💡 Usando stream key fixa: {FIXED_STREAM_KEY}")
+            return DEFAULT_STREAM_ID, FIXED_STREAM_KEY, FIXED_RTMP_URL
+        
+        if config:
+            stream_id = config.get('stream_id', DEFAULT_STREAM_ID)
+            stream_key = config.get('stream_key', FIXED_STREAM_KEY)
+            rtmp_url = config.get('rtmp_url', FIXED_RTMP_URL)
+            
+            # SEMPRE usa a stream key fixa (mesmo se a salva for outra)
+            stream_key = FIXED_STREAM_KEY
+            rtmp_url = FIXED_RTMP_URL
+            
+            print(f"✅ Usando stream permanente salvo: {stream_id}")
+            print(f"🔑 Stream Key: {stream_key} (FIXA - sempre a mesma)")
+            print(f"📍 RTMP URL: {rtmp_url}")
+            print(f"💡 Esta chave é fixa e sempre será a mesma")
+            
+            # Verifica se o stream ainda existe (mas não atualiza a key)
             try:
-                with open(self.stream_config_file, 'r') as f:
-                    config = json.load(f)
-                    stream_id = config.get('stream_id', DEFAULT_STREAM_ID)
-                    stream_key = config.get('stream_key', FIXED_STREAM_KEY)
-                    rtmp_url = config.get('rtmp_url', FIXED_RTMP_URL)
-                    
-                    # SEMPRE usa a stream key fixa (mesmo se o arquivo tiver outra)
-                    stream_key = FIXED_STREAM_KEY
-                    rtmp_url = FIXED_RTMP_URL
-                    
-                    print(f"✅ Usando stream permanente do arquivo: {stream_id}")
-                    print(f"🔑 Stream Key: {stream_key} (FIXA - sempre a mesma)")
-                    print(f"📍 RTMP URL: {rtmp_url}")
-                    print(f"💡 Esta chave é fixa e sempre será a mesma")
-                    
-                    # Verifica se o stream ainda existe (mas não atualiza a key)
-                    try:
-                        stream_info = self.youtube.liveStreams().list(
-                            part='cdn,status,snippet',
-                            id=stream_id
-                        ).execute()
-                        
-                        if not stream_info.get('items'):
-                            print(f"⚠️  Stream {stream_id} não encontrado na API, mas usando chave fixa mesmo assim")
-                    except Exception as e:
-                        print(f"⚠️  Erro ao verificar stream na API: {e}")
-                        print(f"💡 Continuando com chave fixa mesmo assim")
-                    
-                    # SEMPRE retorna a chave fixa
+                if not verify:
                     return stream_id, stream_key, rtmp_url
+                stream_info = self.youtube.liveStreams().list(
+                    part='cdn,status,snippet',
+                    id=stream_id
+                ).execute()
+            
+                if not stream_info.get('items'):
+                    print(f"⚠️  Stream {stream_id} não encontrado na API, mas usando chave fixa mesmo assim")
             except Exception as e:
-                print(f"⚠️  Erro ao carregar stream permanente: {e}")
-                print(f"💡 Usando stream key fixa: {FIXED_STREAM_KEY}")
-                return DEFAULT_STREAM_ID, FIXED_STREAM_KEY, FIXED_RTMP_URL
+                print(f"⚠️  Erro ao verificar stream na API: {e}")
+                print(f"💡 Continuando com chave fixa mesmo assim")
+            
+            # SEMPRE retorna a chave fixa
+            return stream_id, stream_key, rtmp_url
         
         # Cria um novo stream permanente
         print("🆕 Criando novo stream permanente (será reutilizado para todas as lives)...")
@@ -244,6 +252,10 @@ class YouTubeUploader:
             print(f"🔍 Aguardando stream_key ficar disponível (pode levar até {max_retries * retry_delay / 60:.1f} minutos)...")
             
             for attempt in range(1, max_retries + 1):
+                if not self.quota_ledger.polling_allowed():
+                    print(f"⚠️  Quota da API quase esgotada ({self.quota_ledger.summary()}), parando consulta")
+                    break
+                delay = retry_delay * self.quota_ledger.delay_factor()
                 try:
                     stream_info = self.youtube.liveStreams().list(
                         part='cdn,status,snippet',
@@ -262,17 +274,14 @@ class YouTubeUploader:
                             break
                         else:
                             if attempt < max_retries:
-                                print(f"⏳ Tentativa {attempt}/{max_retries}: Stream Key ainda não disponível, aguardando {retry_delay}s...")
-                                time.sleep(retry_delay)
+                                print(f"⏳ Tentativa {attempt}/{max_retries}: Stream Key ainda não disponível, aguardando {delay:.0f}s...")
+                                time.sleep(delay)
                 except Exception as e:
                     if attempt < max_retries:
                         print(f"⚠️  Erro na tentativa {attempt}/{max_retries}: {e}")
-                        time.sleep(retry_delay)
+                        time.sleep(delay)
             
             # SEMPRE usa a stream key fixa (mesmo se a API retornar outra)
-            FIXED_STREAM_KEY = "19cr-ehfp-pycp-m8yj-2m85"
-            FIXED_RTMP_URL = "rtmp://a.rtmp.youtube.com/live2"
-            
             # Usa stream_key da API se disponível, senão usa a fixa
             final_stream_key = stream_key if stream_key else FIXED_STREAM_KEY
             final_rtmp_url = rtmp_url if rtmp_url else FIXED_RTMP_URL
@@ -286,11 +295,9 @@ class YouTubeUploader:
                 'is_fixed_key': True
             }
             
-            os.makedirs(os.path.dirname(self.stream_config_file), exist_ok=True)
-            with open(self.stream_config_file, 'w') as f:
-                json.dump(config, f, indent=2)
+            get_state_store().save_stream_config(self.stream_config_file, config)
             
-            print(f"💾 Stream permanente salvo em: {self.stream_config_file}")
+            print(f"💾 Stream permanente salvo ({self.stream_config_file})")
             print(f"🔑 Stream Key: {FIXED_STREAM_KEY} (FIXA - sempre a mesma)")
             print(f"📍 RTMP URL: {FIXED_RTMP_URL}")
             return stream_id, FIXED_STREAM_KEY, FIXED_RTMP_URL
@@ -299,9 +306,6 @@ class YouTubeUploader:
             print(f"⚠️  Erro ao criar stream permanente via API: {e}")
             print(f"💡 Usando stream key fixa como fallback")
             # Retorna stream key fixa mesmo se falhar
-            FIXED_STREAM_KEY = "19cr-ehfp-pycp-m8yj-2m85"
-            FIXED_RTMP_URL = "rtmp://a.rtmp.youtube.com/live2"
-            DEFAULT_STREAM_ID = "0bvegNwA2fGiIN-7wd633g1762446787467917"
             return DEFAULT_STREAM_ID, FIXED_STREAM_KEY, FIXED_RTMP_URL
     
     def create_live_broadcast(self, title, scheduled_start_time=None, 
@@ -375,7 +379,7 @@ class YouTubeUploader:
             
             # Usa stream permanente se solicitado, senão cria um novo
             if use_permanent_stream:
-                stream_id, stream_key, rtmp_url = self.get_or_create_permanent_stream()
+                stream_id, stream_key, rtmp_url = self.get_or_create_permanent_stream(verify=False)
                 
                 if not stream_id:
                     print("❌ Falha ao obter/criar stream permanente")
@@ -384,8 +388,8 @@ class YouTubeUploader:
                 print(f"♻️  Usando stream permanente: {stream_id}")
                 
                 # SEMPRE usa a stream key fixa (não tenta obter da API)
-                FIXED_STREAM_KEY = "19cr-ehfp-pycp-m8yj-2m85"
-                FIXED_RTMP_URL = "rtmp://a.rtmp.youtube.com/live2"
+                FIXED_STREAM_KEY = self.stream_key
+                FIXED_RTMP_URL = RTMP_URL
                 
                 if not stream_key or not rtmp_url:
                     print("💡 Usando stream key fixa (sempre a mesma)")
@@ -427,6 +431,10 @@ class YouTubeUploader:
                 print(f"🔍 Buscando Stream Key (pode levar alguns segundos)...")
                 
                 for attempt in range(1, max_retries + 1):
+                    if not self.quota_ledger.polling_allowed():
+                        print(f"⚠️  Quota da API quase esgotada ({self.quota_ledger.summary()}), parando consulta")
+                        break
+                    delay = retry_delay * self.quota_ledger.delay_factor()
                     try:
                         stream_info = self.youtube.liveStreams().list(
                             part='cdn,status,snippet',
@@ -445,14 +453,14 @@ class YouTubeUploader:
                                 break
                             else:
                                 if attempt < max_retries:
-                                    print(f"⏳ Tentativa {attempt}/{max_retries}: Stream Key ainda não disponível, aguardando {retry_delay}s...")
-                                    time.sleep(retry_delay)
+                                    print(f"⏳ Tentativa {attempt}/{max_retries}: Stream Key ainda não disponível, aguardando {delay:.0f}s...")
+                                    time.sleep(delay)
                                 else:
                                     print(f"⚠️  Tentativa {attempt}/{max_retries}: Stream Key ainda não disponível após {max_retries} tentativas")
                     except Exception as e:
                         if attempt < max_retries:
                             print(f"⚠️  Erro na tentativa {attempt}/{max_retries}: {e}")
-                            time.sleep(retry_delay)
+                            time.sleep(delay)
             
             # Vincula broadcast e stream
             bind_response = self.youtube.liveBroadcasts().bind(
@@ -463,9 +471,23 @@ class YouTubeUploader:
             
             print(f"✅ Broadcast vinculado ao stream!")
             
+            # Confere broadcast e stream juntos (um único round trip) e deixa
+            # o snapshot no cache do poller de status
+            try:
+                resources = self.get_live_resources([broadcast_id], [stream_id])
+                broadcast = resources['broadcasts'].get(broadcast_id)
+                stream = resources['streams'].get(stream_id)
+                if not stream:
+                    print(f"⚠️  Stream {stream_id} não encontrado na API, mas usando chave fixa mesmo assim")
+                if broadcast:
+                    snapshot = self.status_poller.prime(broadcast, stream)
+                    print(f"📊 Status inicial: {snapshot.describe()}")
+            except Exception as e:
+                print(f"⚠️  Erro ao verificar broadcast/stream na API: {e}")
+            
             # SEMPRE usa a stream key fixa (não precisa aguardar da API)
-            FIXED_STREAM_KEY = "19cr-ehfp-pycp-m8yj-2m85"
-            FIXED_RTMP_URL = "rtmp://a.rtmp.youtube.com/live2"
+            FIXED_STREAM_KEY = self.stream_key
+            FIXED_RTMP_URL = RTMP_URL
             
             if not stream_key or not rtmp_url:
                 print("💡 Usando stream key fixa (sempre a mesma)")
@@ -488,8 +510,8 @@ class YouTubeUploader:
             
             # SEMPRE garante que tem stream key fixa
             if not stream_key or not rtmp_url:
-                FIXED_STREAM_KEY = "19cr-ehfp-pycp-m8yj-2m85"
-                FIXED_RTMP_URL = "rtmp://a.rtmp.youtube.com/live2"
+                FIXED_STREAM_KEY = self.stream_key
+                FIXED_RTMP_URL = RTMP_URL
                 print("💡 Usando stream key fixa (sempre a mesma)")
                 stream_key = FIXED_STREAM_KEY
                 rtmp_url = FIXED_RTMP_URL
@@ -540,15 +562,73 @@ class YouTubeUploader:
             
             return None, None, None, None
     
+    def get_live_resources(self, broadcast_ids=(), stream_ids=()):
+        """
+        Lê vários broadcasts e streams em um único round trip (batch HTTP)
+        
+        Args:
+            broadcast_ids: IDs de broadcasts
+            stream_ids: IDs de streams
+        
+        Returns:
+            {'broadcasts': {id: recurso}, 'streams': {id: recurso}}
+        """
+        broadcast_ids = [b for b in broadcast_ids if b]
+        stream_ids = [s for s in stream_ids if s]
+        
+        batch = BatchReader(self.youtube, ledger=self.quota_ledger, label='live_resources')
+        if broadcast_ids:
+            batch.add('broadcasts', self.youtube.liveBroadcasts().list(
+                part='snippet,status,contentDetails',
+                id=','.join(broadcast_ids),
+                maxResults=50
+            ))
+        if stream_ids:
+            batch.add('streams', self.youtube.liveStreams().list(
+                part='cdn,status,snippet',
+                id=','.join(stream_ids),
+                maxResults=50
+            ))
+        batch.execute()
+        
+        resources = {'broadcasts': {}, 'streams': {}}
+        for key in ('broadcasts', 'streams'):
+            if key in batch.results or key in batch.errors:
+                for item in batch.result(key).get('items', []):
+                    resources[key][item['id']] = item
+        return resources
+    
+    def _http_error_reason(self, error):
+        """Extrai o 'reason' de um HttpError da API"""
+        error_details = error.error_details if hasattr(error, 'error_details') else []
+        for detail in error_details or []:
+            if isinstance(detail, dict) and 'reason' in detail:
+                return detail['reason']
+        return None
+    
+    def _transition_broadcast(self, broadcast_id, broadcast_status):
+        """Envia o comando de transição e descarta o snapshot em cache"""
+        try:
+            self.youtube.liveBroadcasts().transition(
+                broadcastStatus=broadcast_status,
+                id=broadcast_id,
+                part='id,status'
+            ).execute()
+        finally:
+            self.status_poller.count_call('liveBroadcasts.transition')
+            self.status_poller.invalidate(broadcast_id)
+    
     def transition_broadcast_to_live(self, broadcast_id, max_retries=10, retry_delay=30):
         """
         Transiciona o broadcast de 'ready' para 'live' (publica a live)
-        Tenta múltiplas vezes até o stream estar ativo
+        Consulta o status com intervalo adaptativo até o stream estar ativo
+        
+        O horário agendado (scheduledStartTime) já é aguardado por LiveManager.publish_live
         
         Args:
             broadcast_id: ID do broadcast
-            max_retries: Número máximo de tentativas
-            retry_delay: Segundos entre tentativas
+            max_retries: Número máximo de comandos de transição
+            retry_delay: Segundos por tentativa (tempo total = max_retries * retry_delay)
         
         Returns:
             True se sucesso, False caso contrário
@@ -557,501 +637,86 @@ class YouTubeUploader:
             print("❌ Não autenticado no YouTube")
             return False
         
-        import time
-        from datetime import datetime, timezone
+        poller = self.status_poller
+        calls_before = poller.total_api_calls()
+        deadline = time.monotonic() + max_retries * retry_delay
+        attempts = 0
+        snapshot = None
         
-        # Verifica se precisa aguardar o scheduledStartTime
-        try:
-            broadcast_info = self.youtube.liveBroadcasts().list(
-                part='snippet,status',
-                id=broadcast_id
-            ).execute()
+        while True:
+            if not self.quota_ledger.polling_allowed():
+                print(f"⚠️  Quota da API quase esgotada ({self.quota_ledger.summary()})")
+                print("💡 Parando consultas para preservar a reserva da próxima live")
+                break
             
-            if broadcast_info.get('items'):
-                snippet = broadcast_info['items'][0].get('snippet', {})
-                scheduled_start_time_str = snippet.get('scheduledStartTime', '')
-                
-                if scheduled_start_time_str:
-                    # Converte para datetime
-                    scheduled_start_time = datetime.fromisoformat(scheduled_start_time_str.replace('Z', '+00:00'))
-                    now_utc = datetime.now(timezone.utc)
-                    
-                    if scheduled_start_time > now_utc:
-                        wait_seconds = (scheduled_start_time - now_utc).total_seconds()
-                        if wait_seconds > 0:
-                            print(f"⏰ Broadcast agendado para: {scheduled_start_time_str}")
-                            print(f"⏰ Horário atual: {now_utc.isoformat()}")
-                            print(f"⏳ Aguardando {wait_seconds:.0f} segundos até o horário agendado...")
-                            time.sleep(min(wait_seconds, 600))  # Aguarda no máximo 10 minutos
-                            print(f"✅ Horário agendado chegou! Tentando transicionar...")
-        except Exception as e:
-            print(f"⚠️  Erro ao verificar scheduledStartTime: {e}")
-            # Continua mesmo se não conseguir verificar
-        
-        for attempt in range(1, max_retries + 1):
             try:
-                # Verifica status do broadcast ANTES de tentar transição
-                broadcast_status = None
-                stream_status = None
-                try:
-                    broadcast_info = self.youtube.liveBroadcasts().list(
-                        part='status,contentDetails,snippet',
-                        id=broadcast_id
-                    ).execute()
-                    
-                    if broadcast_info.get('items'):
-                        status = broadcast_info['items'][0].get('status', {})
-                        content_details = broadcast_info['items'][0].get('contentDetails', {})
-                        snippet = broadcast_info['items'][0].get('snippet', {})
-                        
-                        broadcast_status = status.get('lifeCycleStatus', '')
-                        recording_status = status.get('recordingStatus', '')
-                        made_for_kids = snippet.get('selfDeclaredMadeForKids', False)
-                        stream_id = content_details.get('boundStreamId', '')
-                        
-                        # Verifica se ainda precisa aguardar o scheduledStartTime
-                        scheduled_start_time_str = snippet.get('scheduledStartTime', '')
-                        if scheduled_start_time_str:
-                            scheduled_start_time = datetime.fromisoformat(scheduled_start_time_str.replace('Z', '+00:00'))
-                            now_utc = datetime.now(timezone.utc)
-                            if scheduled_start_time > now_utc:
-                                wait_seconds = (scheduled_start_time - now_utc).total_seconds()
-                                if wait_seconds > 0 and wait_seconds < 60:  # Se falta menos de 1 minuto, aguarda
-                                    print(f"⏳ Aguardando {wait_seconds:.0f} segundos até o horário agendado...")
-                                    time.sleep(wait_seconds)
-                        
-                        # Log detalhado do status
-                        print(f"   📋 Detalhes do broadcast:")
-                        print(f"      - lifeCycleStatus: {broadcast_status}")
-                        print(f"      - recordingStatus: {recording_status}")
-                        print(f"      - madeForKids: {made_for_kids}")
-                        print(f"      - boundStreamId: {stream_id}")
-                        
-                        # Verifica status do stream
-                        if stream_id:
-                            try:
-                                stream_info = self.youtube.liveStreams().list(
-                                    part='status,snippet',
-                                    id=stream_id
-                                ).execute()
-                                
-                                if stream_info.get('items'):
-                                    stream_status_obj = stream_info['items'][0].get('status', {})
-                                    stream_status = stream_status_obj.get('streamStatus', '')
-                                    health_status = stream_status_obj.get('healthStatus', {})
-                                    
-                                    print(f"   📋 Detalhes do stream:")
-                                    print(f"      - streamStatus: {stream_status}")
-                                    print(f"      - healthStatus: {health_status}")
-                            except Exception as e:
-                                print(f"   ⚠️  Erro ao obter detalhes do stream: {e}")
-                                pass
-                        
-                        # Se já está 'live', retorna sucesso
-                        if broadcast_status == 'live':
-                            print(f"✅ Live já está publicada!")
-                            return True
-                        # Se já está 'complete', não pode mais transicionar
-                        elif broadcast_status == 'complete':
-                            print(f"⚠️  Live já foi encerrada")
-                            return False
-                        # Se está 'testing', precisa ir para 'ready' primeiro
-                        elif broadcast_status == 'testing':
-                            print(f"⚠️  Broadcast está em 'testing'. Transicionando para 'ready' primeiro...")
-                            try:
-                                transition_response = self.youtube.liveBroadcasts().transition(
-                                    broadcastStatus='ready',
-                                    id=broadcast_id,
-                                    part='id,snippet,contentDetails,status'
-                                ).execute()
-                                print(f"✅ Comando de transição para 'ready' enviado. Aguardando {retry_delay}s...")
-                                time.sleep(retry_delay)
-                                
-                                # Verifica novamente o status após a transição
-                                check_response = self.youtube.liveBroadcasts().list(
-                                    part='status',
-                                    id=broadcast_id
-                                ).execute()
-                                if check_response.get('items'):
-                                    new_status = check_response['items'][0].get('status', {}).get('lifeCycleStatus', '')
-                                    broadcast_status = new_status
-                                    print(f"📊 Novo status após transição: {broadcast_status}")
-                            except Exception as e:
-                                print(f"⚠️  Erro ao transicionar de 'testing' para 'ready': {e}")
-                                # Continua para tentar novamente na próxima iteração
-                except Exception as e:
-                    print(f"⚠️  Erro ao verificar status: {e}")
-                    pass  # Continua mesmo se não conseguir verificar
-                
-                # Log do status atual
-                if broadcast_status:
-                    print(f"📊 Status atual do broadcast: {broadcast_status}")
-                if stream_status:
-                    print(f"📊 Status do stream: {stream_status}")
-                
-                # Se ainda está em 'testing', aguarda mais e tenta novamente
-                if broadcast_status == 'testing':
-                    if attempt < max_retries:
-                        print(f"⏳ Broadcast ainda está em 'testing'. Aguardando {retry_delay}s antes de tentar novamente...")
-                        time.sleep(retry_delay)
-                        continue
-                    else:
-                        print(f"⚠️  Broadcast não saiu de 'testing' após {max_retries} tentativas")
-                        return False
-                
-                # Verifica se o stream está realmente ativo antes de tentar transicionar
-                if stream_status and stream_status != 'active':
-                    if attempt < max_retries:
-                        print(f"⏳ Stream ainda não está ativo (status: {stream_status}). Aguardando {retry_delay}s...")
-                        time.sleep(retry_delay)
-                        continue
-                    else:
-                        print(f"⚠️  Stream não está ativo após {max_retries} tentativas (status: {stream_status})")
-                        return False
-                
-                # Só tenta transicionar se estiver em 'ready' e stream estiver 'active'
-                if broadcast_status and broadcast_status not in ['ready', 'live']:
-                    if attempt < max_retries:
-                        print(f"⏳ Broadcast está em '{broadcast_status}'. Aguardando {retry_delay}s...")
-                        time.sleep(retry_delay)
-                        continue
-                    else:
-                        print(f"⚠️  Broadcast não está em estado 'ready' (está em '{broadcast_status}')")
-                        return False
+                snapshot = poller.snapshot(broadcast_id, max_age=poller.max_age_after(snapshot))
+            except Exception as e:
+                print(f"⚠️  Erro ao verificar status: {e}")
+                snapshot = None
+            
+            if snapshot is not None:
+                if not snapshot.exists:
+                    print(f"❌ Broadcast {broadcast_id} não encontrado")
+                    return False
                 
-                # Se stream está ativo mas broadcast não está em 'ready', aguarda mais
-                if stream_status == 'active' and broadcast_status != 'ready' and broadcast_status != 'live':
-                    if attempt < max_retries:
-                        print(f"⏳ Stream ativo mas broadcast em '{broadcast_status}'. Aguardando {retry_delay}s...")
-                        time.sleep(retry_delay)
-                        continue
+                if poller.observe(snapshot):
+                    print(f"📊 Status: {snapshot.describe()}")
                 
-                print(f"🔄 Tentativa {attempt}/{max_retries}: Transicionando broadcast para 'live'...")
-                print(f"   📊 Broadcast: {broadcast_status}, Stream: {stream_status}")
+                status = snapshot.lifecycle_status
+                if status == 'live':
+                    print(f"✅ Live publicada com sucesso!")
+                    print(f"🔗 Link: https://www.youtube.com/watch?v={broadcast_id}")
+                    print(f"📈 Chamadas à API nesta publicação: {poller.total_api_calls() - calls_before}")
+                    return True
+                if status in ('complete', 'revoked'):
+                    print(f"⚠️  Live já foi encerrada (status: {status})")
+                    return False
                 
-                # Verifica se o stream está ativo há tempo suficiente
-                # O YouTube pode precisar de pelo menos 5-6 minutos de stream ativo antes de permitir transição
-                # Aumentado para dar mais tempo ao YouTube processar
-                if attempt < 6 and stream_status == 'active':
-                    print(f"💡 Stream está ativo mas pode precisar de mais tempo (tentativa {attempt}). Aguardando {retry_delay}s...")
-                    time.sleep(retry_delay)
-                    # Verifica se já foi publicado automaticamente enquanto aguarda
+                # Só transiciona com o stream ativo; nos demais casos apenas consulta
+                if snapshot.stream_status == 'active' and status in ('ready', 'testing'):
+                    if attempts >= max_retries:
+                        print(f"⚠️  Limite de {max_retries} tentativas de transição atingido")
+                        break
+                    attempts += 1
+                    print(f"🔄 Tentativa {attempts}/{max_retries}: Transicionando de '{status}' para 'live'...")
                     try:
-                        check_response = self.youtube.liveBroadcasts().list(
-                            part='status',
-                            id=broadcast_id
-                        ).execute()
-                        if check_response.get('items'):
-                            current_status = check_response['items'][0].get('status', {}).get('lifeCycleStatus', '')
-                            if current_status == 'live':
-                                print(f"✅ Live foi publicada automaticamente pelo YouTube!")
-                                print(f"🔗 Link: https://www.youtube.com/watch?v={broadcast_id}")
-                                return True
-                    except:
-                        pass
-                    continue
-                
-                # Transição: 'testing' -> 'ready' -> 'live' -> 'complete'
-                # Se monitor stream estiver desabilitado, pode ir direto de 'ready' para 'live'
-                # Caso contrário, precisa ir primeiro para 'testing'
-                try:
-                    # Tenta transicionar diretamente para 'live' primeiro
-                    transition_response = self.youtube.liveBroadcasts().transition(
-                        broadcastStatus='live',
-                        id=broadcast_id,
-                        part='id,snippet,contentDetails,status'
-                    ).execute()
-                    
-                    # Verifica imediatamente após a transição se funcionou
-                    time.sleep(2)  # Pequeno delay para o YouTube processar
-                    check_response = self.youtube.liveBroadcasts().list(
-                        part='status',
-                        id=broadcast_id
-                    ).execute()
-                    if check_response.get('items'):
-                        current_status = check_response['items'][0].get('status', {}).get('lifeCycleStatus', '')
-                        if current_status == 'live':
-                            print(f"✅ Live publicada com sucesso!")
-                            print(f"🔗 Link: https://www.youtube.com/watch?v={broadcast_id}")
-                            return True
+                        self._transition_broadcast(broadcast_id, 'live')
+                    except HttpError as e:
+                        reason = self._http_error_reason(e)
+                        if reason == 'invalidTransition' and status == 'ready':
+                            # Com monitor stream habilitado é preciso passar por 'testing'
+                            print("⚠️  Transição direta falhou. Transicionando para 'testing' primeiro...")
+                            try:
+                                self._transition_broadcast(broadcast_id, 'testing')
+                            except HttpError as e2:
+                                print(f"⚠️  Erro ao transicionar para 'testing': {self._http_error_reason(e2) or e2}")
+                        elif reason in ('streamNotActive', 'broadcastNotReady',
+                                        'invalidTransition', 'redundantTransition'):
+                            print(f"⏳ YouTube ainda processando o stream ({reason})")
                         else:
-                            print(f"⚠️  Transição enviada mas status ainda é '{current_status}'. Aguardando processamento...")
-                            time.sleep(10)  # Aguarda mais um pouco
-                            # Verifica novamente
-                            check_response = self.youtube.liveBroadcasts().list(
-                                part='status',
-                                id=broadcast_id
-                            ).execute()
-                            if check_response.get('items'):
-                                current_status = check_response['items'][0].get('status', {}).get('lifeCycleStatus', '')
-                                if current_status == 'live':
-                                    print(f"✅ Live publicada com sucesso!")
-                                    print(f"🔗 Link: https://www.youtube.com/watch?v={broadcast_id}")
-                                    return True
-                except HttpError as e:
-                    error_details = e.error_details if hasattr(e, 'error_details') else []
-                    error_reason = None
-                    for detail in error_details:
-                        if isinstance(detail, dict) and 'reason' in detail:
-                            error_reason = detail['reason']
-                            break
-                    
-                    # Se falhou com 'invalidTransition', pode ser que precise transicionar para 'testing' primeiro
-                    if error_reason == 'invalidTransition' and broadcast_status == 'ready':
-                        print(f"⚠️  Transição direta falhou. Tentando transicionar para 'testing' primeiro...")
-                        try:
-                            # Transiciona para 'testing' primeiro
-                            transition_response = self.youtube.liveBroadcasts().transition(
-                                broadcastStatus='testing',
-                                id=broadcast_id,
-                                part='id,snippet,contentDetails,status'
-                            ).execute()
-                            print(f"✅ Transicionado para 'testing'. Aguardando {retry_delay}s...")
-                            time.sleep(retry_delay)
-                            
-                            # Verifica se está em 'testing' agora
-                            check_response = self.youtube.liveBroadcasts().list(
-                                part='status',
-                                id=broadcast_id
-                            ).execute()
-                            if check_response.get('items'):
-                                new_status = check_response['items'][0].get('status', {}).get('lifeCycleStatus', '')
-                                print(f"📊 Novo status após transição para 'testing': {new_status}")
-                                
-                                # Se está em 'testing' ou 'liveStarting', aguarda um pouco mais
-                                if new_status in ['testing', 'liveStarting']:
-                                    print(f"⏳ Aguardando status estabilizar...")
-                                    time.sleep(10)
-                                    
-                                    # Verifica novamente
-                                    check_response = self.youtube.liveBroadcasts().list(
-                                        part='status',
-                                        id=broadcast_id
-                                    ).execute()
-                                    if check_response.get('items'):
-                                        new_status = check_response['items'][0].get('status', {}).get('lifeCycleStatus', '')
-                                
-                                # Se ainda está em 'testing', tenta transicionar para 'live'
-                                if new_status == 'testing':
-                                    print(f"🔄 Transicionando de 'testing' para 'live'...")
-                                    transition_response = self.youtube.liveBroadcasts().transition(
-                                        broadcastStatus='live',
-                                        id=broadcast_id,
-                                        part='id,snippet,contentDetails,status'
-                                    ).execute()
-                                    print(f"✅ Comando de transição para 'live' enviado!")
-                                    time.sleep(5)
-                                    
-                                    # Verifica se está 'live' agora
-                                    check_response = self.youtube.liveBroadcasts().list(
-                                        part='status',
-                                        id=broadcast_id
-                                    ).execute()
-                                    if check_response.get('items'):
-                                        final_status = check_response['items'][0].get('status', {}).get('lifeCycleStatus', '')
-                                        if final_status == 'live':
-                                            print(f"✅ Live publicada com sucesso!")
-                                            print(f"🔗 Link: https://www.youtube.com/watch?v={broadcast_id}")
-                                            return True
-                                elif new_status == 'live':
-                                    print(f"✅ Live foi publicada automaticamente!")
-                                    print(f"🔗 Link: https://www.youtube.com/watch?v={broadcast_id}")
-                                    return True
-                        except Exception as e2:
-                            print(f"⚠️  Erro ao transicionar para 'testing': {e2}")
-                    
-                    # Se falhar, tenta verificar se já está live (pode ter sido publicado automaticamente)
-                    try:
-                        check_response = self.youtube.liveBroadcasts().list(
-                            part='status',
-                            id=broadcast_id
-                        ).execute()
-                        if check_response.get('items'):
-                            current_status = check_response['items'][0].get('status', {}).get('lifeCycleStatus', '')
-                            if current_status == 'live':
-                                print(f"✅ Live foi publicada automaticamente pelo YouTube!")
-                                print(f"🔗 Link: https://www.youtube.com/watch?v={broadcast_id}")
-                                return True
-                    except:
-                        pass
-                    raise  # Re-lança o erro original
-                except Exception as e:
-                    # Se falhar, tenta verificar se já está live (pode ter sido publicado automaticamente)
-                    try:
-                        check_response = self.youtube.liveBroadcasts().list(
-                            part='status',
-                            id=broadcast_id
-                        ).execute()
-                        if check_response.get('items'):
-                            current_status = check_response['items'][0].get('status', {}).get('lifeCycleStatus', '')
-                            if current_status == 'live':
-                                print(f"✅ Live foi publicada automaticamente pelo YouTube!")
-                                print(f"🔗 Link: https://www.youtube.com/watch?v={broadcast_id}")
-                                return True
-                    except:
-                        pass
-                    raise  # Re-lança o erro original
-                
-                print(f"✅ Live publicada com sucesso!")
+                            print(f"⚠️  Erro ao transicionar para 'live': {reason or e}")
+            
+            if time.monotonic() >= deadline:
+                break
+            poller.wait(snapshot, deadline)
+        
+        # Verificação final: o YouTube pode ter publicado automaticamente
+        try:
+            snapshot = poller.snapshot(broadcast_id, max_age=0)
+            if snapshot.lifecycle_status == 'live':
+                print(f"✅ Live foi publicada automaticamente pelo YouTube!")
                 print(f"🔗 Link: https://www.youtube.com/watch?v={broadcast_id}")
                 return True
-                
-            except HttpError as e:
-                error_details = e.error_details if hasattr(e, 'error_details') else []
-                error_reason = None
-                for detail in error_details:
-                    if isinstance(detail, dict) and 'reason' in detail:
-                        error_reason = detail['reason']
-                        break
-                
-                if error_reason == 'streamNotActive':
-                    if attempt < max_retries:
-                        print(f"⏳ Stream ainda não está ativo. Aguardando {retry_delay}s antes de tentar novamente...")
-                        time.sleep(retry_delay)
-                        continue
-                    else:
-                        print("⚠️  Stream ainda não está ativo após múltiplas tentativas")
-                        print("💡 A live será publicada automaticamente quando o YouTube detectar o stream")
-                        return False
-                elif error_reason == 'broadcastNotReady':
-                    if attempt < max_retries:
-                        print(f"⏳ Broadcast ainda não está pronto. Aguardando {retry_delay}s...")
-                        time.sleep(retry_delay)
-                        continue
-                    else:
-                        print("⚠️  Broadcast ainda não está pronto para transição")
-                        return False
-                elif error_reason == 'invalidTransition':
-                    # Tenta transicionar para 'testing' primeiro se ainda não tentou
-                    if broadcast_status == 'ready' and attempt <= 3:  # Tenta nas primeiras 3 tentativas
-                        print(f"⚠️  Transição direta falhou. Tentando transicionar para 'testing' primeiro...")
-                        try:
-                            # Transiciona para 'testing' primeiro
-                            transition_response = self.youtube.liveBroadcasts().transition(
-                                broadcastStatus='testing',
-                                id=broadcast_id,
-                                part='id,snippet,contentDetails,status'
-                            ).execute()
-                            print(f"✅ Transicionado para 'testing'. Aguardando {retry_delay}s...")
-                            time.sleep(retry_delay)
-                            
-                            # Verifica se está em 'testing' agora
-                            check_response = self.youtube.liveBroadcasts().list(
-                                part='status',
-                                id=broadcast_id
-                            ).execute()
-                            if check_response.get('items'):
-                                new_status = check_response['items'][0].get('status', {}).get('lifeCycleStatus', '')
-                                print(f"📊 Novo status após transição para 'testing': {new_status}")
-                                
-                                # Se está em 'testing' ou 'liveStarting', aguarda um pouco mais
-                                if new_status in ['testing', 'liveStarting']:
-                                    print(f"⏳ Aguardando status estabilizar...")
-                                    time.sleep(15)
-                                    
-                                    # Verifica novamente
-                                    check_response = self.youtube.liveBroadcasts().list(
-                                        part='status',
-                                        id=broadcast_id
-                                    ).execute()
-                                    if check_response.get('items'):
-                                        new_status = check_response['items'][0].get('status', {}).get('lifeCycleStatus', '')
-                                
-                                # Se está em 'testing', tenta transicionar para 'live'
-                                if new_status == 'testing':
-                                    print(f"🔄 Transicionando de 'testing' para 'live'...")
-                                    transition_response = self.youtube.liveBroadcasts().transition(
-                                        broadcastStatus='live',
-                                        id=broadcast_id,
-                                        part='id,snippet,contentDetails,status'
-                                    ).execute()
-                                    print(f"✅ Comando de transição para 'live' enviado!")
-                                    time.sleep(10)
-                                    
-                                    # Verifica se está 'live' agora
-                                    check_response = self.youtube.liveBroadcasts().list(
-                                        part='status',
-                                        id=broadcast_id
-                                    ).execute()
-                                    if check_response.get('items'):
-                                        final_status = check_response['items'][0].get('status', {}).get('lifeCycleStatus', '')
-                                        if final_status == 'live':
-                                            print(f"✅ Live publicada com sucesso!")
-                                            print(f"🔗 Link: https://www.youtube.com/watch?v={broadcast_id}")
-                                            return True
-                                        else:
-                                            print(f"📊 Status após transição: {final_status}")
-                                elif new_status == 'live':
-                                    print(f"✅ Live foi publicada automaticamente!")
-                                    print(f"🔗 Link: https://www.youtube.com/watch?v={broadcast_id}")
-                                    return True
-                        except Exception as e2:
-                            print(f"⚠️  Erro ao transicionar para 'testing': {e2}")
-                            import traceback
-                            traceback.print_exc()
-                    
-                    if attempt < max_retries:
-                        print(f"⏳ Transição inválida - broadcast pode não estar no estado correto")
-                        print(f"💡 Aguardando {retry_delay}s para o YouTube processar o stream...")
-                        time.sleep(retry_delay)
-                        # Verifica se foi publicado automaticamente enquanto aguarda
-                        try:
-                            check_response = self.youtube.liveBroadcasts().list(
-                                part='status',
-                                id=broadcast_id
-                            ).execute()
-                            if check_response.get('items'):
-                                current_status = check_response['items'][0].get('status', {}).get('lifeCycleStatus', '')
-                                if current_status == 'live':
-                                    print(f"✅ Live foi publicada automaticamente pelo YouTube!")
-                                    print(f"🔗 Link: https://www.youtube.com/watch?v={broadcast_id}")
-                                    return True
-                        except:
-                            pass
-                        continue
-                    else:
-                        print("⚠️  Não foi possível transicionar para 'live' após todas as tentativas")
-                        # Verificação final: aguarda mais um pouco e verifica se foi publicado automaticamente
-                        print("💡 Aguardando mais 60 segundos para verificar se YouTube publicou automaticamente...")
-                        time.sleep(60)
-                        try:
-                            check_response = self.youtube.liveBroadcasts().list(
-                                part='status',
-                                id=broadcast_id
-                            ).execute()
-                            if check_response.get('items'):
-                                current_status = check_response['items'][0].get('status', {}).get('lifeCycleStatus', '')
-                                if current_status == 'live':
-                                    print(f"✅ Live foi publicada automaticamente pelo YouTube!")
-                                    print(f"🔗 Link: https://www.youtube.com/watch?v={broadcast_id}")
-                                    return True
-                                else:
-                                    print(f"⚠️  Status ainda é '{current_status}' após aguardar")
-                        except Exception as e:
-                            print(f"⚠️  Erro ao verificar status final: {e}")
-                        print("💡 O YouTube pode publicar automaticamente quando detectar o stream ativo")
-                        print(f"💡 Verifique manualmente: https://www.youtube.com/watch?v={broadcast_id}")
-                        return False
-                else:
-                    if attempt < max_retries:
-                        print(f"⚠️  Erro na tentativa {attempt}: {e}")
-                        print(f"⏳ Aguardando {retry_delay}s antes de tentar novamente...")
-                        time.sleep(retry_delay)
-                        continue
-                    else:
-                        print(f"⚠️  Erro ao transicionar para 'live' após {max_retries} tentativas: {e}")
-                        print(f"💡 A live pode ser publicada manualmente no YouTube Studio")
-                        return False
-            except Exception as e:
-                if attempt < max_retries:
-                    print(f"⚠️  Erro na tentativa {attempt}: {e}")
-                    print(f"⏳ Aguardando {retry_delay}s antes de tentar novamente...")
-                    time.sleep(retry_delay)
-                    continue
-                else:
-                    print(f"⚠️  Erro ao transicionar broadcast após {max_retries} tentativas: {e}")
-                    return False
+            if snapshot.exists:
+                print(f"⚠️  Status final: {snapshot.describe()}")
+        except Exception as e:
+            print(f"⚠️  Erro ao verificar status final: {e}")
         
+        print(f"📈 Chamadas à API nesta publicação: {poller.total_api_calls() - calls_before}")
+        print(f"📈 Quota da API hoje: {self.quota_ledger.summary()}")
+        print("💡 O YouTube pode publicar automaticamente quando detectar o stream ativo")
+        print(f"💡 Verifique manualmente: https://www.youtube.com/watch?v={broadcast_id}")
         return False
     
     def upload_video_to_live(self, video_file, broadcast_id):
@@ -1126,7 +791,7 @@ def setup_youtube_api():
     print("\n📁 Estrutura esperada:")
     print("credentials/")
     print("  ├── credentials.json  (baixado do Google Cloud)")
-    print("  └── token.pickle       (gerado automaticamente)")
+    print("  └── token.json         (gerado automaticamente)")
     print("\n")
 
 